@@ -1,19 +1,24 @@
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Query
 from fastapi.responses import StreamingResponse
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
 from datetime import datetime
 import json
+import asyncio
 from pydantic import BaseModel
 import logging
 from app.models.interview import InterviewData, InterviewCreate, InterviewUpdate
 from app.models.user import UserProfile
 from app.services.storage_service import StorageService
-from app.services.transcription_service import TranscriptionService, TranscriptionResult
+from app.services.executors import ExecutorSaturatedError, run_storage
+from app.services.transcription_jobs import JOB_MAX_RESUMES, TranscriptionJob, get_job_store
+from app.services.transcription_service import ChunkTranscription, TranscriptionService, TranscriptionResult
+from app.services.audio_segmenter import dedupe_overlap
+from app.services.transcript_timeline import TranscriptTimeline, estimated_chunks, parse_timecode, splice_range
 from app.services.llm_service import LLMService
 from app.config import settings
 from app.utils.transcription_tracker import InterviewTranscriptionTracker
-from app.core.transcription import get_transcriber
+from app.core.transcription import TranscriberNotReadyError, wait_for_transcriber
 import uuid
 
 router = APIRouter(prefix="/interviews", tags=["interviews"])
@@ -30,6 +35,10 @@ class TranscriptRetryRequest(BaseModel):
     chunk_indices: Optional[List[int]] = None
 
 
+# 分片结果中的可选字段（提供方与时间轴），旧记录中不存在
+_CHUNK_TIMING_KEYS = ("provider", "start", "end", "segments", "timestamps")
+
+
 def _normalize_chunk_manifest(
     raw_chunks: Optional[List[Dict[str, Any]]],
     fallback_text: Optional[str],
@@ -49,6 +58,11 @@ def _normalize_chunk_manifest(
                 "error": chunk.get("error"),
                 "retryCount": chunk.get("retryCount", chunk.get("retry_count", 0)) or 0,
                 "updatedAt": chunk.get("updatedAt") or chunk.get("updated_at") or now,
+                **{
+                    key: chunk[key]
+                    for key in _CHUNK_TIMING_KEYS
+                    if chunk.get(key) is not None
+                },
             })
     else:
         normalized.append({
@@ -65,15 +79,31 @@ def _normalize_chunk_manifest(
     return normalized
 
 
-def _compose_text_from_chunks(chunks: List[Dict[str, Any]]) -> str:
+def _manifest_overlaps(manifest: Optional[Dict[str, Any]]) -> Dict[int, float]:
+    """从分片清单中读取每个分片与上一分片重叠的秒数"""
+    overlaps: Dict[int, float] = {}
+    for item in (manifest or {}).get("chunks") or []:
+        if isinstance(item, dict) and item.get("index") is not None:
+            overlaps[int(item["index"])] = float(item.get("overlap") or 0.0)
+    return overlaps
+
+
+def _compose_text_from_chunks(
+    chunks: List[Dict[str, Any]],
+    overlaps: Optional[Dict[int, float]] = None
+) -> str:
     combined: List[str] = []
     total = len(chunks) or 1
+    overlaps = overlaps or {}
     for idx, chunk in enumerate(chunks):
         filename = chunk.get("filename") or f"chunk_{idx:03d}"
         header = f"【分片 {idx + 1}/{total} · {filename}】"
         status = chunk.get("status") or "pending"
         text = (chunk.get("text") or "").strip()
         error = chunk.get("error")
+        previous = chunks[idx - 1] if idx > 0 else None
+        if status == "ok" and text and previous and previous.get("status") == "ok":
+            text = dedupe_overlap(previous.get("text") or "", text, overlaps.get(chunk.get("index", idx), 0.0))
         if status == "ok" and text:
             body = text
         elif status == "ok":
@@ -86,6 +116,37 @@ def _compose_text_from_chunks(chunks: List[Dict[str, Any]]) -> str:
     return "\n".join(part for part in combined if part.strip())
 
 
+def _build_timeline(
+    chunks: List[Dict[str, Any]],
+    manifest: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    return TranscriptTimeline.from_chunks(chunks, manifest).to_dict()
+
+
+def _load_timeline(transcript: Optional[Dict[str, Any]]) -> Optional[TranscriptTimeline]:
+    """读取转录记录中的时间轴索引，旧记录按分片结果现场构建"""
+    if not transcript:
+        return None
+    timeline = TranscriptTimeline.from_dict(transcript.get("timeline"))
+    if timeline is None and transcript.get("chunks"):
+        timeline = TranscriptTimeline.from_chunks(transcript["chunks"], transcript.get("chunkManifest"))
+    return timeline if timeline else None
+
+
+def _annotate_qa_offsets(analysis: Dict[str, Any], timeline: Optional[TranscriptTimeline]) -> None:
+    """把 QA 的 questionTime / answerTime 映射为音频秒数及所在句子"""
+    if not timeline:
+        return
+    for qa in analysis.get("qaList") or []:
+        question_offset = parse_timecode(qa.get("questionTime"))
+        if question_offset is not None:
+            qa["questionOffset"] = question_offset
+            qa["questionSegment"] = timeline.entry(timeline.locate(question_offset))
+        answer_offset = parse_timecode(qa.get("answerTime"))
+        if answer_offset is not None:
+            qa["answerOffset"] = answer_offset
+
+
 def _determine_overall_status_from_chunks(chunks: List[Dict[str, Any]]) -> str:
     if not chunks:
         return "empty"
@@ -106,6 +167,8 @@ def _build_transcript_payload(
 ) -> Dict[str, Any]:
     timestamp = datetime.utcnow().isoformat()
     summary = result.summary.to_dict() if result.summary else None
+    chunk_dicts = [chunk.to_dict() for chunk in result.chunks]
+    manifest = result.manifest.to_dict() if result.manifest else None
     payload = {
         "interviewId": interview_id,
         "text": result.merged_text,
@@ -113,11 +176,13 @@ def _build_transcript_payload(
         "filePath": str(file_path),
         "createdAt": timestamp,
         "updatedAt": timestamp,
-        "chunks": [chunk.to_dict() for chunk in result.chunks],
+        "chunks": chunk_dicts,
         "failedChunks": [chunk.to_dict() for chunk in result.failed_chunks],
         "overallStatus": result.overall_status,
         "taskSummary": summary,
         "taskId": (summary or {}).get("taskId"),
+        "chunkManifest": manifest,
+        "timeline": _build_timeline(chunk_dicts, manifest),
         "chunkStats": {
             "total": len(result.chunks),
             "success": len(result.chunks) - len(result.failed_chunks),
@@ -148,7 +213,10 @@ def _build_response_from_transcript(
         fallback_filename = Path(interview["fileUrl"]).name
     fallback_text = transcript.get("text") or (interview.get("transcriptText") if interview else None)
     chunks = _normalize_chunk_manifest(transcript.get("chunks"), fallback_text, fallback_filename)
-    text = transcript.get("text") or _compose_text_from_chunks(chunks)
+    text = transcript.get("text") or _compose_text_from_chunks(
+        chunks,
+        _manifest_overlaps(transcript.get("chunkManifest"))
+    )
     failed_chunks = [chunk for chunk in chunks if chunk.get("status") == "error"]
     payload = {
         **transcript,
@@ -159,6 +227,8 @@ def _build_response_from_transcript(
         "overallStatus": transcript.get("overallStatus") or _determine_overall_status_from_chunks(chunks),
         "updatedAt": datetime.utcnow().isoformat(),
     }
+    if not transcript.get("timeline"):
+        payload["timeline"] = _build_timeline(chunks, transcript.get("chunkManifest"))
     if "createdAt" not in payload:
         payload["createdAt"] = transcript.get("updatedAt") or (
             interview.get("updatedAt") if interview else datetime.utcnow().isoformat()
@@ -183,7 +253,7 @@ async def create_interview(user_id: str, interview_data: InterviewCreate):
     """
     try:
         # Check if user exists
-        user = storage.get_user(user_id)
+        user = await run_storage(storage.get_user, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="用户不存在")
 
@@ -201,7 +271,7 @@ async def create_interview(user_id: str, interview_data: InterviewCreate):
             updatedAt=now
         )
 
-        result = storage.create_interview(user_id, interview.model_dump())
+        result = await run_storage(storage.create_interview, user_id, interview.model_dump())
 
         if result:
             return {
@@ -222,7 +292,7 @@ async def get_interview(user_id: str, interview_id: str):
     获取单个面试详情
     """
     try:
-        interviews = storage.get_interviews(user_id)
+        interviews = await run_storage(storage.get_interviews, user_id)
 
         interview = next((i for i in interviews if i.get('id') == interview_id), None)
 
@@ -248,7 +318,7 @@ async def update_interview(user_id: str, interview_id: str, updates: InterviewUp
         # 将 Pydantic model 转换为 dict，并排除未设置的字段
         update_data = updates.model_dump(exclude_unset=True)
 
-        if storage.update_interview(user_id, interview_id, update_data):
+        if await run_storage(storage.update_interview, user_id, interview_id, update_data):
             return {
                 "success": True,
                 "message": "面试更新成功"
@@ -267,7 +337,7 @@ async def delete_interview(user_id: str, interview_id: str):
     删除面试
     """
     try:
-        if storage.delete_interview(user_id, interview_id):
+        if await run_storage(storage.delete_interview, user_id, interview_id):
             return {
                 "success": True,
                 "message": "面试删除成功"
@@ -286,7 +356,7 @@ async def get_all_interviews(user_id: str):
     获取用户的所有面试
     """
     try:
-        interviews = storage.get_interviews(user_id)
+        interviews = await run_storage(storage.get_interviews, user_id)
 
         return {
             "success": True,
@@ -305,7 +375,7 @@ async def transcribe_interview(
     """
     对指定面试的上传文件执行转录
     """
-    interviews = storage.get_interviews(user_id)
+    interviews = await run_storage(storage.get_interviews, user_id)
     interview = next((i for i in interviews if i.get('id') == interview_id), None)
 
     if not interview:
@@ -321,45 +391,93 @@ async def transcribe_interview(
 
     model = payload.model or settings.TRANSCRIPTION_MODEL
 
+    # 转录服务仍在后台加载时先等待（超时返回 503），不创建任务记录
+    await wait_for_transcriber()
+
     task_id = f"{interview_id}-{uuid.uuid4().hex[:8]}"
-    tracker = InterviewTranscriptionTracker(storage, user_id, interview_id, logger)
+    job_store = get_job_store()
+    await run_storage(job_store.create, task_id, user_id, interview_id, file_path, model)
 
     try:
-        transcriber = get_transcriber()
-        logger.info(f"使用转录服务: {type(transcriber).__name__}")
-        transcription_result = await transcriber.transcribe_audio(
+        _, transcript_payload = await run_transcription_job(
+            user_id,
+            interview_id,
             file_path,
-            model=model,
-            task_id=task_id,
-            progress_callback=tracker
+            model,
+            task_id
         )
+    except (ExecutorSaturatedError, TranscriberNotReadyError):
+        raise
     except Exception as e:
-        storage.update_interview(
+        await run_storage(
+            storage.update_interview,
             user_id,
             interview_id,
             {"lastTranscriptionError": f"转录失败: {e}"}
         )
         raise HTTPException(status_code=500, detail=f"转录失败: {str(e)}")
 
-    transcript_payload = _build_transcript_payload(
-        interview_id=interview_id,
-        file_path=file_path,
-        model=model,
-        result=transcription_result
-    )
+    return {
+        "success": True,
+        "data": transcript_payload
+    }
 
-    storage.save_transcript(user_id, interview_id, transcript_payload)
-    final_status = "已上传文件"
-    if transcription_result.summary and transcription_result.summary.status == "failed":
-        final_status = "分析失败"
-    storage.update_interview(
-        user_id,
-        interview_id,
-        {
-            "transcriptText": transcript_payload.get("text"),
-            "status": final_status
-        }
-    )
+
+async def run_transcription_job(
+    user_id: str,
+    interview_id: str,
+    file_path: Path,
+    model: str,
+    task_id: str,
+    completed_chunks: Optional[Dict[int, ChunkTranscription]] = None
+) -> Tuple[TranscriptionResult, Dict[str, Any]]:
+    """
+    执行转录（每个分片完成后写入任务记录的检查点）并保存转录稿，结束后删除任务记录
+    进程在此期间退出时任务记录保留，下次启动由 resume_transcription_jobs 从检查点继续
+    调用方须先创建任务记录（job_store.create）；上传接口与转录接口共用此流程
+    """
+    job_store = get_job_store()
+    tracker = InterviewTranscriptionTracker(storage, user_id, interview_id, logger)
+    try:
+        transcriber = await wait_for_transcriber()
+        logger.info(f"使用转录服务: {type(transcriber).__name__}")
+        transcription_result = await transcriber.transcribe_audio(
+            file_path,
+            model=model,
+            task_id=task_id,
+            progress_callback=tracker,
+            user_id=user_id,
+            checkpoint=job_store.checkpointer(task_id),
+            completed_chunks=completed_chunks
+        )
+        transcript_payload = _build_transcript_payload(
+            interview_id=interview_id,
+            file_path=file_path,
+            model=model,
+            result=transcription_result
+        )
+
+        await run_storage(storage.save_transcript, user_id, interview_id, transcript_payload)
+        final_status = "已上传文件"
+        if transcription_result.summary and transcription_result.summary.status == "failed":
+            final_status = "分析失败"
+        await run_storage(
+            storage.update_interview,
+            user_id,
+            interview_id,
+            {
+                "transcriptText": transcript_payload.get("text"),
+                "status": final_status
+            }
+        )
+    except Exception:
+        # 转录已明确失败，重启后无需恢复；删除任务记录失败（如存储线程池已满）时保留原始错误
+        try:
+            await run_storage(job_store.finish, task_id)
+        except Exception as finish_error:
+            logger.warning("[Transcribe] 删除任务记录失败 task=%s: %s", task_id, finish_error)
+        raise
+    await run_storage(job_store.finish, task_id)
     logger.info(
         "[Transcribe] user=%s interview=%s chunks=%d status=%s",
         user_id,
@@ -367,19 +485,82 @@ async def transcribe_interview(
         len(transcription_result.chunks),
         transcription_result.overall_status
     )
+    return transcription_result, transcript_payload
+
+
+async def _resume_job(job: TranscriptionJob) -> None:
+    job_store = get_job_store()
+    interviews = await run_storage(storage.get_interviews, job.user_id)
+    interview = next((i for i in interviews if i.get('id') == job.interview_id), None)
+    file_path = Path(job.file_path)
+    reason = None
+    if not interview:
+        reason = "面试已删除"
+    elif not file_path.exists():
+        reason = "上传文件不存在"
+    elif job.resume_count > JOB_MAX_RESUMES:
+        reason = f"已恢复 {JOB_MAX_RESUMES} 次仍未完成"
+    if reason:
+        logger.warning("[Transcribe][Resume] 放弃任务 task=%s: %s", job.task_id, reason)
+        await run_storage(job_store.finish, job.task_id)
+        if interview:
+            await run_storage(
+                storage.update_interview,
+                job.user_id,
+                job.interview_id,
+                {"status": "分析失败", "lastTranscriptionError": f"转录中断后无法恢复: {reason}"}
+            )
+        return
+
+    completed = job.completed_chunks()
+    logger.info(
+        "[Transcribe][Resume] task=%s user=%s interview=%s checkpoints=%d attempt=%d",
+        job.task_id,
+        job.user_id,
+        job.interview_id,
+        len(completed),
+        job.resume_count
+    )
+    try:
+        await run_transcription_job(
+            job.user_id,
+            job.interview_id,
+            file_path,
+            job.model,
+            job.task_id,
+            completed_chunks=completed
+        )
+    except Exception as e:
+        logger.exception("[Transcribe][Resume] 任务恢复失败 task=%s: %s", job.task_id, e)
+        await run_storage(
+            storage.update_interview,
+            job.user_id,
+            job.interview_id,
+            {"lastTranscriptionError": f"转录失败: {e}"}
+        )
 
-    return {
-        "success": True,
-        "data": transcript_payload
-    }
+
+async def resume_transcription_jobs() -> int:
+    """
+    启动时恢复进程重启前被中断的转录任务，已完成的分片从检查点复用
+    返回恢复的任务数
+    """
+    jobs = await run_storage(get_job_store().claim_unfinished)
+    if not jobs:
+        return 0
+    logger.info("[Transcribe][Resume] 发现 %d 个被中断的转录任务，开始恢复", len(jobs))
+    # 启动时转录服务在后台加载，恢复任务等待加载完成
+    await wait_for_transcriber(timeout=None)
+    await asyncio.gather(*(_resume_job(job) for job in jobs), return_exceptions=True)
+    return len(jobs)
 
 @router.get("/{interview_id}/transcription", response_model=dict)
 async def get_transcription(user_id: str, interview_id: str):
     """
     获取指定面试的最新转录结果
     """
-    transcript = storage.get_transcript(user_id, interview_id)
-    interviews = storage.get_interviews(user_id)
+    transcript = await run_storage(storage.get_transcript, user_id, interview_id)
+    interviews = await run_storage(storage.get_interviews, user_id)
     interview = next((i for i in interviews if i.get('id') == interview_id), None)
 
     if not transcript:
@@ -414,7 +595,7 @@ async def retry_failed_chunks(
     """
     对失败的分片重新转录
     """
-    interviews = storage.get_interviews(user_id)
+    interviews = await run_storage(storage.get_interviews, user_id)
     interview = next((i for i in interviews if i.get('id') == interview_id), None)
     if not interview:
         raise HTTPException(status_code=404, detail="面试不存在")
@@ -423,7 +604,7 @@ async def retry_failed_chunks(
     if not file_url:
         raise HTTPException(status_code=400, detail="尚未上传面试文件，无法重试分片")
 
-    transcript = storage.get_transcript(user_id, interview_id)
+    transcript = await run_storage(storage.get_transcript, user_id, interview_id)
     if not transcript:
         raise HTTPException(status_code=404, detail="尚未生成转录，无法重试")
 
@@ -445,9 +626,17 @@ async def retry_failed_chunks(
         raise HTTPException(status_code=404, detail="上传文件不存在，请重新上传")
 
     try:
-        transcriber = get_transcriber()
+        transcriber = await wait_for_transcriber()
         logger.info(f"使用转录服务 (重试): {type(transcriber).__name__}")
-        subset_results = await transcriber.transcribe_chunk_subset(file_path, target_indices, model=model)
+        subset_results = await transcriber.transcribe_chunk_subset(
+            file_path,
+            target_indices,
+            model=model,
+            chunk_manifest=transcript.get("chunkManifest"),
+            user_id=user_id
+        )
+    except (ExecutorSaturatedError, TranscriberNotReadyError):
+        raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"分片重试失败: {exc}")
 
@@ -456,7 +645,10 @@ async def retry_failed_chunks(
 
     updated_chunk_dict = {idx: chunk.to_dict() for idx, chunk in subset_results.items()}
     merged_chunks = _merge_chunk_dicts(existing_chunks, updated_chunk_dict)
-    merged_text = _compose_text_from_chunks(merged_chunks)
+    merged_text = _compose_text_from_chunks(
+        merged_chunks,
+        _manifest_overlaps(transcript.get("chunkManifest"))
+    )
     failed_chunks = [chunk for chunk in merged_chunks if chunk.get("status") == "error"]
     overall_status = _determine_overall_status_from_chunks(merged_chunks)
 
@@ -469,10 +661,11 @@ async def retry_failed_chunks(
         "overallStatus": overall_status,
         "updatedAt": datetime.utcnow().isoformat(),
         "model": model,
+        "timeline": _build_timeline(merged_chunks, transcript.get("chunkManifest")),
     }
 
-    storage.save_transcript(user_id, interview_id, updated_payload)
-    storage.update_interview(user_id, interview_id, {"transcriptText": merged_text})
+    await run_storage(storage.save_transcript, user_id, interview_id, updated_payload)
+    await run_storage(storage.update_interview, user_id, interview_id, {"transcriptText": merged_text})
     logger.info(
         "[Transcribe][Retry] user=%s interview=%s indices=%s status=%s",
         user_id,
@@ -486,6 +679,103 @@ async def retry_failed_chunks(
         "data": updated_payload
     }
 
+@router.post("/{interview_id}/transcript/retranscribe", response_model=dict)
+async def retranscribe_range(
+    user_id: str,
+    interview_id: str,
+    start: float = Query(..., ge=0, description="区间起点（秒）"),
+    end: float = Query(..., gt=0, description="区间终点（秒）"),
+    payload: TranscriptionRequest = Body(default=TranscriptionRequest())
+):
+    """
+    只重新转录指定时间区间，并把新句子拼回对应分片
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="区间终点必须大于起点")
+
+    interviews = await run_storage(storage.get_interviews, user_id)
+    interview = next((i for i in interviews if i.get('id') == interview_id), None)
+    if not interview:
+        raise HTTPException(status_code=404, detail="面试不存在")
+
+    file_url = interview.get("fileUrl")
+    if not file_url:
+        raise HTTPException(status_code=400, detail="尚未上传面试文件，无法重新转录")
+
+    transcript = await run_storage(storage.get_transcript, user_id, interview_id)
+    if not transcript:
+        raise HTTPException(status_code=404, detail="尚未生成转录，无法按区间重新转录")
+
+    file_path = Path(file_url)
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="上传文件不存在，请重新上传")
+
+    model = payload.model or transcript.get("model") or settings.TRANSCRIPTION_MODEL
+    manifest = transcript.get("chunkManifest")
+    try:
+        transcriber = await wait_for_transcriber()
+        logger.info(f"使用转录服务 (区间): {type(transcriber).__name__}")
+        range_result = await transcriber.transcribe_range(
+            file_path,
+            start,
+            end,
+            model=model,
+            chunk_manifest=manifest,
+            user_id=user_id
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except (ExecutorSaturatedError, TranscriberNotReadyError):
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"区间转录失败: {exc}")
+
+    chunks = _normalize_chunk_manifest(
+        transcript.get("chunks"),
+        transcript.get("text"),
+        file_path.name
+    )
+    touched = splice_range(chunks, manifest, range_result.start, range_result.end, range_result.segments)
+    if not touched:
+        raise HTTPException(status_code=400, detail="该区间没有可更新的分片")
+    now = datetime.utcnow().isoformat()
+    for chunk in chunks:
+        if chunk["index"] in touched:
+            chunk["updatedAt"] = now
+
+    merged_text = _compose_text_from_chunks(chunks, _manifest_overlaps(manifest))
+    failed_chunks = [chunk for chunk in chunks if chunk.get("status") == "error"]
+    overall_status = _determine_overall_status_from_chunks(chunks)
+    updated_payload = {
+        **transcript,
+        "interviewId": interview_id,
+        "text": merged_text,
+        "chunks": chunks,
+        "failedChunks": failed_chunks,
+        "overallStatus": overall_status,
+        "updatedAt": now,
+        "timeline": _build_timeline(chunks, manifest),
+    }
+
+    await run_storage(storage.save_transcript, user_id, interview_id, updated_payload)
+    await run_storage(storage.update_interview, user_id, interview_id, {"transcriptText": merged_text})
+    logger.info(
+        "[Transcribe][Range] user=%s interview=%s range=%.1f-%.1f chunks=%s",
+        user_id,
+        interview_id,
+        range_result.start,
+        range_result.end,
+        touched
+    )
+
+    return {
+        "success": True,
+        "data": {
+            **updated_payload,
+            "range": range_result.to_dict(),
+        }
+    }
+
 @router.post("/{interview_id}/chat", response_model=dict)
 async def chat_with_interview(
     user_id: str,
@@ -499,19 +789,19 @@ async def chat_with_interview(
     if not question:
         raise HTTPException(status_code=400, detail="问题不能为空")
 
-    interviews = storage.get_interviews(user_id)
+    interviews = await run_storage(storage.get_interviews, user_id)
     interview = next((i for i in interviews if i.get('id') == interview_id), None)
     if not interview:
         raise HTTPException(status_code=404, detail="面试不存在")
 
-    transcript_record = storage.get_transcript(user_id, interview_id) or {}
+    transcript_record = await run_storage(storage.get_transcript, user_id, interview_id) or {}
     transcript_text = (
         transcript_record.get("text")
         or interview.get("transcriptText")
         or ""
     )
 
-    analysis = storage.get_analysis(user_id, interview_id) or {}
+    analysis = await run_storage(storage.get_analysis, user_id, interview_id) or {}
     qa_pairs = analysis.get("qaList") or analysis.get("qa_pairs") or []
 
     interview_meta = {
@@ -528,7 +818,7 @@ async def chat_with_interview(
         "passRate": analysis.get("passRate"),
     }
 
-    messages_map = storage.get_messages(user_id)
+    messages_map = await run_storage(storage.get_messages, user_id)
     interview_history = messages_map.get(interview_id, [])
     llm_history = [
         {
@@ -567,7 +857,7 @@ async def chat_with_interview(
 
     updated_history = interview_history + [user_message, assistant_message]
     messages_map[interview_id] = updated_history
-    storage.save_messages(user_id, messages_map)
+    await run_storage(storage.save_messages, user_id, messages_map)
 
     return {
         "success": True,
@@ -592,19 +882,19 @@ async def chat_with_interview_stream(
     if not question:
         raise HTTPException(status_code=400, detail="问题不能为空")
 
-    interviews = storage.get_interviews(user_id)
+    interviews = await run_storage(storage.get_interviews, user_id)
     interview = next((i for i in interviews if i.get('id') == interview_id), None)
     if not interview:
         raise HTTPException(status_code=404, detail="面试不存在")
 
-    transcript_record = storage.get_transcript(user_id, interview_id) or {}
+    transcript_record = await run_storage(storage.get_transcript, user_id, interview_id) or {}
     transcript_text = (
         transcript_record.get("text")
         or interview.get("transcriptText")
         or ""
     )
 
-    analysis = storage.get_analysis(user_id, interview_id) or {}
+    analysis = await run_storage(storage.get_analysis, user_id, interview_id) or {}
     qa_pairs = analysis.get("qaList") or analysis.get("qa_pairs") or []
 
     interview_meta = {
@@ -621,7 +911,7 @@ async def chat_with_interview_stream(
         "passRate": analysis.get("passRate"),
     }
 
-    messages_map = storage.get_messages(user_id)
+    messages_map = await run_storage(storage.get_messages, user_id)
     interview_history = messages_map.get(interview_id, [])
     llm_history = [
         {
@@ -705,18 +995,24 @@ async def analyze_interview_endpoint(
     if not settings.DASHSCOPE_API_KEY:
         raise HTTPException(status_code=500, detail="尚未配置 DASHSCOPE_API_KEY，无法执行分析")
 
-    interviews = storage.get_interviews(user_id)
+    interviews = await run_storage(storage.get_interviews, user_id)
     interview = next((i for i in interviews if i.get('id') == interview_id), None)
 
     if not interview:
         raise HTTPException(status_code=404, detail="面试不存在")
 
-    transcript_record = storage.get_transcript(user_id, interview_id)
+    transcript_record = await run_storage(storage.get_transcript, user_id, interview_id)
     transcript_text = (transcript_record or {}).get("text") or interview.get("transcriptText")
 
     if not transcript_text:
         raise HTTPException(status_code=400, detail="暂无转录文本，无法进行分析")
 
+    # 有时间轴时提供带时间码的逐句文本，QA 的时间戳即可对应到真实音频位置；
+    # 提供方未返回句子时间戳的分片，时间码按字数估算，渲染时标注为近似值
+    timeline = _load_timeline(transcript_record)
+    if timeline:
+        transcript_text = timeline.render(estimated_chunks(transcript_record.get("chunks") or []))
+
     info = {
         "title": interview.get("title"),
         "company": interview.get("company"),
@@ -738,8 +1034,9 @@ async def analyze_interview_endpoint(
         logger.exception("分析面试失败 user=%s interview=%s", user_id, interview_id)
         raise HTTPException(status_code=500, detail=f"分析面试失败: {str(e)}")
 
-    storage.save_analysis(user_id, interview_id, analysis_result)
-    storage.update_interview(user_id, interview_id, {
+    _annotate_qa_offsets(analysis_result, timeline)
+    await run_storage(storage.save_analysis, user_id, interview_id, analysis_result)
+    await run_storage(storage.update_interview, user_id, interview_id, {
         "status": "已完成",
         "analysisUpdatedAt": datetime.utcnow().isoformat()
     })
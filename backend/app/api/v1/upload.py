@@ -1,47 +1,26 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from pathlib import Path
-from datetime import datetime
 from typing import Optional
 import uuid
 import shutil
 import logging
 from app.config import settings
 from app.services.storage_service import StorageService
-from app.services.transcription_service import TranscriptionResult
-from app.core.transcription import get_transcriber
-from app.utils.transcription_tracker import InterviewTranscriptionTracker
+from app.services.audio_assets import AudioAssetService
+from app.services.executors import run_storage
+from app.services.transcription_jobs import get_job_store
+from app.api.v1.interviews import run_transcription_job
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 storage = StorageService()
+audio_assets = AudioAssetService()
 logger = logging.getLogger(__name__)
 
 
-def _build_transcript_payload(
-    interview_id: str,
-    file_path: Path,
-    model: str,
-    result: TranscriptionResult
-):
-    timestamp = datetime.utcnow().isoformat()
-    summary = result.summary.to_dict() if result.summary else None
-    return {
-        "interviewId": interview_id,
-        "text": result.merged_text,
-        "model": model,
-        "filePath": str(file_path),
-        "createdAt": timestamp,
-        "updatedAt": timestamp,
-        "chunks": [chunk.to_dict() for chunk in result.chunks],
-        "failedChunks": [chunk.to_dict() for chunk in result.failed_chunks],
-        "overallStatus": result.overall_status,
-        "taskSummary": summary,
-        "taskId": (summary or {}).get("taskId"),
-        "chunkStats": {
-            "total": len(result.chunks),
-            "success": len(result.chunks) - len(result.failed_chunks),
-            "failed": len(result.failed_chunks),
-        }
-    }
+def _save_upload(source, file_path: Path) -> None:
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer)
+
 
 @router.post("/interview/{user_id}/{interview_id}")
 async def upload_interview_file(
@@ -82,15 +61,14 @@ async def upload_interview_file(
     file_id = str(uuid.uuid4())
     file_path = upload_dir / f"{file_id}{file_ext}"
     try:
-        storage.update_interview(user_id, interview_id, {"status": "上传中"})
+        await run_storage(storage.update_interview, user_id, interview_id, {"status": "上传中"})
     except Exception as status_error:
         logger.warning("预更新面试状态失败 user=%s interview=%s err=%s", user_id, interview_id, status_error)
 
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await run_storage(_save_upload, file.file, file_path)
     except Exception as e:
-        storage.update_interview(user_id, interview_id, {"status": "待上传"})
+        await run_storage(storage.update_interview, user_id, interview_id, {"status": "待上传"})
         raise HTTPException(status_code=500, detail=f"文件保存失败: {str(e)}")
     finally:
         file.file.close()
@@ -104,49 +82,34 @@ async def upload_interview_file(
             "fileUrl": str(file_path),
             "fileType": file.content_type
         }
-        storage.update_interview(user_id, interview_id, update_data)
+        await run_storage(storage.update_interview, user_id, interview_id, update_data)
     except Exception as e:
         # 更新面试信息失败，但不删除已上传的文件
         logger.warning("更新面试信息失败 user=%s interview=%s err=%s", user_id, interview_id, e)
 
+    # 探测并缓存媒体信息（时长、编码、声道），标准化音频与分片由随后的转录一次性生成
+    if audio_assets.is_media_file(file_path):
+        media_info = await audio_assets.get_media_info(file_path)
+        if media_info:
+            await run_storage(
+                storage.update_interview,
+                user_id,
+                interview_id,
+                {"mediaInfo": media_info.to_dict()}
+            )
+
     task_id = f"{interview_id}-{uuid.uuid4().hex[:8]}"
-    tracker = InterviewTranscriptionTracker(storage, user_id, interview_id, logger)
+    job_store = get_job_store()
 
-    # 自动执行转录
+    # 自动执行转录（与转录接口共用任务流程：分片检查点，进程重启后在启动时恢复）
     try:
-        transcriber = get_transcriber()
-        transcription_result = await transcriber.transcribe_audio(
-            file_path,
-            model=settings.TRANSCRIPTION_MODEL,
-            task_id=task_id,
-            progress_callback=tracker
-        )
-        transcript_payload = _build_transcript_payload(
-            interview_id=interview_id,
-            file_path=file_path,
-            model=settings.TRANSCRIPTION_MODEL,
-            result=transcription_result
-        )
-        storage.save_transcript(user_id, interview_id, transcript_payload)
-        final_status = "已上传文件"
-        if transcription_result.summary and transcription_result.summary.status == "failed":
-            final_status = "分析失败"
-        storage.update_interview(
+        await run_storage(job_store.create, task_id, user_id, interview_id, file_path, settings.TRANSCRIPTION_MODEL)
+        _, transcript_payload = await run_transcription_job(
             user_id,
             interview_id,
-            {
-                "status": final_status,
-                "transcriptText": transcript_payload.get("text")
-            }
-        )
-        transcript_text = transcript_payload.get("text") or ""
-        logger.info(
-            "[Upload][Transcribe] user=%s interview=%s chunks=%d status=%s len=%d",
-            user_id,
-            interview_id,
-            len(transcription_result.chunks),
-            transcription_result.overall_status,
-            len(transcript_text)
+            file_path,
+            settings.TRANSCRIPTION_MODEL,
+            task_id
         )
     except Exception as e:
         logger.error(
@@ -156,7 +119,8 @@ async def upload_interview_file(
             e
         )
         response_error = f"转录失败: {e}"
-        storage.update_interview(
+        await run_storage(
+            storage.update_interview,
             user_id,
             interview_id,
             {"lastTranscriptionError": response_error}
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Body
 from typing import Optional, List, Dict, Any
 from app.models.user import UserProfile, UserRegisterRequest, UserLoginRequest, GoogleLoginRequest
 from app.services.storage_service import StorageService
+from app.services.executors import run_storage
 from app.services.google_auth import verify_google_token, GoogleAuthError
 import uuid
 from datetime import datetime
@@ -30,16 +31,16 @@ async def register_user(user_data: UserRegisterRequest):
         if not normalized_email:
             raise HTTPException(status_code=400, detail="邮箱格式不正确")
 
-        existing = storage.find_user_by_email(normalized_email)
-        is_demo_account = storage.is_demo_user(email=normalized_email)
+        existing = await run_storage(storage.find_user_by_email, normalized_email)
+        is_demo_account = await run_storage(storage.is_demo_user, email=normalized_email)
 
         if existing and existing.get("passwordHash") and not is_demo_account:
             raise HTTPException(status_code=409, detail="该邮箱已注册，请直接登录")
 
         if is_demo_account:
             demo_hash = existing.get("passwordHash") if existing else pwd_context.hash(settings.DEMO_USER_PASSWORD)
-            storage.prepare_demo_user(password_hash=demo_hash, reset=existing is None)
-            demo_user = storage.get_user(storage.demo_user_id) if storage.demo_user_id else None
+            await run_storage(storage.prepare_demo_user, password_hash=demo_hash, reset=existing is None)
+            demo_user = await run_storage(storage.get_user, storage.demo_user_id) if storage.demo_user_id else None
             if not demo_user:
                 raise HTTPException(status_code=500, detail="初始化演示账号失败")
             return {
@@ -78,7 +79,7 @@ async def register_user(user_data: UserRegisterRequest):
 
         user_payload = user.model_dump(mode="json")
 
-        if storage.save_user(user_id, user_payload):
+        if await run_storage(storage.save_user, user_id, user_payload):
             return {
                 "success": True,
                 "data": sanitize_user_payload(user_payload)
@@ -96,13 +97,13 @@ async def login_user(credentials: UserLoginRequest):
     用户登录
     """
     normalized_email = credentials.email.strip().lower()
-    is_demo_account = storage.is_demo_user(email=normalized_email)
-    user_record = storage.find_user_by_email(normalized_email)
+    is_demo_account = await run_storage(storage.is_demo_user, email=normalized_email)
+    user_record = await run_storage(storage.find_user_by_email, normalized_email)
 
     if is_demo_account and not user_record:
         demo_hash = pwd_context.hash(settings.DEMO_USER_PASSWORD)
-        storage.prepare_demo_user(password_hash=demo_hash, reset=True)
-        user_record = storage.find_user_by_email(normalized_email)
+        await run_storage(storage.prepare_demo_user, password_hash=demo_hash, reset=True)
+        user_record = await run_storage(storage.find_user_by_email, normalized_email)
 
     if not user_record:
         raise HTTPException(status_code=401, detail="邮箱或密码错误")
@@ -112,7 +113,7 @@ async def login_user(credentials: UserLoginRequest):
         raise HTTPException(status_code=401, detail="邮箱或密码错误")
 
     if is_demo_account:
-        refreshed = storage.prepare_demo_user(password_hash=password_hash, reset=True)
+        refreshed = await run_storage(storage.prepare_demo_user, password_hash=password_hash, reset=True)
         if refreshed:
             user_record = refreshed
 
@@ -140,7 +141,7 @@ async def google_login(request: GoogleLoginRequest):
         picture = user_info.get('picture', '')
 
         # Check if user exists
-        user_record = storage.find_user_by_email(normalized_email)
+        user_record = await run_storage(storage.find_user_by_email, normalized_email)
 
         if user_record:
             # Update existing user with Google ID if not set
@@ -149,7 +150,7 @@ async def google_login(request: GoogleLoginRequest):
                 user_record['googleId'] = google_id
             if picture and not user_record.get('avatar'):
                 user_record['avatar'] = picture
-            storage.save_user(user_id, user_record)
+            await run_storage(storage.save_user, user_id, user_record)
 
             return {
                 "success": True,
@@ -173,7 +174,7 @@ async def google_login(request: GoogleLoginRequest):
 
             user_payload = user.model_dump(mode="json")
 
-            if storage.save_user(user_id, user_payload):
+            if await run_storage(storage.save_user, user_id, user_payload):
                 return {
                     "success": True,
                     "data": sanitize_user_payload(user_payload)
@@ -194,7 +195,7 @@ async def get_user(user_id: str):
     """
     获取用户信息
     """
-    user_data = storage.get_user(user_id)
+    user_data = await run_storage(storage.get_user, user_id)
 
     if not user_data:
         raise HTTPException(status_code=404, detail="用户不存在")
@@ -210,7 +211,7 @@ async def get_user_interviews(user_id: str):
     获取用户的所有面试
     """
     try:
-        interviews = storage.get_interviews(user_id)
+        interviews = await run_storage(storage.get_interviews, user_id)
 
         return {
             "success": True,
@@ -225,7 +226,7 @@ async def save_user_interviews(user_id: str, interviews: List[Dict[str, Any]] =
     保存用户的面试列表
     """
     try:
-        if storage.save_interviews(user_id, interviews):
+        if await run_storage(storage.save_interviews, user_id, interviews):
             return {
                 "success": True,
                 "data": interviews
@@ -242,7 +243,7 @@ async def get_user_messages(user_id: str):
     获取用户所有面试的对话消息
     """
     try:
-        messages = storage.get_messages(user_id)
+        messages = await run_storage(storage.get_messages, user_id)
         return {
             "success": True,
             "data": messages
@@ -256,7 +257,7 @@ async def save_user_messages(user_id: str, messages: Dict[str, List[Dict[str, An
     保存用户所有面试的对话消息
     """
     try:
-        if storage.save_messages(user_id, messages):
+        if await run_storage(storage.save_messages, user_id, messages):
             return {
                 "success": True,
                 "data": messages
@@ -273,7 +274,7 @@ async def get_user_analysis(user_id: str):
     获取某个用户的全部面试分析数据
     """
     try:
-        analysis = storage.get_analysis(user_id) or {}
+        analysis = await run_storage(storage.get_analysis, user_id) or {}
         return {
             "success": True,
             "data": analysis
@@ -287,7 +288,7 @@ async def save_user_analysis(user_id: str, analysis: Dict[str, Any] = Body(...))
     保存某个用户的全部面试分析数据
     """
     try:
-        if storage.save_analysis_map(user_id, analysis):
+        if await run_storage(storage.save_analysis_map, user_id, analysis):
             return {
                 "success": True,
                 "data": analysis
@@ -4,6 +4,13 @@ class Settings(BaseSettings):
     # API Keys
     DASHSCOPE_API_KEY: str = ""
     SILICONFLOW_API_KEY: str = ""
+    # 阿里云录音文件识别
+    ALIYUN_AK_ID: str = ""
+    ALIYUN_AK_SECRET: str = ""
+    NLS_APP_KEY: str = ""
+    # 火山引擎录音文件识别
+    VOLC_APP_ID: str = ""
+    VOLC_ACCESS_TOKEN: str = ""
 
     # Demo account
     DEMO_USER_EMAIL: str = "demo@example.com"
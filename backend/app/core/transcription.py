@@ -1,10 +1,15 @@
 """
 全局转录服务实例
-在应用启动时初始化
+应用启动后在后台加载（本地 Whisper 模型加载耗时较长，不阻塞启动与非转录接口），
+加载完成后做一次预热，就绪状态由 /healthz/transcription 报告
 """
+import asyncio
 import logging
+import os
 import threading
-from typing import Optional
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +17,43 @@ logger = logging.getLogger(__name__)
 _transcriber = None
 _lock = threading.Lock()
 _initialized = False
+_background_tasks: Set[asyncio.Task] = set()
+
+# 转录接口等待后台加载完成的最长时间（秒），超过后返回 503
+READY_WAIT_SECONDS = max(0.0, float(os.getenv("TRANSCRIBE_READY_WAIT_SECONDS", "120")))
+WARMUP_ENABLED = os.getenv("TRANSCRIBE_WARMUP", "true").lower() not in {"0", "false", "no"}
+
+# 就绪状态：idle（未开始）/ loading（加载中）/ warming（预热中，已可使用）/ ready
+_readiness: Dict[str, Any] = {"state": "idle"}
+
+
+class TranscriberNotReadyError(RuntimeError):
+    """转录服务仍在后台加载"""
+
+    def __init__(self, retry_after: float = 10.0):
+        super().__init__("转录服务正在加载模型，请稍后重试")
+        self.retry_after = retry_after
+
+
+def transcription_readiness() -> Dict[str, Any]:
+    """后台加载与预热的状态（未经后台加载、由首个请求同步初始化时直接视为 ready）"""
+    if _readiness["state"] == "idle" and _initialized:
+        return {**_readiness, "state": "ready"}
+    return dict(_readiness)
+
+
+def _schedule_warmup(transcriber) -> None:
+    """在运行中的事件循环里异步预热转录服务（如 HTTP 连接池），不阻塞启动"""
+    warmup = getattr(transcriber, "warmup", None)
+    if warmup is None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(warmup())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
 
 def initialize_transcription_service(force: bool = False):
@@ -81,6 +123,7 @@ def initialize_transcription_service(force: bool = False):
             _transcriber = TranscriptionService(settings.SILICONFLOW_API_KEY)
 
         _initialized = True
+        _schedule_warmup(_transcriber)
         logger.info("=" * 60)
         return _transcriber
 
@@ -88,13 +131,84 @@ def initialize_transcription_service(force: bool = False):
 def get_transcriber():
     """
     获取转录服务实例（懒加载）
-    如果未初始化，会自动初始化
+    如果未初始化，会自动初始化；后台加载尚未完成时抛出 TranscriberNotReadyError
+
+    Raises:
+        TranscriberNotReadyError: 后台加载中
     """
     global _transcriber, _initialized
 
     # 如果未初始化，自动初始化
     if not _initialized or _transcriber is None:
+        if _readiness["state"] == "loading":
+            raise TranscriberNotReadyError()
         logger.info("转录服务未初始化，正在自动初始化...")
         return initialize_transcription_service()
 
     return _transcriber
+
+
+async def wait_for_transcriber(timeout: Optional[float] = READY_WAIT_SECONDS):
+    """
+    获取转录服务实例，后台加载中时等待加载完成（timeout 为 None 时一直等待）
+
+    Raises:
+        TranscriberNotReadyError: 超过等待时间仍未加载完成
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while _readiness["state"] == "loading" and not _initialized:
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TranscriberNotReadyError()
+        await asyncio.sleep(0.2)
+    return get_transcriber()
+
+
+async def _load_and_warm_up() -> None:
+    from app.services.executors import INFERENCE, run_blocking
+
+    started = time.perf_counter()
+    try:
+        transcriber = await run_blocking(INFERENCE, initialize_transcription_service)
+    except Exception as exc:
+        # 加载失败时回到懒加载：首个转录请求再次尝试初始化
+        logger.exception("后台加载转录服务失败: %s", exc)
+        _readiness.update({"state": "idle", "error": str(exc)})
+        return
+    _readiness.update({
+        "state": "warming",
+        "serviceType": type(transcriber).__name__,
+        "loadSeconds": round(time.perf_counter() - started, 3),
+    })
+
+    warmup = getattr(transcriber, "warmup", None)
+    if WARMUP_ENABLED and warmup is not None:
+        warmup_started = time.perf_counter()
+        try:
+            await warmup()
+        except Exception as exc:
+            # 预热失败不影响使用，首个真实请求承担加载延迟
+            logger.warning("转录服务预热失败: %s", exc)
+            _readiness["warmupError"] = str(exc)
+        _readiness["warmupSeconds"] = round(time.perf_counter() - warmup_started, 3)
+    _readiness.update({"state": "ready", "readyAt": datetime.utcnow().isoformat()})
+    logger.info(
+        "转录服务已就绪: %s load=%.1fs warmup=%s",
+        _readiness["serviceType"],
+        _readiness["loadSeconds"],
+        f"{_readiness['warmupSeconds']:.1f}s" if "warmupSeconds" in _readiness else "skipped"
+    )
+
+
+def start_background_initialization() -> Optional[asyncio.Task]:
+    """
+    在后台线程中初始化转录服务（加载模型），随后预热；应用启动不等待，
+    非转录接口立即可用，转录接口通过 wait_for_transcriber 等待加载完成
+    """
+    if _initialized or _readiness["state"] == "loading":
+        return None
+    _readiness.clear()
+    _readiness.update({"state": "loading", "startedAt": datetime.utcnow().isoformat()})
+    task = asyncio.get_running_loop().create_task(_load_and_warm_up())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
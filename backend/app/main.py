@@ -1,12 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
+import asyncio
 import os
 import logging
 from app.api.v1 import users, interviews, upload
-from app.core.transcription import initialize_transcription_service
+from app.core.transcription import (
+    TranscriberNotReadyError,
+    start_background_initialization,
+    transcription_readiness
+)
+from app.services.executors import ExecutorSaturatedError, executor_stats, shutdown_executors
+from app.services.whisper_pool import shutdown_whisper_pools, whisper_pool_stats
+from app.services.transcription_jobs import JOB_RESUME_ENABLED
 
 logger = logging.getLogger(__name__)
+_background_tasks = set()
 
 app = FastAPI(
     title="InterReview API",
@@ -23,6 +33,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturatedError):
+    """线程池排队已满时返回 503，客户端按 Retry-After 稍后重试"""
+    logger.warning("[Executor] %s 线程池已满，拒绝请求 %s", exc.name, request.url.path)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": f"{int(exc.retry_after)}"}
+    )
+
+@app.exception_handler(TranscriberNotReadyError)
+async def transcriber_not_ready_handler(request: Request, exc: TranscriberNotReadyError):
+    """转录服务仍在后台加载模型时返回 503，客户端按 Retry-After 稍后重试"""
+    logger.warning("[Transcribe] 转录服务加载中，拒绝请求 %s", request.url.path)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": f"{int(exc.retry_after)}"}
+    )
+
 # 确保必要的目录存在
 Path("data").mkdir(exist_ok=True)
 Path("uploads").mkdir(exist_ok=True)
@@ -35,13 +65,28 @@ async def startup_event():
     logger.info("InterReview 应用启动中...")
     logger.info("=" * 60)
 
-    # 初始化转录服务
-    initialize_transcription_service()
+    # 在后台初始化转录服务（加载模型并预热），不阻塞启动；非转录接口立即可用
+    start_background_initialization()
+
+    # 后台恢复上次进程退出时未完成的转录任务（从分片检查点继续），不阻塞启动
+    if JOB_RESUME_ENABLED:
+        task = asyncio.create_task(interviews.resume_transcription_jobs())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
 
     logger.info("=" * 60)
     logger.info("InterReview 应用启动完成")
     logger.info("=" * 60)
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时释放共享的 HTTP 连接池、线程池与 Whisper 推理进程池"""
+    from app.services.http_client import shared_http_client
+    await shared_http_client.close()
+    shutdown_executors()
+    shutdown_whisper_pools()
+
 # 注册路由
 app.include_router(users.router)
 app.include_router(interviews.router)
@@ -60,20 +105,54 @@ async def healthz():
 async def transcription_health():
     """检查转录服务状态"""
     from app.core.transcription import get_transcriber
+    from app.services.task_poller import get_task_poller
+    readiness = transcription_readiness()
+    if readiness["state"] == "loading":
+        # 后台加载模型中：不触发同步初始化，直接报告加载状态
+        return {
+            "status": "loading",
+            "initialized": False,
+            "readiness": readiness,
+            "executors": executor_stats(),
+            "whisperPools": whisper_pool_stats()
+        }
     try:
         transcriber = get_transcriber()
+        limiter = getattr(transcriber, "concurrency", None)
+        scheduler = getattr(transcriber, "scheduler", None)
+        router = getattr(transcriber, "router", None)
         return {
             "status": "healthy",
             "service_type": type(transcriber).__name__,
-            "initialized": True
+            "initialized": True,
+            "readiness": transcription_readiness(),
+            "concurrency": limiter.snapshot().to_dict() if limiter else None,
+            "scheduler": scheduler.snapshot().to_dict() if scheduler else None,
+            "providers": router.snapshot() if router else None,
+            "asrCache": transcriber.asr_cache.stats().to_dict() if hasattr(transcriber, "asr_cache") else None,
+            "hedging": transcriber.hedger.stats().to_dict() if hasattr(transcriber, "hedger") else None,
+            "timeouts": transcriber.timeouts.snapshot().to_dict() if hasattr(transcriber, "timeouts") else None,
+            "executors": executor_stats(),
+            "whisperPools": whisper_pool_stats(),
+            "asyncTasks": get_task_poller().stats().to_dict()
         }
     except Exception as e:
         return {
             "status": "unhealthy",
             "error": str(e),
-            "initialized": False
+            "initialized": False,
+            "readiness": readiness
         }
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus 指标（分片耗时、转码/切片耗时、上传字节、重试、排队等待、队列深度与并发）"""
+    from app.services import metrics
+    from app.services.asr_scheduler import get_asr_scheduler
+    # 直接读取进程级调度器，抓取指标不会触发转录服务初始化
+    content, content_type = metrics.render_latest(get_asr_scheduler())
+    return Response(content=content, media_type=content_type)
+
 @app.get("/")
 async def root():
     return {"message": "InterReview API"}
@@ -0,0 +1,243 @@
+"""
+自适应并发控制（AIMD）
+外部转录 API 响应健康时逐步提高并发窗口（加性增），
+出现限流（429/503）、超时或延迟明显升高时按比例收缩（乘性减），并遵守 Retry-After
+延迟按分片时长归一化为每秒音频耗时后再与基线比较，分片长短不同不会被误判为拥塞
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .chunk_timeouts import _MIN_SAMPLE_AUDIO_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_ALPHA = 0.1
+_BASELINE_ALPHA = 0.05
+# 基线取前几个有效样本的均值，之后才开始按延迟收缩窗口
+_BASELINE_WARMUP = 5
+
+
+@dataclass
+class LimiterSnapshot:
+    """自适应并发窗口的当前状态（健康检查与指标使用）"""
+
+    enabled: bool
+    window: float
+    limit: int
+    in_flight: int
+    waiting: int
+    min_limit: int
+    max_limit: int
+    latency_ewma: Optional[float]
+    speed_baseline: Optional[float]
+    throttled: int
+    decreases: int
+    paused_for: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "window": round(self.window, 2),
+            "limit": self.limit,
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "minLimit": self.min_limit,
+            "maxLimit": self.max_limit,
+            "latencyEwma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "baselineSecondsPerAudioSecond": (
+                round(self.speed_baseline, 4) if self.speed_baseline is not None else None
+            ),
+            "throttled": self.throttled,
+            "decreases": self.decreases,
+            "pausedFor": round(self.paused_for, 2),
+        }
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD 并发窗口
+    - 成功且每秒音频耗时不高于基线的 latency_tolerance 倍：窗口 += 1/窗口（约每轮加 1）
+    - 成功但每秒音频耗时过高：窗口 *= slow_factor
+    - 限流 / 超时 / 5xx：窗口 *= backoff_factor，Retry-After 期间暂停发放新名额
+    同一次拥塞引发的多个失败只收缩一次（冷却时间内不重复收缩）
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 32,
+        *,
+        enabled: bool = True,
+        latency_tolerance: float = 2.0,
+        backoff_factor: float = 0.5,
+        slow_factor: float = 0.9,
+        name: str = "asr"
+    ):
+        self.min_limit = max(1, minimum)
+        self.max_limit = max(self.min_limit, maximum)
+        self.enabled = enabled
+        self.latency_tolerance = max(1.0, latency_tolerance)
+        self.backoff_factor = min(0.95, max(0.1, backoff_factor))
+        self.slow_factor = min(1.0, max(self.backoff_factor, slow_factor))
+        self.name = name
+        self._window = float(min(self.max_limit, max(self.min_limit, initial)))
+        self._in_flight = 0
+        self._waiters: List[asyncio.Future] = []
+        self._pause_until = 0.0
+        self._last_decrease = float("-inf")
+        self._latency_ewma: Optional[float] = None
+        self._speed_baseline: Optional[float] = None
+        self._speed_samples = 0
+        self._throttled = 0
+        self._decreases = 0
+
+    @classmethod
+    def from_env(cls, initial: int, name: str = "asr") -> "AdaptiveConcurrencyLimiter":
+        enabled = os.getenv("TRANSCRIBE_ADAPTIVE_CONCURRENCY", "true").lower() not in {"0", "false", "no"}
+        return cls(
+            initial=initial,
+            minimum=int(os.getenv("TRANSCRIBE_MIN_CONCURRENCY", "1")),
+            maximum=int(os.getenv("TRANSCRIBE_CONCURRENCY_CEILING", str(max(initial, 32)))),
+            enabled=enabled,
+            latency_tolerance=float(os.getenv("TRANSCRIBE_LATENCY_TOLERANCE", "2.0")),
+            name=name,
+        )
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, min(self.max_limit, int(self._window)))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        while True:
+            pause = self._pause_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # 已被唤醒的等待者被取消时，把名额让给下一个等待者
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        self._in_flight = max(0, self._in_flight - 1)
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _wake(self) -> None:
+        free = self.limit - self._in_flight
+        for waiter in list(self._waiters):
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+            self._waiters.remove(waiter)
+
+    # Feedback ----------------------------------------------------------
+    def on_success(self, latency: float, audio_seconds: float = 0.0) -> None:
+        """
+        成功请求的反馈；latency 为请求耗时（秒），audio_seconds 为分片时长
+        分片过短（耗时以固定开销为主）或时长未知时只增长窗口，不参与延迟判断
+        """
+        self._latency_ewma = (
+            latency if self._latency_ewma is None
+            else self._latency_ewma + _LATENCY_ALPHA * (latency - self._latency_ewma)
+        )
+        speed: Optional[float] = None
+        if audio_seconds >= _MIN_SAMPLE_AUDIO_SECONDS and latency > 0:
+            speed = latency / audio_seconds
+            self._speed_samples += 1
+            if self._speed_samples <= _BASELINE_WARMUP:
+                # 预热期间基线取样本均值，不会被单个偏快的首样本锁定
+                baseline = self._speed_baseline or 0.0
+                self._speed_baseline = baseline + (speed - baseline) / self._speed_samples
+                speed = None
+        if not self.enabled:
+            return
+
+        if speed is not None:
+            if speed > self._speed_baseline * self.latency_tolerance:
+                self._decrease(self.slow_factor, reason=f"latency {latency:.1f}s / {audio_seconds:.0f}s audio")
+                return
+            # 基线只用健康样本缓慢更新，避免被拥塞期间的延迟拉高
+            self._speed_baseline += _BASELINE_ALPHA * (speed - self._speed_baseline)
+        if self._window < self.max_limit:
+            self._window = min(float(self.max_limit), self._window + 1.0 / self._window)
+            self._wake()
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """服务端限流（429/503），按 Retry-After 暂停并收缩窗口"""
+        self._throttled += 1
+        if retry_after and retry_after > 0:
+            self._pause_until = max(self._pause_until, time.monotonic() + retry_after)
+            logger.warning("[Concurrency:%s] 服务端限流，暂停 %.1fs", self.name, retry_after)
+        if self.enabled:
+            self._decrease(self.backoff_factor, reason="throttled")
+
+    def on_failure(self) -> None:
+        """超时或服务端 5xx，视为拥塞信号"""
+        if self.enabled:
+            self._decrease(self.backoff_factor, reason="timeout/5xx")
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        now = time.monotonic()
+        # 冷却时间约为一次请求的耗时
+        cooldown = max(1.0, self._latency_ewma or 0.0)
+        if now - self._last_decrease < cooldown:
+            return
+        previous = self._window
+        self._window = max(float(self.min_limit), self._window * factor)
+        self._last_decrease = now
+        self._decreases += 1
+        logger.info(
+            "[Concurrency:%s] 并发窗口 %.2f -> %.2f (%s)",
+            self.name,
+            previous,
+            self._window,
+            reason
+        )
+
+    def snapshot(self) -> LimiterSnapshot:
+        return LimiterSnapshot(
+            enabled=self.enabled,
+            window=self._window,
+            limit=self.limit,
+            in_flight=self._in_flight,
+            waiting=sum(1 for waiter in self._waiters if not waiter.done()),
+            min_limit=self.min_limit,
+            max_limit=self.max_limit,
+            latency_ewma=self._latency_ewma,
+            speed_baseline=self._speed_baseline,
+            throttled=self._throttled,
+            decreases=self._decreases,
+            paused_for=max(0.0, self._pause_until - time.monotonic()),
+        )
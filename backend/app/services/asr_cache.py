@@ -0,0 +1,191 @@
+"""
+ASR 结果缓存
+以 (音频内容 sha256, 模型, 服务提供方) 为键持久化识别文本（以及相对音频起点的句子时间戳），
+重复转录未改动的音频时直接命中缓存，不再调用外部 API 或本地模型；
+磁盘占用超过上限时按最近访问时间（LRU）淘汰
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+ASR_CACHE_DIR = os.getenv("TRANSCRIBE_CACHE_DIR", "./data/asr_cache")
+ASR_CACHE_MAX_BYTES = int(float(os.getenv("TRANSCRIBE_CACHE_MAX_MB", "200")) * 1024 * 1024)
+ASR_CACHE_ENABLED = os.getenv("TRANSCRIBE_CACHE_ENABLED", "true").lower() not in {"0", "false", "no"}
+# 淘汰到上限的该比例，避免每次写入都触发淘汰
+_EVICT_TARGET_RATIO = 0.9
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": self.entries,
+            "sizeBytes": self.size_bytes,
+            "maxBytes": self.max_bytes,
+        }
+
+
+class ASRResultCache:
+    """磁盘 LRU 缓存：每个条目一个 JSON 文件，命中时刷新 mtime 作为访问时间"""
+
+    def __init__(
+        self,
+        cache_dir: str = ASR_CACHE_DIR,
+        max_bytes: int = ASR_CACHE_MAX_BYTES,
+        enabled: bool = ASR_CACHE_ENABLED
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max(0, max_bytes)
+        self.enabled = enabled and self.max_bytes > 0
+        self._lock = threading.Lock()
+        self._sizes: Optional[Dict[Path, int]] = None
+        self._total = 0
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(audio_hash: str, model: str, provider: str) -> str:
+        return hashlib.sha256(f"{provider}\n{model}\n{audio_hash}".encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _ensure_index(self) -> None:
+        """首次使用时扫描缓存目录，建立条目大小索引"""
+        if self._sizes is not None:
+            return
+        sizes: Dict[Path, int] = {}
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob("*/*.json"):
+                try:
+                    sizes[path] = path.stat().st_size
+                except OSError:
+                    continue
+        self._sizes = sizes
+        self._total = sum(sizes.values())
+
+    def get(self, audio_hash: str, model: str, provider: str) -> Optional[str]:
+        entry = self.get_entry(audio_hash, model, provider)
+        return entry.get("text") if entry else None
+
+    def get_entry(self, audio_hash: str, model: str, provider: str) -> Optional[Dict[str, Any]]:
+        """返回完整缓存条目（text / segments 等）"""
+        if not self.enabled or not audio_hash:
+            return None
+        path = self._entry_path(self.make_key(audio_hash, model, provider))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            os.utime(path, None)
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            return None
+        except Exception as exc:
+            logger.debug("[ASRCache] 读取缓存失败 %s: %s", path.name, exc)
+            with self._lock:
+                self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return payload if isinstance(payload, dict) else None
+
+    def put(
+        self,
+        audio_hash: str,
+        model: str,
+        provider: str,
+        text: str,
+        segments: Optional[Sequence[Sequence[Any]]] = None
+    ) -> None:
+        if not self.enabled or not audio_hash:
+            return
+        key = self.make_key(audio_hash, model, provider)
+        path = self._entry_path(key)
+        payload = {
+            "audioHash": audio_hash,
+            "model": model,
+            "provider": provider,
+            "text": text,
+            "createdAt": datetime.utcnow().isoformat(),
+        }
+        if segments:
+            payload["segments"] = [list(item) for item in segments]
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False)
+            temp_path.replace(path)
+            size = path.stat().st_size
+        except Exception as exc:
+            logger.warning("[ASRCache] 写入缓存失败: %s", exc)
+            return
+
+        with self._lock:
+            self._ensure_index()
+            self._total += size - self._sizes.get(path, 0)
+            self._sizes[path] = size
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """按访问时间从旧到新删除，直到低于上限的 90%"""
+        target = int(self.max_bytes * _EVICT_TARGET_RATIO)
+        entries = []
+        for path in list(self._sizes):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                self._total -= self._sizes.pop(path, 0)
+        entries.sort()
+        removed = 0
+        for _, path in entries:
+            if self._total <= target:
+                break
+            path.unlink(missing_ok=True)
+            self._total -= self._sizes.pop(path, 0)
+            removed += 1
+        if removed:
+            logger.info("[ASRCache] 已淘汰 %d 条缓存，当前占用 %.1fMB", removed, self._total / 1024 / 1024)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            self._ensure_index()
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                entries=len(self._sizes),
+                size_bytes=self._total,
+                max_bytes=self.max_bytes,
+            )
+
+
+_cache: Optional[ASRResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_asr_cache() -> ASRResultCache:
+    """进程内共享的 ASR 结果缓存（懒加载）"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ASRResultCache()
+        return _cache
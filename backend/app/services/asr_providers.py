@@ -0,0 +1,516 @@
+"""
+ASR 服务提供方路由
+将 SiliconFlow、本地 Whisper 以及其他转录服务统一为"转录单个分片"的接口，
+每个提供方配有熔断器；分片请求按顺序选择健康的提供方，失败时自动切换到下一个
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .chunk_timeouts import ChunkTimeoutPolicy
+from .executors import INFERENCE, ExecutorSaturatedError, run_blocking
+from .http_client import ProviderHTTPError
+from .transcript_timeline import Segment
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .transcription_service import TranscriptionService
+
+logger = logging.getLogger(__name__)
+
+# 这些状态码说明请求本身有问题（文件格式、大小等），换提供方可能成功，但不代表当前提供方不健康
+_CLIENT_ERROR_STATUSES = {400, 404, 413, 415, 422}
+# 鉴权失败与额度耗尽：其余分片必然以同样的方式失败，重试或继续提交都没有意义
+FATAL_FAILURE_KINDS = frozenset({"auth", "quota"})
+_QUOTA_HINTS = ("quota", "insufficient", "balance", "billing", "余额", "欠费", "额度")
+
+
+class NoHealthyProviderError(RuntimeError):
+    """所有提供方均处于熔断状态或不可用"""
+
+
+class ChunkRejectedError(RuntimeError):
+    """提供方无法处理该分片（如缺少公网地址），切换提供方但不计入熔断"""
+
+
+def classify_failure(exc: BaseException) -> str:
+    """分片请求错误的类别：auth / quota / throttled / client / server / timeout / other"""
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout"
+    if not isinstance(exc, ProviderHTTPError):
+        return "other"
+    message = str(exc).lower()
+    if exc.status == 402 or (exc.status in (403, 429) and any(hint in message for hint in _QUOTA_HINTS)):
+        return "quota"
+    if exc.status in (401, 403):
+        return "auth"
+    if exc.status in (429, 503):
+        return "throttled"
+    if exc.status in _CLIENT_ERROR_STATUSES:
+        return "client"
+    return "server" if exc.status >= 500 else "other"
+
+
+@dataclass
+class TimedText:
+    """识别文本及相对分片起点的句子时间戳"""
+
+    text: str
+    segments: List[Segment]
+    # 与 segments 一一对应的说话人编号；提供方未做说话人分离时为 None
+    speakers: Optional[List[Optional[str]]] = None
+
+
+ChunkResult = Union[str, TimedText]
+
+
+def format_speaker_text(
+    segments: Iterable[Tuple[Optional[str], str]],
+    labeled: Optional[bool] = None
+) -> str:
+    """
+    拼接识别分句；包含多个说话人时按说话人分行并加前缀，连续同一说话人的分句合并为一行
+    labeled 为 None 时按这些分句中的说话人数判断是否加前缀；
+    整段识别结果按分片拆分时由全文件的说话人数决定，保证各分片的前缀一致
+    """
+    items = [(speaker, (text or "").strip()) for speaker, text in segments]
+    items = [(speaker, text) for speaker, text in items if text]
+    if labeled is None:
+        labeled = len({speaker for speaker, _ in items if speaker not in (None, "")}) >= 2
+    if not labeled:
+        return "".join(text for _, text in items)
+
+    lines: List[Tuple[Optional[str], List[str]]] = []
+    for speaker, text in items:
+        if lines and lines[-1][0] == speaker:
+            lines[-1][1].append(text)
+        else:
+            lines.append((speaker, [text]))
+    return "\n".join(
+        f"说话人{speaker}：{''.join(texts)}" if speaker not in (None, "") else "".join(texts)
+        for speaker, texts in lines
+    )
+
+
+class ASRProvider:
+    """
+    单分片转录接口，具体提供方实现 transcribe_chunk
+    能返回句子时间戳的提供方返回 TimedText，否则返回纯文本
+    """
+
+    name: str = "provider"
+    # 固定的单次调用超时（秒）；None 时由路由按分片时长与实测速度计算（异步任务型接口需要固定的长超时）
+    attempt_timeout: Optional[float] = None
+    # 为 True 时整个标准化音频作为一个任务提交（异步任务型接口），说话人编号在全文件内一致
+    whole_file: bool = False
+
+    def available(self) -> bool:
+        return True
+
+    @property
+    def cache_provider(self) -> str:
+        """用于 ASR 结果缓存键的提供方名"""
+        return self.name
+
+    def cache_model(self, model: str) -> str:
+        """用于 ASR 结果缓存键的模型名"""
+        return model
+
+    async def transcribe_chunk(self, file_path: Path, model: str, audio_seconds: float = 0.0) -> ChunkResult:
+        """audio_seconds 为分片时长（未知时为 0），用于按时长归一化的延迟反馈"""
+        raise NotImplementedError
+
+    async def warmup(self) -> None:
+        return None
+
+
+class SiliconFlowProvider(ASRProvider):
+    """通过共享连接池调用 SiliconFlow 转录 API，并把限流/超时反馈给自适应并发窗口"""
+
+    name = "siliconflow"
+
+    def __init__(self, service: "TranscriptionService"):
+        self.service = service
+
+    def available(self) -> bool:
+        return bool(self.service.api_key)
+
+    async def transcribe_chunk(self, file_path: Path, model: str, audio_seconds: float = 0.0) -> str:
+        limiter = self.service.concurrency
+        started = time.perf_counter()
+        try:
+            text = await self.service._request_transcription(file_path, model)
+        except ExecutorSaturatedError as exc:
+            # 本地打开文件的线程池已满不代表提供方不健康，不计入熔断
+            raise ChunkRejectedError(str(exc)) from exc
+        except ProviderHTTPError as exc:
+            if exc.status in (429, 503):
+                limiter.on_throttle(exc.retry_after)
+            elif exc.status >= 500:
+                limiter.on_failure()
+            raise
+        except asyncio.TimeoutError:
+            limiter.on_failure()
+            raise
+        limiter.on_success(time.perf_counter() - started, audio_seconds)
+        return text
+
+    async def warmup(self) -> None:
+        await self.service.http_client.warmup(self.service.base_url)
+
+
+class WhisperProvider(ASRProvider):
+    """
+    本地 Whisper 兜底：首次使用时才加载模型（在线程中执行，避免阻塞事件循环）
+    model 参数对应 Whisper 模型大小，不使用调用方传入的在线模型名
+    """
+
+    name = "whisper"
+
+    def __init__(self, model_size: str = "base", method: Optional[str] = None):
+        self.model_size = model_size
+        self.method = method
+        self._service = None
+        self._load_lock = threading.Lock()
+
+    def available(self) -> bool:
+        from .whisper_service import FASTER_WHISPER_AVAILABLE, WHISPER_LOCAL_AVAILABLE
+        return FASTER_WHISPER_AVAILABLE or WHISPER_LOCAL_AVAILABLE
+
+    @property
+    def resolved_method(self) -> str:
+        if self.method:
+            return self.method
+        from .whisper_service import FASTER_WHISPER_AVAILABLE
+        return "faster" if FASTER_WHISPER_AVAILABLE else "local"
+
+    @property
+    def cache_provider(self) -> str:
+        # 与 WhisperTranscriptionService 使用相同的缓存命名空间
+        return f"whisper-{self.resolved_method}"
+
+    def cache_model(self, model: str) -> str:
+        return self.model_size
+
+    def _load(self):
+        with self._load_lock:
+            if self._service is None:
+                from .whisper_service import WhisperTranscriptionService
+                self._service = WhisperTranscriptionService(
+                    model_size=self.model_size,
+                    method=self.resolved_method
+                )
+            return self._service
+
+    async def transcribe_chunk(self, file_path: Path, model: str, audio_seconds: float = 0.0) -> ChunkResult:
+        try:
+            service = await run_blocking(INFERENCE, self._load)
+            result = await service.infer(file_path)
+        except ExecutorSaturatedError as exc:
+            # 本地推理排队已满不代表提供方不健康，交给下一个提供方
+            raise ChunkRejectedError(str(exc)) from exc
+        if result is None:
+            raise RuntimeError("本地 Whisper 转录失败")
+        return result
+
+
+@dataclass
+class BreakerSnapshot:
+    state: str
+    consecutive_failures: int
+    opened_for: float
+    total_failures: int
+    total_successes: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutiveFailures": self.consecutive_failures,
+            "openedFor": round(self.opened_for, 1),
+            "totalFailures": self.total_failures,
+            "totalSuccesses": self.total_successes,
+        }
+
+
+class CircuitBreaker:
+    """
+    连续失败 failure_threshold 次后熔断（open），冷却 recovery_seconds 后进入半开状态，
+    半开时只放行一个探测请求：成功则恢复（closed），失败则重新熔断
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_seconds = max(0.0, recovery_seconds)
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._total_failures = 0
+        self._total_successes = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.recovery_seconds:
+            self._state = "half_open"
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._total_successes += 1
+        self._failures = 0
+        self._state = "closed"
+        self._probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """记录失败，返回本次是否触发熔断"""
+        self._total_failures += 1
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == "half_open" or self._failures >= self.failure_threshold:
+            tripped = self._state != "open"
+            self._state = "open"
+            self._opened_at = time.monotonic()
+            return tripped
+        return False
+
+    def release_probe(self) -> None:
+        """探测请求被取消（未得出结论）时释放探测名额"""
+        self._probe_in_flight = False
+
+    def snapshot(self) -> BreakerSnapshot:
+        state = self.state
+        return BreakerSnapshot(
+            state=state,
+            consecutive_failures=self._failures,
+            opened_for=time.monotonic() - self._opened_at if state == "open" else 0.0,
+            total_failures=self._total_failures,
+            total_successes=self._total_successes,
+        )
+
+
+@dataclass
+class RoutedTranscription:
+    text: str
+    provider: str
+    # 相对分片起点的句子时间戳；提供方未返回时为 None
+    segments: Optional[List[Segment]] = None
+    # 与 segments 一一对应的说话人编号
+    speakers: Optional[List[Optional[str]]] = None
+
+
+class ProviderRouter:
+    """按优先级顺序选择健康的提供方转录分片，失败时切换到下一个"""
+
+    def __init__(
+        self,
+        providers: Sequence[ASRProvider],
+        *,
+        attempt_timeout: Optional[float] = None,
+        timeout_policy: Optional[ChunkTimeoutPolicy] = None,
+        failure_threshold: int = 5,
+        recovery_seconds: float = 30.0
+    ):
+        self.providers: List[ASRProvider] = [provider for provider in providers if provider.available()]
+        self.attempt_timeout = attempt_timeout
+        self.timeout_policy = timeout_policy
+        self.breakers: Dict[str, CircuitBreaker] = {
+            provider.name: CircuitBreaker(failure_threshold, recovery_seconds)
+            for provider in self.providers
+        }
+
+    def timeout_for(self, provider: ASRProvider, audio_seconds: float) -> Optional[float]:
+        if provider.attempt_timeout:
+            return provider.attempt_timeout
+        if self.timeout_policy is not None:
+            return self.timeout_policy.timeout_for(provider.name, audio_seconds)
+        return self.attempt_timeout
+
+    def longest_attempt_timeout(self) -> float:
+        """各提供方单次请求可能的最长超时（秒）；未设置超时时为 0"""
+        candidates = [provider.attempt_timeout or 0.0 for provider in self.providers]
+        candidates.append(self.attempt_timeout or 0.0)
+        if self.timeout_policy is not None:
+            candidates.append(self.timeout_policy.maximum)
+        return max(candidates)
+
+    def whole_file_provider(self) -> Optional[ASRProvider]:
+        """当前优先使用的（未熔断的）提供方支持整段提交时返回它，否则返回 None"""
+        for provider in self.providers:
+            if self.breakers[provider.name].state == "open":
+                continue
+            return provider if provider.whole_file else None
+        return None
+
+    async def transcribe(
+        self,
+        file_path: Path,
+        model: str,
+        audio_seconds: float = 0.0,
+        providers: Optional[Sequence[ASRProvider]] = None
+    ) -> RoutedTranscription:
+        """
+        依次尝试健康的提供方；返回识别文本与实际使用的提供方
+        providers 给出时只在这些提供方（须属于本路由）中选择
+        鉴权失败与额度耗尽（FATAL_FAILURE_KINDS）不切换提供方，直接抛出
+        单次调用的超时按分片时长（audio_seconds）与该提供方的实测速度计算，超时会取消请求本身
+        全部失败时抛出最后一个错误（超时为 asyncio.TimeoutError）
+        """
+        last_error: Optional[BaseException] = None
+        tried = 0
+        for provider in providers or self.providers:
+            breaker = self.breakers[provider.name]
+            if not breaker.allow():
+                continue
+            tried += 1
+            timeout = self.timeout_for(provider, audio_seconds)
+            # 固定超时的提供方（异步任务型接口）不参与速度估计
+            adaptive = self.timeout_policy is not None and not provider.attempt_timeout
+            started = time.perf_counter()
+            try:
+                if timeout:
+                    result = await asyncio.wait_for(
+                        provider.transcribe_chunk(file_path, model, audio_seconds=audio_seconds),
+                        timeout=timeout
+                    )
+                else:
+                    result = await provider.transcribe_chunk(file_path, model, audio_seconds=audio_seconds)
+            except asyncio.CancelledError:
+                breaker.release_probe()
+                raise
+            except ChunkRejectedError as exc:
+                last_error = exc
+                breaker.release_probe()
+                continue
+            except ProviderHTTPError as exc:
+                last_error = exc
+                kind = classify_failure(exc)
+                if kind in FATAL_FAILURE_KINDS:
+                    # 鉴权失败或额度耗尽：换提供方只会掩盖配置问题，直接交给调用方终止任务
+                    breaker.release_probe()
+                    raise
+                if kind in ("client", "throttled"):
+                    # 分片本身的问题或限流（由并发窗口处理）不代表提供方不健康，不计入熔断
+                    breaker.release_probe()
+                else:
+                    self._on_failure(provider, breaker, exc)
+                continue
+            except asyncio.TimeoutError as exc:
+                last_error = exc
+                if adaptive:
+                    self.timeout_policy.observe_timeout(provider.name)
+                self._on_failure(provider, breaker, exc)
+                continue
+            except Exception as exc:
+                last_error = exc
+                self._on_failure(provider, breaker, exc)
+                continue
+            breaker.record_success()
+            if adaptive:
+                self.timeout_policy.observe(provider.name, audio_seconds, time.perf_counter() - started)
+            if tried > 1:
+                logger.info("[ASRRouter] 分片 %s 已切换到提供方 %s", file_path.name, provider.name)
+            if isinstance(result, TimedText):
+                return RoutedTranscription(
+                    text=result.text,
+                    provider=provider.name,
+                    segments=result.segments or None,
+                    speakers=result.speakers if result.segments else None
+                )
+            return RoutedTranscription(text=result, provider=provider.name)
+
+        if last_error is not None:
+            raise last_error
+        raise NoHealthyProviderError("没有可用的转录服务（所有提供方均已熔断或未配置）")
+
+    def _on_failure(self, provider: ASRProvider, breaker: CircuitBreaker, exc: BaseException) -> None:
+        if breaker.record_failure():
+            logger.warning(
+                "[ASRRouter] 提供方 %s 连续失败已熔断 %.0fs: %s",
+                provider.name,
+                breaker.recovery_seconds,
+                exc or type(exc).__name__
+            )
+
+    async def warmup(self) -> None:
+        for provider in self.providers:
+            try:
+                await provider.warmup()
+            except Exception as exc:  # pragma: no cover - best effort
+                logger.info("[ASRRouter] 预热提供方 %s 失败: %s", provider.name, exc)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            provider.name: self.breakers[provider.name].snapshot().to_dict()
+            for provider in self.providers
+        }
+
+
+# 可按名称启用的提供方工厂，其他模块可通过 register_provider 注册
+ProviderFactory = Callable[["TranscriptionService"], ASRProvider]
+_PROVIDER_FACTORIES: Dict[str, ProviderFactory] = {}
+
+
+def register_provider(name: str, factory: ProviderFactory) -> None:
+    _PROVIDER_FACTORIES[name] = factory
+
+
+def _whisper_factory(_service: "TranscriptionService") -> ASRProvider:
+    from app.config import settings
+    return WhisperProvider(model_size=settings.WHISPER_MODEL_SIZE)
+
+
+def _aliyun_factory(_service: "TranscriptionService") -> ASRProvider:
+    from .async_asr_providers import AliyunFileTransProvider
+    return AliyunFileTransProvider.from_settings()
+
+
+def _volcengine_factory(_service: "TranscriptionService") -> ASRProvider:
+    from .async_asr_providers import VolcengineAUCProvider
+    return VolcengineAUCProvider.from_settings()
+
+
+register_provider("siliconflow", SiliconFlowProvider)
+register_provider("whisper", _whisper_factory)
+register_provider("aliyun", _aliyun_factory)
+register_provider("volcengine", _volcengine_factory)
+
+
+def build_provider_router(service: "TranscriptionService") -> ProviderRouter:
+    """
+    根据 TRANSCRIBE_PROVIDERS（逗号分隔，按优先级）构造路由
+    默认只使用 SiliconFlow；本地 Whisper 兜底需显式配置（如 siliconflow,whisper），避免 API 模式下意外加载模型
+    """
+    names = [
+        name.strip().lower()
+        for name in os.getenv("TRANSCRIBE_PROVIDERS", "siliconflow").split(",")
+        if name.strip()
+    ]
+    providers: List[ASRProvider] = []
+    for name in names:
+        factory = _PROVIDER_FACTORIES.get(name)
+        if factory is None:
+            logger.warning("[ASRRouter] 未知的转录提供方: %s", name)
+            continue
+        providers.append(factory(service))
+    router = ProviderRouter(
+        providers,
+        attempt_timeout=service.chunk_timeout_seconds,
+        timeout_policy=service.timeouts,
+        failure_threshold=int(os.getenv("TRANSCRIBE_BREAKER_FAILURES", "5")),
+        recovery_seconds=float(os.getenv("TRANSCRIBE_BREAKER_COOLDOWN", "30")),
+    )
+    logger.info("[ASRRouter] 转录提供方顺序: %s", ", ".join(p.name for p in router.providers) or "(无)")
+    return router
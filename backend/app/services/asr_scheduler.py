@@ -0,0 +1,376 @@
+"""
+进程级 ASR 调度器
+所有转录任务的外部 API 请求都经过同一个调度器：
+- 全局令牌桶：限制每秒请求数与每分钟提交的音频秒数
+- 按用户公平排队：各用户轮流获得名额，超长文件不会独占配额
+- 优先级分档：交互式重试 > 短文件（按探测到的总时长）> 长文件批量任务，
+  排队过久的请求逐档提升优先级（aging），避免长任务被饿死
+- 并发上限由共享的自适应并发窗口（AIMD）决定
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from . import metrics
+from .adaptive_concurrency import AdaptiveConcurrencyLimiter
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS_USER = "_anonymous"
+
+# 优先级从高到低
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_SHORT = "short"
+PRIORITY_BULK = "bulk"
+PRIORITY_CLASSES = (PRIORITY_INTERACTIVE, PRIORITY_SHORT, PRIORITY_BULK)
+
+
+class _SlotLease:
+    """当前请求持有的并发名额，可在 slot() 结束前提前归还（只归还一次）"""
+
+    def __init__(self, scheduler: "ASRScheduler"):
+        self.scheduler = scheduler
+        self.held = True
+
+    def release(self) -> None:
+        if self.held:
+            self.held = False
+            self.scheduler.release()
+
+
+_current_lease: contextvars.ContextVar[Optional[_SlotLease]] = contextvars.ContextVar(
+    "asr_scheduler_lease",
+    default=None
+)
+
+
+def release_current_slot() -> None:
+    """
+    提前归还当前请求的并发名额（不在 slot() 内调用时无操作）
+    异步任务型提供方提交任务后调用：轮询等待结果期间不占用在线接口的并发窗口
+    """
+    lease = _current_lease.get()
+    if lease is not None:
+        lease.release()
+
+
+class TokenBucket:
+    """
+    允许透支的令牌桶：reserve 立即扣减令牌并返回需要等待的秒数
+    调度器保证同一时刻只有一个请求在预约令牌，因此无需加锁
+    """
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = max(capacity, 1e-9)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        if not self.enabled or amount <= 0:
+            return 0.0
+        self._refill()
+        self._tokens -= amount
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    @property
+    def available(self) -> Optional[float]:
+        if not self.enabled:
+            return None
+        self._refill()
+        return self._tokens
+
+
+@dataclass
+class _Ticket:
+    user_id: str
+    audio_seconds: float
+    retry: bool
+    priority: str
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    granted: bool = False
+
+
+class _FairQueue:
+    """按用户轮转的队列：每个用户一个 FIFO，出队时依次轮到下一个用户"""
+
+    def __init__(self):
+        self._users: "OrderedDict[str, Deque[_Ticket]]" = OrderedDict()
+
+    def push(self, ticket: _Ticket) -> None:
+        self._users.setdefault(ticket.user_id, deque()).append(ticket)
+
+    def pop(self) -> Optional[_Ticket]:
+        while self._users:
+            user_id, tickets = next(iter(self._users.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                self._users.move_to_end(user_id)
+            else:
+                del self._users[user_id]
+            return ticket
+        return None
+
+    def remove(self, ticket: _Ticket) -> None:
+        tickets = self._users.get(ticket.user_id)
+        if not tickets:
+            return
+        try:
+            tickets.remove(ticket)
+        except ValueError:
+            return
+        if not tickets:
+            del self._users[ticket.user_id]
+
+    def oldest_enqueued(self) -> Optional[float]:
+        """队列中最早入队的时间（各用户队首即该用户最早的请求）"""
+        if not self._users:
+            return None
+        return min(tickets[0].enqueued_at for tickets in self._users.values())
+
+    def __len__(self) -> int:
+        return sum(len(tickets) for tickets in self._users.values())
+
+    def per_user(self) -> Dict[str, int]:
+        return {user_id: len(tickets) for user_id, tickets in self._users.items()}
+
+
+@dataclass
+class SchedulerSnapshot:
+    """进程级调度器的排队情况与限速状态"""
+
+    queued_retries: int
+    queued_fresh: int
+    queued_short: int
+    queued_bulk: int
+    queued_by_user: Dict[str, int]
+    oldest_wait: Dict[str, float]
+    dispatched: int
+    dispatched_by_priority: Dict[str, int]
+    short_job_seconds: float
+    aging_seconds: float
+    requests_per_second: float
+    audio_seconds_per_minute: float
+    request_tokens: Optional[float]
+    audio_tokens: Optional[float]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "queuedRetries": self.queued_retries,
+            "queuedFresh": self.queued_fresh,
+            "queuedShort": self.queued_short,
+            "queuedBulk": self.queued_bulk,
+            "queuedByUser": self.queued_by_user,
+            "oldestWait": {key: round(value, 1) for key, value in self.oldest_wait.items()},
+            "dispatched": self.dispatched,
+            "dispatchedByPriority": self.dispatched_by_priority,
+            "shortJobSeconds": self.short_job_seconds,
+            "agingSeconds": self.aging_seconds,
+            "requestsPerSecond": self.requests_per_second,
+            "audioSecondsPerMinute": self.audio_seconds_per_minute,
+            "requestTokens": round(self.request_tokens, 2) if self.request_tokens is not None else None,
+            "audioTokens": round(self.audio_tokens, 2) if self.audio_tokens is not None else None,
+        }
+
+
+class ASRScheduler:
+    """
+    请求按优先级与公平顺序逐个通过"闸门"：轮到的请求先获取并发名额，再预约令牌
+    闸门一次只放行一个请求，保证调度顺序与令牌桶扣减顺序一致
+
+    优先级：重试（用户手动重试失败分片、分片自动重试、对冲请求）为 interactive；
+    新请求按所属文件的总时长分为 short（不超过 short_job_seconds）与 bulk（更长或未知）。
+    每排队 aging_seconds 秒提升一档，同档时先入队者优先
+    """
+
+    def __init__(
+        self,
+        limiter: AdaptiveConcurrencyLimiter,
+        requests_per_second: float = 0.0,
+        audio_seconds_per_minute: float = 0.0,
+        *,
+        short_job_seconds: float = 1200.0,
+        aging_seconds: float = 120.0
+    ):
+        self.limiter = limiter
+        self.requests_per_second = max(0.0, requests_per_second)
+        self.audio_seconds_per_minute = max(0.0, audio_seconds_per_minute)
+        self.short_job_seconds = max(0.0, short_job_seconds)
+        self.aging_seconds = max(0.0, aging_seconds)
+        self._request_bucket = TokenBucket(self.requests_per_second, max(1.0, self.requests_per_second))
+        self._audio_bucket = TokenBucket(self.audio_seconds_per_minute / 60.0, self.audio_seconds_per_minute)
+        self._queues: Dict[str, _FairQueue] = {name: _FairQueue() for name in PRIORITY_CLASSES}
+        self._gate_busy = False
+        self._dispatched = 0
+        self._dispatched_by_priority: Dict[str, int] = {name: 0 for name in PRIORITY_CLASSES}
+
+    @classmethod
+    def from_env(cls) -> "ASRScheduler":
+        initial = int(os.getenv("TRANSCRIBE_MAX_CONCURRENCY", os.getenv("TRANSCRIPTION_CHUNK_WORKERS", "4")))
+        return cls(
+            limiter=AdaptiveConcurrencyLimiter.from_env(max(1, initial)),
+            requests_per_second=float(os.getenv("TRANSCRIBE_RATE_LIMIT_RPS", "0")),
+            audio_seconds_per_minute=float(os.getenv("TRANSCRIBE_AUDIO_SECONDS_PER_MINUTE", "0")),
+            short_job_seconds=float(os.getenv("TRANSCRIBE_SHORT_JOB_SECONDS", "1200")),
+            aging_seconds=float(os.getenv("TRANSCRIBE_PRIORITY_AGING_SECONDS", "120")),
+        )
+
+    def classify(self, retry: bool, job_seconds: Optional[float]) -> str:
+        if retry:
+            return PRIORITY_INTERACTIVE
+        if job_seconds and job_seconds <= self.short_job_seconds:
+            return PRIORITY_SHORT
+        return PRIORITY_BULK
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        """选择有效优先级最高的档位（档位序号减去已排队的 aging 周期数），同级时先入队者优先"""
+        now = time.monotonic()
+        best: Optional[Tuple[float, float]] = None
+        best_queue: Optional[_FairQueue] = None
+        for rank, name in enumerate(PRIORITY_CLASSES):
+            queue = self._queues[name]
+            oldest = queue.oldest_enqueued()
+            if oldest is None:
+                continue
+            promoted = int((now - oldest) // self.aging_seconds) if self.aging_seconds > 0 else 0
+            key = (rank - promoted, oldest)
+            if best is None or key < best:
+                best, best_queue = key, queue
+        return best_queue.pop() if best_queue is not None else None
+
+    def _advance(self) -> None:
+        if self._gate_busy:
+            return
+        while True:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            if ticket.future.done():
+                continue
+            ticket.granted = True
+            self._gate_busy = True
+            ticket.future.set_result(None)
+            return
+
+    async def acquire(
+        self,
+        user_id: Optional[str] = None,
+        audio_seconds: float = 0.0,
+        retry: bool = False,
+        job_seconds: Optional[float] = None
+    ) -> None:
+        """
+        排队等待一个请求名额；返回后调用方必须调用 release()
+        job_seconds 为分片所属文件的总时长，用于区分短文件与长文件批量任务
+        """
+        ticket = _Ticket(
+            user_id=user_id or ANONYMOUS_USER,
+            audio_seconds=max(0.0, audio_seconds),
+            retry=retry,
+            priority=self.classify(retry, job_seconds),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        queue = self._queues[ticket.priority]
+        queue.push(ticket)
+        self._advance()
+        holds_slot = False
+        try:
+            await ticket.future
+            await self.limiter.acquire()
+            holds_slot = True
+            wait = max(
+                self._request_bucket.reserve(1.0),
+                self._audio_bucket.reserve(ticket.audio_seconds)
+            )
+            if wait > 0:
+                logger.debug("[ASRScheduler] 令牌不足，等待 %.2fs user=%s", wait, ticket.user_id)
+                await asyncio.sleep(wait)
+            self._dispatched += 1
+            self._dispatched_by_priority[ticket.priority] += 1
+            metrics.SCHEDULER_WAIT.labels(priority=ticket.priority).observe(time.monotonic() - ticket.enqueued_at)
+        except BaseException:
+            if holds_slot:
+                self.limiter.release()
+            if not ticket.granted:
+                queue.remove(ticket)
+            raise
+        finally:
+            if ticket.granted:
+                self._gate_busy = False
+                self._advance()
+
+    def release(self) -> None:
+        self.limiter.release()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user_id: Optional[str] = None,
+        audio_seconds: float = 0.0,
+        retry: bool = False,
+        job_seconds: Optional[float] = None
+    ) -> AsyncIterator[None]:
+        await self.acquire(user_id=user_id, audio_seconds=audio_seconds, retry=retry, job_seconds=job_seconds)
+        lease = _SlotLease(self)
+        token = _current_lease.set(lease)
+        try:
+            yield
+        finally:
+            _current_lease.reset(token)
+            lease.release()
+
+    def snapshot(self) -> SchedulerSnapshot:
+        now = time.monotonic()
+        queued: Dict[str, int] = {}
+        oldest_wait: Dict[str, float] = {}
+        for name, queue in self._queues.items():
+            for user_id, count in queue.per_user().items():
+                queued[user_id] = queued.get(user_id, 0) + count
+            oldest = queue.oldest_enqueued()
+            if oldest is not None:
+                oldest_wait[name] = now - oldest
+        short = len(self._queues[PRIORITY_SHORT])
+        bulk = len(self._queues[PRIORITY_BULK])
+        return SchedulerSnapshot(
+            queued_retries=len(self._queues[PRIORITY_INTERACTIVE]),
+            queued_fresh=short + bulk,
+            queued_short=short,
+            queued_bulk=bulk,
+            queued_by_user=queued,
+            oldest_wait=oldest_wait,
+            dispatched=self._dispatched,
+            dispatched_by_priority=dict(self._dispatched_by_priority),
+            short_job_seconds=self.short_job_seconds,
+            aging_seconds=self.aging_seconds,
+            requests_per_second=self.requests_per_second,
+            audio_seconds_per_minute=self.audio_seconds_per_minute,
+            request_tokens=self._request_bucket.available,
+            audio_tokens=self._audio_bucket.available,
+        )
+
+
+_scheduler: Optional[ASRScheduler] = None
+
+
+def get_asr_scheduler() -> ASRScheduler:
+    """进程内共享的 ASR 调度器（懒加载）"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ASRScheduler.from_env()
+    return _scheduler
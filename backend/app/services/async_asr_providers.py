@@ -0,0 +1,323 @@
+"""
+异步任务型转录提供方
+阿里云录音文件识别（filetrans）与火山引擎大模型录音文件识别（AUC）均为"提交任务 -> 轮询结果"模式，
+这里基于共享连接池与共享轮询器实现为 ProviderRouter 可用的提供方，替代原先的阻塞脚本
+（ali_voice.py / auc_websocket_demo.py）。两者都需要可公网访问的音频地址，
+由 TRANSCRIBE_FILE_BASE_URL 映射 TRANSCRIBE_FILE_ROOT 下的本地文件得到。
+作为首选提供方时整个标准化音频作为一个任务提交（whole_file），说话人编号在全文件内一致，
+由转录服务按分片区间拆分结果；故障转移到这里的单个分片仍按分片提交。
+任务提交后即归还调度器的并发名额，轮询等待结果期间不占用在线接口（SiliconFlow）的并发窗口
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+from urllib.parse import quote
+
+from app.config import settings
+
+from .asr_providers import ASRProvider, ChunkRejectedError, TimedText, format_speaker_text
+from .asr_scheduler import release_current_slot
+from .http_client import AsyncHTTPClient, shared_http_client
+from .task_poller import AsyncTaskPoller, TaskFailedError, get_task_poller
+
+logger = logging.getLogger(__name__)
+
+FILE_BASE_URL = os.getenv("TRANSCRIBE_FILE_BASE_URL", "")
+FILE_ROOT = os.getenv("TRANSCRIBE_FILE_ROOT", settings.UPLOAD_DIR)
+ASYNC_TASK_TIMEOUT_SECONDS = float(os.getenv("TRANSCRIBE_ASYNC_TASK_TIMEOUT", "900"))
+_REQUEST_TIMEOUT_SECONDS = 30.0
+
+
+def resolve_file_link(file_path: Path) -> str:
+    """把本地文件映射为公网地址（文件须位于 TRANSCRIBE_FILE_ROOT 之下）"""
+    if not FILE_BASE_URL:
+        raise ChunkRejectedError("未配置 TRANSCRIBE_FILE_BASE_URL，无法提供音频公网地址")
+    try:
+        relative = Path(file_path).resolve().relative_to(Path(FILE_ROOT).resolve())
+    except ValueError:
+        raise ChunkRejectedError(f"文件不在可公开访问的目录下: {file_path}")
+    return f"{FILE_BASE_URL.rstrip('/')}/{quote(relative.as_posix())}"
+
+
+def timed_result(
+    items: Iterable[Dict[str, Any]],
+    start_key: str,
+    end_key: str,
+    speaker_of: Callable[[Dict[str, Any]], Optional[str]]
+) -> TimedText:
+    """
+    把识别结果中的分句（毫秒时间戳）转为 TimedText：文本按说话人分行，
+    句子时间戳换算为相对音频起点的秒数并附带说话人编号；缺少时间戳的分句只计入文本
+    """
+    items = list(items)
+    text = format_speaker_text((speaker_of(item), item.get("text") or item.get("Text") or "") for item in items)
+    segments, speakers = [], []
+    for item in items:
+        sentence = (item.get("text") or item.get("Text") or "").strip()
+        begin, end = item.get(start_key), item.get(end_key)
+        if sentence and begin is not None and end is not None:
+            segments.append((round(float(begin) / 1000, 2), round(float(end) / 1000, 2), sentence))
+            speakers.append(speaker_of(item))
+    return TimedText(
+        text=text,
+        segments=segments,
+        speakers=speakers if any(speaker not in (None, "") for speaker in speakers) else None
+    )
+
+
+class _AsyncTaskProvider(ASRProvider):
+    """提交任务后交给共享轮询器等待结果"""
+
+    attempt_timeout = ASYNC_TASK_TIMEOUT_SECONDS
+    whole_file = True
+
+    def __init__(
+        self,
+        *,
+        http_client: Optional[AsyncHTTPClient] = None,
+        poller: Optional[AsyncTaskPoller] = None,
+        file_link: Callable[[Path], str] = resolve_file_link
+    ):
+        self.http_client = http_client or shared_http_client
+        self.poller = poller or get_task_poller()
+        self.file_link = file_link
+
+
+class AliyunFileTransProvider(_AsyncTaskProvider):
+    """阿里云智能语音交互 - 录音文件识别（RPC 接口，HMAC-SHA1 签名）"""
+
+    name = "aliyun"
+    endpoint = "https://filetrans.cn-shanghai.aliyuncs.com/"
+    region_id = "cn-shanghai"
+    api_version = "2018-08-17"
+    _PENDING = {"RUNNING", "QUEUEING"}
+    _SUCCESS = {"SUCCESS", "SUCCESS_WITH_NO_VALID_FRAGMENT"}
+
+    def __init__(
+        self,
+        access_key_id: str,
+        access_key_secret: str,
+        app_key: str,
+        *,
+        auto_split: bool = False,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.access_key_id = access_key_id
+        self.access_key_secret = access_key_secret
+        self.app_key = app_key
+        self.auto_split = auto_split
+
+    @classmethod
+    def from_settings(cls) -> "AliyunFileTransProvider":
+        return cls(
+            settings.ALIYUN_AK_ID,
+            settings.ALIYUN_AK_SECRET,
+            settings.NLS_APP_KEY,
+            # 智能分轨（说话人分离）仅支持 8kHz 单声道音频，默认关闭
+            auto_split=os.getenv("TRANSCRIBE_ALIYUN_AUTO_SPLIT", "false").lower() in {"1", "true", "yes"},
+        )
+
+    def available(self) -> bool:
+        return bool(self.access_key_id and self.access_key_secret and self.app_key and FILE_BASE_URL)
+
+    def cache_model(self, model: str) -> str:
+        return "filetrans-4.0" + ("-split" if self.auto_split else "")
+
+    @staticmethod
+    def _percent_encode(value: str) -> str:
+        return quote(str(value), safe="~")
+
+    def sign(self, method: str, params: Dict[str, str]) -> Dict[str, str]:
+        """按阿里云 RPC 签名规则（SignatureVersion 1.0）补全公共参数与签名"""
+        signed = {
+            "AccessKeyId": self.access_key_id,
+            "Format": "JSON",
+            "RegionId": self.region_id,
+            "SignatureMethod": "HMAC-SHA1",
+            "SignatureNonce": uuid.uuid4().hex,
+            "SignatureVersion": "1.0",
+            "Timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "Version": self.api_version,
+            **params,
+        }
+        canonical = "&".join(
+            f"{self._percent_encode(key)}={self._percent_encode(value)}"
+            for key, value in sorted(signed.items())
+        )
+        string_to_sign = f"{method}&{self._percent_encode('/')}&{self._percent_encode(canonical)}"
+        digest = hmac.new(
+            f"{self.access_key_secret}&".encode("utf-8"),
+            string_to_sign.encode("utf-8"),
+            hashlib.sha1
+        ).digest()
+        signed["Signature"] = base64.b64encode(digest).decode("ascii")
+        return signed
+
+    async def _call(self, method: str, action: str, params: Dict[str, str]) -> Dict[str, Any]:
+        signed = self.sign(method, {"Action": action, **params})
+        response = await self.http_client.request_json(
+            method,
+            self.endpoint,
+            params=signed if method == "GET" else None,
+            data=signed if method != "GET" else None,
+            timeout=_REQUEST_TIMEOUT_SECONDS
+        )
+        return response.body if isinstance(response.body, dict) else {}
+
+    async def transcribe_chunk(self, file_path: Path, model: str, audio_seconds: float = 0.0) -> TimedText:
+        task: Dict[str, Any] = {
+            "appkey": self.app_key,
+            "file_link": self.file_link(file_path),
+            "version": "4.0",
+            "enable_words": False,
+        }
+        if self.auto_split:
+            task["auto_split"] = True
+        body = await self._call("POST", "SubmitTask", {"Task": json.dumps(task)})
+        if body.get("StatusText") != "SUCCESS" or not body.get("TaskId"):
+            raise TaskFailedError(f"阿里云录音文件识别提交失败: {body.get('StatusText') or body}")
+        task_id = str(body["TaskId"])
+        logger.info("[Aliyun] 已提交识别任务 task=%s file=%s", task_id, file_path.name)
+        release_current_slot()
+        return await self.poller.wait(
+            task_id,
+            lambda: self._query(task_id),
+            label=f"aliyun:{file_path.name}"
+        )
+
+    async def _query(self, task_id: str) -> Optional[TimedText]:
+        body = await self._call("GET", "GetTaskResult", {"TaskId": task_id})
+        status = body.get("StatusText")
+        if status in self._PENDING:
+            return None
+        if status not in self._SUCCESS:
+            raise TaskFailedError(f"阿里云录音文件识别失败: {status}")
+        sentences = (body.get("Result") or {}).get("Sentences") or []
+        return timed_result(
+            sentences,
+            "BeginTime",
+            "EndTime",
+            lambda item: str(item["SpeakerId"]) if item.get("SpeakerId") is not None else None
+        )
+
+
+class VolcengineAUCProvider(_AsyncTaskProvider):
+    """火山引擎豆包大模型录音文件识别（submit / query 接口，状态码位于响应头）"""
+
+    name = "volcengine"
+    resource_id = "volc.bigasr.auc"
+    _STATUS_DONE = "20000000"
+    _STATUS_PENDING = {"20000001", "20000002"}
+    _STATUS_SILENT = "20000003"
+
+    def __init__(
+        self,
+        app_id: str,
+        access_token: str,
+        *,
+        endpoint: Optional[str] = None,
+        speaker_info: bool = True,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.app_id = app_id
+        self.access_token = access_token
+        self.endpoint = (
+            endpoint
+            or os.getenv("TRANSCRIBE_VOLC_ENDPOINT", "https://openspeech-direct.zijieapi.com/api/v3/auc/bigmodel")
+        ).rstrip("/")
+        self.speaker_info = speaker_info
+
+    @classmethod
+    def from_settings(cls) -> "VolcengineAUCProvider":
+        return cls(
+            settings.VOLC_APP_ID,
+            settings.VOLC_ACCESS_TOKEN,
+            speaker_info=os.getenv("TRANSCRIBE_VOLC_SPEAKER_INFO", "true").lower() not in {"0", "false", "no"},
+        )
+
+    def available(self) -> bool:
+        return bool(self.app_id and self.access_token and FILE_BASE_URL)
+
+    def cache_model(self, model: str) -> str:
+        return "bigmodel" + ("-speaker" if self.speaker_info else "")
+
+    def _headers(self, task_id: str, **extra: str) -> Dict[str, str]:
+        return {
+            "X-Api-App-Key": self.app_id,
+            "X-Api-Access-Key": self.access_token,
+            "X-Api-Resource-Id": self.resource_id,
+            "X-Api-Request-Id": task_id,
+            **extra,
+        }
+
+    async def transcribe_chunk(self, file_path: Path, model: str, audio_seconds: float = 0.0) -> TimedText:
+        task_id = str(uuid.uuid4())
+        payload = {
+            "user": {"uid": "interreview"},
+            "audio": {"url": self.file_link(file_path)},
+            "request": {
+                "model_name": "bigmodel",
+                "enable_itn": True,
+                "enable_punc": True,
+                "enable_ddc": True,
+                "enable_speaker_info": self.speaker_info,
+                "show_utterances": True,
+            },
+        }
+        response = await self.http_client.request_json(
+            "POST",
+            f"{self.endpoint}/submit",
+            json_body=payload,
+            headers=self._headers(task_id, **{"X-Api-Sequence": "-1"}),
+            timeout=_REQUEST_TIMEOUT_SECONDS
+        )
+        code = response.headers.get("x-api-status-code", "")
+        if code != self._STATUS_DONE:
+            raise TaskFailedError(
+                f"火山引擎录音文件识别提交失败: {code} {response.headers.get('x-api-message', '')}".strip()
+            )
+        logid = response.headers.get("x-tt-logid", "")
+        logger.info("[Volcengine] 已提交识别任务 task=%s file=%s", task_id, file_path.name)
+        release_current_slot()
+        return await self.poller.wait(
+            task_id,
+            lambda: self._query(task_id, logid),
+            label=f"volcengine:{file_path.name}"
+        )
+
+    async def _query(self, task_id: str, logid: str) -> Optional[TimedText]:
+        response = await self.http_client.request_json(
+            "POST",
+            f"{self.endpoint}/query",
+            json_body={},
+            headers=self._headers(task_id, **{"X-Tt-Logid": logid}),
+            timeout=_REQUEST_TIMEOUT_SECONDS
+        )
+        code = response.headers.get("x-api-status-code", "")
+        if code in self._STATUS_PENDING:
+            return None
+        if code == self._STATUS_SILENT:
+            return TimedText(text="", segments=[])
+        if code != self._STATUS_DONE:
+            raise TaskFailedError(
+                f"火山引擎录音文件识别失败: {code} {response.headers.get('x-api-message', '')}".strip()
+            )
+        result = (response.body or {}).get("result") or {}
+        utterances = result.get("utterances") or []
+        if not utterances:
+            return TimedText(text=(result.get("text") or "").strip(), segments=[])
+        return timed_result(
+            utterances,
+            "start_time",
+            "end_time",
+            lambda item: (item.get("additions") or {}).get("speaker")
+        )
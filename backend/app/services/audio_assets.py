@@ -0,0 +1,795 @@
+"""
+音频派生资产服务
+上传后将原始音/视频统一转码为 16kHz 单声道的标准音频（canonical audio），
+按源文件内容哈希缓存在原文件旁，供所有转录后端与分片重试复用；
+编码器与码率由转码配置（TranscodeProfile）决定
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import shutil
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any, Sequence, Tuple
+
+from .audio_segmenter import (
+    EnergyAnalyzer,
+    SegmenterConfig,
+    build_segments,
+    plan_cut_points,
+)
+from .media_toolkit import (
+    MediaInfo,
+    MediaToolError,
+    MediaToolNotFoundError,
+    ProgressHandler,
+    ffmpeg_available,
+    probe_media,
+    run_ffmpeg,
+)
+from . import metrics
+from .executors import MEDIA, run_blocking
+from .transcode_profiles import DEFAULT_PROFILE, TranscodeProfile, profile_from_env
+
+logger = logging.getLogger(__name__)
+
+CANONICAL_SAMPLE_RATE = 16000
+CANONICAL_CHANNELS = 1
+TEXT_EXTENSIONS = {'.txt', '.md'}
+MEDIA_EXTENSIONS = {
+    '.mp3', '.wav', '.m4a', '.flac', '.ogg',
+    '.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv'
+}
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+# (分片文件, 起始秒, 结束秒, 与上一分片重叠的秒数)
+Segment = Tuple[Path, float, float, float]
+_path_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _tee_escape(value: Path) -> str:
+    """转义 tee muxer 输出描述中的特殊字符"""
+    text = str(value)
+    for char in ("\\", ":", "|", "[", "]"):
+        text = text.replace(char, "\\" + char)
+    return text
+
+
+def _lock_for(path: Path) -> asyncio.Lock:
+    key = str(path.resolve())
+    lock = _path_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _path_locks[key] = lock
+    return lock
+
+
+@dataclass
+class AudioAsset:
+    """由上传文件转换得到、可直接提交识别的标准化音频"""
+
+    source_path: Path
+    source_hash: str
+    path: Path
+    sample_rate: int = CANONICAL_SAMPLE_RATE
+    channels: int = CANONICAL_CHANNELS
+    profile: str = DEFAULT_PROFILE
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sourceHash": self.source_hash,
+            "path": str(self.path),
+            "sampleRate": self.sample_rate,
+            "channels": self.channels,
+            "profile": self.profile,
+        }
+
+
+@dataclass
+class AudioChunk:
+    """标准化音频切分后落盘的一个分片"""
+
+    index: int
+    relpath: str
+    start: float
+    end: float
+    size: int
+    sha256: str
+    overlap: float = 0.0
+
+    @property
+    def filename(self) -> str:
+        return Path(self.relpath).name
+
+    @property
+    def duration(self) -> float:
+        return max(0.0, self.end - self.start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "filename": self.filename,
+            "path": self.relpath,
+            "start": round(self.start, 3),
+            "end": round(self.end, 3),
+            "overlap": round(self.overlap, 3),
+            "size": self.size,
+            "sha256": self.sha256,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AudioChunk":
+        return cls(
+            index=int(data["index"]),
+            relpath=str(data.get("path") or data.get("filename")),
+            start=float(data.get("start") or 0.0),
+            end=float(data.get("end") or 0.0),
+            size=int(data.get("size") or 0),
+            sha256=str(data.get("sha256") or ""),
+            overlap=float(data.get("overlap") or 0.0),
+        )
+
+
+@dataclass
+class ChunkManifest:
+    """切片结果清单，与标准化音频和转录稿一起保存"""
+
+    source_hash: str
+    chunk_seconds: int
+    chunks: List[AudioChunk]
+    duration: Optional[float] = None
+    strategy: str = "fixed"
+    overlap_seconds: float = 0.0
+    profile: str = DEFAULT_PROFILE
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+    def matches(self, segmenter: SegmenterConfig, profile: Optional[TranscodeProfile] = None) -> bool:
+        return (
+            self.chunk_seconds == segmenter.chunk_seconds
+            and self.strategy == segmenter.strategy
+            and abs(self.overlap_seconds - segmenter.overlap_seconds) < 1e-6
+            and (profile is None or self.profile == profile.name)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sourceHash": self.source_hash,
+            "chunkSeconds": self.chunk_seconds,
+            "strategy": self.strategy,
+            "overlapSeconds": self.overlap_seconds,
+            "profile": self.profile,
+            "duration": self.duration,
+            "createdAt": self.created_at,
+            "chunks": [chunk.to_dict() for chunk in self.chunks],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChunkManifest":
+        return cls(
+            source_hash=str(data["sourceHash"]),
+            chunk_seconds=int(data.get("chunkSeconds") or 0),
+            chunks=sorted(
+                (AudioChunk.from_dict(item) for item in data.get("chunks") or []),
+                key=lambda chunk: chunk.index
+            ),
+            duration=data.get("duration"),
+            strategy=str(data.get("strategy") or "fixed"),
+            overlap_seconds=float(data.get("overlapSeconds") or 0.0),
+            profile=str(data.get("profile") or DEFAULT_PROFILE),
+            created_at=data.get("createdAt") or datetime.utcnow().isoformat(),
+        )
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AudioAssetService:
+    """管理上传文件的派生音频（标准化音频），同一源文件只转码一次"""
+
+    def __init__(self, profile: Optional[TranscodeProfile] = None):
+        self.profile = profile or profile_from_env()
+
+    @property
+    def chunk_suffix(self) -> str:
+        return self.profile.suffix
+
+    def is_media_file(self, file_path: Path) -> bool:
+        return file_path.suffix.lower() in MEDIA_EXTENSIONS
+
+    def asset_dir(self, source_path: Path) -> Path:
+        """派生资产目录，位于原文件旁"""
+        return source_path.parent / f"{source_path.name}.assets"
+
+    def compute_source_hash(self, source_path: Path) -> str:
+        """
+        计算源文件 sha256
+        结果按 (size, mtime) 缓存在资产目录的 source.json 中，避免每次都全量读文件
+        """
+        stat = source_path.stat()
+        meta_path = self.asset_dir(source_path) / "source.json"
+        meta = self._read_json(meta_path)
+        if (
+            meta
+            and meta.get("size") == stat.st_size
+            and meta.get("mtimeNs") == stat.st_mtime_ns
+            and meta.get("sha256")
+        ):
+            return meta["sha256"]
+
+        source_hash = file_sha256(source_path)
+
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_json(meta_path, {
+            "size": stat.st_size,
+            "mtimeNs": stat.st_mtime_ns,
+            "sha256": source_hash,
+        })
+        return source_hash
+
+    def canonical_path(self, source_path: Path, source_hash: str) -> Path:
+        return self.asset_dir(source_path) / (
+            f"canonical_{source_hash[:16]}_{CANONICAL_SAMPLE_RATE // 1000}k_mono"
+            f"{self.profile.file_tag}{self.profile.suffix}"
+        )
+
+    async def get_media_info(self, source_path: Path) -> Optional[MediaInfo]:
+        """
+        获取源文件的媒体元数据（时长、编码、声道等）
+        按源哈希缓存在资产目录的 media_info.json 中，只在首次调用时执行 ffprobe
+        """
+        source_hash = await run_blocking(MEDIA, self.compute_source_hash, source_path)
+        cache_path = self.asset_dir(source_path) / "media_info.json"
+        cached = self._read_json(cache_path)
+        if cached and cached.get("sourceHash") == source_hash and isinstance(cached.get("info"), dict):
+            return MediaInfo.from_dict(cached["info"])
+        try:
+            info = await probe_media(source_path)
+        except Exception as exc:
+            logger.warning("[AudioAsset] 获取媒体信息失败 %s: %s", source_path.name, exc)
+            return None
+        self._write_json(cache_path, {"sourceHash": source_hash, "info": info.to_dict()})
+        return info
+
+    async def ensure_canonical(
+        self,
+        source_path: Path,
+        progress: Optional[ProgressHandler] = None
+    ) -> AudioAsset:
+        """
+        获取（必要时生成）源文件对应的 16kHz 单声道标准音频
+        同一源文件并发调用时只会执行一次转码
+        """
+        self._check_source(source_path)
+        async with _lock_for(source_path):
+            asset = await self._asset_for(source_path)
+            if self._canonical_ready(asset):
+                logger.debug("[AudioAsset] 复用标准化音频 %s", asset.path.name)
+                return asset
+
+            media_info = await self.get_media_info(source_path)
+            await self._transcode_canonical(
+                asset,
+                progress=progress,
+                total_seconds=media_info.duration if media_info else None
+            )
+            return asset
+
+    async def prepare_chunks(
+        self,
+        source_path: Path,
+        segmenter: SegmenterConfig,
+        should_chunk: Callable[[Optional[float]], bool],
+        fallback: Optional[Dict[str, Any]] = None,
+        progress: Optional[ProgressHandler] = None
+    ) -> Tuple[AudioAsset, ChunkManifest]:
+        """
+        获取标准化音频及其分片清单
+        - 清单已持久化：直接复用
+        - 标准化音频不存在：单次 ffmpeg 解码，固定时长切分时同时写出分片（tee muxer），
+          静音感知切分时同时输出 PCM 流计算帧能量，随后按静音位置无损切片
+        - 标准化音频已存在但缺少对应策略的分片：仅做无损切片（静音感知需先解码一次算能量）
+        时长取自缓存的媒体信息或 ffmpeg 自身的进度输出，不再单独 ffprobe 标准化音频
+        """
+        self._check_source(source_path)
+        async with _lock_for(source_path):
+            asset = await self._asset_for(source_path)
+            canonical_ready = self._canonical_ready(asset)
+            if canonical_ready:
+                manifest = await run_blocking(MEDIA, self.load_chunk_manifest, asset, segmenter, fallback)
+                if manifest:
+                    logger.info(
+                        "[AudioAsset] 复用分片清单 file=%s chunks=%d",
+                        source_path.name,
+                        len(manifest.chunks)
+                    )
+                    return asset, manifest
+
+            media_info = await self.get_media_info(source_path)
+            duration = media_info.duration if media_info else None
+            chunk_dir = self.chunk_dir(asset, segmenter)
+            segments: List[Segment] = []
+
+            segment_timer = metrics.SEGMENT_SECONDS.labels(strategy=segmenter.strategy)
+            if canonical_ready:
+                if should_chunk(duration):
+                    with segment_timer.time():
+                        segments = await self._segment_existing(asset, chunk_dir, segmenter, duration)
+            else:
+                split = should_chunk(duration)
+                tee_chunks = split and segmenter.single_pass
+                analyzer = self._energy_analyzer(segmenter) if split else None
+                measured = await self._transcode_canonical(
+                    asset,
+                    progress=progress,
+                    total_seconds=duration,
+                    chunk_dir=chunk_dir if tee_chunks else None,
+                    chunk_seconds=segmenter.chunk_seconds,
+                    pcm_handler=analyzer.feed if analyzer else None
+                )
+                duration = (analyzer.duration if analyzer else None) or measured or duration
+                if tee_chunks:
+                    segments = self._read_segment_list(chunk_dir, segmenter.chunk_seconds)
+                elif split and duration:
+                    with segment_timer.time():
+                        segments = await self._segment_planned(asset.path, chunk_dir, segmenter, duration, analyzer)
+                elif should_chunk(duration):
+                    # 转码前未能获知时长，转码后才确认需要分片
+                    with segment_timer.time():
+                        segments = await self._segment_existing(asset, chunk_dir, segmenter, duration)
+
+            if not segments:
+                segments = [(asset.path, 0.0, duration or 0.0, 0.0)]
+
+            manifest = await run_blocking(
+                MEDIA,
+                self.save_chunk_manifest,
+                asset,
+                segmenter,
+                segments,
+                duration
+            )
+            logger.info(
+                "[AudioAsset] 已生成分片清单 file=%s strategy=%s chunks=%d duration=%s",
+                source_path.name,
+                manifest.strategy,
+                len(manifest.chunks),
+                f"{duration:.1f}s" if duration else "unknown"
+            )
+            return asset, manifest
+
+    def _check_source(self, source_path: Path) -> None:
+        if not source_path.exists():
+            raise FileNotFoundError(f"文件不存在: {source_path}")
+        if not self.is_media_file(source_path):
+            raise ValueError(f"不支持的音视频格式: {source_path.suffix}")
+
+    async def _asset_for(self, source_path: Path) -> AudioAsset:
+        source_hash = await run_blocking(MEDIA, self.compute_source_hash, source_path)
+        return AudioAsset(
+            source_path=source_path,
+            source_hash=source_hash,
+            path=self.canonical_path(source_path, source_hash),
+            profile=self.profile.name
+        )
+
+    @staticmethod
+    def _canonical_ready(asset: AudioAsset) -> bool:
+        return asset.path.exists() and asset.path.stat().st_size > 0
+
+    async def _transcode_canonical(
+        self,
+        asset: AudioAsset,
+        progress: Optional[ProgressHandler] = None,
+        total_seconds: Optional[float] = None,
+        chunk_dir: Optional[Path] = None,
+        chunk_seconds: int = 0,
+        pcm_handler: Optional[Callable[[bytes], None]] = None
+    ) -> Optional[float]:
+        """
+        单次解码完成重采样、编码；传入 chunk_dir 时通过 tee muxer 同时写出分片，
+        传入 pcm_handler 时额外输出 16kHz s16le PCM 到标准输出供能量分析
+        返回 ffmpeg 进度输出中的音频时长
+        """
+        target = asset.path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(f".{target.stem}_{uuid.uuid4().hex[:8]}{target.suffix}")
+
+        encode_args = [
+            "-y",
+            "-i", str(asset.source_path),
+            "-map", "0:a:0",
+            "-vn",
+            *self.profile.encode_args,
+            "-ar", str(CANONICAL_SAMPLE_RATE),
+            "-ac", str(CANONICAL_CHANNELS),
+        ]
+        if chunk_dir is not None:
+            self._reset_chunk_dir(chunk_dir)
+            outputs = "|".join([
+                f"[f={self.profile.muxer}]{_tee_escape(temp_path)}",
+                (
+                    f"[f=segment:segment_time={chunk_seconds}"
+                    f":segment_list={_tee_escape(chunk_dir / 'segments.csv')}"
+                    f":segment_list_type=csv]{_tee_escape(chunk_dir / self._chunk_pattern)}"
+                ),
+            ])
+            output_args = ["-f", "tee", outputs]
+        else:
+            output_args = [str(temp_path)]
+        if pcm_handler is not None:
+            output_args += self._pcm_output_args()
+
+        try:
+            result = await run_ffmpeg(
+                encode_args + output_args,
+                progress=progress,
+                total_seconds=total_seconds,
+                stdout_handler=pcm_handler
+            )
+        except MediaToolNotFoundError:
+            temp_path.unlink(missing_ok=True)
+            raise RuntimeError("系统未安装 ffmpeg，无法生成标准化音频")
+        except MediaToolError as exc:
+            temp_path.unlink(missing_ok=True)
+            raise RuntimeError(f"音频标准化失败，{exc}")
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+        if not temp_path.exists():
+            raise RuntimeError("音频标准化失败，未生成输出文件")
+        temp_path.replace(target)
+        self._remove_stale_canonicals(asset)
+        metrics.TRANSCODE_SECONDS.labels(
+            profile=self.profile.name,
+            mode="tee" if chunk_dir is not None else ("pcm" if pcm_handler is not None else "plain")
+        ).observe(result.elapsed_seconds)
+        logger.info(
+            "[AudioAsset] 已生成标准化音频 %s -> %s (%.2fs%s)",
+            asset.source_path.name,
+            target.name,
+            result.elapsed_seconds,
+            "，含分片" if chunk_dir is not None else ""
+        )
+        return result.last_progress.out_time_seconds if result.last_progress else None
+
+    @staticmethod
+    def _pcm_output_args() -> List[str]:
+        return [
+            "-map", "0:a:0",
+            "-vn",
+            "-ac", str(CANONICAL_CHANNELS),
+            "-ar", str(CANONICAL_SAMPLE_RATE),
+            "-f", "s16le",
+            "-acodec", "pcm_s16le",
+            "pipe:1",
+        ]
+
+    @staticmethod
+    def _energy_analyzer(segmenter: SegmenterConfig) -> Optional[EnergyAnalyzer]:
+        if not segmenter.uses_silence:
+            return None
+        return EnergyAnalyzer(CANONICAL_SAMPLE_RATE, segmenter.frame_ms)
+
+    async def _segment_existing(
+        self,
+        asset: AudioAsset,
+        output_dir: Path,
+        segmenter: SegmenterConfig,
+        duration: Optional[float]
+    ) -> List[Segment]:
+        """标准化音频已存在时按切分策略生成分片"""
+        if segmenter.single_pass:
+            return await self._segment_copy(asset.path, output_dir, segmenter.chunk_seconds)
+
+        analyzer = self._energy_analyzer(segmenter)
+        if analyzer is not None and ffmpeg_available():
+            try:
+                await run_ffmpeg(["-i", str(asset.path)] + self._pcm_output_args(), stdout_handler=analyzer.feed)
+                duration = analyzer.duration or duration
+            except MediaToolError as exc:
+                logger.warning("[AudioAsset] 能量分析失败，退回固定时长切分: %s", exc)
+                analyzer = None
+        if not duration:
+            return await self._segment_copy(asset.path, output_dir, segmenter.chunk_seconds)
+        return await self._segment_planned(asset.path, output_dir, segmenter, duration, analyzer)
+
+    async def _segment_planned(
+        self,
+        file_path: Path,
+        output_dir: Path,
+        segmenter: SegmenterConfig,
+        duration: float,
+        analyzer: Optional[EnergyAnalyzer] = None
+    ) -> List[Segment]:
+        """
+        按规划的切分点无损切片：有能量数据时切在目标时长附近的静音处
+        无重叠时一次 segment muxer 完成；有重叠时各分片独立截取
+        """
+        if not ffmpeg_available():
+            logger.warning("切片失败：系统未安装 ffmpeg")
+            return []
+
+        if analyzer is not None and analyzer.total_samples:
+            cuts = plan_cut_points(
+                analyzer.energies(),
+                analyzer.frame_seconds,
+                duration,
+                segmenter.chunk_seconds,
+                segmenter.search_seconds
+            )
+        else:
+            cuts = plan_cut_points([], 1.0, duration, segmenter.chunk_seconds, 0.0)
+        if not cuts:
+            # 总时长不足以切分，直接使用整段标准化音频
+            return []
+        bounds = build_segments(cuts, duration, segmenter.overlap_seconds)
+        self._reset_chunk_dir(output_dir)
+
+        if segmenter.overlap_seconds <= 0:
+            try:
+                await run_ffmpeg([
+                    "-y",
+                    "-i", str(file_path),
+                    "-f", "segment",
+                    "-segment_times", ",".join(f"{cut:.3f}" for cut in cuts),
+                    "-segment_list", str(output_dir / "segments.csv"),
+                    "-segment_list_type", "csv",
+                    "-c", "copy",
+                    str(output_dir / self._chunk_pattern)
+                ])
+            except MediaToolError as exc:
+                logger.error("音频切片失败: %s", exc)
+                return []
+            segments = self._read_segment_list(output_dir, segmenter.chunk_seconds)
+        else:
+            outputs = [output_dir / f"chunk_{idx:03d}{self.chunk_suffix}" for idx in range(len(bounds))]
+            done = await asyncio.gather(*(
+                self.cut_range(file_path, start, end, output)
+                for (start, end, _), output in zip(bounds, outputs)
+            ))
+            if not all(done):
+                return []
+            segments = [
+                (output, start, end, leading)
+                for (start, end, leading), output in zip(bounds, outputs)
+            ]
+
+        logger.info(
+            "Split %s into %d segments (strategy=%s, cuts=%s)",
+            file_path.name,
+            len(segments),
+            segmenter.strategy,
+            ",".join(f"{cut:.1f}" for cut in cuts)
+        )
+        return segments
+
+    async def _segment_copy(self, file_path: Path, output_dir: Path, chunk_seconds: int) -> List[Segment]:
+        """标准化音频已存在时，按固定时长无损切片（不重新解码）"""
+        if not ffmpeg_available():
+            logger.warning("切片失败：系统未安装 ffmpeg")
+            return []
+
+        self._reset_chunk_dir(output_dir)
+        try:
+            await run_ffmpeg([
+                "-y",
+                "-i", str(file_path),
+                "-f", "segment",
+                "-segment_time", str(chunk_seconds),
+                "-segment_list", str(output_dir / "segments.csv"),
+                "-segment_list_type", "csv",
+                "-c", "copy",
+                str(output_dir / self._chunk_pattern)
+            ])
+        except MediaToolError as exc:
+            logger.error("音频切片失败: %s", exc)
+            return []
+
+        segments = self._read_segment_list(output_dir, chunk_seconds)
+        logger.info("Split %s into %d segments", file_path.name, len(segments))
+        return segments
+
+    @property
+    def _chunk_pattern(self) -> str:
+        return f"chunk_%03d{self.chunk_suffix}"
+
+    @staticmethod
+    def _reset_chunk_dir(output_dir: Path) -> None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for stale in output_dir.glob("chunk_*"):
+            stale.unlink(missing_ok=True)
+        (output_dir / "segments.csv").unlink(missing_ok=True)
+
+    def _read_segment_list(self, output_dir: Path, chunk_seconds: int) -> List[Segment]:
+        """解析 ffmpeg segment muxer 输出的 csv 列表（filename,start,end）"""
+        segment_list = output_dir / "segments.csv"
+        segments: List[Segment] = []
+        if segment_list.exists():
+            for line in segment_list.read_text(encoding='utf-8').splitlines():
+                parts = line.strip().split(",")
+                if len(parts) < 3:
+                    continue
+                chunk_path = output_dir / parts[0]
+                if chunk_path.exists():
+                    segments.append((chunk_path, float(parts[1]), float(parts[2]), 0.0))
+        if not segments:
+            # 无分段列表时按固定时长推算时间偏移
+            for order, chunk_path in enumerate(sorted(output_dir.glob(f"chunk_*{self.chunk_suffix}"))):
+                start = float(order * chunk_seconds)
+                segments.append((chunk_path, start, start + chunk_seconds, 0.0))
+        return segments
+
+    async def cut_range(self, file_path: Path, start: float, end: float, output_path: Path) -> bool:
+        """从标准化音频中无损截取 [start, end) 区间"""
+        if not ffmpeg_available():
+            logger.warning("截取失败：系统未安装 ffmpeg")
+            return False
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            await run_ffmpeg([
+                "-y",
+                "-ss", f"{max(0.0, start):.3f}",
+                "-i", str(file_path),
+                "-t", f"{max(0.0, end - start):.3f}",
+                "-c", "copy",
+                str(output_path)
+            ])
+        except MediaToolError as exc:
+            logger.error("音频截取失败: %s", exc)
+            return False
+        return output_path.exists()
+
+    async def materialize_chunks(
+        self,
+        asset: AudioAsset,
+        manifest: ChunkManifest,
+        indices: Sequence[int]
+    ) -> List[Path]:
+        """
+        校验指定分片的文件，仅对丢失或被改动的分片按时间偏移重新截取
+        返回与清单顺序一致的全部分片路径
+        """
+        chunk_paths = [self.resolve_chunk_path(asset, chunk) for chunk in manifest.chunks]
+        for idx in indices:
+            chunk = manifest.chunks[idx]
+            if await run_blocking(MEDIA, self.verify_chunk, asset, chunk):
+                continue
+            if chunk_paths[idx] == asset.path:
+                continue
+            logger.info("[AudioAsset] 分片 %s 缺失或已变化，重新截取", chunk.filename)
+            await self.cut_range(asset.path, chunk.start, chunk.end, chunk_paths[idx])
+        return chunk_paths
+
+    def range_path(self, asset: AudioAsset, start: float, end: float) -> Path:
+        """区间截取文件；目录名与分片目录同前缀，源文件变化后随旧分片目录一起清理"""
+        return self.asset_dir(asset.source_path) / (
+            f"chunks_{asset.source_hash[:16]}{self.profile.file_tag}_ranges"
+        ) / f"range_{int(start * 1000):09d}_{int(end * 1000):09d}{self.chunk_suffix}"
+
+    async def cut_span(self, asset: AudioAsset, start: float, end: float) -> Path:
+        """截取任意区间（按区间重新转录时使用），同一区间的截取结果直接复用"""
+        path = self.range_path(asset, start, end)
+        if path.exists() and path.stat().st_size > 0:
+            return path
+        if not await self.cut_range(asset.path, start, end, path):
+            raise RuntimeError(f"音频区间截取失败: {start:.1f}s - {end:.1f}s")
+        return path
+
+    def _remove_stale_canonicals(self, asset: AudioAsset) -> None:
+        """源文件被覆盖后，清理旧哈希对应的标准化音频（保留同一源文件其他转码配置的产物）"""
+        prefix = f"canonical_{asset.source_hash[:16]}_"
+        for candidate in self.asset_dir(asset.source_path).glob("canonical_*"):
+            if candidate != asset.path and not candidate.name.startswith(prefix):
+                candidate.unlink(missing_ok=True)
+
+    # Chunk manifest -------------------------------------------------
+    def chunk_dir(self, asset: AudioAsset, segmenter: SegmenterConfig) -> Path:
+        return self.asset_dir(asset.source_path) / (
+            f"chunks_{asset.source_hash[:16]}{self.profile.file_tag}_{segmenter.cache_key}"
+        )
+
+    def resolve_chunk_path(self, asset: AudioAsset, chunk: AudioChunk) -> Path:
+        return self.asset_dir(asset.source_path) / chunk.relpath
+
+    def load_chunk_manifest(
+        self,
+        asset: AudioAsset,
+        segmenter: SegmenterConfig,
+        fallback: Optional[Dict[str, Any]] = None
+    ) -> Optional[ChunkManifest]:
+        """
+        读取已持久化的分片清单
+        磁盘清单缺失时可使用转录记录中保存的清单（fallback），但要求源哈希与切分策略一致
+        """
+        data = self._read_json(self.chunk_dir(asset, segmenter) / "manifest.json")
+        if not data and isinstance(fallback, dict) and fallback.get("sourceHash") == asset.source_hash:
+            data = fallback
+        if not data:
+            return None
+        try:
+            manifest = ChunkManifest.from_dict(data)
+        except Exception as exc:
+            logger.warning("[AudioAsset] 分片清单损坏，忽略: %s", exc)
+            return None
+        if manifest.source_hash != asset.source_hash or not manifest.chunks:
+            return None
+        if not manifest.matches(segmenter, self.profile):
+            return None
+        return manifest
+
+    def save_chunk_manifest(
+        self,
+        asset: AudioAsset,
+        segmenter: SegmenterConfig,
+        segments: Sequence[Segment],
+        duration: Optional[float] = None
+    ) -> ChunkManifest:
+        """根据切片结果（文件, 起始秒, 结束秒, 重叠秒）生成并持久化分片清单"""
+        base_dir = self.asset_dir(asset.source_path)
+        chunks: List[AudioChunk] = []
+        for index, (path, start, end, overlap) in enumerate(segments):
+            chunks.append(AudioChunk(
+                index=index,
+                relpath=path.relative_to(base_dir).as_posix(),
+                start=float(start),
+                end=float(end),
+                size=path.stat().st_size,
+                sha256=file_sha256(path),
+                overlap=float(overlap),
+            ))
+        manifest = ChunkManifest(
+            source_hash=asset.source_hash,
+            chunk_seconds=segmenter.chunk_seconds,
+            chunks=chunks,
+            duration=duration if duration else (chunks[-1].end if chunks else None),
+            strategy=segmenter.strategy,
+            overlap_seconds=segmenter.overlap_seconds,
+            profile=self.profile.name,
+        )
+        target_dir = self.chunk_dir(asset, segmenter)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        self._write_json(target_dir / "manifest.json", manifest.to_dict())
+        self._remove_stale_chunk_dirs(asset)
+        return manifest
+
+    def verify_chunk(self, asset: AudioAsset, chunk: AudioChunk) -> bool:
+        """校验分片文件仍然存在且内容未变化"""
+        path = self.resolve_chunk_path(asset, chunk)
+        if not path.exists() or path.stat().st_size != chunk.size:
+            return False
+        return not chunk.sha256 or file_sha256(path) == chunk.sha256
+
+    def _remove_stale_chunk_dirs(self, asset: AudioAsset) -> None:
+        """清理旧源哈希遗留的分片目录"""
+        prefix = f"chunks_{asset.source_hash[:16]}_"
+        for candidate in self.asset_dir(asset.source_path).glob("chunks_*"):
+            if candidate.is_dir() and not candidate.name.startswith(prefix):
+                shutil.rmtree(candidate, ignore_errors=True)
+
+    @staticmethod
+    def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as exc:
+            logger.debug("[AudioAsset] 读取 %s 失败: %s", path, exc)
+            return None
+
+    @staticmethod
+    def _write_json(path: Path, payload: Dict[str, Any]) -> None:
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        temp_path.replace(path)
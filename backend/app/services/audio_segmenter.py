@@ -0,0 +1,220 @@
+"""
+静音感知的音频分段
+基于解码后的 PCM 计算帧能量（numpy 向量化），在目标时长附近的静音处切分，
+支持相邻分片重叠，并在合并文本时去除重叠区域的重复内容
+"""
+import importlib.util
+import logging
+import math
+import os
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_SMOOTH_SECONDS = 0.3
+_DISTANCE_PENALTY_DB = 6.0
+_CHARS_PER_SECOND = 8
+_MIN_OVERLAP_MATCH = 4
+_LEADING_PUNCTUATION = " \t\n，。？！、；：,.?!;:"
+
+
+def energy_analysis_available() -> bool:
+    # audioop 只在没有 numpy 时使用（Python 3.13 已移除），这里只检查是否存在，不导入以免触发弃用警告
+    return NUMPY_AVAILABLE or importlib.util.find_spec("audioop") is not None
+
+
+@dataclass
+class SegmenterConfig:
+    """标准化音频的切分方式"""
+
+    chunk_seconds: int
+    silence_aware: bool = True
+    overlap_seconds: float = 0.0
+    search_seconds: float = 30.0
+    frame_ms: int = 30
+
+    @classmethod
+    def from_env(cls, chunk_seconds: int) -> "SegmenterConfig":
+        silence_flag = os.getenv("TRANSCRIBE_SILENCE_SPLIT", "true").lower() not in {"0", "false", "no"}
+        overlap = max(0.0, float(os.getenv("TRANSCRIBE_CHUNK_OVERLAP_SECONDS", "0")))
+        search = float(os.getenv("TRANSCRIBE_SILENCE_SEARCH_SECONDS", str(min(30.0, chunk_seconds * 0.2))))
+        return cls(
+            chunk_seconds=chunk_seconds,
+            silence_aware=silence_flag,
+            overlap_seconds=min(overlap, chunk_seconds / 4),
+            search_seconds=max(0.0, min(search, chunk_seconds / 2)),
+        )
+
+    @property
+    def uses_silence(self) -> bool:
+        return self.silence_aware and energy_analysis_available()
+
+    @property
+    def strategy(self) -> str:
+        return "silence" if self.uses_silence else "fixed"
+
+    @property
+    def cache_key(self) -> str:
+        """分片目录名后缀，不同切分策略的结果互不覆盖"""
+        key = f"{self.chunk_seconds}s"
+        if self.uses_silence:
+            key += "_vad"
+        if self.overlap_seconds > 0:
+            key += f"_ov{self.overlap_seconds:g}"
+        return key
+
+    @property
+    def single_pass(self) -> bool:
+        """固定时长且无重叠时，可在转码的同时由 segment muxer 直接写出分片"""
+        return not self.uses_silence and self.overlap_seconds <= 0
+
+
+class EnergyAnalyzer:
+    """逐帧增量计算 s16le 单声道 PCM 的 RMS 能量（dBFS）"""
+
+    def __init__(self, sample_rate: int, frame_ms: int = 30):
+        self.sample_rate = sample_rate
+        self.frame_samples = max(1, int(sample_rate * frame_ms / 1000))
+        self.frame_bytes = self.frame_samples * 2
+        self.frame_seconds = self.frame_samples / sample_rate
+        self._remainder = b""
+        self._blocks: List[Sequence[float]] = []
+        self.total_samples = 0
+
+    def feed(self, data: bytes) -> None:
+        if not data:
+            return
+        self.total_samples += len(data) // 2
+        buffer = self._remainder + data
+        usable = len(buffer) - (len(buffer) % self.frame_bytes)
+        self._remainder = buffer[usable:]
+        if usable:
+            self._blocks.append(self._frame_energy(buffer[:usable]))
+
+    def _frame_energy(self, data: bytes) -> Sequence[float]:
+        if NUMPY_AVAILABLE:
+            samples = np.frombuffer(data, dtype="<i2").astype(np.float32)
+            frames = samples.reshape(-1, self.frame_samples)
+            rms = np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0
+            return 20.0 * np.log10(np.maximum(rms, 1e-5))
+        import audioop
+
+        values: List[float] = []
+        for offset in range(0, len(data), self.frame_bytes):
+            rms = audioop.rms(data[offset:offset + self.frame_bytes], 2) / 32768.0
+            values.append(20.0 * math.log10(max(rms, 1e-5)))
+        return values
+
+    @property
+    def duration(self) -> float:
+        return self.total_samples / self.sample_rate
+
+    def energies(self) -> Sequence[float]:
+        if NUMPY_AVAILABLE:
+            if not self._blocks:
+                return np.zeros(0, dtype=np.float32)
+            return np.concatenate([np.asarray(block, dtype=np.float32) for block in self._blocks])
+        merged: List[float] = []
+        for block in self._blocks:
+            merged.extend(block)
+        return merged
+
+
+def _best_frame(window: Sequence[float], ideal_offset: int, smooth_frames: int, max_distance: int) -> int:
+    """在窗口内选取平滑能量最低（且靠近理想位置）的帧"""
+    if NUMPY_AVAILABLE:
+        values = np.asarray(window, dtype=np.float32)
+        if smooth_frames > 1 and len(values) > smooth_frames:
+            kernel = np.ones(smooth_frames, dtype=np.float32) / smooth_frames
+            values = np.convolve(values, kernel, mode="same")
+        distance = np.abs(np.arange(len(values)) - ideal_offset) / max(1, max_distance)
+        return int(np.argmin(values + distance * _DISTANCE_PENALTY_DB))
+
+    half = smooth_frames // 2
+    best_idx, best_score = 0, float("inf")
+    for idx in range(len(window)):
+        lo, hi = max(0, idx - half), min(len(window), idx + half + 1)
+        smoothed = sum(window[lo:hi]) / (hi - lo)
+        score = smoothed + abs(idx - ideal_offset) / max(1, max_distance) * _DISTANCE_PENALTY_DB
+        if score < best_score:
+            best_idx, best_score = idx, score
+    return best_idx
+
+
+def plan_cut_points(
+    energies: Sequence[float],
+    frame_seconds: float,
+    total_seconds: float,
+    target_seconds: float,
+    search_seconds: float
+) -> List[float]:
+    """
+    规划切分点：每个切分点位于 [目标-search, 目标+search] 内能量最低的位置
+    最后一个分片不超过目标时长的 1.5 倍
+    """
+    cuts: List[float] = []
+    if total_seconds <= 0 or target_seconds <= 0:
+        return cuts
+    smooth_frames = max(1, int(_SMOOTH_SECONDS / frame_seconds))
+    frame_count = len(energies)
+    last = 0.0
+    while total_seconds - last > target_seconds * 1.5:
+        ideal = last + target_seconds
+        lo = max(last + target_seconds * 0.5, ideal - search_seconds)
+        hi = min(total_seconds - target_seconds * 0.25, ideal + search_seconds)
+        lo_frame = min(frame_count, int(lo / frame_seconds))
+        hi_frame = min(frame_count, int(hi / frame_seconds))
+        if search_seconds <= 0 or hi_frame - lo_frame < 2:
+            cut = ideal
+        else:
+            ideal_offset = int(ideal / frame_seconds) - lo_frame
+            max_distance = max(1, int(search_seconds / frame_seconds))
+            best = _best_frame(energies[lo_frame:hi_frame], ideal_offset, smooth_frames, max_distance)
+            cut = (lo_frame + best + 0.5) * frame_seconds
+        cuts.append(round(cut, 3))
+        last = cut
+    return cuts
+
+
+def build_segments(
+    cut_points: Sequence[float],
+    total_seconds: float,
+    overlap_seconds: float = 0.0
+) -> List[Tuple[float, float, float]]:
+    """根据切分点生成 (start, end, leading_overlap)，分片起点向前延伸 overlap 秒"""
+    bounds = [0.0, *cut_points, total_seconds]
+    segments: List[Tuple[float, float, float]] = []
+    for idx in range(len(bounds) - 1):
+        start, end = bounds[idx], bounds[idx + 1]
+        leading = min(overlap_seconds, start) if idx > 0 else 0.0
+        segments.append((round(start - leading, 3), round(end, 3), round(leading, 3)))
+    return segments
+
+
+def dedupe_overlap(previous_text: str, next_text: str, overlap_seconds: float) -> str:
+    """
+    去除 next_text 开头与 previous_text 结尾重复的部分（来自重叠音频）
+    只在两段文本边界附近查找足够长的公共片段，未找到时原样返回
+    """
+    if overlap_seconds <= 0 or not previous_text or not next_text:
+        return next_text
+    window = int(overlap_seconds * _CHARS_PER_SECOND) + 10
+    tail = previous_text[-window:]
+    head = next_text[:window]
+    matcher = SequenceMatcher(None, tail, head, autojunk=False)
+    match = matcher.find_longest_match(0, len(tail), 0, len(head))
+    if match.size < _MIN_OVERLAP_MATCH:
+        return next_text
+    slack = max(3, window // 4)
+    if match.a + match.size < len(tail) - slack or match.b > slack:
+        return next_text
+    return next_text[match.b + match.size:].lstrip(_LEADING_PUNCTUATION)
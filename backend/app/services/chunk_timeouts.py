@@ -0,0 +1,158 @@
+"""
+分片超时与任务截止时间
+单次请求的超时 = 基础耗时 + 分片时长 × 处理速度 × 余量倍数，并限制在 [最小值, 上限] 之间；
+处理速度（每秒音频的耗时）取该提供方最近成功请求的 EWMA，没有样本时使用配置的初始值，
+请求超时后放慢估计，后续重试获得更长的超时。
+整个转录任务可另设与音频总时长成正比的截止时间（默认关闭），从第一个分片请求发出时开始计时，
+到期后取消仍未完成的分片请求（aiohttp 请求被取消时连接会立即关闭，调度器名额随之释放）
+"""
+import asyncio
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 音频过短时耗时主要是固定开销，不用于估计处理速度
+_MIN_SAMPLE_AUDIO_SECONDS = 5.0
+# 请求超时后处理速度估计放慢的倍数
+_TIMEOUT_BACKOFF = 1.5
+
+
+@dataclass
+class TimeoutSnapshot:
+    base_seconds: float
+    multiplier: float
+    minimum: float
+    maximum: float
+    job_ratio: float
+    job_minimum: float
+    speeds: Dict[str, float]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "baseSeconds": self.base_seconds,
+            "multiplier": self.multiplier,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "jobRatio": self.job_ratio,
+            "jobMinimum": self.job_minimum,
+            "secondsPerAudioSecond": {name: round(speed, 4) for name, speed in self.speeds.items()},
+        }
+
+
+class ChunkTimeoutPolicy:
+    """按分片时长与提供方实测速度计算单次请求超时，并给出整个任务的截止时长"""
+
+    def __init__(
+        self,
+        *,
+        base_seconds: float = 15.0,
+        seconds_per_audio_second: float = 0.05,
+        multiplier: float = 3.0,
+        minimum: float = 10.0,
+        maximum: float = 300.0,
+        smoothing: float = 0.2,
+        job_ratio: float = 0.0,
+        job_minimum: float = 300.0
+    ):
+        self.base_seconds = max(0.0, base_seconds)
+        self.initial_speed = max(0.0, seconds_per_audio_second)
+        self.multiplier = max(1.0, multiplier)
+        self.minimum = max(1.0, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.smoothing = min(1.0, max(0.01, smoothing))
+        self.job_ratio = max(0.0, job_ratio)
+        self.job_minimum = max(0.0, job_minimum)
+        self._speeds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ChunkTimeoutPolicy":
+        return cls(
+            base_seconds=float(os.getenv("TRANSCRIBE_CHUNK_TIMEOUT_BASE", "15")),
+            seconds_per_audio_second=float(os.getenv("TRANSCRIBE_CHUNK_TIMEOUT_PER_SECOND", "0.05")),
+            multiplier=float(os.getenv("TRANSCRIBE_CHUNK_TIMEOUT_MULTIPLIER", "3")),
+            minimum=float(os.getenv("TRANSCRIBE_CHUNK_TIMEOUT_MIN", "10")),
+            maximum=float(os.getenv("TRANSCRIBE_CHUNK_TIMEOUT", "300")),
+            job_ratio=float(os.getenv("TRANSCRIBE_JOB_TIMEOUT_RATIO", "0")),
+            job_minimum=float(os.getenv("TRANSCRIBE_JOB_TIMEOUT_MIN", "300")),
+        )
+
+    def speed(self, provider: str) -> float:
+        """提供方每秒音频的处理耗时（秒）"""
+        with self._lock:
+            return self._speeds.get(provider, self.initial_speed)
+
+    def timeout_for(self, provider: str, audio_seconds: float) -> float:
+        budget = self.base_seconds + max(0.0, audio_seconds) * self.speed(provider) * self.multiplier
+        return min(self.maximum, max(self.minimum, budget))
+
+    def observe(self, provider: str, audio_seconds: float, elapsed: float) -> None:
+        """记录一次成功请求的耗时（含上传）"""
+        if audio_seconds < _MIN_SAMPLE_AUDIO_SECONDS or elapsed <= 0:
+            return
+        sample = elapsed / audio_seconds
+        with self._lock:
+            current = self._speeds.get(provider)
+            self._speeds[provider] = (
+                sample if current is None
+                else current + self.smoothing * (sample - current)
+            )
+
+    def observe_timeout(self, provider: str) -> None:
+        """请求超时：放慢处理速度估计，避免超时过短导致所有重试都失败"""
+        ceiling = self.maximum / self.multiplier
+        with self._lock:
+            current = self._speeds.get(provider, self.initial_speed) or 0.01
+            slowed = self._speeds[provider] = min(ceiling, current * _TIMEOUT_BACKOFF)
+        logger.info("[Timeout] 提供方 %s 请求超时，处理速度估计调整为 %.3fs/音频秒", provider, slowed)
+
+    def job_deadline(self, audio_seconds: Optional[float], floor: float = 0.0) -> Optional[float]:
+        """
+        整个任务（一批分片）允许的最长时间（秒）；job_ratio 为 0 时不限制
+        floor 为单次请求可能的最长超时，截止时间不短于它，避免取消仍在正常等待结果的请求
+        """
+        if self.job_ratio <= 0:
+            return None
+        return max(self.job_minimum, (audio_seconds or 0.0) * self.job_ratio, floor)
+
+    def snapshot(self) -> TimeoutSnapshot:
+        with self._lock:
+            speeds = dict(self._speeds)
+        return TimeoutSnapshot(
+            base_seconds=self.base_seconds,
+            multiplier=self.multiplier,
+            minimum=self.minimum,
+            maximum=self.maximum,
+            job_ratio=self.job_ratio,
+            job_minimum=self.job_minimum,
+            speeds=speeds,
+        )
+
+
+class JobDeadline:
+    """任务截止时间：从第一个分片请求获得调度器名额时开始计时，之前的排队时间不计入"""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at: Optional[float] = None
+        self._started = asyncio.Event()
+
+    def start(self) -> None:
+        if self.expires_at is None:
+            self.expires_at = asyncio.get_running_loop().time() + self.budget
+            self._started.set()
+
+    def allows(self, wait_seconds: float) -> bool:
+        """等待 wait_seconds 后是否仍在截止时间之前（尚未开始计时时总是允许）"""
+        if self.expires_at is None:
+            return True
+        return asyncio.get_running_loop().time() + wait_seconds < self.expires_at
+
+    async def expired(self) -> None:
+        """开始计时后等待到期"""
+        await self._started.wait()
+        await asyncio.sleep(max(0.0, self.expires_at - asyncio.get_running_loop().time()))
@@ -0,0 +1,207 @@
+"""
+按用途划分的有界线程池
+阻塞操作不再共用 asyncio 默认线程池，避免几个 Whisper 推理任务占满线程后拖慢缓存读写与存储 I/O：
+- asr_io：ASR 结果缓存读写、分片哈希等转录相关的小文件 I/O
+- inference：本地 Whisper 模型加载与推理（CPU 密集，默认 1 个线程）
+- media：源文件哈希、切片清单读写与校验（ffmpeg 子进程另由 media_toolkit 的信号量限制）
+- storage：用户、面试、转录稿等 JSON 存储读写
+每个线程池有独立的线程数与排队上限，排队已满时立即抛出 ExecutorSaturatedError（接口返回 503）
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+ASR_IO = "asr_io"
+INFERENCE = "inference"
+MEDIA = "media"
+STORAGE = "storage"
+
+# 名称 -> (默认线程数, 默认排队上限)
+_DEFAULTS: Dict[str, tuple] = {
+    ASR_IO: (8, 64),
+    INFERENCE: (1, 4),
+    MEDIA: (max(2, (os.cpu_count() or 2) // 2), 32),
+    STORAGE: (4, 64),
+}
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """线程池与排队均已满，调用方应稍后重试（HTTP 503）"""
+
+    def __init__(self, name: str, retry_after: float = 5.0):
+        super().__init__(f"服务繁忙（{name} 线程池已满），请稍后重试")
+        self.name = name
+        self.retry_after = retry_after
+
+
+@dataclass
+class ExecutorStats:
+    name: str
+    max_workers: int
+    max_queue: int
+    active: int
+    queued: int
+    completed: int
+    rejected: int
+    busy_seconds: float
+
+    @property
+    def utilization(self) -> float:
+        return self.active / self.max_workers if self.max_workers else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "maxWorkers": self.max_workers,
+            "maxQueue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "utilization": round(self.utilization, 3),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "busySeconds": round(self.busy_seconds, 3),
+        }
+
+
+class BoundedExecutor:
+    """固定大小的线程池 + 排队上限；排队中与执行中的任务数之和超过容量时拒绝新任务"""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"ir-{name}")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    @classmethod
+    def from_env(cls, name: str) -> "BoundedExecutor":
+        workers, queue = _DEFAULTS[name]
+        prefix = f"TRANSCRIBE_EXECUTOR_{name.upper()}"
+        return cls(
+            name,
+            int(os.getenv(f"{prefix}_WORKERS", str(workers))),
+            int(os.getenv(f"{prefix}_QUEUE", str(queue))),
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _update_gauges(self) -> None:
+        metrics.EXECUTOR_ACTIVE.labels(executor=self.name).set(self._active)
+        metrics.EXECUTOR_QUEUED.labels(executor=self.name).set(self._pending - self._active)
+
+    def _invoke(self, submitted: float, call: Callable[[], T]) -> T:
+        started = time.perf_counter()
+        metrics.EXECUTOR_WAIT.labels(executor=self.name).observe(started - submitted)
+        with self._lock:
+            self._active += 1
+            self._update_gauges()
+        try:
+            return call()
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._busy_seconds += time.perf_counter() - started
+                self._update_gauges()
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        在线程池中执行阻塞函数（与 asyncio.to_thread 一样传递 contextvars）
+
+        Raises:
+            ExecutorSaturatedError: 执行中与排队中的任务数已达容量上限
+        """
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                metrics.EXECUTOR_REJECTED.labels(executor=self.name).inc()
+                raise ExecutorSaturatedError(self.name)
+            self._pending += 1
+            self._update_gauges()
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._pool, self._invoke, time.perf_counter(), call)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+                self._update_gauges()
+
+    def stats(self) -> ExecutorStats:
+        with self._lock:
+            return ExecutorStats(
+                name=self.name,
+                max_workers=self.max_workers,
+                max_queue=self.max_queue,
+                active=self._active,
+                queued=max(0, self._pending - self._active),
+                completed=self._completed,
+                rejected=self._rejected,
+                busy_seconds=self._busy_seconds,
+            )
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executors: Dict[str, BoundedExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                executor = _executors[name] = BoundedExecutor.from_env(name)
+                logger.info(
+                    "[Executor] %s 线程池 workers=%d queue=%d",
+                    name,
+                    executor.max_workers,
+                    executor.max_queue
+                )
+    return executor
+
+
+async def run_blocking(name: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """在指定用途的线程池中执行阻塞函数"""
+    return await get_executor(name).run(func, *args, **kwargs)
+
+
+async def run_storage(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await run_blocking(STORAGE, func, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """各线程池的使用情况（未使用过的线程池不会创建）"""
+    return {name: executor.stats().to_dict() for name, executor in list(_executors.items())}
+
+
+def shutdown_executors(names: Optional[list] = None) -> None:
+    with _executors_lock:
+        for name in list(names or _executors):
+            executor = _executors.pop(name, None)
+            if executor is not None:
+                executor.shutdown()
@@ -0,0 +1,197 @@
+"""
+对冲请求（hedged requests）
+按分片时长分档统计进程内的请求延迟分布，某个请求超过该档位的 p90 仍未返回时，
+在对冲预算内再发一个相同请求，取先成功返回的结果，降低长尾分片拖慢整体完成时间
+"""
+import asyncio
+import logging
+import math
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 分片时长分档上界（秒），超出最后一档归入 "long"
+_DURATION_CLASSES: Sequence[int] = (60, 180, 420, 900)
+_WINDOW_SIZE = 200
+
+
+def duration_class(audio_seconds: float) -> str:
+    for bound in _DURATION_CLASSES:
+        if audio_seconds <= bound:
+            return f"<={bound}s"
+    return "long"
+
+
+class LatencyTracker:
+    """每个时长档位保留最近 N 个成功请求的延迟"""
+
+    def __init__(self, window: int = _WINDOW_SIZE):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, audio_seconds: float, latency: float) -> None:
+        key = duration_class(audio_seconds)
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(latency)
+
+    def quantile(self, audio_seconds: float, q: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples.get(duration_class(audio_seconds)) or ())
+        if len(samples) < max(1, min_samples):
+            return None
+        samples.sort()
+        position = min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))
+        return samples[position]
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {key: sorted(values) for key, values in self._samples.items()}
+        result: Dict[str, Dict[str, Any]] = {}
+        for key, values in snapshot.items():
+            if not values:
+                continue
+            result[key] = {
+                "count": len(values),
+                "p50": round(values[len(values) // 2], 3),
+                "p90": round(values[min(len(values) - 1, math.ceil(0.9 * len(values)) - 1)], 3),
+            }
+        return result
+
+
+@dataclass
+class HedgeStats:
+    requests: int
+    hedges: int
+    hedge_wins: int
+    budget_ratio: float
+    latency: Dict[str, Dict[str, Any]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedgeWins": self.hedge_wins,
+            "budgetRatio": self.budget_ratio,
+            "latency": self.latency,
+        }
+
+
+class RequestHedger:
+    """
+    对冲预算：对冲请求数不超过总请求数的 budget_ratio（另有少量初始额度）
+    延迟样本不足 min_samples 时不对冲，避免冷启动阶段误判
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        quantile: float = 0.9,
+        budget_ratio: float = 0.1,
+        min_samples: int = 10,
+        initial_budget: int = 2
+    ):
+        self.enabled = enabled
+        self.quantile = min(0.999, max(0.5, quantile))
+        self.budget_ratio = max(0.0, budget_ratio)
+        self.min_samples = max(1, min_samples)
+        self.initial_budget = max(0, initial_budget)
+        self.latency = LatencyTracker()
+        self._requests = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+
+    @classmethod
+    def from_env(cls) -> "RequestHedger":
+        return cls(
+            enabled=os.getenv("TRANSCRIBE_HEDGE_ENABLED", "true").lower() not in {"0", "false", "no"},
+            quantile=float(os.getenv("TRANSCRIBE_HEDGE_QUANTILE", "0.9")),
+            budget_ratio=float(os.getenv("TRANSCRIBE_HEDGE_BUDGET", "0.1")),
+            min_samples=int(os.getenv("TRANSCRIBE_HEDGE_MIN_SAMPLES", "10")),
+        )
+
+    def hedge_delay(self, audio_seconds: float) -> Optional[float]:
+        if not self.enabled or self.budget_ratio <= 0:
+            return None
+        return self.latency.quantile(audio_seconds, self.quantile, self.min_samples)
+
+    def _try_spend(self) -> bool:
+        allowed = self.initial_budget + self.budget_ratio * self._requests
+        if self._hedges + 1 > allowed:
+            return False
+        self._hedges += 1
+        return True
+
+    async def _timed(self, audio_seconds: float, request: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await request()
+        self.latency.record(audio_seconds, loop.time() - started)
+        return result
+
+    async def run(
+        self,
+        primary: Callable[[], Awaitable[T]],
+        hedge: Callable[[], Awaitable[T]],
+        *,
+        audio_seconds: float,
+        label: str = ""
+    ) -> T:
+        """
+        执行 primary；超过当前档位延迟分位数仍未完成时发出 hedge，返回先成功的结果
+        两个请求都失败时抛出最后一个异常；调用方取消时两个请求一并取消
+        """
+        self._requests += 1
+        primary_task = asyncio.ensure_future(self._timed(audio_seconds, primary))
+        tasks = {primary_task}
+        try:
+            delay = self.hedge_delay(audio_seconds)
+            if delay is None:
+                return await primary_task
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._try_spend():
+                return await primary_task
+
+            logger.info(
+                "[Hedge] %s 超过 p%d 延迟 %.1fs 未返回，发出对冲请求",
+                label,
+                int(self.quantile * 100),
+                delay
+            )
+            hedge_task = asyncio.ensure_future(self._timed(audio_seconds, hedge))
+            tasks.add(hedge_task)
+            last_error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    error = task.exception()
+                    if error is None:
+                        if task is hedge_task:
+                            self._hedge_wins += 1
+                        return task.result()
+                    last_error = error
+            assert last_error is not None
+            raise last_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> HedgeStats:
+        return HedgeStats(
+            requests=self._requests,
+            hedges=self._hedges,
+            hedge_wins=self._hedge_wins,
+            budget_ratio=self.budget_ratio,
+            latency=self.latency.summary(),
+        )
@@ -0,0 +1,291 @@
+"""
+共享异步 HTTP 客户端
+所有外部转录请求复用同一个 aiohttp 连接池（keep-alive），避免每个分片重复 TCP/TLS 握手；
+上传文件以流式 multipart 发送，不在内存中拼装请求体（打开文件与读取内容均在线程池中执行）；
+请求协程被取消（如超时）时会立即中断连接，不会遗留后台线程。
+aiohttp 只支持 HTTP/1.1，不支持 HTTP/2：每个在途请求独占一条 keep-alive 连接，
+并发上限即连接池大小（TRANSCRIBE_HTTP_POOL_SIZE），无法在单条连接上多路复用
+"""
+import asyncio
+import json
+import logging
+import os
+import weakref
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from . import metrics
+from .executors import ASR_IO, run_blocking
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:  # pragma: no cover - 依赖缺失时仅 mock 模式可用
+    aiohttp = None
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+HTTP_POOL_SIZE = max(1, int(os.getenv("TRANSCRIBE_HTTP_POOL_SIZE", "32")))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("TRANSCRIBE_HTTP_KEEPALIVE", "60"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("TRANSCRIBE_HTTP_CONNECT_TIMEOUT", "10"))
+_ERROR_BODY_LIMIT = 500
+
+
+class ProviderHTTPError(RuntimeError):
+    """转录服务返回非 2xx 状态码"""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或 HTTP 日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _open_upload(file_path: Path) -> Tuple[BinaryIO, int]:
+    """打开待上传的文件并取得大小（在线程池中执行）"""
+    handle = open(file_path, 'rb')
+    try:
+        return handle, os.fstat(handle.fileno()).st_size
+    except BaseException:
+        handle.close()
+        raise
+
+
+@dataclass
+class JSONResponse:
+    """非流式提供方调用的状态码、小写响应头与解析后的响应体"""
+
+    status: int
+    headers: Dict[str, str]
+    body: Any
+
+
+@dataclass
+class PoolStats:
+    """连接池配置与使用情况（用于诊断）"""
+
+    pool_size: int
+    keepalive_seconds: float
+    sessions: int
+    requests: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "poolSize": self.pool_size,
+            "keepaliveSeconds": self.keepalive_seconds,
+            "sessions": self.sessions,
+            "requests": self.requests,
+        }
+
+
+def _build_trace_config() -> "aiohttp.TraceConfig":
+    """记录请求体发送耗时（上传）与发送完成到响应头返回的耗时（服务端处理）"""
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params) -> None:
+        ctx.started = asyncio.get_running_loop().time()
+        ctx.body_sent = None
+
+    async def on_request_chunk_sent(session, ctx, params) -> None:
+        ctx.body_sent = asyncio.get_running_loop().time()
+
+    async def on_request_end(session, ctx, params) -> None:
+        if ctx.body_sent is None:
+            return
+        host = params.url.host or ""
+        metrics.UPLOAD_SECONDS.labels(host=host).observe(ctx.body_sent - ctx.started)
+        metrics.RESPONSE_SECONDS.labels(host=host).observe(asyncio.get_running_loop().time() - ctx.body_sent)
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_chunk_sent.append(on_request_chunk_sent)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+
+class AsyncHTTPClient:
+    """
+    按事件循环维护 aiohttp.ClientSession
+    ClientSession 绑定创建它的事件循环，测试或脚本中多次 asyncio.run 时各自获得独立会话
+    """
+
+    def __init__(
+        self,
+        pool_size: int = HTTP_POOL_SIZE,
+        keepalive_seconds: float = HTTP_KEEPALIVE_SECONDS,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT_SECONDS
+    ):
+        self.pool_size = pool_size
+        self.keepalive_seconds = keepalive_seconds
+        self.connect_timeout = connect_timeout
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._request_count = 0
+
+    def _require_aiohttp(self) -> None:
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("aiohttp 不可用，无法执行真实转录，请执行 pip install aiohttp")
+
+    async def session(self) -> "aiohttp.ClientSession":
+        self._require_aiohttp()
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=self.keepalive_seconds,
+                ttl_dns_cache=300
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout),
+                trace_configs=[_build_trace_config()]
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def warmup(self, url: str) -> bool:
+        """创建连接池并预先建立到目标主机的连接（失败不影响启动）"""
+        if not AIOHTTP_AVAILABLE:
+            return False
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}/"
+        try:
+            session = await self.session()
+            async with session.head(
+                origin,
+                allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(total=self.connect_timeout)
+            ) as response:
+                await response.release()
+            logger.info("[HTTP] 已预热连接池 host=%s", parts.netloc)
+            return True
+        except Exception as exc:
+            logger.info("[HTTP] 预热连接失败 host=%s: %s", parts.netloc, exc)
+            return False
+
+    async def post_file(
+        self,
+        url: str,
+        file_path: Path,
+        *,
+        fields: Optional[Mapping[str, str]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
+        file_field: str = "file"
+    ) -> Dict[str, Any]:
+        """
+        以流式 multipart 上传文件并解析 JSON 响应
+        打开文件在 asr_io 线程池中执行，文件内容由 aiohttp 分块读取（同样不在事件循环中读盘）
+
+        Raises:
+            ProviderHTTPError: 服务端返回非 2xx 状态码（附带 Retry-After）
+            ExecutorSaturatedError: asr_io 线程池已满
+        """
+        session = await self.session()
+        handle, file_size = await run_blocking(ASR_IO, _open_upload, file_path)
+        with handle:
+            self._request_count += 1
+            metrics.UPLOAD_BYTES.labels(host=urlsplit(url).netloc).inc(file_size)
+            form = aiohttp.FormData()
+            for key, value in (fields or {}).items():
+                form.add_field(key, value)
+            form.add_field(file_field, handle, filename=file_path.name)
+            async with session.post(
+                url,
+                data=form,
+                headers=dict(headers or {}),
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                if response.status >= 400:
+                    body = (await response.text(errors="ignore"))[:_ERROR_BODY_LIMIT]
+                    raise ProviderHTTPError(
+                        response.status,
+                        body.strip() or (response.reason or "请求失败"),
+                        retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                    )
+                return await response.json(content_type=None)
+
+    async def request_json(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Optional[Mapping[str, str]] = None,
+        data: Optional[Mapping[str, str]] = None,
+        json_body: Optional[Any] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> JSONResponse:
+        """
+        发送普通请求（表单或 JSON 请求体）并解析 JSON 响应，供异步任务型接口提交与轮询使用
+
+        Raises:
+            ProviderHTTPError: 服务端返回非 2xx 状态码（附带 Retry-After）
+        """
+        session = await self.session()
+        self._request_count += 1
+        async with session.request(
+            method,
+            url,
+            params=dict(params) if params else None,
+            data=dict(data) if data is not None else None,
+            json=json_body,
+            headers=dict(headers or {}),
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            text = await response.text(errors="ignore")
+            if response.status >= 400:
+                raise ProviderHTTPError(
+                    response.status,
+                    text[:_ERROR_BODY_LIMIT].strip() or (response.reason or "请求失败"),
+                    retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                )
+            try:
+                body = json.loads(text) if text.strip() else {}
+            except ValueError:
+                body = {}
+            return JSONResponse(
+                status=response.status,
+                headers={key.lower(): value for key, value in response.headers.items()},
+                body=body
+            )
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            pool_size=self.pool_size,
+            keepalive_seconds=self.keepalive_seconds,
+            sessions=sum(1 for session in self._sessions.values() if not session.closed),
+            requests=self._request_count,
+        )
+
+    async def close(self) -> None:
+        """关闭当前事件循环的会话（应用关闭时调用）"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+
+# 进程内共享的客户端实例
+shared_http_client = AsyncHTTPClient()
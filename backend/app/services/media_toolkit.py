@@ -0,0 +1,375 @@
+"""
+异步媒体工具
+基于 asyncio.create_subprocess_exec 调用 ffmpeg / ffprobe，避免阻塞事件循环
+支持超时与取消（会终止子进程）、解析 ffmpeg 进度输出、限制同时运行的 ffmpeg / ffprobe 进程数
+"""
+import asyncio
+import inspect
+import json
+import logging
+import os
+import shutil
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Sequence, Union
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_MAX_PROCESSES = max(1, int(os.getenv("FFMPEG_MAX_PROCESSES", str(max(1, (os.cpu_count() or 2) // 2)))))
+FFMPEG_TIMEOUT_SECONDS = float(os.getenv("FFMPEG_TIMEOUT", "1800"))
+FFPROBE_TIMEOUT_SECONDS = float(os.getenv("FFPROBE_TIMEOUT", "30"))
+_STDERR_TAIL_LINES = 40
+_STDOUT_BLOCK_SIZE = 64 * 1024
+
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+class MediaToolError(RuntimeError):
+    """ffmpeg / ffprobe 执行失败"""
+
+    def __init__(self, message: str, returncode: Optional[int] = None, stderr: str = ""):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class MediaToolNotFoundError(MediaToolError):
+    """系统未安装 ffmpeg / ffprobe"""
+
+
+@dataclass
+class MediaProgress:
+    """ffmpeg 通过 -progress 输出的处理进度"""
+
+    out_time_seconds: float
+    speed: Optional[float] = None
+    total_seconds: Optional[float] = None
+    finished: bool = False
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if not self.total_seconds:
+            return None
+        return min(1.0, self.out_time_seconds / self.total_seconds)
+
+
+@dataclass
+class MediaRunResult:
+    returncode: int
+    stdout: bytes
+    stderr_tail: str
+    elapsed_seconds: float
+    last_progress: Optional[MediaProgress] = None
+
+
+@dataclass
+class MediaInfo:
+    """上传文件的容器与音视频流信息（按文件缓存）"""
+
+    duration: Optional[float] = None
+    format_name: Optional[str] = None
+    bit_rate: Optional[int] = None
+    audio_codec: Optional[str] = None
+    channels: Optional[int] = None
+    sample_rate: Optional[int] = None
+    video_codec: Optional[str] = None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "duration": self.duration,
+            "formatName": self.format_name,
+            "bitRate": self.bit_rate,
+            "audioCodec": self.audio_codec,
+            "channels": self.channels,
+            "sampleRate": self.sample_rate,
+            "videoCodec": self.video_codec,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MediaInfo":
+        return cls(
+            duration=data.get("duration"),
+            format_name=data.get("formatName"),
+            bit_rate=data.get("bitRate"),
+            audio_codec=data.get("audioCodec"),
+            channels=data.get("channels"),
+            sample_rate=data.get("sampleRate"),
+            video_codec=data.get("videoCodec"),
+        )
+
+
+ProgressHandler = Callable[[MediaProgress], Union[None, Awaitable[None]]]
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """每个事件循环一个信号量，限制同时运行的 ffmpeg / ffprobe 进程数"""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(FFMPEG_MAX_PROCESSES)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+def _require_binary(name: str) -> str:
+    path = shutil.which(name)
+    if not path:
+        raise MediaToolNotFoundError(
+            f"系统未安装 {name}，请先安装: brew install ffmpeg (macOS) 或 sudo apt install ffmpeg (Ubuntu)"
+        )
+    return path
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+async def _terminate(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is not None:
+        return
+    try:
+        process.kill()
+    except ProcessLookupError:
+        return
+    try:
+        await asyncio.wait_for(process.wait(), timeout=5)
+    except asyncio.TimeoutError:  # pragma: no cover - 进程无法退出时仅记录
+        logger.warning("[Media] 子进程 pid=%s 未能及时退出", process.pid)
+
+
+async def _notify(handler: Optional[ProgressHandler], progress: MediaProgress) -> None:
+    if not handler:
+        return
+    try:
+        outcome = handler(progress)
+        if inspect.isawaitable(outcome):
+            await outcome
+    except Exception as exc:  # pragma: no cover - best effort
+        logger.debug("[Media] 进度回调失败: %s", exc)
+
+
+def _parse_speed(value: str) -> Optional[float]:
+    value = value.strip().rstrip("x")
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+async def run_ffmpeg(
+    args: Sequence[str],
+    *,
+    timeout: Optional[float] = None,
+    progress: Optional[ProgressHandler] = None,
+    total_seconds: Optional[float] = None,
+    capture_stdout: bool = False,
+    stdout_handler: Optional[Callable[[bytes], None]] = None
+) -> MediaRunResult:
+    """
+    异步执行 ffmpeg
+
+    Args:
+        args: ffmpeg 参数（不含可执行文件本身）
+        timeout: 超时时间（秒），超时会终止进程并抛出 asyncio.TimeoutError
+        progress: 进度回调，接收 MediaProgress（可为协程函数）
+        total_seconds: 输入总时长，用于计算进度比例
+        capture_stdout: 是否收集标准输出
+        stdout_handler: 以数据块流式处理标准输出（如 PCM），不在内存中累积
+
+    Raises:
+        MediaToolError: ffmpeg 返回非零退出码
+    """
+    ffmpeg_path = _require_binary("ffmpeg")
+    command = [
+        ffmpeg_path,
+        "-hide_banner",
+        "-nostdin",
+        "-nostats",
+        "-progress", "pipe:2",
+        *[str(arg) for arg in args]
+    ]
+    limit = timeout if timeout is not None else FFMPEG_TIMEOUT_SECONDS
+
+    async with _get_semaphore():
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=(
+                asyncio.subprocess.PIPE
+                if capture_stdout or stdout_handler
+                else asyncio.subprocess.DEVNULL
+            ),
+            stderr=asyncio.subprocess.PIPE
+        )
+        tail: Deque[str] = deque(maxlen=_STDERR_TAIL_LINES)
+        state: Dict[str, Any] = {"last": None}
+
+        async def read_stderr() -> None:
+            current: Dict[str, str] = {}
+            assert process.stderr is not None
+            async for raw_line in process.stderr:
+                line = raw_line.decode("utf-8", errors="ignore").strip()
+                if not line:
+                    continue
+                key, sep, value = line.partition("=")
+                if not sep or " " in key:
+                    tail.append(line)
+                    continue
+                current[key] = value
+                if key != "progress":
+                    continue
+                previous = state["last"]
+                out_seconds = previous.out_time_seconds if previous else 0.0
+                out_time = current.get("out_time_us") or current.get("out_time_ms")
+                if out_time:
+                    try:
+                        out_seconds = max(0.0, int(out_time) / 1_000_000)
+                    except ValueError:
+                        pass
+                snapshot = MediaProgress(
+                    out_time_seconds=out_seconds,
+                    speed=_parse_speed(current.get("speed", "")),
+                    total_seconds=total_seconds,
+                    finished=value == "end"
+                )
+                state["last"] = snapshot
+                current = {}
+                await _notify(progress, snapshot)
+
+        async def read_stdout() -> bytes:
+            if process.stdout is None:
+                return b""
+            if stdout_handler:
+                while True:
+                    block = await process.stdout.read(_STDOUT_BLOCK_SIZE)
+                    if not block:
+                        return b""
+                    stdout_handler(block)
+            return await process.stdout.read()
+
+        try:
+            _, stdout_data, _ = await asyncio.wait_for(
+                asyncio.gather(read_stderr(), read_stdout(), process.wait()),
+                timeout=limit
+            )
+        except asyncio.TimeoutError:
+            await _terminate(process)
+            logger.error("[Media] ffmpeg 执行超时（>%ss），已终止 output=%s", limit, command[-1])
+            raise
+        except asyncio.CancelledError:
+            await _terminate(process)
+            logger.info("[Media] ffmpeg 任务已取消，已终止子进程 pid=%s", process.pid)
+            raise
+        except BaseException as exc:
+            # 如 stdout_handler 或读取输出时抛出异常：同样终止子进程，避免 ffmpeg 在后台继续运行
+            await _terminate(process)
+            logger.error("[Media] ffmpeg 输出处理失败，已终止子进程 pid=%s: %s", process.pid, exc)
+            raise
+
+        elapsed = time.perf_counter() - started
+        stderr_tail = "\n".join(tail)
+        if process.returncode != 0:
+            raise MediaToolError(
+                f"ffmpeg 返回码 {process.returncode}: {stderr_tail.strip() or '未知错误'}",
+                returncode=process.returncode,
+                stderr=stderr_tail
+            )
+        return MediaRunResult(
+            returncode=process.returncode,
+            stdout=stdout_data,
+            stderr_tail=stderr_tail,
+            elapsed_seconds=elapsed,
+            last_progress=state["last"]
+        )
+
+
+async def run_ffprobe(args: Sequence[str], *, timeout: Optional[float] = None) -> str:
+    """异步执行 ffprobe，返回标准输出文本"""
+    ffprobe_path = _require_binary("ffprobe")
+    command = [ffprobe_path, "-v", "error", *[str(arg) for arg in args]]
+    limit = timeout if timeout is not None else FFPROBE_TIMEOUT_SECONDS
+
+    # 与 ffmpeg 共用进程数上限，批量上传时的探测不会额外挤占 CPU
+    async with _get_semaphore():
+        with metrics.PROBE_SECONDS.time():
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=limit)
+            except BaseException:
+                await _terminate(process)
+                raise
+
+    if process.returncode != 0:
+        message = stderr.decode("utf-8", errors="ignore").strip()
+        raise MediaToolError(
+            f"ffprobe 返回码 {process.returncode}: {message or '未知错误'}",
+            returncode=process.returncode,
+            stderr=message
+        )
+    return stdout.decode("utf-8", errors="ignore")
+
+
+async def probe_duration(file_path: Path) -> Optional[float]:
+    """获取媒体时长（秒），无法获取时返回 None"""
+    try:
+        output = await run_ffprobe([
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            str(file_path)
+        ])
+        return float(output.strip())
+    except Exception as exc:
+        logger.debug("Failed to obtain duration for %s: %s", file_path, exc)
+        return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def probe_media(file_path: Path) -> MediaInfo:
+    """一次 ffprobe 获取时长、容器与首个音/视频流信息"""
+    output = await run_ffprobe([
+        "-show_entries", "format=duration,format_name,bit_rate:stream=codec_type,codec_name,channels,sample_rate",
+        "-of", "json",
+        str(file_path)
+    ])
+    data = json.loads(output or "{}")
+    fmt = data.get("format") or {}
+    streams = data.get("streams") or []
+    audio = next((item for item in streams if item.get("codec_type") == "audio"), None)
+    video = next((item for item in streams if item.get("codec_type") == "video"), None)
+    return MediaInfo(
+        duration=_to_float(fmt.get("duration")),
+        format_name=fmt.get("format_name"),
+        bit_rate=_to_int(fmt.get("bit_rate")),
+        audio_codec=audio.get("codec_name") if audio else None,
+        channels=_to_int(audio.get("channels")) if audio else None,
+        sample_rate=_to_int(audio.get("sample_rate")) if audio else None,
+        video_codec=video.get("codec_name") if video else None,
+    )
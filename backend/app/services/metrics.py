@@ -0,0 +1,153 @@
+"""
+转录流水线的 Prometheus 指标（prometheus_client，独立的 CollectorRegistry）
+"""
+import logging
+from typing import Any, Optional, Sequence, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "interreview"
+
+LATENCY_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 900.0)
+MEDIA_BUCKETS = (0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_registry = CollectorRegistry()
+
+
+def _counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return Counter(f"{NAMESPACE}_{name}", documentation, labelnames, registry=_registry)
+
+
+def _gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return Gauge(f"{NAMESPACE}_{name}", documentation, labelnames, registry=_registry)
+
+
+def _histogram(name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]) -> Histogram:
+    return Histogram(f"{NAMESPACE}_{name}", documentation, labelnames, buckets=buckets, registry=_registry)
+
+
+# 分片请求 ---------------------------------------------------------------
+CHUNK_LATENCY = _histogram(
+    "transcribe_chunk_seconds",
+    "Per-attempt chunk transcription latency (including failover), by provider/model/attempt",
+    ("provider", "model", "attempt", "outcome"),
+    LATENCY_BUCKETS,
+)
+CHUNK_RETRIES = _counter(
+    "transcribe_chunk_retries",
+    "Chunk transcription retries, by failure reason",
+    ("reason",),
+)
+UPLOAD_BYTES = _counter(
+    "asr_upload_bytes",
+    "Audio bytes uploaded to ASR providers",
+    ("host",),
+)
+UPLOAD_SECONDS = _histogram(
+    "asr_upload_seconds",
+    "Time from request start until the request body is fully sent",
+    ("host",),
+    LATENCY_BUCKETS,
+)
+RESPONSE_SECONDS = _histogram(
+    "asr_response_seconds",
+    "Time from request body sent until response headers arrive (provider processing)",
+    ("host",),
+    LATENCY_BUCKETS,
+)
+
+# 音频处理 ---------------------------------------------------------------
+PROBE_SECONDS = _histogram(
+    "probe_seconds",
+    "ffprobe invocation time",
+    (),
+    MEDIA_BUCKETS,
+)
+TRANSCODE_SECONDS = _histogram(
+    "transcode_seconds",
+    "Canonical audio transcode time",
+    ("profile", "mode"),
+    MEDIA_BUCKETS,
+)
+SEGMENT_SECONDS = _histogram(
+    "segment_seconds",
+    "Chunk segmentation time on already transcoded audio",
+    ("strategy",),
+    MEDIA_BUCKETS,
+)
+
+# 调度与并发 -------------------------------------------------------------
+SCHEDULER_WAIT = _histogram(
+    "scheduler_wait_seconds",
+    "Time a chunk request waits for a scheduler slot (queue + concurrency window + rate limit)",
+    ("priority",),
+    WAIT_BUCKETS,
+)
+QUEUE_DEPTH = _gauge(
+    "scheduler_queue_depth",
+    "Chunk requests waiting in the scheduler, by priority class",
+    ("priority",),
+)
+ASR_IN_FLIGHT = _gauge("asr_in_flight", "ASR requests currently holding a concurrency slot")
+ASR_CONCURRENCY_LIMIT = _gauge("asr_concurrency_limit", "Current adaptive concurrency window")
+TASKS_IN_FLIGHT = _gauge(
+    "transcription_tasks_in_flight",
+    "Whole-file transcription tasks currently running",
+    ("transcriber",),
+)
+JOB_ABORTS = _counter(
+    "transcription_job_aborts",
+    "Transcription jobs stopped early, by reason (auth / quota / failure_ratio)",
+    ("reason",),
+)
+
+# 线程池 -----------------------------------------------------------------
+EXECUTOR_ACTIVE = _gauge("executor_active", "Blocking calls currently running, by executor", ("executor",))
+EXECUTOR_QUEUED = _gauge("executor_queued", "Blocking calls waiting for a worker thread, by executor", ("executor",))
+EXECUTOR_REJECTED = _counter(
+    "executor_rejected",
+    "Blocking calls rejected because the executor queue was full",
+    ("executor",),
+)
+EXECUTOR_WAIT = _histogram(
+    "executor_wait_seconds",
+    "Time a blocking call waits for a worker thread",
+    ("executor",),
+    WAIT_BUCKETS,
+)
+
+
+def histogram_totals(metric: Histogram) -> Tuple[float, float]:
+    """汇总直方图所有标签的 (观测次数, 累计值)，供基准测试前后对比"""
+    count = total = 0.0
+    for family in metric.collect():
+        for sample in family.samples:
+            if sample.name == f"{family.name}_count":
+                count += sample.value
+            elif sample.name == f"{family.name}_sum":
+                total += sample.value
+    return count, total
+
+
+def update_scheduler_gauges(scheduler: Any) -> None:
+    """抓取时根据调度器快照刷新队列深度与并发窗口"""
+    snapshot = scheduler.snapshot()
+    QUEUE_DEPTH.labels(priority="interactive").set(snapshot.queued_retries)
+    QUEUE_DEPTH.labels(priority="short").set(snapshot.queued_short)
+    QUEUE_DEPTH.labels(priority="bulk").set(snapshot.queued_bulk)
+    limiter = scheduler.limiter.snapshot()
+    ASR_IN_FLIGHT.set(limiter.in_flight)
+    ASR_CONCURRENCY_LIMIT.set(limiter.limit)
+
+
+def render_latest(scheduler: Optional[Any] = None) -> Tuple[bytes, str]:
+    """生成 Prometheus 文本格式的指标输出，返回 (内容, Content-Type)"""
+    if scheduler is not None:
+        try:
+            update_scheduler_gauges(scheduler)
+        except Exception as exc:  # pragma: no cover - best effort
+            logger.debug("[Metrics] 刷新调度器指标失败: %s", exc)
+    return generate_latest(_registry), CONTENT_TYPE_LATEST
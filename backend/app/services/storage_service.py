@@ -3,12 +3,32 @@
 支持 JSON 文件存储（本地开发）和 Supabase 数据库（生产环境）
 """
 import json
+import os
 import shutil
+import threading
+import uuid
+import weakref
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from app.config import settings
 
+# 同一用户的读-改-写串行执行（存储线程池中的多个线程可能同时修改同一个 JSON 文件）
+# 锁表在进程内共享（各路由与进度跟踪器各自创建 StorageService 实例），
+# 弱引用字典只保留正在使用的锁，不会随用户数无限增长
+_user_locks: "weakref.WeakValueDictionary[str, threading.RLock]" = weakref.WeakValueDictionary()
+_user_locks_guard = threading.Lock()
+
+
+def _user_lock(user_id: str) -> threading.RLock:
+    with _user_locks_guard:
+        lock = _user_locks.get(user_id)
+        if lock is None:
+            lock = threading.RLock()
+            _user_locks[user_id] = lock
+        return lock
+
+
 class StorageService:
     """本地 JSON 文件存储服务"""
 
@@ -20,6 +40,19 @@ class StorageService:
         template_dir = (settings.DEMO_DATA_TEMPLATE_DIR or "").strip()
         self.demo_template_dir = Path(template_dir).resolve() if template_dir else None
 
+    @staticmethod
+    def _write_json(file_path: Path, data: Any) -> None:
+        """先写临时文件再原子替换，读取方不会读到写了一半的文件"""
+        temp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex[:8]}")
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, file_path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
     def _get_user_file(self, user_id: str, file_name: str) -> Path:
         """获取用户数据文件路径"""
         user_dir = self.data_dir / user_id
@@ -28,14 +61,14 @@ class StorageService:
 
     def save_user(self, user_id: str, user_data: Dict[str, Any]) -> bool:
         """保存用户数据"""
-        try:
-            file_path = self._get_user_file(user_id, "user.json")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(user_data, f, ensure_ascii=False, indent=2, default=str)
-            return True
-        except Exception as e:
-            print(f"保存用户数据失败: {e}")
-            return False
+        with _user_lock(user_id):
+            try:
+                file_path = self._get_user_file(user_id, "user.json")
+                self._write_json(file_path, user_data)
+                return True
+            except Exception as e:
+                print(f"保存用户数据失败: {e}")
+                return False
 
     def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         """获取用户数据"""
@@ -76,14 +109,14 @@ class StorageService:
 
     def save_interviews(self, user_id: str, interviews: List[Dict[str, Any]]) -> bool:
         """保存面试列表"""
-        try:
-            file_path = self._get_user_file(user_id, "interviews.json")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(interviews, f, ensure_ascii=False, indent=2, default=str)
-            return True
-        except Exception as e:
-            print(f"保存面试数据失败: {e}")
-            return False
+        with _user_lock(user_id):
+            try:
+                file_path = self._get_user_file(user_id, "interviews.json")
+                self._write_json(file_path, interviews)
+                return True
+            except Exception as e:
+                print(f"保存面试数据失败: {e}")
+                return False
 
     def get_interviews(self, user_id: str) -> List[Dict[str, Any]]:
         """获取面试列表"""
@@ -99,51 +132,54 @@ class StorageService:
 
     def create_interview(self, user_id: str, interview_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """创建面试"""
-        try:
-            # 确保有创建时间
-            if 'createdAt' not in interview_data:
-                interview_data['createdAt'] = datetime.utcnow().isoformat()
+        with _user_lock(user_id):
+            try:
+                # 确保有创建时间
+                if 'createdAt' not in interview_data:
+                    interview_data['createdAt'] = datetime.utcnow().isoformat()
 
-            interviews = self.get_interviews(user_id)
-            interviews.append(interview_data)
+                interviews = self.get_interviews(user_id)
+                interviews.append(interview_data)
 
-            if self.save_interviews(user_id, interviews):
-                return interview_data
-            return None
-        except Exception as e:
-            print(f"创建面试失败: {e}")
-            return None
+                if self.save_interviews(user_id, interviews):
+                    return interview_data
+                return None
+            except Exception as e:
+                print(f"创建面试失败: {e}")
+                return None
 
     def update_interview(self, user_id: str, interview_id: str, updates: Dict[str, Any]) -> bool:
         """更新面试"""
-        try:
-            interviews = self.get_interviews(user_id)
-            updated = False
-
-            for interview in interviews:
-                if interview.get('id') == interview_id:
-                    interview.update(updates)
-                    if 'updatedAt' not in updates:
-                        interview['updatedAt'] = datetime.utcnow().isoformat()
-                    updated = True
-                    break
-
-            if updated:
-                return self.save_interviews(user_id, interviews)
-            return False
-        except Exception as e:
-            print(f"更新面试失败: {e}")
-            return False
+        with _user_lock(user_id):
+            try:
+                interviews = self.get_interviews(user_id)
+                updated = False
+
+                for interview in interviews:
+                    if interview.get('id') == interview_id:
+                        interview.update(updates)
+                        if 'updatedAt' not in updates:
+                            interview['updatedAt'] = datetime.utcnow().isoformat()
+                        updated = True
+                        break
+
+                if updated:
+                    return self.save_interviews(user_id, interviews)
+                return False
+            except Exception as e:
+                print(f"更新面试失败: {e}")
+                return False
 
     def delete_interview(self, user_id: str, interview_id: str) -> bool:
         """删除面试"""
-        try:
-            interviews = self.get_interviews(user_id)
-            interviews = [i for i in interviews if i.get('id') != interview_id]
-            return self.save_interviews(user_id, interviews)
-        except Exception as e:
-            print(f"删除面试失败: {e}")
-            return False
+        with _user_lock(user_id):
+            try:
+                interviews = self.get_interviews(user_id)
+                interviews = [i for i in interviews if i.get('id') != interview_id]
+                return self.save_interviews(user_id, interviews)
+            except Exception as e:
+                print(f"删除面试失败: {e}")
+                return False
 
     def get_messages(self, user_id: str) -> Dict[str, List[Dict[str, Any]]]:
         """获取对话消息"""
@@ -159,35 +195,36 @@ class StorageService:
 
     def save_messages(self, user_id: str, messages: Dict[str, List[Dict[str, Any]]]) -> bool:
         """保存对话消息"""
-        try:
-            file_path = self._get_user_file(user_id, "messages.json")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(messages, f, ensure_ascii=False, indent=2, default=str)
-            return True
-        except Exception as e:
-            print(f"保存对话消息失败: {e}")
-            return False
+        with _user_lock(user_id):
+            try:
+                file_path = self._get_user_file(user_id, "messages.json")
+                self._write_json(file_path, messages)
+                return True
+            except Exception as e:
+                print(f"保存对话消息失败: {e}")
+                return False
 
     def save_analysis_map(self, user_id: str, analysis_map: Dict[str, Any]) -> bool:
         """保存整份分析结果"""
-        try:
-            file_path = self._get_user_file(user_id, "analysis.json")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(analysis_map, f, ensure_ascii=False, indent=2, default=str)
-            return True
-        except Exception as e:
-            print(f"保存分析数据失败: {e}")
-            return False
+        with _user_lock(user_id):
+            try:
+                file_path = self._get_user_file(user_id, "analysis.json")
+                self._write_json(file_path, analysis_map)
+                return True
+            except Exception as e:
+                print(f"保存分析数据失败: {e}")
+                return False
 
     def save_analysis(self, user_id: str, interview_id: str, analysis_data: Dict[str, Any]) -> bool:
         """保存分析结果"""
-        try:
-            all_analysis = self.get_analysis(user_id) or {}
-            all_analysis[interview_id] = analysis_data
-            return self.save_analysis_map(user_id, all_analysis)
-        except Exception as e:
-            print(f"保存分析数据失败: {e}")
-            return False
+        with _user_lock(user_id):
+            try:
+                all_analysis = self.get_analysis(user_id) or {}
+                all_analysis[interview_id] = analysis_data
+                return self.save_analysis_map(user_id, all_analysis)
+            except Exception as e:
+                print(f"保存分析数据失败: {e}")
+                return False
 
     def get_analysis(self, user_id: str, interview_id: str = None) -> Optional[Dict[str, Any]]:
         """获取分析结果"""
@@ -225,20 +262,21 @@ class StorageService:
 
     def save_transcripts(self, user_id: str, transcripts: Dict[str, Any]) -> bool:
         """保存全部转录"""
-        try:
-            file_path = self._get_user_file(user_id, "transcripts.json")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(transcripts, f, ensure_ascii=False, indent=2, default=str)
-            return True
-        except Exception as e:
-            print(f"保存转录数据失败: {e}")
-            return False
+        with _user_lock(user_id):
+            try:
+                file_path = self._get_user_file(user_id, "transcripts.json")
+                self._write_json(file_path, transcripts)
+                return True
+            except Exception as e:
+                print(f"保存转录数据失败: {e}")
+                return False
 
     def save_transcript(self, user_id: str, interview_id: str, transcript: Dict[str, Any]) -> bool:
         """保存单个面试的转录"""
-        transcripts = self.get_transcripts(user_id)
-        transcripts[interview_id] = transcript
-        return self.save_transcripts(user_id, transcripts)
+        with _user_lock(user_id):
+            transcripts = self.get_transcripts(user_id)
+            transcripts[interview_id] = transcript
+            return self.save_transcripts(user_id, transcripts)
 
     # Demo helpers -----------------------------------------------------
     def is_demo_user(self, user_id: Optional[str] = None, email: Optional[str] = None) -> bool:
@@ -266,8 +304,9 @@ class StorageService:
         if not self.demo_user_id:
             return None
 
-        force = reset or not self.demo_user_exists()
-        return self._sync_demo_template(password_hash=password_hash, force=force)
+        with _user_lock(self.demo_user_id):
+            force = reset or not self.demo_user_exists()
+            return self._sync_demo_template(password_hash=password_hash, force=force)
 
     def _sync_demo_template(self, password_hash: str, force: bool) -> Optional[Dict[str, Any]]:
         """复制模板数据到演示账号目录"""
@@ -297,8 +336,7 @@ class StorageService:
                 existing = None
 
         user_payload = self._build_demo_user_payload(password_hash, existing)
-        with open(user_file, "w", encoding="utf-8") as f:
-            json.dump(user_payload, f, ensure_ascii=False, indent=2, default=str)
+        self._write_json(user_file, user_payload)
         return user_payload
 
     def _build_demo_user_payload(
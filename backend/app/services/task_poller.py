@@ -0,0 +1,224 @@
+"""
+异步任务轮询器
+"提交任务 -> 轮询结果"型的转录接口（阿里云录音文件识别、火山引擎 AUC 等）共用一个轮询器：
+所有未完成的任务 id 在同一个事件循环中复用一个调度协程，每个任务按指数退避安排下一次查询，
+不再为每个任务占用一个线程或一个 while True + sleep 循环
+"""
+import asyncio
+import itertools
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from .http_client import ProviderHTTPError
+
+logger = logging.getLogger(__name__)
+
+# 返回 None 表示任务仍在排队/运行，返回其他值表示任务完成
+PollFunction = Callable[[], Awaitable[Optional[Any]]]
+
+
+class TaskFailedError(RuntimeError):
+    """服务端明确报告任务失败（不再继续轮询）"""
+
+
+@dataclass
+class _PollEntry:
+    task_id: str
+    label: str
+    query: PollFunction
+    future: asyncio.Future
+    interval: float
+    next_at: float
+    polls: int = 0
+    errors: int = 0
+    in_flight: bool = False
+
+
+@dataclass
+class PollerStats:
+    outstanding: int
+    polls: int
+    completed: int
+    failed: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "outstanding": self.outstanding,
+            "polls": self.polls,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+class AsyncTaskPoller:
+    """
+    单个调度协程管理所有待轮询任务：
+    - 到期的任务并发发起查询，查询间隔从 initial_interval 起按 backoff_factor 增长至 max_interval
+    - 查询本身出错（网络、5xx、429）视为暂时故障，继续退避轮询，连续 max_errors 次后判定失败
+    - 调用方取消等待时移除对应任务
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_interval: float = 1.0,
+        max_interval: float = 15.0,
+        backoff_factor: float = 1.5,
+        max_errors: int = 5
+    ):
+        self.initial_interval = max(0.01, initial_interval)
+        self.max_interval = max(self.initial_interval, max_interval)
+        self.backoff_factor = max(1.0, backoff_factor)
+        self.max_errors = max(1, max_errors)
+        self._entries: Dict[int, _PollEntry] = {}
+        self._ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._queries: Set[asyncio.Task] = set()
+        self._polls = 0
+        self._completed = 0
+        self._failed = 0
+
+    @classmethod
+    def from_env(cls) -> "AsyncTaskPoller":
+        return cls(
+            initial_interval=float(os.getenv("TRANSCRIBE_POLL_INITIAL_INTERVAL", "1")),
+            max_interval=float(os.getenv("TRANSCRIBE_POLL_MAX_INTERVAL", "15")),
+            backoff_factor=float(os.getenv("TRANSCRIBE_POLL_BACKOFF", "1.5")),
+        )
+
+    def _ensure_runner(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 新的事件循环（如脚本中多次 asyncio.run）：旧循环上的任务已随循环结束
+            self._loop = loop
+            self._entries.clear()
+            self._queries.clear()
+            self._runner = None
+            self._wakeup = asyncio.Event()
+        if self._runner is None or self._runner.done():
+            self._runner = loop.create_task(self._run())
+
+    async def wait(
+        self,
+        task_id: str,
+        query: PollFunction,
+        *,
+        label: str = "",
+        first_delay: Optional[float] = None
+    ) -> Any:
+        """登记一个已提交的任务并等待其结果"""
+        self._ensure_runner()
+        loop = asyncio.get_running_loop()
+        key = next(self._ids)
+        entry = _PollEntry(
+            task_id=task_id,
+            label=label or task_id,
+            query=query,
+            future=loop.create_future(),
+            interval=self.initial_interval,
+            next_at=loop.time() + (self.initial_interval if first_delay is None else first_delay),
+        )
+        self._entries[key] = entry
+        self._wakeup.set()
+        try:
+            return await entry.future
+        finally:
+            self._entries.pop(key, None)
+            # 唤醒调度协程，没有剩余任务时让其退出
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._entries:
+            now = loop.time()
+            next_at: Optional[float] = None
+            for entry in list(self._entries.values()):
+                if entry.in_flight or entry.future.done():
+                    continue
+                if entry.next_at <= now:
+                    entry.in_flight = True
+                    query_task = loop.create_task(self._poll(entry))
+                    self._queries.add(query_task)
+                    query_task.add_done_callback(self._queries.discard)
+                elif next_at is None or entry.next_at < next_at:
+                    next_at = entry.next_at
+            self._wakeup.clear()
+            timeout = None if next_at is None else max(0.0, next_at - loop.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, entry: _PollEntry) -> None:
+        loop = asyncio.get_running_loop()
+        self._polls += 1
+        entry.polls += 1
+        try:
+            result = await entry.query()
+        except asyncio.CancelledError:
+            raise
+        except TaskFailedError as exc:
+            self._finish(entry, error=exc)
+            return
+        except ProviderHTTPError as exc:
+            if 400 <= exc.status < 500 and exc.status != 429:
+                self._finish(entry, error=exc)
+                return
+            self._on_poll_error(entry, exc, retry_after=exc.retry_after)
+        except Exception as exc:
+            self._on_poll_error(entry, exc)
+        else:
+            if result is not None:
+                self._finish(entry, result=result)
+                return
+            entry.errors = 0
+            self._schedule_next(entry, loop.time())
+        finally:
+            entry.in_flight = False
+            self._wakeup.set()
+
+    def _on_poll_error(self, entry: _PollEntry, exc: BaseException, retry_after: Optional[float] = None) -> None:
+        entry.errors += 1
+        if entry.errors >= self.max_errors:
+            self._finish(entry, error=exc)
+            return
+        logger.info("[TaskPoller] 查询任务 %s 失败（第 %d 次），稍后重试: %s", entry.label, entry.errors, exc)
+        self._schedule_next(entry, asyncio.get_running_loop().time(), minimum=retry_after or 0.0)
+
+    def _schedule_next(self, entry: _PollEntry, now: float, minimum: float = 0.0) -> None:
+        entry.next_at = now + max(entry.interval, minimum)
+        entry.interval = min(self.max_interval, entry.interval * self.backoff_factor)
+
+    def _finish(self, entry: _PollEntry, *, result: Any = None, error: Optional[BaseException] = None) -> None:
+        if entry.future.done():
+            return
+        if error is not None:
+            self._failed += 1
+            entry.future.set_exception(error)
+        else:
+            self._completed += 1
+            entry.future.set_result(result)
+        logger.debug("[TaskPoller] 任务 %s 结束 polls=%d", entry.label, entry.polls)
+
+    def stats(self) -> PollerStats:
+        return PollerStats(
+            outstanding=len(self._entries),
+            polls=self._polls,
+            completed=self._completed,
+            failed=self._failed,
+        )
+
+
+_poller: Optional[AsyncTaskPoller] = None
+
+
+def get_task_poller() -> AsyncTaskPoller:
+    """进程内共享的异步任务轮询器（懒加载）"""
+    global _poller
+    if _poller is None:
+        _poller = AsyncTaskPoller.from_env()
+    return _poller
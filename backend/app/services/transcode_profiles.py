@@ -0,0 +1,90 @@
+"""
+标准化音频的转码配置
+语音识别只需要 16kHz 单声道，低码率编码即可保持识别准确率，
+而上传字节数直接决定每个分片的请求耗时；通过 TRANSCRIBE_TRANSCODE_PROFILE 选择配置，
+不同配置生成的标准化音频与分片互不覆盖
+"""
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = "mp3-hq"
+
+
+@dataclass(frozen=True)
+class TranscodeProfile:
+    """标准化音频及其分片的编码参数"""
+
+    name: str
+    codec: str
+    codec_args: Tuple[str, ...]
+    suffix: str
+    muxer: str
+    description: str = ""
+
+    @property
+    def encode_args(self) -> List[str]:
+        return ["-acodec", self.codec, *self.codec_args]
+
+    @property
+    def file_tag(self) -> str:
+        """文件名中的配置标记；默认配置沿用原有文件名，已生成的资产无需重建"""
+        return "" if self.name == DEFAULT_PROFILE else f"_{self.name}"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "name": self.name,
+            "codec": self.codec,
+            "codecArgs": list(self.codec_args),
+            "suffix": self.suffix,
+            "description": self.description,
+        }
+
+
+PROFILES: Dict[str, TranscodeProfile] = {
+    profile.name: profile
+    for profile in (
+        TranscodeProfile(
+            name="mp3-hq",
+            codec="libmp3lame",
+            codec_args=("-q:a", "2"),
+            suffix=".mp3",
+            muxer="mp3",
+            description="MP3 VBR 高质量（原有配置）",
+        ),
+        TranscodeProfile(
+            name="mp3-32k",
+            codec="libmp3lame",
+            codec_args=("-b:a", "32k"),
+            suffix=".mp3",
+            muxer="mp3",
+            description="MP3 32kbps CBR，兼容性最好的低码率配置",
+        ),
+        TranscodeProfile(
+            name="opus-24k",
+            codec="libopus",
+            codec_args=("-b:a", "24k", "-application", "voip"),
+            suffix=".ogg",
+            muxer="ogg",
+            description="Opus 24kbps 语音模式（Ogg 封装）",
+        ),
+    )
+}
+
+
+def get_profile(name: str) -> TranscodeProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"未知的转码配置: {name}（可选: {', '.join(PROFILES)}）")
+
+
+def profile_from_env() -> TranscodeProfile:
+    name = os.getenv("TRANSCRIBE_TRANSCODE_PROFILE", DEFAULT_PROFILE).strip().lower()
+    if name not in PROFILES:
+        logger.warning("[Transcode] 未知的转码配置 %s，使用默认配置 %s", name, DEFAULT_PROFILE)
+        name = DEFAULT_PROFILE
+    return PROFILES[name]
@@ -0,0 +1,279 @@
+"""
+转录时间轴索引
+每个分片记录其在原音频中的起止时间与句子级时间戳（绝对秒数），
+整个转录再汇总为按开始时间排序的紧凑数组索引（starts/ends/chunks/texts 四个并列数组），
+用于：按时间二分定位句子、把 QA 的 question_time 映射回音频位置、
+以及只重新转录某个时间区间后把新句子拼回对应分片
+提供方未返回时间戳时，按字数比例在分片区间内估算
+"""
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# (start, end, text)，单位秒
+Segment = Tuple[float, float, str]
+
+TIMELINE_VERSION = 1
+_SENTENCE_PATTERN = re.compile(r"[^。！？!?；;\n]+[。！？!?；;]*")
+_TIMECODE_PATTERN = re.compile(r"(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?(?:[.,](\d+))?")
+
+
+def parse_timecode(value: Any) -> Optional[float]:
+    """解析 "06:41" / "1:02:03" / "07:03-07:53"（取起点）形式的时间，返回秒数"""
+    if isinstance(value, (int, float)):
+        return float(value) if value >= 0 else None
+    if not isinstance(value, str):
+        return None
+    match = _TIMECODE_PATTERN.search(value)
+    if not match:
+        return None
+    first, second, third, fraction = match.groups()
+    if third is None:
+        seconds = int(first) * 60 + int(second)
+    else:
+        seconds = int(first) * 3600 + int(second) * 60 + int(third)
+    if fraction:
+        seconds += float(f"0.{fraction}")
+    return float(seconds)
+
+
+def format_timecode(seconds: float) -> str:
+    total = max(0, int(seconds))
+    hours, rest = divmod(total, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+def join_segment_texts(texts: Iterable[str]) -> str:
+    """拼接句子文本：中文直接相连，两侧都是英文/数字时补一个空格"""
+    result = ""
+    for text in texts:
+        text = (text or "").strip()
+        if not text:
+            continue
+        if result and result[-1].isascii() and result[-1].isalnum() and text[0].isascii() and text[0].isalnum():
+            result += " "
+        result += text
+    return result
+
+
+def estimate_segments(text: str, start: float, end: float) -> List[Segment]:
+    """按标点切句，并按字数比例把 [start, end) 分配给各句（提供方没有返回时间戳时使用）"""
+    sentences = [item.strip() for item in _SENTENCE_PATTERN.findall(text or "") if item.strip()]
+    if not sentences or end <= start:
+        return []
+    total_chars = sum(len(sentence) for sentence in sentences)
+    span = end - start
+    segments: List[Segment] = []
+    cursor = start
+    for sentence in sentences:
+        seg_end = cursor + span * len(sentence) / total_chars
+        segments.append((round(cursor, 2), round(seg_end, 2), sentence))
+        cursor = seg_end
+    return segments
+
+
+def shift_segments(segments: Iterable[Sequence[Any]], offset: float) -> List[Segment]:
+    """把相对分片的时间戳平移为绝对时间"""
+    return [
+        (round(float(item[0]) + offset, 2), round(float(item[1]) + offset, 2), str(item[2]))
+        for item in segments
+        if len(item) >= 3 and str(item[2]).strip()
+    ]
+
+
+def _chunk_bounds(
+    chunk: Dict[str, Any],
+    manifest_chunks: Dict[int, Dict[str, Any]],
+    duration: Optional[float]
+) -> Optional[Tuple[float, float, float]]:
+    """分片的 (start, end, overlap)；旧转录记录没有时取分片清单，单分片转录取整段音频"""
+    index = int(chunk.get("index", 0))
+    entry = manifest_chunks.get(index) or {}
+    start = chunk.get("start", entry.get("start"))
+    end = chunk.get("end", entry.get("end"))
+    if start is None or end is None:
+        if len(manifest_chunks) > 1 or not duration:
+            return None
+        start, end = 0.0, duration
+    return float(start), float(end), float(entry.get("overlap") or 0.0)
+
+
+def chunk_segments(
+    chunk: Dict[str, Any],
+    bounds: Optional[Tuple[float, float, float]]
+) -> List[Segment]:
+    """分片已记录的句子时间戳；没有时按分片区间估算"""
+    stored = chunk.get("segments")
+    if stored:
+        return [(float(item[0]), float(item[1]), str(item[2])) for item in stored]
+    if bounds is None:
+        return []
+    return estimate_segments(chunk.get("text") or "", bounds[0], bounds[1])
+
+
+def estimated_chunks(chunks: Iterable[Dict[str, Any]]) -> Set[int]:
+    """时间戳为按字数估算（提供方未返回句子时间戳）的成功分片序号"""
+    return {
+        int(chunk.get("index", 0))
+        for chunk in chunks
+        if isinstance(chunk, dict)
+        and chunk.get("status", "ok") == "ok"
+        and (chunk.get("timestamps") == "estimated" or not chunk.get("segments"))
+    }
+
+
+def _manifest_lookup(manifest: Optional[Dict[str, Any]]) -> Tuple[Dict[int, Dict[str, Any]], Optional[float]]:
+    entries: Dict[int, Dict[str, Any]] = {}
+    for item in (manifest or {}).get("chunks") or []:
+        if isinstance(item, dict) and item.get("index") is not None:
+            entries[int(item["index"])] = item
+    duration = (manifest or {}).get("duration")
+    return entries, float(duration) if duration else None
+
+
+@dataclass
+class TranscriptTimeline:
+    """整篇转录稿的句子索引（按时间排序，基于数组存储）"""
+
+    starts: List[float] = field(default_factory=list)
+    ends: List[float] = field(default_factory=list)
+    chunks: List[int] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @classmethod
+    def from_chunks(
+        cls,
+        chunks: Sequence[Dict[str, Any]],
+        manifest: Optional[Dict[str, Any]] = None
+    ) -> "TranscriptTimeline":
+        """
+        由分片结果构建索引；相邻分片的重叠区间以中点为界，
+        中点之前的句子归上一分片，之后的归下一分片，避免重复
+        """
+        manifest_chunks, duration = _manifest_lookup(manifest)
+        ordered = sorted(
+            (chunk for chunk in chunks if isinstance(chunk, dict)),
+            key=lambda item: int(item.get("index", 0))
+        )
+        bounds = [_chunk_bounds(chunk, manifest_chunks, duration) for chunk in ordered]
+        rows: List[Tuple[float, float, int, str]] = []
+        for pos, chunk in enumerate(ordered):
+            if chunk.get("status", "ok") != "ok":
+                continue
+            own = bounds[pos]
+            lower = own[0] + own[2] / 2 if own and pos > 0 else float("-inf")
+            following = bounds[pos + 1] if pos + 1 < len(bounds) else None
+            upper = following[0] + following[2] / 2 if following else float("inf")
+            for start, end, text in chunk_segments(chunk, own):
+                if lower <= (start + end) / 2 < upper:
+                    rows.append((start, end, int(chunk.get("index", pos)), text))
+        rows.sort(key=lambda row: (row[0], row[1]))
+        return cls(
+            starts=[row[0] for row in rows],
+            ends=[row[1] for row in rows],
+            chunks=[row[2] for row in rows],
+            texts=[row[3] for row in rows],
+        )
+
+    def locate(self, seconds: float) -> Optional[int]:
+        """返回 seconds 所在（或之前最近）的句子序号"""
+        if not self.starts:
+            return None
+        pos = bisect_right(self.starts, seconds) - 1
+        return max(0, pos)
+
+    def between(self, start: float, end: float) -> List[int]:
+        """与 [start, end) 有交集的句子序号"""
+        if not self.starts or end <= start:
+            return []
+        # 句子按开始时间排序，开始于 end 之后的一定不相交
+        upper = bisect_left(self.starts, end)
+        return [pos for pos in range(upper) if self.ends[pos] > start]
+
+    def entry(self, pos: int) -> Dict[str, Any]:
+        return {
+            "start": self.starts[pos],
+            "end": self.ends[pos],
+            "chunk": self.chunks[pos],
+            "text": self.texts[pos],
+        }
+
+    def render(self, approximate_chunks: Iterable[int] = ()) -> str:
+        """
+        带时间码的逐句文本，供 LLM 分析时引用真实音频时间
+        approximate_chunks 中分片的时间码是估算值，标注为 "≈mm:ss" 并在开头加一行说明
+        """
+        approximate = set(approximate_chunks)
+        lines = [
+            f"[{'≈' if chunk in approximate else ''}{format_timecode(start)}] {text}"
+            for start, chunk, text in zip(self.starts, self.chunks, self.texts)
+        ]
+        if any(chunk in approximate for chunk in self.chunks):
+            lines.insert(0, "（标注 ≈ 的时间码按字数比例估算，仅为大致位置）")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": TIMELINE_VERSION,
+            "starts": self.starts,
+            "ends": self.ends,
+            "chunks": self.chunks,
+            "texts": self.texts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["TranscriptTimeline"]:
+        if not isinstance(data, dict) or data.get("version") != TIMELINE_VERSION:
+            return None
+        starts = [float(value) for value in data.get("starts") or []]
+        ends = [float(value) for value in data.get("ends") or []]
+        chunks = [int(value) for value in data.get("chunks") or []]
+        texts = [str(value) for value in data.get("texts") or []]
+        if not len(starts) == len(ends) == len(chunks) == len(texts):
+            return None
+        return cls(starts=starts, ends=ends, chunks=chunks, texts=texts)
+
+
+def splice_range(
+    chunks: List[Dict[str, Any]],
+    manifest: Optional[Dict[str, Any]],
+    start: float,
+    end: float,
+    segments: Sequence[Segment]
+) -> List[int]:
+    """
+    用区间 [start, end) 重新转录得到的句子（绝对时间）替换各分片中中点落在该区间内的句子，
+    并按句子重建分片文本；完全被区间覆盖的失败分片同时标记为成功
+    返回被修改的分片序号
+    """
+    manifest_chunks, duration = _manifest_lookup(manifest)
+    touched: List[int] = []
+    for chunk in chunks:
+        bounds = _chunk_bounds(chunk, manifest_chunks, duration)
+        if bounds is None:
+            continue
+        chunk_start, chunk_end, _ = bounds
+        if chunk_end <= start or chunk_start >= end:
+            continue
+        covered = start <= chunk_start and end >= chunk_end
+        if chunk.get("status") != "ok" and not covered:
+            continue
+        existing = chunk_segments(chunk, bounds) if chunk.get("status") == "ok" else []
+        kept = [item for item in existing if not start <= (item[0] + item[1]) / 2 < end]
+        added = [item for item in segments if chunk_start <= (item[0] + item[1]) / 2 < chunk_end]
+        merged = sorted(kept + added, key=lambda item: (item[0], item[1]))
+        chunk.update({
+            "start": round(chunk_start, 3),
+            "end": round(chunk_end, 3),
+            "segments": [list(item) for item in merged],
+            "text": join_segment_texts(item[2] for item in merged),
+            "status": "ok",
+            "error": None,
+        })
+        touched.append(int(chunk.get("index", 0)))
+    return touched
@@ -0,0 +1,233 @@
+"""
+可恢复的转录任务记录
+每个转录任务在 data/transcription_jobs 下保存一个 JSON 记录（用户、面试、文件、模型），
+分片转录成功后立即写入该记录（检查点），任务正常结束（成功或报错）后删除记录。
+进程重启后仍存在的记录即为被中断的任务：启动时认领这些记录，
+已完成的分片直接复用，只转录剩余分片，不必重新支付已完成部分的 ASR 费用
+"""
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .executors import STORAGE, run_blocking
+from .transcription_service import ChunkCheckpoint, ChunkTranscription
+
+logger = logging.getLogger(__name__)
+
+JOB_DIR = os.getenv("TRANSCRIBE_JOB_DIR", "./data/transcription_jobs")
+JOB_RESUME_ENABLED = os.getenv("TRANSCRIBE_JOB_RESUME", "true").lower() not in {"0", "false", "no"}
+# 同一任务最多恢复的次数（避免每次启动都因同一个任务崩溃）
+JOB_MAX_RESUMES = max(1, int(os.getenv("TRANSCRIBE_JOB_MAX_RESUMES", "3")))
+
+
+@dataclass
+class TranscriptionJob:
+    task_id: str
+    user_id: str
+    interview_id: str
+    file_path: str
+    model: str
+    owner_pid: int = field(default_factory=os.getpid)
+    resume_count: int = 0
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    chunks: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+
+    def completed_chunks(self) -> Dict[int, ChunkTranscription]:
+        """已成功的分片（检查点），恢复时跳过"""
+        return {
+            idx: ChunkTranscription.from_dict(chunk)
+            for idx, chunk in self.chunks.items()
+            if chunk.get("status") == "ok"
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "taskId": self.task_id,
+            "userId": self.user_id,
+            "interviewId": self.interview_id,
+            "filePath": self.file_path,
+            "model": self.model,
+            "ownerPid": self.owner_pid,
+            "resumeCount": self.resume_count,
+            "createdAt": self.created_at,
+            "updatedAt": self.updated_at,
+            "chunks": [self.chunks[idx] for idx in sorted(self.chunks)],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TranscriptionJob":
+        return cls(
+            task_id=data["taskId"],
+            user_id=data["userId"],
+            interview_id=data["interviewId"],
+            file_path=data["filePath"],
+            model=data["model"],
+            owner_pid=int(data.get("ownerPid") or 0),
+            resume_count=int(data.get("resumeCount") or 0),
+            created_at=data.get("createdAt") or datetime.utcnow().isoformat(),
+            updated_at=data.get("updatedAt") or datetime.utcnow().isoformat(),
+            chunks={int(chunk["index"]): chunk for chunk in data.get("chunks") or []},
+        )
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TranscriptionJobStore:
+    """任务记录的读写；同一任务的检查点写入串行化，文件以临时文件 + 替换的方式原子写入"""
+
+    def __init__(self, job_dir: str = JOB_DIR):
+        self.job_dir = Path(job_dir)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, TranscriptionJob] = {}
+
+    def _job_path(self, task_id: str) -> Path:
+        return self.job_dir / f"{task_id}.json"
+
+    def _write(self, job: TranscriptionJob) -> None:
+        path = self._job_path(job.task_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(job.to_dict(), f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        temp_path.replace(path)
+
+    def _read(self, path: Path) -> Optional[TranscriptionJob]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return TranscriptionJob.from_dict(json.load(f))
+        except Exception as exc:
+            logger.warning("[Jobs] 无法读取任务记录 %s: %s", path.name, exc)
+            return None
+
+    def create(
+        self,
+        task_id: str,
+        user_id: str,
+        interview_id: str,
+        file_path: Path,
+        model: str
+    ) -> TranscriptionJob:
+        job = TranscriptionJob(
+            task_id=task_id,
+            user_id=user_id,
+            interview_id=interview_id,
+            file_path=str(file_path),
+            model=model
+        )
+        with self._lock:
+            self._write(job)
+            self._jobs[task_id] = job
+        return job
+
+    def checkpoint(self, task_id: str, chunk: ChunkTranscription) -> None:
+        """记录一个已成功的分片；失败的分片不记录，恢复时重新转录"""
+        if chunk.status != "ok":
+            return
+        with self._lock:
+            job = self._jobs.get(task_id)
+            if job is None:
+                return
+            job.chunks[chunk.index] = chunk.to_dict()
+            job.updated_at = datetime.utcnow().isoformat()
+            self._write(job)
+
+    def checkpointer(self, task_id: str) -> ChunkCheckpoint:
+        """供转录服务调用的异步检查点回调（写入在存储线程池中执行，失败只记录日志）"""
+        async def save(chunk: ChunkTranscription) -> None:
+            try:
+                await run_blocking(STORAGE, self.checkpoint, task_id, chunk)
+            except Exception as exc:
+                logger.warning("[Jobs] 写入检查点失败 task=%s chunk=%s: %s", task_id, chunk.index, exc)
+
+        return save
+
+    def finish(self, task_id: str) -> None:
+        """任务结束（结果已保存或已报错），删除记录"""
+        with self._lock:
+            self._jobs.pop(task_id, None)
+            self._job_path(task_id).unlink(missing_ok=True)
+            self._claim_path(task_id).unlink(missing_ok=True)
+
+    def _claim_path(self, task_id: str) -> Path:
+        return self.job_dir / f".{task_id}.claim"
+
+    def _try_claim(self, job: TranscriptionJob) -> bool:
+        """
+        认领被中断的任务：原进程仍存活（如多 worker 部署中的其他进程）时不认领；
+        认领标记以独占方式创建，多个进程同时启动时只有一个能恢复该任务
+        """
+        if job.owner_pid != os.getpid() and _pid_alive(job.owner_pid):
+            return False
+        claim = self._claim_path(job.task_id)
+        for _ in range(2):
+            try:
+                fd = os.open(claim, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    holder = int(claim.read_text().strip() or 0)
+                except (OSError, ValueError):
+                    holder = 0
+                if _pid_alive(holder):
+                    return False
+                claim.unlink(missing_ok=True)
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(str(os.getpid()))
+            return True
+        return False
+
+    def claim_unfinished(self) -> List[TranscriptionJob]:
+        """认领所有被中断的任务记录，按创建时间排序"""
+        if not self.job_dir.exists():
+            return []
+        claimed: List[TranscriptionJob] = []
+        for path in sorted(self.job_dir.glob("*.json")):
+            job = self._read(path)
+            with self._lock:
+                # 本进程中正在执行的任务（启动后已经收到的请求）
+                active = job is not None and job.task_id in self._jobs
+            if job is None or active or not self._try_claim(job):
+                continue
+            job.owner_pid = os.getpid()
+            job.resume_count += 1
+            job.updated_at = datetime.utcnow().isoformat()
+            with self._lock:
+                self._write(job)
+                self._jobs[job.task_id] = job
+            claimed.append(job)
+        claimed.sort(key=lambda item: item.created_at)
+        return claimed
+
+
+_store: Optional[TranscriptionJobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> TranscriptionJobStore:
+    """进程内共享的任务记录存储（懒加载）"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TranscriptionJobStore()
+        return _store
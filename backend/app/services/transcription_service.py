@@ -1,25 +1,47 @@
 import os
-import shutil
-import subprocess
-import tempfile
 import uuid
 import logging
 import time
-try:
-    import requests
-except ImportError:  # pragma: no cover - fallback for mock mode
-    requests = None
 import asyncio
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Sequence, Literal, Callable, Awaitable, Tuple
 from pathlib import Path
 from datetime import datetime
 
+from . import media_toolkit, metrics
+from .asr_cache import ASRResultCache, get_asr_cache
+from .asr_providers import (
+    FATAL_FAILURE_KINDS,
+    ProviderRouter,
+    RoutedTranscription,
+    build_provider_router,
+    classify_failure,
+    format_speaker_text
+)
+from .asr_scheduler import ASRScheduler, get_asr_scheduler
+from .chunk_timeouts import ChunkTimeoutPolicy, JobDeadline
+from .executors import ASR_IO, ExecutorSaturatedError, run_blocking
+from .audio_assets import AudioAsset, AudioAssetService, ChunkManifest
+from .audio_segmenter import SegmenterConfig, dedupe_overlap
+from .hedging import RequestHedger
+from .http_client import AsyncHTTPClient, ProviderHTTPError, shared_http_client
+from .media_toolkit import ProgressHandler as MediaProgressHandler
+from .transcript_timeline import Segment, estimate_segments, shift_segments
+
 logger = logging.getLogger(__name__)
 
 ChunkStatus = Literal["pending", "ok", "error"]
 
 
+class FatalTranscriptionError(RuntimeError):
+    """鉴权失败或额度耗尽：其余分片必然同样失败，应立即停止整个任务"""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
 @dataclass
 class ChunkTranscription:
     """Chunk-level transcription result used for manifest."""
@@ -31,6 +53,13 @@ class ChunkTranscription:
     error: Optional[str] = None
     retry_count: int = 0
     updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    provider: Optional[str] = None
+    # 分片在原音频中的起止时间与句子级时间戳（绝对秒数）
+    start: Optional[float] = None
+    end: Optional[float] = None
+    segments: List[Segment] = field(default_factory=list)
+    # 时间戳来源：provider（提供方返回）/ estimated（按字数估算）
+    timestamps: Optional[str] = None
 
     def to_dict(self) -> Dict[str, Optional[str]]:
         return {
@@ -41,6 +70,50 @@ class ChunkTranscription:
             "error": self.error,
             "retryCount": self.retry_count,
             "updatedAt": self.updated_at,
+            "provider": self.provider,
+            "start": round(self.start, 3) if self.start is not None else None,
+            "end": round(self.end, 3) if self.end is not None else None,
+            "segments": [list(item) for item in self.segments],
+            "timestamps": self.timestamps,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "ChunkTranscription":
+        return cls(
+            index=int(data["index"]),
+            filename=data.get("filename") or "",
+            status=data.get("status") or "pending",
+            text=data.get("text") or "",
+            error=data.get("error"),
+            retry_count=int(data.get("retryCount") or 0),
+            updated_at=data.get("updatedAt") or datetime.utcnow().isoformat(),
+            provider=data.get("provider"),
+            start=data.get("start"),
+            end=data.get("end"),
+            segments=shift_segments(data.get("segments") or [], 0.0),
+            timestamps=data.get("timestamps"),
+        )
+
+
+@dataclass
+class RangeTranscription:
+    """原音频任意 [start, end) 区间的重新转录结果"""
+
+    start: float
+    end: float
+    text: str
+    segments: List[Segment]
+    provider: Optional[str] = None
+    timestamps: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "start": round(self.start, 3),
+            "end": round(self.end, 3),
+            "text": self.text,
+            "segments": [list(item) for item in self.segments],
+            "provider": self.provider,
+            "timestamps": self.timestamps,
         }
 
 
@@ -53,6 +126,7 @@ class TranscriptionResult:
     overall_status: str
     failed_chunks: List[ChunkTranscription]
     summary: Optional["TranscriptionSummary"] = None
+    manifest: Optional[ChunkManifest] = None
 
     def to_dict(self) -> Dict[str, object]:
         return {
@@ -62,6 +136,7 @@ class TranscriptionResult:
             "overallStatus": self.overall_status,
             "failedChunks": [chunk.to_dict() for chunk in self.failed_chunks],
             "summary": self.summary.to_dict() if self.summary else None,
+            "chunkManifest": self.manifest.to_dict() if self.manifest else None,
         }
 
 
@@ -120,31 +195,243 @@ class TranscriptionProgress:
 
 
 ProgressCallback = Callable[[TranscriptionProgress], Awaitable[None]]
+# 分片转录完成后的检查点回调（持久化已完成的分片，进程重启后可从断点恢复）
+ChunkCheckpoint = Callable[[ChunkTranscription], Awaitable[None]]
+
+
+class ChunkResultMixin:
+    """分片结果的合并、汇总与进度上报（在线 API 与本地 Whisper 转录共用）"""
+
+    failure_ratio_threshold: float = 0.3
+    chunk_duration_seconds: int = 600
+
+    def _check_range_span(self, start: float, end: float) -> None:
+        """按区间重新转录的长度上限约为一个分片，避免把整段音频作为单个请求处理"""
+        if end <= start:
+            raise ValueError("转录区间为空或超出音频时长")
+        max_span = max(self.chunk_duration_seconds * 1.5, self.chunk_duration_seconds + 60)
+        if end - start > max_span:
+            raise ValueError(f"单次最多重新转录 {max_span:.0f} 秒")
+
+    def _build_transcription_result(
+        self,
+        chunks: List[ChunkTranscription],
+        task_id: Optional[str] = None,
+        manifest: Optional[ChunkManifest] = None
+    ) -> TranscriptionResult:
+        """构造完整的转录结果"""
+        overlaps = {chunk.index: chunk.overlap for chunk in manifest.chunks} if manifest else {}
+        merged_text = self._combine_chunk_texts(chunks, overlaps)
+        failed = [chunk for chunk in chunks if chunk.status == "error"]
+        summary = self._build_summary(task_id or f"transcribe-{uuid.uuid4().hex}", chunks, failed)
+        overall_status = self._determine_overall_status(summary)
+        return TranscriptionResult(
+            chunks=chunks,
+            merged_text=merged_text,
+            overall_status=overall_status,
+            failed_chunks=failed,
+            summary=summary,
+            manifest=manifest
+        )
+
+    def _build_summary(
+        self,
+        task_id: str,
+        chunks: Sequence[ChunkTranscription],
+        failed: Sequence[ChunkTranscription]
+    ) -> TranscriptionSummary:
+        total = len(chunks)
+        failed_count = len(failed)
+        success_count = total - failed_count
+        if total == 0:
+            return TranscriptionSummary(
+                task_id=task_id,
+                total_chunks=0,
+                success_chunks=0,
+                failed_chunks=0,
+                failure_ratio=0.0,
+                status="empty",
+                error_message="没有可用于转录的分片"
+            )
+
+        failure_ratio = failed_count / total if total else 0.0
+        if failed_count == 0:
+            status = "completed"
+            error_message = None
+        elif failure_ratio > self.failure_ratio_threshold:
+            status = "failed"
+            error_message = self._summarize_failures(failed, total, failure_ratio)
+        else:
+            status = "partial"
+            error_message = self._summarize_failures(failed, total, failure_ratio)
+
+        return TranscriptionSummary(
+            task_id=task_id,
+            total_chunks=total,
+            success_chunks=success_count,
+            failed_chunks=failed_count,
+            failure_ratio=failure_ratio,
+            status=status,
+            error_message=error_message
+        )
+
+    def _summarize_failures(
+        self,
+        failed_chunks: Sequence[ChunkTranscription],
+        total_chunks: int,
+        ratio: float
+    ) -> str:
+        details: List[str] = []
+        for chunk in failed_chunks[:5]:
+            label = f"#{chunk.index}"
+            if chunk.error:
+                details.append(f"{label}:{chunk.error}")
+            else:
+                details.append(label)
+        suffix = ", ".join(details)
+        if len(failed_chunks) > len(details):
+            suffix += f" (+{len(failed_chunks) - len(details)} more)"
+        percent = f"{ratio * 100:.0f}%"
+        return f"{len(failed_chunks)}/{total_chunks} 分片失败（{percent}），详情: {suffix}"
+
+    def _determine_overall_status(self, summary: TranscriptionSummary) -> str:
+        if summary.status == "empty":
+            return "empty"
+        if summary.status == "completed":
+            return "completed"
+        if summary.status == "partial":
+            return "partial"
+        return "error"
 
-class TranscriptionService:
+    def _combine_chunk_texts(
+        self,
+        chunks: List[ChunkTranscription],
+        overlaps: Optional[Dict[int, float]] = None
+    ) -> str:
+        """合并分片转录结果，分片之间有重叠音频时去除重复文本"""
+        combined_segments: List[str] = []
+        total = len(chunks)
+        overlaps = overlaps or {}
+        for idx, chunk in enumerate(chunks):
+            label = chunk.filename or f"chunk_{idx:03d}"
+            header = f"【分片 {idx + 1}/{total} · {label}】"
+            combined_segments.append(header)
+            if chunk.status == "ok":
+                content = (chunk.text or "").strip()
+                previous = chunks[idx - 1] if idx > 0 else None
+                if content and previous is not None and previous.status == "ok":
+                    content = dedupe_overlap(previous.text or "", content, overlaps.get(chunk.index, 0.0))
+                if content:
+                    combined_segments.append(content)
+                else:
+                    combined_segments.append("(该分片暂无可显示的内容)")
+            elif chunk.status == "error":
+                combined_segments.append(f"(分片转录失败：{chunk.error or '请稍后重试'})")
+            else:
+                combined_segments.append("(分片仍在处理中)")
+            combined_segments.append("")
+        return "\n".join(segment for segment in combined_segments if segment.strip())
+
+    def _build_progress(
+        self,
+        task_id: str,
+        *,
+        status: Literal["uploaded", "transcribing", "merging", "completed", "failed"],
+        total_chunks: int,
+        completed_chunks: int,
+        failed_chunks: int,
+        stage: Optional[str] = None,
+        message: Optional[str] = None,
+        error_message: Optional[str] = None,
+        chunk_index: Optional[int] = None,
+        chunk_status: Optional[ChunkStatus] = None
+    ) -> TranscriptionProgress:
+        safe_total = max(0, total_chunks)
+        safe_completed = max(0, completed_chunks)
+        safe_failed = max(0, failed_chunks)
+        progress_value = 0.0
+        if safe_total > 0:
+            progress_value = min(1.0, safe_completed / safe_total)
+        return TranscriptionProgress(
+            task_id=task_id,
+            status=status,
+            total_chunks=safe_total,
+            completed_chunks=safe_completed,
+            failed_chunks=safe_failed,
+            progress=progress_value,
+            stage=stage or status,
+            message=message,
+            error_message=error_message,
+            chunk_index=chunk_index,
+            chunk_status=chunk_status
+        )
+
+    def _media_progress_reporter(
+        self,
+        task_id: str,
+        callback: Optional[ProgressCallback]
+    ) -> Optional[MediaProgressHandler]:
+        """将 ffmpeg 转码进度转换为转录进度（每 10% 上报一次）"""
+        if not callback:
+            return None
+        state = {"bucket": -1}
+
+        async def report(media_progress: media_toolkit.MediaProgress) -> None:
+            ratio = media_progress.ratio
+            if ratio is None:
+                return
+            bucket = int(ratio * 10)
+            if bucket <= state["bucket"]:
+                return
+            state["bucket"] = bucket
+            await self._emit_progress(
+                callback,
+                self._build_progress(
+                    task_id,
+                    status="transcribing",
+                    total_chunks=0,
+                    completed_chunks=0,
+                    failed_chunks=0,
+                    stage="normalizing",
+                    message=f"正在标准化音频 {ratio * 100:.0f}%"
+                )
+            )
+
+        return report
+
+    async def _emit_progress(
+        self,
+        callback: Optional[ProgressCallback],
+        progress: Optional[TranscriptionProgress]
+    ) -> None:
+        if not callback or not progress:
+            return
+        try:
+            await callback(progress)
+        except Exception as exc:  # pragma: no cover - best effort logging
+            logger.warning("Transcription progress callback failed: %s", exc)
+
+
+class TranscriptionService(ChunkResultMixin):
     """语音转文字服务 - 使用 SiliconFlow API"""
 
     def __init__(self, api_key: Optional[str]):
         self.api_key = api_key
-        self.base_url = "https://api.siliconflow.cn/v1/audio/transcriptions"
+        # 可指向本地模拟服务（app/tools/fake_asr_server.py）进行压测与故障演练
+        self.base_url = os.getenv(
+            "TRANSCRIBE_SILICONFLOW_URL",
+            "https://api.siliconflow.cn/v1/audio/transcriptions"
+        )
+        self.provider_name = "siliconflow"
         self.supported_extensions = [
             '.mp3', '.wav', '.m4a', '.mp4', '.avi', '.mov', '.flac', '.ogg', '.txt', '.md'
         ]
-        self.convertible_extensions = {
-            '.wav', '.m4a', '.mp4', '.avi', '.mov', '.flac', '.ogg'
-        }
         self.max_file_size = 200 * 1024 * 1024  # 200MB, 与上传保持一致
         self.chunk_duration_seconds = int(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "600"))
-        self.max_parallel_chunks = max(
-            1,
-            int(
-                os.getenv(
-                    "TRANSCRIBE_MAX_CONCURRENCY",
-                    os.getenv("TRANSCRIPTION_CHUNK_WORKERS", "4")
-                )
-            )
-        )
-        self.chunk_timeout_seconds = int(os.getenv("TRANSCRIBE_CHUNK_TIMEOUT", "60"))
+        self.segmenter = SegmenterConfig.from_env(self.chunk_duration_seconds)
+        # 单次请求超时按分片时长与实测速度计算，TRANSCRIBE_CHUNK_TIMEOUT 为上限
+        self.timeouts = ChunkTimeoutPolicy.from_env()
+        self.chunk_timeout_seconds = self.timeouts.maximum
         self.chunk_retry_attempts = max(0, int(os.getenv("TRANSCRIBE_MAX_RETRIES", "2")))
         self.chunk_max_attempts = self.chunk_retry_attempts + 1
         self.retry_base_delay = float(os.getenv("TRANSCRIBE_RETRY_BASE_DELAY", "2"))
@@ -153,8 +440,26 @@ class TranscriptionService:
             1.0,
             max(0.0, float(os.getenv("TRANSCRIBE_FAILURE_THRESHOLD", "0.3")))
         )
+        # 失败比例已确定超过阈值，或出现鉴权/额度错误时，取消其余分片
+        self.early_abort = os.getenv("TRANSCRIBE_EARLY_ABORT", "true").lower() not in {"0", "false", "no"}
         mock_flag = os.getenv("MOCK_TRANSCRIPTION", "").lower() == "true"
         self.use_mock = mock_flag or not api_key
+        self.audio_assets = AudioAssetService()
+        self.http_client: AsyncHTTPClient = shared_http_client
+        # 进程级调度器：全局限速 + 按用户公平排队，并发窗口在所有任务间共享
+        # 并发窗口的初始值（TRANSCRIBE_MAX_CONCURRENCY / TRANSCRIPTION_CHUNK_WORKERS）由进程级调度器读取
+        self.scheduler: ASRScheduler = get_asr_scheduler()
+        self.concurrency = self.scheduler.limiter
+        self.asr_cache: ASRResultCache = get_asr_cache()
+        self.hedger = RequestHedger.from_env()
+        # 多提供方故障转移：按 TRANSCRIBE_PROVIDERS 顺序选择未熔断的提供方
+        self.router: ProviderRouter = build_provider_router(self)
+
+    async def warmup(self) -> None:
+        """启动时预热各提供方（HTTP 连接池等），首个分片无需再等待 TCP/TLS 握手"""
+        if self.use_mock:
+            return
+        await self.router.warmup()
 
     async def transcribe_audio(
         self,
@@ -162,10 +467,16 @@ class TranscriptionService:
         model: str = "FunAudioLLM/SenseVoiceSmall",
         *,
         task_id: Optional[str] = None,
-        progress_callback: Optional[ProgressCallback] = None
+        progress_callback: Optional[ProgressCallback] = None,
+        user_id: Optional[str] = None,
+        checkpoint: Optional[ChunkCheckpoint] = None,
+        completed_chunks: Optional[Dict[int, ChunkTranscription]] = None
     ) -> TranscriptionResult:
         """
         转录音频/视频/文本文件为文本
+        user_id 用于进程级调度器的按用户公平排队
+        checkpoint 在每个分片完成后调用（持久化检查点）；
+        completed_chunks 为中断前已完成的分片，恢复任务时直接复用，只转录其余分片
         """
         if not file_path.exists():
             raise FileNotFoundError(f"文件不存在: {file_path}")
@@ -241,45 +552,78 @@ class TranscriptionService:
             )
             return result
 
-        chunk_dir: Optional[Path] = None
-        chunk_files: List[Path] = []
-        temp_file: Optional[Path] = None
-
+        tasks_in_flight = metrics.TASKS_IN_FLIGHT.labels(transcriber="api")
+        tasks_in_flight.inc()
         try:
-            transcription_target = file_path
-
-            if self._should_convert_to_mp3(file_path):
-                temp_file = self._convert_to_mp3(file_path)
-                transcription_target = temp_file
-
-            if self._should_chunk_audio(transcription_target):
-                chunk_dir = Path(tempfile.mkdtemp(prefix="ir_chunk_"))
-                chunk_files = self._split_audio_file(transcription_target, chunk_dir)
-
-            if not chunk_files:
-                chunk_files = [transcription_target]
+            asset, manifest = await self._prepare_chunk_manifest(
+                file_path,
+                progress=self._media_progress_reporter(current_task_id, progress_callback)
+            )
+            chunk_files = [
+                self.audio_assets.resolve_chunk_path(asset, chunk) for chunk in manifest.chunks
+            ]
 
             total_chunks = len(chunk_files)
+            # 检查点中的分片与当前清单一致（序号、文件名相同）时才复用
+            resumed = {
+                idx: chunk for idx, chunk in (completed_chunks or {}).items()
+                if idx < total_chunks and chunk.status == "ok" and chunk.filename == chunk_files[idx].name
+            }
+            remaining = [idx for idx in range(total_chunks) if idx not in resumed]
             await self._emit_progress(
                 progress_callback,
                 self._build_progress(
                     current_task_id,
                     status="transcribing",
                     total_chunks=total_chunks,
-                    completed_chunks=0,
+                    completed_chunks=len(resumed),
                     failed_chunks=0,
                     stage="transcribing",
-                    message=f"准备转录 {total_chunks} 个分片"
+                    message=(
+                        f"从检查点恢复，已完成 {len(resumed)}/{total_chunks} 个分片"
+                        if resumed else f"准备转录 {total_chunks} 个分片"
+                    )
                 )
             )
+            if resumed:
+                logger.info(
+                    "[Transcribe][Resume] task=%s reused=%d remaining=%d",
+                    current_task_id,
+                    len(resumed),
+                    len(remaining)
+                )
 
-            chunk_results_map, stats = await self._transcribe_chunk_group(
-                chunk_files,
+            whole_file_results = await self._transcribe_whole_file(
+                asset,
+                manifest,
                 model,
+                remaining,
                 task_id=current_task_id,
-                total_chunks=total_chunks,
-                progress_callback=progress_callback
+                user_id=user_id
             )
+            if whole_file_results is not None:
+                chunk_results_map = whole_file_results
+                failed = sum(1 for chunk in chunk_results_map.values() if chunk.status == "error")
+                stats = {"completed": len(resumed) + len(chunk_results_map), "failed": failed}
+                if checkpoint is not None:
+                    for idx in remaining:
+                        await checkpoint(chunk_results_map[idx])
+            else:
+                chunk_results_map, stats = await self._transcribe_chunk_group(
+                    chunk_files,
+                    model,
+                    remaining,
+                    task_id=current_task_id,
+                    total_chunks=total_chunks,
+                    completed_offset=len(resumed),
+                    progress_callback=progress_callback,
+                    checkpoint=checkpoint,
+                    user_id=user_id,
+                    chunk_durations={chunk.index: chunk.duration for chunk in manifest.chunks},
+                    chunk_hashes={chunk.index: chunk.sha256 for chunk in manifest.chunks},
+                    chunk_starts={chunk.index: chunk.start for chunk in manifest.chunks},
+                    job_seconds=manifest.duration or sum(chunk.duration for chunk in manifest.chunks)
+                )
 
             await self._emit_progress(
                 progress_callback,
@@ -294,8 +638,9 @@ class TranscriptionService:
                 )
             )
 
+            chunk_results_map.update(resumed)
             ordered_chunks = [chunk_results_map[idx] for idx in range(len(chunk_files))]
-            result = self._build_transcription_result(ordered_chunks, task_id=current_task_id)
+            result = self._build_transcription_result(ordered_chunks, task_id=current_task_id, manifest=manifest)
             if result.summary:
                 logger.info(
                     "[Transcribe][Result] task=%s total=%d success=%d failed=%d status=%s",
@@ -368,52 +713,97 @@ class TranscriptionService:
                 return fallback_result
             raise
         finally:
-            if temp_file and temp_file.exists():
-                try:
-                    temp_file.unlink()
-                except Exception as cleanup_error:
-                    logger.debug("Failed to remove temp file %s: %s", temp_file, cleanup_error)
-            if chunk_dir and chunk_dir.exists():
-                shutil.rmtree(chunk_dir, ignore_errors=True)
-
-    def _transcribe_via_requests(self, file_path: Path, model: str) -> Optional[str]:
-        if requests is None:
-            raise RuntimeError("requests 不可用，无法执行真实转录")
-        headers = {
-            "Authorization": f"Bearer {self.api_key}"
-        }
-
-        data = {
-            "model": model
-        }
+            tasks_in_flight.dec()
 
+    async def _request_transcription(self, file_path: Path, model: str) -> str:
+        """通过共享连接池上传分片并返回识别文本"""
         try:
-            with open(file_path, 'rb') as f:
-                files = {
-                    'file': (file_path.name, f)
-                }
-
-                response = requests.post(
-                    self.base_url,
-                    headers=headers,
-                    data=data,
-                    files=files,
-                    timeout=self.chunk_timeout_seconds
-                )
-                response.raise_for_status()
-                result = response.json()
-                logger.debug(
-                    "[Transcribe][HTTP] file=%s status=%s",
-                    file_path.name,
-                    response.status_code
-                )
-                return (result.get('text') or '').strip()
+            result = await self.http_client.post_file(
+                self.base_url,
+                file_path,
+                fields={"model": model},
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.chunk_timeout_seconds
+            )
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error("转录请求失败 file=%s err=%s", file_path.name, e)
             raise
+        logger.debug("[Transcribe][HTTP] file=%s", file_path.name)
+        return (result.get('text') or '').strip()
 
+    async def _hedge_request(
+        self,
+        file_path: Path,
+        model: str,
+        user_id: Optional[str],
+        audio_seconds: float
+    ) -> RoutedTranscription:
+        """对冲请求同样占用调度器名额（按重试优先级排队）"""
+        async with self.scheduler.slot(user_id, audio_seconds, retry=True):
+            return await self.router.transcribe(file_path, model, audio_seconds)
+
+    async def _lookup_cached_text(self, audio_hash: str, model: str) -> Optional[RoutedTranscription]:
+        """按提供方优先级查询 ASR 结果缓存（线程池已满时跳过缓存）"""
+        for provider in self.router.providers:
+            try:
+                entry = await run_blocking(
+                    ASR_IO,
+                    self.asr_cache.get_entry,
+                    audio_hash,
+                    provider.cache_model(model),
+                    provider.cache_provider
+                )
+            except ExecutorSaturatedError:
+                logger.info("[Transcribe][Cache] asr_io 线程池已满，跳过缓存查询")
+                return None
+            if entry is not None and entry.get("text") is not None:
+                return RoutedTranscription(
+                    text=entry["text"],
+                    provider=provider.name,
+                    segments=shift_segments(entry.get("segments") or [], 0.0) or None
+                )
         return None
 
+    async def _store_cached_text(
+        self,
+        audio_hash: str,
+        model: str,
+        provider_name: str,
+        text: str,
+        segments: Optional[List[Segment]] = None
+    ) -> None:
+        for provider in self.router.providers:
+            if provider.name == provider_name:
+                try:
+                    await run_blocking(
+                        ASR_IO,
+                        self.asr_cache.put,
+                        audio_hash,
+                        provider.cache_model(model),
+                        provider.cache_provider,
+                        text,
+                        segments
+                    )
+                except ExecutorSaturatedError:
+                    logger.info("[Transcribe][Cache] asr_io 线程池已满，跳过写入缓存")
+                return
+
+    @staticmethod
+    def _absolute_segments(
+        routed: RoutedTranscription,
+        text: str,
+        audio_start: Optional[float],
+        audio_seconds: float
+    ) -> Tuple[List[Segment], Optional[str]]:
+        """把提供方返回的相对时间戳平移为绝对时间；没有时间戳时按字数在分片区间内估算"""
+        if audio_start is None:
+            return [], None
+        if routed.segments:
+            return shift_segments(routed.segments, audio_start), "provider"
+        return estimate_segments(text, audio_start, audio_start + audio_seconds), "estimated"
+
     def _generate_mock_transcript(self, file_path: Path) -> str:
         """生成本地模拟的转录文本，方便前端联调"""
         template = [
@@ -430,125 +820,40 @@ class TranscriptionService:
         ]
         return "\n".join(template)
 
-    def _should_convert_to_mp3(self, file_path: Path) -> bool:
-        """判断是否需要在转录前将文件转为 MP3"""
-        return file_path.suffix.lower() in self.convertible_extensions
+    async def _prepare_chunk_manifest(
+        self,
+        file_path: Path,
+        fallback_manifest: Optional[Dict[str, object]] = None,
+        progress: Optional[MediaProgressHandler] = None
+    ) -> Tuple[AudioAsset, ChunkManifest]:
+        """获取标准化音频及其分片清单，已持久化的清单直接复用"""
+        return await self.audio_assets.prepare_chunks(
+            file_path,
+            self.segmenter,
+            self._should_chunk_audio,
+            fallback=fallback_manifest,
+            progress=progress
+        )
 
-    def _should_chunk_audio(self, file_path: Path) -> bool:
-        """检查音频长度是否需要切片"""
-        duration = self._get_audio_duration_seconds(file_path)
+    def _should_chunk_audio(self, duration: Optional[float]) -> bool:
+        """根据音频长度判断是否需要切片"""
         if duration is None:
             return False
         return duration > max(self.chunk_duration_seconds * 1.5, self.chunk_duration_seconds + 60)
 
-    def _convert_to_mp3(self, file_path: Path) -> Path:
-        """通过 ffmpeg 将音/视频转码为 mp3 以满足硅基流动接口要求"""
-        ffmpeg_path = shutil.which("ffmpeg")
-        if not ffmpeg_path:
-            raise RuntimeError("系统未安装 ffmpeg，无法将文件转码为 MP3")
-
-        temp_filename = f"{file_path.stem}_{uuid.uuid4().hex}.mp3"
-        temp_path = Path(tempfile.gettempdir()) / temp_filename
-
-        command = [
-            ffmpeg_path,
-            "-y",  # overwrite temp file if needed
-            "-i", str(file_path),
-            "-vn",
-            "-acodec", "libmp3lame",
-            "-ar", "44100",
-            "-ac", "2",
-            str(temp_path)
-        ]
-
-        process = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-
-        if process.returncode != 0 or not temp_path.exists():
-            stderr = process.stderr.decode('utf-8', errors='ignore') if process.stderr else ''
-            temp_path.unlink(missing_ok=True)
-            raise RuntimeError(
-                f"音频转码失败，ffmpeg 返回码 {process.returncode}: {stderr.strip() or '未知错误'}"
-            )
-
-        logger.info(
-            "Converted %s -> %s for transcription",
-            file_path.name,
-            temp_path.name
-        )
-        return temp_path
-
-    def _get_audio_duration_seconds(self, file_path: Path) -> Optional[float]:
-        """使用 ffprobe 获取音频时长"""
-        ffprobe_path = shutil.which("ffprobe")
-        if not ffprobe_path:
-            return None
-
-        try:
-            result = subprocess.run(
-                [
-                    ffprobe_path,
-                    "-v", "error",
-                    "-show_entries", "format=duration",
-                    "-of", "default=noprint_wrappers=1:nokey=1",
-                    str(file_path)
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True
-            )
-            return float(result.stdout.strip())
-        except Exception as exc:
-            logger.debug("Failed to obtain duration for %s: %s", file_path, exc)
-            return None
-
-    def _split_audio_file(self, file_path: Path, output_dir: Path) -> List[Path]:
-        """将音频切分为多个片段以便并发转录"""
-        ffmpeg_path = shutil.which("ffmpeg")
-        if not ffmpeg_path:
-            logger.warning("切片失败：系统未安装 ffmpeg")
-            return []
-
-        output_dir.mkdir(parents=True, exist_ok=True)
-        segment_pattern = output_dir / "chunk_%03d.mp3"
-
-        command = [
-            ffmpeg_path,
-            "-y",
-            "-i", str(file_path),
-            "-f", "segment",
-            "-segment_time", str(self.chunk_duration_seconds),
-            "-c", "copy",
-            str(segment_pattern)
-        ]
-
-        process = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-
-        if process.returncode != 0:
-            stderr = process.stderr.decode('utf-8', errors='ignore') if process.stderr else ''
-            logger.error("音频切片失败: %s", stderr.strip() or "unknown error")
-            return []
-
-        chunks = sorted(output_dir.glob("chunk_*.mp3"))
-        logger.info("Split %s into %d segments", file_path.name, len(chunks))
-        return chunks
-
     async def transcribe_chunk_subset(
         self,
         file_path: Path,
         indices: Sequence[int],
-        model: str = "FunAudioLLM/SenseVoiceSmall"
+        model: str = "FunAudioLLM/SenseVoiceSmall",
+        *,
+        chunk_manifest: Optional[Dict[str, object]] = None,
+        user_id: Optional[str] = None
     ) -> Dict[int, ChunkTranscription]:
         """
         仅重试给定分片序号，返回对应的 chunk manifest
+        复用已持久化的分片文件，只处理请求的分片；chunk_manifest 为转录记录中保存的清单
+        重试请求在调度器中优先于新任务的分片
         """
         if not file_path.exists():
             raise FileNotFoundError(f"文件不存在: {file_path}")
@@ -576,37 +881,205 @@ class TranscriptionService:
             )
             return {0: chunk}
 
-        temp_file: Optional[Path] = None
-        chunk_dir: Optional[Path] = None
-        try:
-            transcription_target = file_path
-            if self._should_convert_to_mp3(file_path):
-                temp_file = self._convert_to_mp3(file_path)
-                transcription_target = temp_file
+        asset, manifest = await self._prepare_chunk_manifest(file_path, chunk_manifest)
+        normalized_indices = sorted({
+            int(idx) for idx in indices if 0 <= int(idx) < len(manifest.chunks)
+        })
+        if not normalized_indices:
+            return {}
 
-            chunk_files: List[Path] = []
-            if self._should_chunk_audio(transcription_target):
-                chunk_dir = Path(tempfile.mkdtemp(prefix="ir_chunk_retry_"))
-                chunk_files = self._split_audio_file(transcription_target, chunk_dir)
+        whole_file_results = await self._transcribe_whole_file(
+            asset,
+            manifest,
+            model,
+            normalized_indices,
+            user_id=user_id,
+            retry=True
+        )
+        if whole_file_results is not None:
+            return whole_file_results
+
+        chunk_files = await self.audio_assets.materialize_chunks(asset, manifest, normalized_indices)
+        chunk_map, _ = await self._transcribe_chunk_group(
+            chunk_files,
+            model,
+            target_indices=normalized_indices,
+            user_id=user_id,
+            chunk_durations={chunk.index: chunk.duration for chunk in manifest.chunks},
+            chunk_hashes={chunk.index: chunk.sha256 for chunk in manifest.chunks},
+            chunk_starts={chunk.index: chunk.start for chunk in manifest.chunks},
+            retry=True
+        )
+        return chunk_map
 
-            if not chunk_files:
-                chunk_files = [transcription_target]
+    async def transcribe_range(
+        self,
+        file_path: Path,
+        start: float,
+        end: float,
+        model: str = "FunAudioLLM/SenseVoiceSmall",
+        *,
+        chunk_manifest: Optional[Dict[str, object]] = None,
+        user_id: Optional[str] = None
+    ) -> RangeTranscription:
+        """
+        只重新转录原音频的 [start, end) 区间（秒）
+        从标准化音频无损截取该区间后作为单个请求提交，按重试优先级调度；
+        用户主动要求重新识别，因此不读取 ASR 结果缓存
+        """
+        if not file_path.exists():
+            raise FileNotFoundError(f"文件不存在: {file_path}")
+        if file_path.suffix.lower() in ['.txt', '.md'] or self.use_mock:
+            raise ValueError("文本文件或模拟转录模式不支持按区间重新转录")
+
+        asset, manifest = await self._prepare_chunk_manifest(file_path, chunk_manifest)
+        start, end = max(0.0, float(start)), float(end)
+        if manifest.duration:
+            end = min(end, manifest.duration)
+        self._check_range_span(start, end)
+
+        range_path = await self.audio_assets.cut_span(asset, start, end)
+        chunk = await self._transcribe_single_chunk(
+            0,
+            range_path,
+            model,
+            user_id=user_id,
+            audio_seconds=end - start,
+            audio_start=start,
+            retry=True
+        )
+        if chunk.status != "ok":
+            raise RuntimeError(chunk.error or "区间转录失败")
+        logger.info(
+            "[Transcribe][Range] file=%s range=%.1f-%.1fs provider=%s segments=%d",
+            file_path.name,
+            start,
+            end,
+            chunk.provider,
+            len(chunk.segments)
+        )
+        return RangeTranscription(
+            start=start,
+            end=end,
+            text=chunk.text,
+            segments=chunk.segments,
+            provider=chunk.provider,
+            timestamps=chunk.timestamps
+        )
 
-            normalized_indices = sorted({idx for idx in indices if 0 <= idx < len(chunk_files)})
-            if not normalized_indices:
-                return {}
+    async def _transcribe_whole_file(
+        self,
+        asset: AudioAsset,
+        manifest: ChunkManifest,
+        model: str,
+        indices: Sequence[int],
+        *,
+        task_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        retry: bool = False
+    ) -> Optional[Dict[int, ChunkTranscription]]:
+        """
+        首选提供方支持整段提交（阿里云 / 火山引擎录音文件识别）时，把整个标准化音频作为一个任务识别，
+        再按分片区间拆分为 indices 对应的分片结果，说话人编号在全文件内一致；
+        首选提供方不支持整段提交时返回 None，整段识别失败（鉴权/额度错误除外）时同样返回 None，
+        由调用方按分片转录（分片请求仍可故障转移到其他提供方）
+        """
+        provider = self.router.whole_file_provider()
+        if provider is None or not indices or not manifest.chunks:
+            return None
+        task_label = task_id or f"transcribe-{uuid.uuid4().hex}"
+        job_seconds = manifest.duration or sum(chunk.duration for chunk in manifest.chunks)
+        logger.info(
+            "[Transcribe][WholeFile] task=%s provider=%s duration=%.0fs chunks=%d",
+            task_label,
+            provider.name,
+            job_seconds,
+            len(indices)
+        )
+        started = time.perf_counter()
+        try:
+            async with self.scheduler.slot(user_id, job_seconds, retry=retry, job_seconds=job_seconds):
+                started = time.perf_counter()
+                routed = await self.router.transcribe(asset.path, model, job_seconds, providers=[provider])
+        except ProviderHTTPError as exc:
+            kind = classify_failure(exc)
+            if kind not in FATAL_FAILURE_KINDS:
+                logger.warning("[Transcribe][WholeFile] task=%s 整段识别失败，改为按分片转录: %s", task_label, exc)
+                return None
+            label = "鉴权失败" if kind == "auth" else "额度不足"
+            logger.error("[Transcribe][WholeFile] task=%s 转录%s: %s", task_label, label, exc)
+            metrics.JOB_ABORTS.labels(reason=kind).inc()
+            return {
+                idx: ChunkTranscription(
+                    index=idx,
+                    filename=manifest.chunks[idx].filename,
+                    status="error",
+                    text="",
+                    error=f"{label}: {exc}"
+                )
+                for idx in indices
+            }
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning(
+                "[Transcribe][WholeFile] task=%s 整段识别失败，改为按分片转录: %s",
+                task_label,
+                exc or type(exc).__name__
+            )
+            return None
+        metrics.CHUNK_LATENCY.labels(
+            provider=routed.provider,
+            model=model,
+            attempt="1",
+            outcome="ok"
+        ).observe(time.perf_counter() - started)
+        return self._split_whole_file(routed, manifest, indices, job_seconds)
+
+    @staticmethod
+    def _split_whole_file(
+        routed: RoutedTranscription,
+        manifest: ChunkManifest,
+        indices: Sequence[int],
+        job_seconds: float
+    ) -> Dict[int, ChunkTranscription]:
+        """
+        按句子开始时间把整段识别结果分配到各分片：每个分片负责从自身切分点（起点之后的重叠部分）
+        到下一个分片切分点之间的句子，重叠区间不重复计入
+        提供方没有返回时间戳时先按字数在整段音频上估算
+        """
+        text = (routed.text or "").strip()
+        if routed.segments:
+            segments, speakers, source = routed.segments, routed.speakers, "provider"
+        else:
+            segments, speakers, source = estimate_segments(text, 0.0, job_seconds), None, "estimated"
+        labeled = len({speaker for speaker in speakers or [] if speaker not in (None, "")}) >= 2
+        starts = [chunk.start + chunk.overlap for chunk in manifest.chunks]
+        owned: Dict[int, List[int]] = {}
+        for position, segment in enumerate(segments):
+            owner = max(0, bisect_right(starts, segment[0]) - 1)
+            owned.setdefault(owner, []).append(position)
 
-            chunk_map, _ = await self._transcribe_chunk_group(
-                chunk_files,
-                model,
-                target_indices=normalized_indices
+        results: Dict[int, ChunkTranscription] = {}
+        for idx in indices:
+            chunk = manifest.chunks[idx]
+            positions = owned.get(idx, [])
+            chunk_text = format_speaker_text(
+                ((speakers[position] if speakers else None, segments[position][2]) for position in positions),
+                labeled=labeled
             )
-            return chunk_map
-        finally:
-            if temp_file and temp_file.exists():
-                temp_file.unlink(missing_ok=True)
-            if chunk_dir and chunk_dir.exists():
-                shutil.rmtree(chunk_dir, ignore_errors=True)
+            results[idx] = ChunkTranscription(
+                index=idx,
+                filename=chunk.filename,
+                status="ok",
+                text=chunk_text,
+                provider=routed.provider,
+                start=chunk.start,
+                end=chunk.end,
+                segments=[segments[position] for position in positions],
+                timestamps=source
+            )
+        return results
 
     async def _transcribe_chunk_group(
         self,
@@ -616,20 +1089,38 @@ class TranscriptionService:
         *,
         task_id: Optional[str] = None,
         total_chunks: Optional[int] = None,
-        progress_callback: Optional[ProgressCallback] = None
+        completed_offset: int = 0,
+        progress_callback: Optional[ProgressCallback] = None,
+        checkpoint: Optional[ChunkCheckpoint] = None,
+        user_id: Optional[str] = None,
+        chunk_durations: Optional[Dict[int, float]] = None,
+        chunk_hashes: Optional[Dict[int, str]] = None,
+        chunk_starts: Optional[Dict[int, float]] = None,
+        retry: bool = False,
+        job_seconds: Optional[float] = None
     ) -> Tuple[Dict[int, ChunkTranscription], Dict[str, int]]:
-        """并发转录多个切片，并返回索引 -> chunk manifest 以及统计数据"""
+        """
+        并发转录多个切片，并返回索引 -> chunk manifest 以及统计数据
+        实际并发与速率由进程级调度器控制，chunk_durations 用于音频秒数限速，
+        chunk_hashes（分片内容 sha256）用于查询 ASR 结果缓存，
+        chunk_starts（分片在原音频中的起点）用于把句子时间戳换算为绝对时间，
+        job_seconds（整个文件的时长）决定新请求的调度优先级（短文件优先）；
+        本批分片的总时长决定截止时间，到期仍未完成的分片会被取消并标记为失败；
+        completed_offset 为此前已完成（从检查点恢复）的分片数，计入进度统计，
+        checkpoint 在每个分片完成后调用；
+        出现鉴权/额度错误，或（整个任务转录时）失败分片数已使失败比例确定超过阈值时，
+        立即取消其余分片，不再消耗提供方额度
+        """
         if target_indices is None:
             indices = list(range(len(chunk_files)))
         else:
             indices = sorted({idx for idx in target_indices if 0 <= idx < len(chunk_files)})
 
         if not indices:
-            return {}, {"completed": 0, "failed": 0}
+            return {}, {"completed": completed_offset, "failed": 0}
 
-        semaphore = asyncio.Semaphore(max(1, self.max_parallel_chunks))
         results: Dict[int, ChunkTranscription] = {}
-        stats = {"completed": 0, "failed": 0}
+        stats = {"completed": completed_offset, "failed": 0}
         progress_lock = asyncio.Lock()
         task_label = task_id or f"transcribe-{uuid.uuid4().hex}"
         batch_total = len(indices)
@@ -638,9 +1129,45 @@ class TranscriptionService:
             "[Transcribe][Batch] task=%s chunkCount=%d concurrency=%d",
             task_label,
             batch_total,
-            self.max_parallel_chunks
+            self.concurrency.limit
         )
         batch_start = time.perf_counter()
+        batch_seconds = sum((chunk_durations or {}).get(idx, 0.0) for idx in indices) or job_seconds
+        budget = self.timeouts.job_deadline(batch_seconds, floor=self.router.longest_attempt_timeout())
+        deadline = JobDeadline(budget) if budget else None
+        abort: Dict[str, str] = {}
+
+        def check_abort(chunk_result: ChunkTranscription, fatal: Optional[FatalTranscriptionError]) -> None:
+            """在 progress_lock 内调用：满足提前终止条件时取消其余分片"""
+            if abort or not self.early_abort:
+                return
+            if fatal is not None:
+                abort.update(reason=fatal.kind, message=str(fatal))
+            elif (
+                chunk_result.status == "error"
+                and total_chunks
+                and stats["failed"] / total_chunks > self.failure_ratio_threshold
+            ):
+                # 即使其余分片全部成功，失败比例也已超过阈值，任务结果必然是失败
+                abort.update(
+                    reason="failure_ratio",
+                    message=f"失败分片 {stats['failed']}/{total_chunks} 已超过阈值 {self.failure_ratio_threshold:.0%}"
+                )
+            else:
+                return
+            metrics.JOB_ABORTS.labels(reason=abort["reason"]).inc()
+            current = asyncio.current_task()
+            cancelled = 0
+            for task in tasks:
+                if task is not current and not task.done():
+                    task.cancel()
+                    cancelled += 1
+            logger.error(
+                "[Transcribe][Batch] task=%s 提前终止（%s），取消 %d 个未完成的分片",
+                task_label,
+                abort["message"],
+                cancelled
+            )
 
         async def worker(idx: int, chunk_path: Path):
             start_ts = time.perf_counter()
@@ -651,23 +1178,44 @@ class TranscriptionService:
                 batch_total,
                 chunk_path.name
             )
-            async with semaphore:
-                try:
-                    chunk_result = await self._transcribe_single_chunk(idx, chunk_path, model)
-                except Exception as exc:
-                    logger.exception(
-                        "[Transcribe][Chunk][fatal] task=%s chunk=%s error=%s",
-                        task_label,
-                        idx,
-                        exc
-                    )
-                    chunk_result = ChunkTranscription(
-                        index=idx,
-                        filename=chunk_path.name,
-                        status="error",
-                        text="",
-                        error=str(exc)
-                    )
+            try:
+                chunk_result = await self._transcribe_single_chunk(
+                    idx,
+                    chunk_path,
+                    model,
+                    user_id=user_id,
+                    audio_seconds=(chunk_durations or {}).get(idx, 0.0),
+                    audio_hash=(chunk_hashes or {}).get(idx),
+                    audio_start=(chunk_starts or {}).get(idx),
+                    retry=retry,
+                    job_seconds=job_seconds,
+                    deadline=deadline
+                )
+                fatal = None
+            except FatalTranscriptionError as exc:
+                fatal = exc
+                chunk_result = ChunkTranscription(
+                    index=idx,
+                    filename=chunk_path.name,
+                    status="error",
+                    text="",
+                    error=str(exc)
+                )
+            except Exception as exc:
+                fatal = None
+                logger.exception(
+                    "[Transcribe][Chunk][fatal] task=%s chunk=%s error=%s",
+                    task_label,
+                    idx,
+                    exc
+                )
+                chunk_result = ChunkTranscription(
+                    index=idx,
+                    filename=chunk_path.name,
+                    status="error",
+                    text="",
+                    error=str(exc)
+                )
             duration = time.perf_counter() - start_ts
             logger.info(
                 "[Transcribe][Chunk][done] task=%s chunk=%s status=%s duration=%.2fs retries=%d",
@@ -697,9 +1245,47 @@ class TranscriptionService:
                         chunk_status=chunk_result.status
                     )
                 )
+                check_abort(chunk_result, fatal)
+            if checkpoint is not None:
+                await checkpoint(chunk_result)
 
         tasks = [asyncio.create_task(worker(idx, chunk_files[idx])) for idx in indices]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        if deadline is None:
+            await asyncio.wait(tasks)
+        else:
+            waiters = [asyncio.ensure_future(asyncio.wait(tasks)), asyncio.ensure_future(deadline.expired())]
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in waiters:
+                waiter.cancel()
+        pending = [task for task in tasks if not task.done()]
+        if pending:
+            # 取消会中断进行中的 HTTP 请求并释放调度器名额
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.error(
+                "[Transcribe][Batch] task=%s 超过截止时间 %.0fs，已取消 %d 个未完成的分片",
+                task_label,
+                budget,
+                len(pending)
+            )
+        # 被取消（截止时间到期或提前终止）的分片标记为失败，之后可通过重试失败分片补齐
+        missing = [idx for idx in indices if idx not in results]
+        cancelled_error = (
+            f"任务已提前终止：{abort['message']}" if abort
+            else f"超过任务截止时间（{budget or 0:.0f}s）"
+        )
+        for idx in missing:
+            results[idx] = ChunkTranscription(
+                index=idx,
+                filename=chunk_files[idx].name,
+                status="error",
+                text="",
+                error=cancelled_error,
+                updated_at=datetime.utcnow().isoformat()
+            )
+            stats["completed"] += 1
+            stats["failed"] += 1
         batch_duration = time.perf_counter() - batch_start
         logger.info(
             "[Transcribe][Batch][done] task=%s completed=%d failed=%d duration=%.2fs",
@@ -710,31 +1296,102 @@ class TranscriptionService:
         )
         return results, stats
 
-    async def _transcribe_single_chunk(self, idx: int, chunk_path: Path, model: str) -> ChunkTranscription:
-        """单个切片的重试控制"""
+    async def _transcribe_single_chunk(
+        self,
+        idx: int,
+        chunk_path: Path,
+        model: str,
+        *,
+        user_id: Optional[str] = None,
+        audio_seconds: float = 0.0,
+        audio_hash: Optional[str] = None,
+        audio_start: Optional[float] = None,
+        retry: bool = False,
+        job_seconds: Optional[float] = None,
+        deadline: Optional[JobDeadline] = None
+    ) -> ChunkTranscription:
+        """
+        单个切片的重试控制，每次请求都经过进程级调度器（重试请求优先）
+        每次请求由提供方路由完成：当前提供方熔断或失败时自动切换到下一个
+        相同音频内容 + 模型已有识别结果时直接返回缓存，不调用外部 API
+        audio_start 为分片在原音频中的起点，给出时记录分片区间与绝对时间的句子时间戳
+        deadline 为任务截止时间（第一个请求获得调度器名额时开始计时），等待重试会越过截止时间时不再重试
+        鉴权失败或额度耗尽时不再重试，抛出 FatalTranscriptionError
+        """
+        audio_end = audio_start + audio_seconds if audio_start is not None else None
+        if audio_hash:
+            cached = await self._lookup_cached_text(audio_hash, model)
+            if cached is not None:
+                logger.info("[Transcribe][Cache] 命中缓存 chunk=%s provider=%s", chunk_path.name, cached.provider)
+                segments, source = self._absolute_segments(cached, cached.text, audio_start, audio_seconds)
+                return ChunkTranscription(
+                    index=idx,
+                    filename=chunk_path.name,
+                    status="ok",
+                    text=cached.text,
+                    provider=cached.provider,
+                    start=audio_start,
+                    end=audio_end,
+                    segments=segments,
+                    timestamps=source
+                )
+
         attempt = 0
         retry_count = 0
         delay_seconds = max(1.0, self.retry_base_delay)
-        text_result = ""
+        routed: Optional[RoutedTranscription] = None
         last_error: Optional[str] = None
+        fatal_kind: Optional[str] = None
 
         while attempt < self.chunk_max_attempts:
             attempt += 1
+            retry_after: Optional[float] = None
+            failure_reason = "error"
+            attempt_started = time.perf_counter()
             try:
-                text_result = await asyncio.wait_for(
-                    asyncio.to_thread(self._transcribe_via_requests, chunk_path, model),
-                    timeout=self.chunk_timeout_seconds
-                )
+                async with self.scheduler.slot(
+                    user_id,
+                    audio_seconds,
+                    retry=retry or attempt > 1,
+                    job_seconds=job_seconds
+                ):
+                    # 耗时指标不含排队时间（排队时间单独记录在调度器指标中）
+                    attempt_started = time.perf_counter()
+                    if deadline is not None:
+                        deadline.start()
+                    # 单个提供方的超时由路由控制，超时后切换到下一个提供方
+                    routed = await self.hedger.run(
+                        lambda: self.router.transcribe(chunk_path, model, audio_seconds),
+                        lambda: self._hedge_request(chunk_path, model, user_id, audio_seconds),
+                        audio_seconds=audio_seconds,
+                        label=chunk_path.name
+                    )
                 last_error = None
-                break
             except asyncio.TimeoutError:
-                last_error = f"请求超时（>{self.chunk_timeout_seconds}s）"
+                failure_reason = "timeout"
+                last_error = f"请求超时（分片 {audio_seconds:.0f}s）"
                 logger.warning(
                     "切片 %s 第 %d 次转录超时，重试=%s",
                     chunk_path.name,
                     attempt,
                     attempt < self.chunk_max_attempts
                 )
+            except ProviderHTTPError as exc:
+                kind = classify_failure(exc)
+                if kind in FATAL_FAILURE_KINDS:
+                    fatal_kind = failure_reason = kind
+                elif exc.status in (429, 503):
+                    retry_after = exc.retry_after
+                    failure_reason = "throttled"
+                else:
+                    failure_reason = f"http_{exc.status // 100}xx"
+                last_error = str(exc)
+                logger.warning(
+                    "切片 %s 第 %d 次转录失败: %s",
+                    chunk_path.name,
+                    attempt,
+                    exc
+                )
             except Exception as exc:
                 last_error = str(exc)
                 logger.warning(
@@ -744,24 +1401,45 @@ class TranscriptionService:
                     exc
                 )
 
+            metrics.CHUNK_LATENCY.labels(
+                provider=routed.provider if last_error is None else "none",
+                model=model,
+                attempt=str(attempt),
+                outcome="ok" if last_error is None else failure_reason
+            ).observe(time.perf_counter() - attempt_started)
             if last_error is None:
                 break
+            if fatal_kind:
+                label = "鉴权失败" if fatal_kind == "auth" else "额度不足"
+                logger.error("切片 %s 转录%s，不再重试: %s", chunk_path.name, label, last_error)
+                raise FatalTranscriptionError(fatal_kind, f"{label}: {last_error}")
             if attempt >= self.chunk_max_attempts:
                 logger.error("切片 %s 多次转录失败: %s", chunk_path.name, last_error)
                 break
+            wait_seconds = max(delay_seconds, retry_after or 0.0)
+            if deadline is not None and not deadline.allows(wait_seconds):
+                logger.error("切片 %s 重试将超过任务截止时间，不再重试: %s", chunk_path.name, last_error)
+                break
             retry_count += 1
+            metrics.CHUNK_RETRIES.labels(reason=failure_reason).inc()
             logger.info(
                 "切片 %s 将在 %d 秒后重试 (%d/%d)",
                 chunk_path.name,
-                int(delay_seconds),
+                int(wait_seconds),
                 attempt,
                 self.chunk_max_attempts
             )
-            await asyncio.sleep(delay_seconds)
+            await asyncio.sleep(wait_seconds)
             delay_seconds = min(delay_seconds * 2, self.retry_max_delay)
 
-        status: ChunkStatus = "ok" if last_error is None else "error"
-        safe_text = (text_result or "").strip() if status == "ok" else ""
+        status: ChunkStatus = "ok" if last_error is None and routed is not None else "error"
+        safe_text = (routed.text or "").strip() if status == "ok" else ""
+        if status == "ok" and audio_hash:
+            await self._store_cached_text(audio_hash, model, routed.provider, safe_text, routed.segments)
+        segments, source = (
+            self._absolute_segments(routed, safe_text, audio_start, audio_seconds)
+            if status == "ok" else ([], None)
+        )
         return ChunkTranscription(
             index=idx,
             filename=chunk_path.name,
@@ -769,162 +1447,14 @@ class TranscriptionService:
             text=safe_text,
             error=None if status == "ok" else (last_error or "转录失败"),
             retry_count=retry_count,
-            updated_at=datetime.utcnow().isoformat()
+            updated_at=datetime.utcnow().isoformat(),
+            provider=routed.provider if status == "ok" else None,
+            start=audio_start,
+            end=audio_end,
+            segments=segments,
+            timestamps=source
         )
 
-    def _build_transcription_result(
-        self,
-        chunks: List[ChunkTranscription],
-        task_id: Optional[str] = None
-    ) -> TranscriptionResult:
-        """构造完整的转录结果"""
-        merged_text = self._combine_chunk_texts(chunks)
-        failed = [chunk for chunk in chunks if chunk.status == "error"]
-        summary = self._build_summary(task_id or f"transcribe-{uuid.uuid4().hex}", chunks, failed)
-        overall_status = self._determine_overall_status(summary)
-        return TranscriptionResult(
-            chunks=chunks,
-            merged_text=merged_text,
-            overall_status=overall_status,
-            failed_chunks=failed,
-            summary=summary
-        )
-
-    def _build_summary(
-        self,
-        task_id: str,
-        chunks: Sequence[ChunkTranscription],
-        failed: Sequence[ChunkTranscription]
-    ) -> TranscriptionSummary:
-        total = len(chunks)
-        failed_count = len(failed)
-        success_count = total - failed_count
-        if total == 0:
-            return TranscriptionSummary(
-                task_id=task_id,
-                total_chunks=0,
-                success_chunks=0,
-                failed_chunks=0,
-                failure_ratio=0.0,
-                status="empty",
-                error_message="没有可用于转录的分片"
-            )
-
-        failure_ratio = failed_count / total if total else 0.0
-        if failed_count == 0:
-            status = "completed"
-            error_message = None
-        elif failure_ratio > self.failure_ratio_threshold:
-            status = "failed"
-            error_message = self._summarize_failures(failed, total, failure_ratio)
-        else:
-            status = "partial"
-            error_message = self._summarize_failures(failed, total, failure_ratio)
-
-        return TranscriptionSummary(
-            task_id=task_id,
-            total_chunks=total,
-            success_chunks=success_count,
-            failed_chunks=failed_count,
-            failure_ratio=failure_ratio,
-            status=status,
-            error_message=error_message
-        )
-
-    def _summarize_failures(
-        self,
-        failed_chunks: Sequence[ChunkTranscription],
-        total_chunks: int,
-        ratio: float
-    ) -> str:
-        details: List[str] = []
-        for chunk in failed_chunks[:5]:
-            label = f"#{chunk.index}"
-            if chunk.error:
-                details.append(f"{label}:{chunk.error}")
-            else:
-                details.append(label)
-        suffix = ", ".join(details)
-        if len(failed_chunks) > len(details):
-            suffix += f" (+{len(failed_chunks) - len(details)} more)"
-        percent = f"{ratio * 100:.0f}%"
-        return f"{len(failed_chunks)}/{total_chunks} 分片失败（{percent}），详情: {suffix}"
-
-    def _determine_overall_status(self, summary: TranscriptionSummary) -> str:
-        if summary.status == "empty":
-            return "empty"
-        if summary.status == "completed":
-            return "completed"
-        if summary.status == "partial":
-            return "partial"
-        return "error"
-
-    def _combine_chunk_texts(self, chunks: List[ChunkTranscription]) -> str:
-        """合并分片转录结果"""
-        combined_segments: List[str] = []
-        total = len(chunks)
-        for idx, chunk in enumerate(chunks):
-            label = chunk.filename or f"chunk_{idx:03d}"
-            header = f"【分片 {idx + 1}/{total} · {label}】"
-            combined_segments.append(header)
-            if chunk.status == "ok":
-                content = (chunk.text or "").strip()
-                if content:
-                    combined_segments.append(content)
-                else:
-                    combined_segments.append("(该分片暂无可显示的内容)")
-            elif chunk.status == "error":
-                combined_segments.append(f"(分片转录失败：{chunk.error or '请稍后重试'})")
-            else:
-                combined_segments.append("(分片仍在处理中)")
-            combined_segments.append("")
-        return "\n".join(segment for segment in combined_segments if segment.strip())
-
-    def _build_progress(
-        self,
-        task_id: str,
-        *,
-        status: Literal["uploaded", "transcribing", "merging", "completed", "failed"],
-        total_chunks: int,
-        completed_chunks: int,
-        failed_chunks: int,
-        stage: Optional[str] = None,
-        message: Optional[str] = None,
-        error_message: Optional[str] = None,
-        chunk_index: Optional[int] = None,
-        chunk_status: Optional[ChunkStatus] = None
-    ) -> TranscriptionProgress:
-        safe_total = max(0, total_chunks)
-        safe_completed = max(0, completed_chunks)
-        safe_failed = max(0, failed_chunks)
-        progress_value = 0.0
-        if safe_total > 0:
-            progress_value = min(1.0, safe_completed / safe_total)
-        return TranscriptionProgress(
-            task_id=task_id,
-            status=status,
-            total_chunks=safe_total,
-            completed_chunks=safe_completed,
-            failed_chunks=safe_failed,
-            progress=progress_value,
-            stage=stage or status,
-            message=message,
-            error_message=error_message,
-            chunk_index=chunk_index,
-            chunk_status=chunk_status
-        )
-
-    async def _emit_progress(
-        self,
-        callback: Optional[ProgressCallback],
-        progress: Optional[TranscriptionProgress]
-    ) -> None:
-        if not callback or not progress:
-            return
-        try:
-            await callback(progress)
-        except Exception as exc:  # pragma: no cover - best effort logging
-            logger.warning("Transcription progress callback failed: %s", exc)
 
 # 测试函数
 async def test_transcription():
@@ -0,0 +1,343 @@
+"""
+本地 Whisper 推理进程池
+每个工作进程启动时加载一份模型（openai-whisper 或 faster-whisper），音频分片分发到各进程并行推理，
+长音频不再只跑在单个模型实例上；工作进程以 spawn 方式启动，不继承父进程的事件循环、线程与连接，
+推理结果以 (文本, 句子时间戳) 元组返回。
+进程数、每个实例的 CPU 线程数与量化类型可由环境变量指定，或使用校准命令在本机测得的最快配置
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import metrics
+from .executors import ExecutorSaturatedError
+
+logger = logging.getLogger(__name__)
+
+# (开始秒, 结束秒, 文本)，相对分片起点
+RawSegment = Tuple[float, float, str]
+
+# 校准命令（python -m app.tools.whisper_calibrate）写入的最快配置，按 "方法:模型" 索引
+WHISPER_TUNING_FILE = os.getenv("TRANSCRIBE_WHISPER_TUNING_FILE", "./data/whisper_tuning.json")
+COMPUTE_TYPES = ("int8", "int8_float32", "int16", "float32")
+
+
+@dataclass
+class WhisperPoolConfig:
+    # 推理进程数（模型实例数），0 表示在当前进程中推理
+    workers: int
+    # 每个模型实例使用的 CPU 线程数
+    cpu_threads: int
+    # faster-whisper 单个模型实例允许的并发转录数
+    num_workers: int = 1
+    # faster-whisper 的量化类型（openai-whisper 在 CPU 上固定为 float32，忽略该项）
+    compute_type: str = "int8"
+    max_queue: int = 4
+    # 配置来源：default / calibrated / env
+    source: str = "default"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "cpuThreads": self.cpu_threads,
+            "numWorkers": self.num_workers,
+            "computeType": self.compute_type,
+            "maxQueue": self.max_queue,
+            "source": self.source,
+        }
+
+    @classmethod
+    def defaults(cls) -> "WhisperPoolConfig":
+        cpu_threads = 4
+        workers = max(1, min(4, (os.cpu_count() or 1) // cpu_threads))
+        return cls(workers=workers, cpu_threads=cpu_threads, max_queue=max(4, workers * 4))
+
+
+def load_tuning(path: str = WHISPER_TUNING_FILE) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as exc:
+        logger.warning("[WhisperPool] 无法读取校准结果 %s: %s", path, exc)
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_tuning(method: str, model_size: str, entry: Dict[str, Any], path: str = WHISPER_TUNING_FILE) -> None:
+    """写入（覆盖）某个方法与模型的校准结果，其余条目保持不变"""
+    data = load_tuning(path)
+    data[f"{method}:{model_size}"] = entry
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target.with_name(f".{target.name}.tmp")
+    temp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+    temp_path.replace(target)
+
+
+def resolve_pool_config(method: str, model_size: str, tuning_file: str = WHISPER_TUNING_FILE) -> WhisperPoolConfig:
+    """
+    推理配置的优先级：环境变量 > 校准结果（TRANSCRIBE_WHISPER_TUNING_FILE）> 按 CPU 核数推算的默认值
+    """
+    config = WhisperPoolConfig.defaults()
+    tuned = load_tuning(tuning_file).get(f"{method}:{model_size}")
+    if tuned:
+        config = replace(
+            config,
+            workers=int(tuned.get("workers", config.workers)),
+            cpu_threads=int(tuned.get("cpuThreads", config.cpu_threads)),
+            num_workers=int(tuned.get("numWorkers", config.num_workers)),
+            compute_type=str(tuned.get("computeType", config.compute_type)),
+            source="calibrated"
+        )
+
+    overrides: Dict[str, Any] = {}
+    if os.getenv("TRANSCRIBE_WHISPER_THREADS"):
+        overrides["cpu_threads"] = int(os.environ["TRANSCRIBE_WHISPER_THREADS"])
+        if not tuned and not os.getenv("TRANSCRIBE_WHISPER_WORKERS"):
+            # 只调整了线程数时，进程数随之按 CPU 核数重新推算
+            overrides["workers"] = max(1, min(4, (os.cpu_count() or 1) // max(1, overrides["cpu_threads"])))
+    if os.getenv("TRANSCRIBE_WHISPER_WORKERS"):
+        overrides["workers"] = int(os.environ["TRANSCRIBE_WHISPER_WORKERS"])
+    if os.getenv("TRANSCRIBE_WHISPER_NUM_WORKERS"):
+        overrides["num_workers"] = int(os.environ["TRANSCRIBE_WHISPER_NUM_WORKERS"])
+    if os.getenv("TRANSCRIBE_WHISPER_COMPUTE_TYPE"):
+        overrides["compute_type"] = os.environ["TRANSCRIBE_WHISPER_COMPUTE_TYPE"]
+    if overrides:
+        config = replace(config, source="env", **overrides)
+
+    workers = max(0, config.workers)
+    return replace(
+        config,
+        workers=workers,
+        cpu_threads=max(1, config.cpu_threads),
+        num_workers=max(1, config.num_workers),
+        max_queue=max(0, int(os.getenv("TRANSCRIBE_WHISPER_QUEUE", str(max(4, workers * 4)))))
+    )
+
+
+def load_model(
+    method: str,
+    model_size: str,
+    cpu_threads: Optional[int] = None,
+    compute_type: str = "int8",
+    num_workers: int = 1
+) -> Any:
+    """加载 Whisper 模型（method: local 使用 openai-whisper，faster 使用 faster-whisper）"""
+    if method == "faster":
+        from faster_whisper import WhisperModel
+        kwargs = {"cpu_threads": cpu_threads} if cpu_threads else {}
+        return WhisperModel(
+            model_size,
+            device="cpu",
+            compute_type=compute_type,
+            num_workers=max(1, num_workers),
+            **kwargs
+        )
+    if cpu_threads:
+        try:
+            import torch
+            torch.set_num_threads(cpu_threads)
+        except ImportError:  # pragma: no cover - openai-whisper 依赖 torch
+            pass
+    import whisper
+    return whisper.load_model(model_size)
+
+
+def run_inference(model: Any, method: str, audio_path: str) -> Tuple[str, List[RawSegment]]:
+    """对单个音频文件推理，返回文本与句子时间戳"""
+    if method == "faster":
+        segments, _info = model.transcribe(audio_path, language="zh", beam_size=5)
+        text_parts = []
+        timed = []
+        for segment in segments:
+            text_parts.append(segment.text)
+            if segment.text.strip():
+                timed.append((round(segment.start, 2), round(segment.end, 2), segment.text.strip()))
+        return " ".join(text_parts).strip(), timed
+
+    result = model.transcribe(audio_path, language="zh", task="transcribe")
+    timed = [
+        (round(float(item["start"]), 2), round(float(item["end"]), 2), item["text"].strip())
+        for item in result.get("segments") or []
+        if item.get("text", "").strip()
+    ]
+    return result["text"].strip(), timed
+
+
+# 工作进程内的模型（每个进程一份）
+_worker_model: Any = None
+_worker_method: str = "local"
+
+
+def _init_worker(method: str, model_size: str, cpu_threads: int, compute_type: str) -> None:
+    # 每个工作进程同一时间只执行一个分片，模型实例内部不需要并发（num_workers 只用于进程内推理）
+    global _worker_model, _worker_method
+    _worker_method = method
+    _worker_model = load_model(method, model_size, cpu_threads, compute_type)
+
+
+def _transcribe_in_worker(audio_path: str) -> Tuple[str, List[RawSegment], float]:
+    started = time.perf_counter()
+    text, segments = run_inference(_worker_model, _worker_method, audio_path)
+    return text, segments, time.perf_counter() - started
+
+
+class WhisperProcessPool:
+    """
+    固定数量的推理进程；排队中与执行中的分片数超过上限时拒绝（ExecutorSaturatedError，接口返回 503）
+    工作进程异常退出（内存不足、模型加载失败）时重建进程池，当前分片按失败处理
+    """
+
+    name = "whisper"
+
+    def __init__(self, method: str, model_size: str, config: WhisperPoolConfig):
+        self.method = method
+        self.model_size = model_size
+        self.config = config
+        self.max_workers = max(1, config.workers)
+        self.max_queue = max(0, config.max_queue)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._restarts = 0
+        self._busy_seconds = 0.0
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                logger.info(
+                    "[WhisperPool] 启动 %d 个推理进程 method=%s model=%s threads=%d compute=%s source=%s",
+                    self.max_workers,
+                    self.method,
+                    self.model_size,
+                    self.config.cpu_threads,
+                    self.config.compute_type,
+                    self.config.source
+                )
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.method, self.model_size, self.config.cpu_threads, self.config.compute_type)
+                )
+            return self._pool
+
+    def _discard(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self._restarts += 1
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _update_gauges(self) -> None:
+        active = min(self._pending, self.max_workers)
+        metrics.EXECUTOR_ACTIVE.labels(executor=self.name).set(active)
+        metrics.EXECUTOR_QUEUED.labels(executor=self.name).set(self._pending - active)
+
+    async def transcribe(self, audio_path: Path) -> Tuple[str, List[RawSegment]]:
+        """
+        在工作进程中转录一个音频文件
+
+        Raises:
+            ExecutorSaturatedError: 排队中与执行中的分片数已达上限
+            RuntimeError: 工作进程异常退出
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                metrics.EXECUTOR_REJECTED.labels(executor=self.name).inc()
+                raise ExecutorSaturatedError(self.name)
+            self._pending += 1
+            self._update_gauges()
+        pool = self._ensure_pool()
+        submitted = time.perf_counter()
+        try:
+            text, segments, busy = await asyncio.get_running_loop().run_in_executor(
+                pool, _transcribe_in_worker, str(audio_path)
+            )
+        except BrokenProcessPool as exc:
+            self._discard(pool)
+            raise RuntimeError("Whisper 推理进程异常退出（可能内存不足或模型加载失败）") from exc
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+                self._update_gauges()
+        metrics.EXECUTOR_WAIT.labels(executor=self.name).observe(max(0.0, time.perf_counter() - submitted - busy))
+        with self._lock:
+            self._busy_seconds += busy
+        return text, segments
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active = min(self._pending, self.max_workers)
+            return {
+                "name": self.name,
+                "method": self.method,
+                "model": self.model_size,
+                "maxWorkers": self.max_workers,
+                "maxQueue": self.max_queue,
+                "config": self.config.to_dict(),
+                "started": self._pool is not None,
+                "active": active,
+                "queued": self._pending - active,
+                "utilization": round(active / self.max_workers, 3),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "restarts": self._restarts,
+                "busySeconds": round(self._busy_seconds, 3),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_pools: Dict[Tuple[str, str], WhisperProcessPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_whisper_pool(
+    method: str,
+    model_size: str,
+    config: Optional[WhisperPoolConfig] = None
+) -> Optional[WhisperProcessPool]:
+    """同一方法与模型共享一个进程池（懒加载）；配置的进程数为 0 时返回 None"""
+    config = config or resolve_pool_config(method, model_size)
+    if config.workers <= 0:
+        return None
+    key = (method, model_size)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = WhisperProcessPool(method, model_size, config)
+        return pool
+
+
+def whisper_pool_stats() -> List[Dict[str, Any]]:
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
+
+
+def shutdown_whisper_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
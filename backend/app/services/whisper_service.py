@@ -4,42 +4,57 @@ Whisper 本地转录服务
 支持本地 Whisper 模型进行音频/视频转录
 """
 import os
-import subprocess
-import tempfile
 import logging
 import asyncio
+import tempfile
+import threading
+import time
+import wave
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 try:
-    import whisper
+    import whisper  # noqa: F401
     WHISPER_LOCAL_AVAILABLE = True
 except ImportError:
     WHISPER_LOCAL_AVAILABLE = False
 
 try:
-    from faster_whisper import WhisperModel
+    from faster_whisper import WhisperModel  # noqa: F401
     FASTER_WHISPER_AVAILABLE = True
 except ImportError:
     FASTER_WHISPER_AVAILABLE = False
 
+from . import metrics
+from .asr_cache import get_asr_cache
+from .asr_providers import TimedText
+from .audio_assets import AudioAsset, AudioAssetService, AudioChunk, ChunkManifest
+from .audio_segmenter import SegmenterConfig
+from .executors import ASR_IO, INFERENCE, ExecutorSaturatedError, run_blocking
+from .transcript_timeline import estimate_segments, shift_segments
+from .whisper_pool import WhisperProcessPool, get_whisper_pool, load_model, resolve_pool_config, run_inference
 from .transcription_service import (
+    ChunkResultMixin,
     ChunkTranscription,
+    RangeTranscription,
     TranscriptionResult,
     TranscriptionSummary,
-    TranscriptionProgress,
     ProgressCallback,
-    ChunkStatus
+    ChunkCheckpoint
 )
 
 logger = logging.getLogger(__name__)
 
+# 预热用的静音片段时长（秒）
+WARMUP_CLIP_SECONDS = 1
+
 
-class WhisperTranscriptionService:
+class WhisperTranscriptionService(ChunkResultMixin):
     """
     本地 Whisper 转录服务
-    使用本地 Whisper 模型进行转录，不依赖在线 API
+    使用本地 Whisper 模型进行转录，不依赖在线 API；
+    长音频按与在线转录相同的方式切片，分片分发到推理进程池（每个进程一份模型）并行转录
     """
 
     def __init__(self, model_size: str = "base", method: str = "local"):
@@ -53,6 +68,14 @@ class WhisperTranscriptionService:
         self.model_size = model_size
         self.method = method
         self.model = None
+        self.audio_assets = AudioAssetService()
+        self.asr_cache = get_asr_cache()
+        self.chunk_duration_seconds = int(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "600"))
+        self.segmenter = SegmenterConfig.from_env(self.chunk_duration_seconds)
+        self.failure_ratio_threshold = min(
+            1.0,
+            max(0.0, float(os.getenv("TRANSCRIBE_FAILURE_THRESHOLD", "0.3")))
+        )
 
         # 检查依赖
         if method == "local":
@@ -60,134 +83,249 @@ class WhisperTranscriptionService:
                 raise ImportError(
                     "本地 Whisper 不可用，请安装: pip install openai-whisper"
                 )
-            logger.info("正在加载 Whisper 模型: %s...", model_size)
-            self.model = whisper.load_model(model_size)
-            logger.info("Whisper 模型加载成功")
-
         elif method == "faster":
             if not FASTER_WHISPER_AVAILABLE:
                 raise ImportError(
                     "faster-whisper 不可用，请安装: pip install faster-whisper"
                 )
-            logger.info("正在加载 faster-whisper 模型: %s...", model_size)
-            self.model = WhisperModel(model_size, device="cpu", compute_type="int8")
-            logger.info("faster-whisper 模型加载成功")
-
         else:
             raise ValueError(f"不支持的转录方法: {method}")
 
-    def check_audio_stream(self, video_path: Path) -> Optional[bool]:
-        """检查视频文件是否有音频流"""
-        try:
-            cmd = [
-                'ffprobe',
-                '-v', 'error',
-                '-select_streams', 'a:0',
-                '-show_entries', 'stream=codec_type,codec_name',
-                '-of', 'json',
-                str(video_path)
-            ]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
+        # 推理进程池：模型在各工作进程中加载，当前进程不再持有模型
+        self.pool_config = resolve_pool_config(method, model_size)
+        self.pool: Optional[WhisperProcessPool] = get_whisper_pool(method, model_size, self.pool_config)
+        # 进程内推理时同一模型实例的并发转录数：openai-whisper 模型不能并发调用，
+        # faster-whisper 按 num_workers 允许并发
+        self.inference_slots = self.pool_config.num_workers if method == "faster" else 1
+        self._inference_semaphore = threading.BoundedSemaphore(self.inference_slots)
+        if self.pool is None:
+            logger.info(
+                "正在加载 Whisper 模型: method=%s model=%s config=%s...",
+                method,
+                model_size,
+                self.pool_config.to_dict()
             )
-            if result.returncode == 0:
-                import json
-                data = json.loads(result.stdout)
-                streams = data.get('streams', [])
-                return len(streams) > 0
-            return False
-        except Exception as e:
-            logger.warning("无法检查音频流: %s", e)
-            return None  # 无法确定
+            self.model = self._load_local_model()
+            logger.info("Whisper 模型加载成功")
 
-    def extract_audio(self, video_path: Path, audio_path: Path) -> bool:
-        """从视频中提取音频"""
-        logger.info("正在从视频提取音频: %s", video_path.name)
+    def _load_local_model(self):
+        return load_model(
+            self.method,
+            self.model_size,
+            self.pool_config.cpu_threads,
+            self.pool_config.compute_type,
+            self.pool_config.num_workers
+        )
 
-        # 先检查是否有音频流
-        has_audio = self.check_audio_stream(video_path)
-        if has_audio is False:
-            logger.error("该视频文件没有音频流，无法转录")
-            return False
+    async def check_audio_stream(self, video_path: Path) -> Optional[bool]:
+        """检查视频文件是否有音频流（使用缓存的媒体信息）"""
+        info = await self.audio_assets.get_media_info(video_path)
+        if info is None:
+            return None  # 无法确定
+        return info.has_audio
 
+    def transcribe_timed(self, audio_path: Path) -> Optional[TimedText]:
+        """在当前进程中用已加载的模型转录（阻塞），返回文本与句子时间戳"""
+        if self.model is None:
+            self.model = self._load_local_model()
         try:
-            # 使用 ffmpeg 提取音频
-            cmd = [
-                'ffmpeg',
-                '-i', str(video_path),
-                '-map', '0:a:0',  # 明确选择第一个音频流
-                '-acodec', 'pcm_s16le',  # 使用 PCM 16位
-                '-ar', '16000',  # 采样率 16kHz
-                '-ac', '1',  # 单声道
-                '-y',  # 覆盖输出文件
-                str(audio_path)
-            ]
-
-            result = subprocess.run(
-                cmd,
-                check=True,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            logger.info("音频已提取: %s", audio_path.name)
-            return True
-
-        except subprocess.CalledProcessError as e:
-            error_output = e.stderr if isinstance(e.stderr, str) else str(e)
-            logger.error("音频提取失败: %s", error_output)
-            return False
-
-        except FileNotFoundError:
-            logger.error("未找到 ffmpeg，请先安装: brew install ffmpeg (macOS) 或 sudo apt install ffmpeg (Ubuntu)")
-            return False
-
+            with self._inference_semaphore:
+                text, segments = run_inference(self.model, self.method, str(audio_path))
         except Exception as e:
-            logger.exception("音频提取失败: %s", e)
-            return False
+            logger.exception("本地转录失败: %s", e)
+            return None
+        logger.info("本地转录完成，文本长度: %d 字符", len(text))
+        return TimedText(text=text, segments=segments)
 
-    def transcribe_with_local(self, audio_path: Path) -> Optional[str]:
-        """使用本地 Whisper 模型转录"""
-        logger.info("正在使用本地 Whisper 模型进行转录...")
+    async def infer(self, audio_path: Path) -> Optional[TimedText]:
+        """
+        转录单个音频文件：配置了进程池时在工作进程中执行，否则在推理线程池中执行
+        推理失败返回 None；排队已满时抛出 ExecutorSaturatedError
+        """
+        if self.pool is None:
+            return await run_blocking(INFERENCE, self.transcribe_timed, audio_path)
         try:
-            result = self.model.transcribe(
-                str(audio_path),
-                language="zh",  # 中文
-                task="transcribe"
-            )
-            text = result["text"].strip()
-            logger.info("本地转录完成，文本长度: %d 字符", len(text))
-            return text
+            text, segments = await self.pool.transcribe(audio_path)
+        except ExecutorSaturatedError:
+            raise
         except Exception as e:
-            logger.exception("本地转录失败: %s", e)
+            logger.exception("本地转录失败: file=%s error=%s", audio_path.name, e)
             return None
+        return TimedText(text=text, segments=segments)
 
-    def transcribe_with_faster(self, audio_path: Path) -> Optional[str]:
-        """使用 faster-whisper 转录"""
-        logger.info("正在使用 faster-whisper 进行转录...")
+    async def warmup(self) -> None:
+        """
+        用一段静音推理一次：进程池中的每个进程都完成模型加载、计算内核初始化并把权重读入内存，
+        首个真实分片不再承担这部分延迟
+
+        Raises:
+            RuntimeError: 所有预热推理均失败（例如模型无法加载）
+        """
+        fd, name = tempfile.mkstemp(prefix="whisper_warmup_", suffix=".wav")
+        clip = Path(name)
         try:
-            segments, info = self.model.transcribe(
-                str(audio_path),
-                language="zh",  # 中文
-                beam_size=5
-            )
+            with os.fdopen(fd, 'wb') as f, wave.open(f, 'wb') as writer:
+                writer.setnchannels(1)
+                writer.setsampwidth(2)
+                writer.setframerate(16000)
+                writer.writeframes(b"\x00\x00" * 16000 * WARMUP_CLIP_SECONDS)
+            rounds = self.pool.max_workers if self.pool else 1
+            results = await asyncio.gather(*(self.infer(clip) for _ in range(rounds)), return_exceptions=True)
+        finally:
+            clip.unlink(missing_ok=True)
+        succeeded = sum(1 for item in results if isinstance(item, TimedText))
+        if not succeeded:
+            raise RuntimeError("本地 Whisper 预热失败，模型可能无法加载")
+        logger.info("本地 Whisper 预热完成: %d/%d 个推理实例", succeeded, rounds)
+
+    def _should_chunk_audio(self, duration: Optional[float]) -> bool:
+        """与在线转录相同的切片规则，分片清单可以在两种转录方式之间复用"""
+        if duration is None:
+            return False
+        return duration > max(self.chunk_duration_seconds * 1.5, self.chunk_duration_seconds + 60)
 
-            # 合并所有片段
-            text_parts = []
-            for segment in segments:
-                text_parts.append(segment.text)
+    async def _prepare_chunk_manifest(
+        self,
+        file_path: Path,
+        fallback_manifest: Optional[Dict] = None,
+        progress=None
+    ) -> Tuple[AudioAsset, ChunkManifest]:
+        """获取标准化音频及其分片清单（与在线转录共用同一份清单与分片文件）"""
+        return await self.audio_assets.prepare_chunks(
+            file_path,
+            self.segmenter,
+            self._should_chunk_audio,
+            fallback=fallback_manifest,
+            progress=progress
+        )
 
-            text = " ".join(text_parts).strip()
-            logger.info("faster-whisper 转录完成，文本长度: %d 字符", len(text))
-            return text
-        except Exception as e:
-            logger.exception("faster-whisper 转录失败: %s", e)
-            return None
+    async def _transcribe_chunk(
+        self,
+        index: int,
+        chunk_path: Path,
+        start: float,
+        end: Optional[float],
+        audio_hash: Optional[str] = None
+    ) -> ChunkTranscription:
+        """
+        转录单个分片，句子时间戳换算为原音频中的绝对时间
+        相同分片内容 + 模型已有结果时直接复用；推理失败时返回失败分片，可单独重试
+        """
+        provider = f"whisper-{self.method}"
+        cached = None
+        if audio_hash:
+            cached = await run_blocking(ASR_IO, self.asr_cache.get_entry, audio_hash, self.model_size, provider)
+        if cached and cached.get("text"):
+            logger.info("本地转录命中缓存: chunk=%s", chunk_path.name)
+            timed = TimedText(text=cached["text"], segments=shift_segments(cached.get("segments") or [], 0.0))
+        else:
+            started = time.perf_counter()
+            timed = await self.infer(chunk_path)
+            metrics.CHUNK_LATENCY.labels(
+                provider=provider,
+                model=self.model_size,
+                attempt="1",
+                outcome="ok" if timed is not None else "error"
+            ).observe(time.perf_counter() - started)
+            if timed is None:
+                return ChunkTranscription(
+                    index=index,
+                    filename=chunk_path.name,
+                    status="error",
+                    text="",
+                    error="本地推理失败",
+                    retry_count=0,
+                    provider="whisper",
+                    start=start,
+                    end=end
+                )
+            if timed.text and audio_hash:
+                await run_blocking(
+                    ASR_IO,
+                    self.asr_cache.put, audio_hash, self.model_size, provider, timed.text, timed.segments
+                )
+
+        if timed.segments:
+            segments, source = shift_segments(timed.segments, start), "provider"
+        elif timed.text and end:
+            segments, source = estimate_segments(timed.text, start, end), "estimated"
+        else:
+            segments, source = [], None
+        return ChunkTranscription(
+            index=index,
+            filename=chunk_path.name,
+            status="ok",
+            text=timed.text,
+            error=None,
+            retry_count=0,
+            provider="whisper",
+            start=start,
+            end=end,
+            segments=segments,
+            timestamps=source
+        )
+
+    async def _transcribe_chunks(
+        self,
+        chunks: List[AudioChunk],
+        chunk_files: List[Path],
+        *,
+        task_id: str,
+        total_chunks: int,
+        stats: Dict[str, int],
+        progress_callback: Optional[ProgressCallback] = None,
+        checkpoint: Optional[ChunkCheckpoint] = None
+    ) -> Dict[int, ChunkTranscription]:
+        """
+        并行转录一组分片，每完成一个分片上报进度并写入检查点
+        单个任务同时提交的分片数不超过推理进程数，排队上限只在多个任务同时转录时生效
+        """
+        results: Dict[int, ChunkTranscription] = {}
+        progress_lock = asyncio.Lock()
+        slots = asyncio.Semaphore(self.pool.max_workers if self.pool else self.inference_slots)
+
+        async def worker(chunk: AudioChunk) -> None:
+            async with slots:
+                chunk_result = await self._transcribe_chunk(
+                    chunk.index,
+                    chunk_files[chunk.index],
+                    chunk.start,
+                    chunk.end or None,
+                    chunk.sha256 or None
+                )
+            async with progress_lock:
+                results[chunk.index] = chunk_result
+                stats["completed"] += 1
+                if chunk_result.status == "error":
+                    stats["failed"] += 1
+                progress = self._build_progress(
+                    task_id,
+                    status="transcribing",
+                    total_chunks=total_chunks,
+                    completed_chunks=stats["completed"],
+                    failed_chunks=stats["failed"],
+                    stage="transcribing",
+                    message=(
+                        f"分片 {chunk.index + 1}/{total_chunks} 转录完成"
+                        if chunk_result.status == "ok"
+                        else f"分片 {chunk.index + 1}/{total_chunks} 转录失败"
+                    ),
+                    chunk_index=chunk.index,
+                    chunk_status=chunk_result.status
+                )
+            await self._emit_progress(progress_callback, progress)
+            if checkpoint is not None:
+                await checkpoint(chunk_result)
+
+        tasks = [asyncio.create_task(worker(chunk)) for chunk in chunks]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return results
 
     async def transcribe_audio(
         self,
@@ -195,16 +333,22 @@ class WhisperTranscriptionService:
         model: Optional[str] = None,
         *,
         task_id: Optional[str] = None,
-        progress_callback: Optional[ProgressCallback] = None
+        progress_callback: Optional[ProgressCallback] = None,
+        user_id: Optional[str] = None,
+        checkpoint: Optional[ChunkCheckpoint] = None,
+        completed_chunks: Optional[Dict[int, ChunkTranscription]] = None
     ) -> TranscriptionResult:
         """
         转录音频/视频文件
+        长音频按分片清单切分后并行转录，分片结果的合并与汇总与在线转录一致
 
         Args:
             file_path: 文件路径
             model: 模型名称（本地转录时忽略此参数）
             task_id: 任务ID
             progress_callback: 进度回调函数
+            checkpoint: 分片完成后的检查点回调
+            completed_chunks: 恢复任务时已完成的分片（序号、文件名与当前清单一致时复用）
 
         Returns:
             TranscriptionResult: 转录结果
@@ -215,159 +359,171 @@ class WhisperTranscriptionService:
         current_task_id = task_id or f"whisper-{file_path.stem}"
 
         logger.info(
-            "开始本地转录: file=%s, method=%s, model=%s",
+            "开始本地转录: file=%s, method=%s, model=%s, workers=%s",
             file_path.name,
             self.method,
-            self.model_size
+            self.model_size,
+            self.pool.max_workers if self.pool else "in-process"
         )
 
         # 发送初始进度
-        if progress_callback:
-            await progress_callback(TranscriptionProgress(
-                task_id=current_task_id,
+        await self._emit_progress(
+            progress_callback,
+            self._build_progress(
+                current_task_id,
                 status="uploaded",
-                total_chunks=1,
+                total_chunks=0,
                 completed_chunks=0,
                 failed_chunks=0,
-                progress=0.0,
                 stage="init",
                 message="准备开始本地转录"
-            ))
+            )
+        )
 
-        # 准备临时音频文件路径
-        audio_path = None
+        total_chunks = 0
+        stats = {"completed": 0, "failed": 0}
+        tasks_in_flight = metrics.TASKS_IN_FLIGHT.labels(transcriber="whisper")
+        tasks_in_flight.inc()
         try:
-            # 如果是视频文件，需要提取音频
+            # 所有音视频统一使用上传时生成的 16kHz 单声道标准音频
             video_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv']
             audio_extensions = ['.mp3', '.wav', '.m4a', '.flac', '.ogg']
+            suffix = file_path.suffix.lower()
 
-            if file_path.suffix.lower() in video_extensions:
-                # 创建临时音频文件
-                audio_path = file_path.parent / f"{file_path.stem}_temp_audio.wav"
-
-                # 发送提取音频进度
-                if progress_callback:
-                    await progress_callback(TranscriptionProgress(
-                        task_id=current_task_id,
-                        status="transcribing",
-                        total_chunks=1,
-                        completed_chunks=0,
-                        failed_chunks=0,
-                        progress=0.1,
-                        stage="extracting_audio",
-                        message="正在从视频提取音频"
-                    ))
-
-                # 在线程池中执行音频提取
-                success = await asyncio.to_thread(
-                    self.extract_audio,
-                    file_path,
-                    audio_path
-                )
-
-                if not success:
-                    raise RuntimeError("音频提取失败")
-
-                transcription_file = audio_path
-            elif file_path.suffix.lower() in audio_extensions:
-                # 直接使用音频文件
-                transcription_file = file_path
-            else:
+            if suffix not in video_extensions and suffix not in audio_extensions:
                 raise ValueError(f"不支持的文件格式: {file_path.suffix}")
 
-            # 发送转录进度
-            if progress_callback:
-                await progress_callback(TranscriptionProgress(
-                    task_id=current_task_id,
+            if suffix in video_extensions:
+                has_audio = await self.check_audio_stream(file_path)
+                if has_audio is False:
+                    raise RuntimeError("该视频文件没有音频流，无法转录")
+
+            # 获取（必要时生成）标准化音频与分片清单
+            asset, manifest = await self._prepare_chunk_manifest(
+                file_path,
+                progress=self._media_progress_reporter(current_task_id, progress_callback)
+            )
+            chunk_files = [
+                self.audio_assets.resolve_chunk_path(asset, chunk) for chunk in manifest.chunks
+            ]
+            total_chunks = len(chunk_files)
+
+            # 检查点中的分片与当前清单一致（序号、文件名相同）时才复用
+            resumed = {
+                idx: chunk for idx, chunk in (completed_chunks or {}).items()
+                if idx < total_chunks and chunk.status == "ok" and chunk.filename == chunk_files[idx].name
+            }
+            stats["completed"] = len(resumed)
+            await self._emit_progress(
+                progress_callback,
+                self._build_progress(
+                    current_task_id,
                     status="transcribing",
-                    total_chunks=1,
-                    completed_chunks=0,
+                    total_chunks=total_chunks,
+                    completed_chunks=len(resumed),
                     failed_chunks=0,
-                    progress=0.3,
                     stage="transcribing",
-                    message="正在使用 Whisper 模型转录"
-                ))
-
-            # 在线程池中执行转录
-            if self.method == "faster":
-                text = await asyncio.to_thread(
-                    self.transcribe_with_faster,
-                    transcription_file
-                )
-            else:  # local
-                text = await asyncio.to_thread(
-                    self.transcribe_with_local,
-                    transcription_file
+                    message=(
+                        f"从检查点恢复，已完成 {len(resumed)}/{total_chunks} 个分片"
+                        if resumed else f"正在使用 Whisper 模型转录 {total_chunks} 个分片"
+                    )
                 )
-
-            if not text:
-                raise RuntimeError("转录失败，未获得文本结果")
-
-            # 构造转录结果
-            chunk = ChunkTranscription(
-                index=0,
-                filename=file_path.name,
-                status="ok",
-                text=text,
-                error=None,
-                retry_count=0
             )
 
-            summary = TranscriptionSummary(
+            chunk_results = await self._transcribe_chunks(
+                [chunk for chunk in manifest.chunks if chunk.index not in resumed],
+                chunk_files,
                 task_id=current_task_id,
-                total_chunks=1,
-                success_chunks=1,
-                failed_chunks=0,
-                failure_ratio=0.0,
-                status="completed",
-                error_message=None
+                total_chunks=total_chunks,
+                stats=stats,
+                progress_callback=progress_callback,
+                checkpoint=checkpoint
             )
+            chunk_results.update(resumed)
+            ordered_chunks = [chunk_results[idx] for idx in range(total_chunks)]
+            if not stats["failed"] and not any(chunk.text for chunk in ordered_chunks):
+                raise RuntimeError("转录失败，未获得文本结果")
 
-            result = TranscriptionResult(
-                chunks=[chunk],
-                merged_text=text,
-                overall_status="completed",
-                failed_chunks=[],
-                summary=summary
+            await self._emit_progress(
+                progress_callback,
+                self._build_progress(
+                    current_task_id,
+                    status="merging",
+                    total_chunks=total_chunks,
+                    completed_chunks=stats["completed"],
+                    failed_chunks=stats["failed"],
+                    stage="merging",
+                    message="正在合并分片文本"
+                )
+            )
+            result = self._build_transcription_result(ordered_chunks, task_id=current_task_id, manifest=manifest)
+
+            final_status = "failed" if result.summary and result.summary.status == "failed" else "completed"
+            await self._emit_progress(
+                progress_callback,
+                self._build_progress(
+                    current_task_id,
+                    status=final_status,
+                    total_chunks=total_chunks,
+                    completed_chunks=stats["completed"],
+                    failed_chunks=stats["failed"],
+                    stage="completed" if final_status == "completed" else "failed",
+                    message=(
+                        "本地转录完成"
+                        if result.summary and result.summary.status == "completed"
+                        else "部分分片转录失败，已返回可用文本"
+                        if result.summary and result.summary.status == "partial"
+                        else "本地转录失败"
+                    ),
+                    error_message=result.summary.error_message if result.summary else None
+                )
             )
-
-            # 发送完成进度
-            if progress_callback:
-                await progress_callback(TranscriptionProgress(
-                    task_id=current_task_id,
-                    status="completed",
-                    total_chunks=1,
-                    completed_chunks=1,
-                    failed_chunks=0,
-                    progress=1.0,
-                    stage="completed",
-                    message="本地转录完成"
-                ))
 
             logger.info(
-                "本地转录完成: file=%s, text_length=%d",
+                "本地转录完成: file=%s, chunks=%d, failed=%d, text_length=%d",
                 file_path.name,
-                len(text)
+                total_chunks,
+                stats["failed"],
+                len(result.merged_text)
             )
 
             return result
 
+        except ExecutorSaturatedError as exc:
+            # 本地推理排队已满：不生成失败结果，由接口返回 503 让客户端稍后重试
+            logger.warning("本地转录排队已满: file=%s", file_path.name)
+            await self._emit_progress(
+                progress_callback,
+                self._build_progress(
+                    current_task_id,
+                    status="failed",
+                    total_chunks=total_chunks,
+                    completed_chunks=stats["completed"],
+                    failed_chunks=stats["failed"],
+                    stage="failed",
+                    message="服务繁忙，请稍后重试",
+                    error_message=str(exc)
+                )
+            )
+            raise
+
         except Exception as e:
             logger.exception("本地转录失败: file=%s, error=%s", file_path.name, e)
 
             # 发送失败进度
-            if progress_callback:
-                await progress_callback(TranscriptionProgress(
-                    task_id=current_task_id,
+            await self._emit_progress(
+                progress_callback,
+                self._build_progress(
+                    current_task_id,
                     status="failed",
-                    total_chunks=1,
-                    completed_chunks=0,
-                    failed_chunks=1,
-                    progress=0.0,
+                    total_chunks=max(total_chunks, 1),
+                    completed_chunks=stats["completed"],
+                    failed_chunks=max(stats["failed"], 1),
                     stage="failed",
                     message="本地转录失败",
                     error_message=str(e)
-                ))
+                )
+            )
 
             # 返回失败结果
             chunk = ChunkTranscription(
@@ -398,39 +554,112 @@ class WhisperTranscriptionService:
             )
 
             return result
-
         finally:
-            # 清理临时音频文件
-            if audio_path and audio_path.exists():
-                try:
-                    audio_path.unlink()
-                    logger.info("已删除临时音频文件: %s", audio_path.name)
-                except Exception as e:
-                    logger.warning("删除临时音频文件失败: %s", e)
+            tasks_in_flight.dec()
+
+    async def transcribe_range(
+        self,
+        file_path: Path,
+        start: float,
+        end: float,
+        model: Optional[str] = None,
+        *,
+        chunk_manifest: Optional[Dict] = None,
+        user_id: Optional[str] = None
+    ) -> RangeTranscription:
+        """
+        只重新转录原音频的 [start, end) 区间（秒）
+
+        Args:
+            file_path: 文件路径
+            start: 区间起点
+            end: 区间终点
+            model: 模型名称（忽略）
+            chunk_manifest: 分片清单（忽略）
+
+        Returns:
+            RangeTranscription: 区间文本与绝对时间的句子时间戳
+        """
+        if not file_path.exists():
+            raise FileNotFoundError(f"文件不存在: {file_path}")
+
+        asset = await self.audio_assets.ensure_canonical(file_path)
+        media_info = await self.audio_assets.get_media_info(file_path)
+        start, end = max(0.0, float(start)), float(end)
+        if media_info and media_info.duration:
+            end = min(end, media_info.duration)
+        self._check_range_span(start, end)
+
+        range_path = await self.audio_assets.cut_span(asset, start, end)
+        timed = await self.infer(range_path)
+        if timed is None:
+            raise RuntimeError("区间转录失败")
+        if timed.segments:
+            segments, source = shift_segments(timed.segments, start), "provider"
+        else:
+            segments, source = estimate_segments(timed.text, start, end), "estimated"
+        return RangeTranscription(
+            start=start,
+            end=end,
+            text=timed.text,
+            segments=segments,
+            provider="whisper",
+            timestamps=source
+        )
 
     async def transcribe_chunk_subset(
         self,
         file_path: Path,
         indices: List[int],
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        *,
+        chunk_manifest: Optional[Dict] = None,
+        user_id: Optional[str] = None
     ) -> Dict[int, ChunkTranscription]:
         """
-        重试失败的分片（本地转录不支持分片，直接重新转录整个文件）
+        只重试给定序号的分片，复用转录记录中保存的分片清单
 
         Args:
             file_path: 文件路径
             indices: 分片索引列表
             model: 模型名称（忽略）
+            chunk_manifest: 转录记录中保存的分片清单
 
         Returns:
             Dict[int, ChunkTranscription]: 分片转录结果
         """
-        logger.info("本地转录不支持分片重试，将重新转录整个文件")
+        if not file_path.exists():
+            raise FileNotFoundError(f"文件不存在: {file_path}")
+        if not indices:
+            return {}
 
-        result = await self.transcribe_audio(file_path, model)
+        if not chunk_manifest:
+            # 旧的本地转录记录没有分片清单（整个文件作为一个分片），重新转录整个文件
+            if 0 not in {int(idx) for idx in indices}:
+                return {}
+            logger.info("转录记录没有分片清单，将重新转录整个文件")
+            asset = await self.audio_assets.ensure_canonical(file_path)
+            media_info = await self.audio_assets.get_media_info(file_path)
+            chunk = await self._transcribe_chunk(
+                0,
+                asset.path,
+                0.0,
+                media_info.duration if media_info else None
+            )
+            return {0: chunk}
 
-        # 返回第一个分片的结果
-        if result.chunks:
-            return {0: result.chunks[0]}
-        else:
+        asset, manifest = await self._prepare_chunk_manifest(file_path, chunk_manifest)
+        normalized_indices = sorted({
+            int(idx) for idx in indices if 0 <= int(idx) < len(manifest.chunks)
+        })
+        if not normalized_indices:
             return {}
+
+        chunk_files = await self.audio_assets.materialize_chunks(asset, manifest, normalized_indices)
+        return await self._transcribe_chunks(
+            [manifest.chunks[idx] for idx in normalized_indices],
+            chunk_files,
+            task_id=f"whisper-retry-{file_path.stem}",
+            total_chunks=len(normalized_indices),
+            stats={"completed": 0, "failed": 0}
+        )
@@ -0,0 +1,304 @@
+"""
+本地模拟转录服务
+模拟 SiliconFlow 的 POST /v1/audio/transcriptions 接口（multipart 上传 file + model，返回 {"text": ...}），
+用于离线压测与故障演练真实的分片、并发、重试、超时与对冲逻辑（MOCK_TRANSCRIPTION 会跳过这些路径）：
+- 响应耗时 = 基础耗时 + 音频秒数 × 实时率，再乘以对数正态抖动
+- 按比例返回 500、429（附带 Retry-After）或挂起不响应
+- 可限制服务端并发，超出时返回 429，模拟提供方容量
+- GET /stats 返回请求计数与峰值并发
+
+示例:
+  # 启动（在 backend 目录下执行）
+  python -m app.tools.fake_asr_server --port 9100 --rtf 0.05 --error-rate 0.05 --throttle-rate 0.05
+
+  # 让后端使用模拟服务（需任意非空的 SILICONFLOW_API_KEY）
+  TRANSCRIBE_SILICONFLOW_URL=http://127.0.0.1:9100/v1/audio/transcriptions SILICONFLOW_API_KEY=fake python -m app
+"""
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import math
+import random
+import sys
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# 保留中文错误信息，便于在后端日志中直接阅读
+_dumps = functools.partial(json.dumps, ensure_ascii=False)
+
+TRANSCRIPTION_PATH = "/v1/audio/transcriptions"
+_SAMPLE_SENTENCES = (
+    "请先做一个简单的自我介绍。",
+    "我主要负责前端方向的性能优化。",
+    "这个项目里你遇到的最大挑战是什么？",
+    "我们通过虚拟滚动把首屏渲染时间降低了一半。",
+    "如果让你重新设计，你会怎么做？",
+    "我会先拆分模块，再逐步替换旧的实现。",
+)
+
+
+@dataclass
+class FakeASRConfig:
+    """模拟转录接口的延迟与故障模型"""
+
+    base_latency: float = 0.2
+    # 每秒音频增加的处理时间（实时率）
+    rtf: float = 0.02
+    # 对数正态抖动的 sigma，0 表示不抖动
+    jitter: float = 0.3
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 1.0
+    hang_rate: float = 0.0
+    hang_seconds: float = 3600.0
+    # 非 0 时所有请求直接返回该状态码（401 模拟失效的 API key，402 模拟余额不足）
+    reject_status: int = 0
+    # 服务端同时处理的请求上限，超出时直接返回 429；0 表示不限
+    max_concurrency: int = 0
+    # 按字节数估算音频时长时假定的码率
+    assumed_kbps: float = 32.0
+    # 使用 ffprobe 获取准确的音频时长（较慢）
+    probe: bool = False
+    chars_per_second: float = 4.0
+    seed: Optional[int] = None
+
+
+class FakeASRStats:
+    def __init__(self):
+        self.requests = 0
+        self.succeeded = 0
+        self.errors = 0
+        self.throttled = 0
+        self.hung = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.audio_seconds = 0.0
+        self.bytes_received = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "succeeded": self.succeeded,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "hung": self.hung,
+            "inFlight": self.in_flight,
+            "peakInFlight": self.peak_in_flight,
+            "audioSeconds": round(self.audio_seconds, 3),
+            "bytesReceived": self.bytes_received,
+        }
+
+
+def synthesize_text(digest: str, audio_seconds: float, chars_per_second: float) -> str:
+    """按音频内容哈希生成确定性的文本，长度与音频时长成正比"""
+    target = max(1, int(audio_seconds * chars_per_second))
+    offset = int(digest[:8], 16)
+    parts = []
+    length = 0
+    while length < target:
+        sentence = _SAMPLE_SENTENCES[(offset + len(parts)) % len(_SAMPLE_SENTENCES)]
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)
+
+
+def _json_response(data: Any, **kwargs: Any) -> web.Response:
+    return web.json_response(data, dumps=_dumps, **kwargs)
+
+
+class FakeASRServer:
+    def __init__(self, config: FakeASRConfig):
+        self.config = config
+        self.stats = FakeASRStats()
+        self.random = random.Random(config.seed)
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=256 * 1024 * 1024)
+        app.router.add_post(TRANSCRIPTION_PATH, self.handle_transcription)
+        app.router.add_get("/stats", self.handle_stats)
+        app.router.add_post("/stats/reset", self.handle_reset)
+        app.router.add_get("/", self.handle_root)
+        return app
+
+    async def _read_upload(self, request: web.Request) -> Tuple[bytes, Optional[str], str]:
+        reader = await request.multipart()
+        payload = b""
+        filename = None
+        model = ""
+        async for part in reader:
+            if part.name == "file":
+                filename = part.filename
+                payload = await part.read(decode=False)
+            elif part.name == "model":
+                model = (await part.text()).strip()
+        return payload, filename, model
+
+    async def _audio_seconds(self, payload: bytes, filename: Optional[str]) -> float:
+        if self.config.probe:
+            from app.services.media_toolkit import MediaToolError, probe_media
+            suffix = Path(filename or "chunk.mp3").suffix or ".mp3"
+            with tempfile.NamedTemporaryFile(suffix=suffix) as handle:
+                handle.write(payload)
+                handle.flush()
+                try:
+                    info = await probe_media(Path(handle.name))
+                    if info.duration:
+                        return info.duration
+                except MediaToolError as exc:
+                    logger.debug("ffprobe 失败，按字节数估算: %s", exc)
+        return len(payload) * 8 / 1000 / max(1.0, self.config.assumed_kbps)
+
+    def _latency(self, audio_seconds: float) -> float:
+        latency = self.config.base_latency + audio_seconds * self.config.rtf
+        if self.config.jitter > 0:
+            # 均值为 1 的对数正态抖动
+            sigma = self.config.jitter
+            latency *= self.random.lognormvariate(-sigma * sigma / 2, sigma)
+        return max(0.0, latency)
+
+    async def handle_transcription(self, request: web.Request) -> web.StreamResponse:
+        stats = self.stats
+        stats.requests += 1
+        if self.config.max_concurrency and stats.in_flight >= self.config.max_concurrency:
+            stats.throttled += 1
+            return self._throttled("服务端并发已满")
+
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        try:
+            payload, filename, model = await self._read_upload(request)
+            if not payload:
+                stats.errors += 1
+                return _json_response({"message": "缺少 file 字段"}, status=400)
+            stats.bytes_received += len(payload)
+            if self.config.reject_status:
+                stats.errors += 1
+                message = "余额不足（insufficient balance）" if self.config.reject_status == 402 else "Invalid API key"
+                return _json_response({"message": message}, status=self.config.reject_status)
+
+            roll = self.random.random()
+            if roll < self.config.throttle_rate:
+                stats.throttled += 1
+                return self._throttled("模拟限流")
+            roll -= self.config.throttle_rate
+            if roll < self.config.hang_rate:
+                stats.hung += 1
+                await asyncio.sleep(self.config.hang_seconds)
+                return _json_response({"message": "模拟挂起结束"}, status=504)
+            roll -= self.config.hang_rate
+
+            audio_seconds = await self._audio_seconds(payload, filename)
+            await asyncio.sleep(self._latency(audio_seconds))
+            if roll < self.config.error_rate:
+                stats.errors += 1
+                return _json_response({"message": "模拟服务端错误"}, status=500)
+
+            stats.succeeded += 1
+            stats.audio_seconds += audio_seconds
+            digest = hashlib.sha256(payload).hexdigest()
+            return _json_response({
+                "text": synthesize_text(digest, audio_seconds, self.config.chars_per_second),
+                "model": model,
+            })
+        finally:
+            stats.in_flight -= 1
+
+    def _throttled(self, message: str) -> web.Response:
+        return _json_response(
+            {"message": message},
+            status=429,
+            headers={"Retry-After": f"{max(0, math.ceil(self.config.retry_after))}"}
+        )
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return _json_response({"stats": self.stats.to_dict(), "config": asdict(self.config)})
+
+    async def handle_reset(self, request: web.Request) -> web.Response:
+        in_flight = self.stats.in_flight
+        self.stats = FakeASRStats()
+        self.stats.in_flight = in_flight
+        return _json_response({"success": True})
+
+    async def handle_root(self, request: web.Request) -> web.Response:
+        return _json_response({"message": "InterReview fake ASR server", "endpoint": TRANSCRIPTION_PATH})
+
+
+async def start_fake_server(
+    config: FakeASRConfig,
+    host: str = "127.0.0.1",
+    port: int = 0
+) -> Tuple[web.AppRunner, FakeASRServer, str]:
+    """在当前事件循环中启动模拟服务，返回 (runner, server, 转录接口地址)；port=0 时自动选择端口"""
+    server = FakeASRServer(config)
+    runner = web.AppRunner(server.create_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1] if runner.addresses else port
+    return runner, server, f"http://{host}:{bound_port}{TRANSCRIPTION_PATH}"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    defaults = FakeASRConfig()
+    parser = argparse.ArgumentParser(
+        description="本地模拟转录服务 - 用于压测与故障演练",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--base-latency", type=float, default=defaults.base_latency, help="基础耗时（秒）")
+    parser.add_argument("--rtf", type=float, default=defaults.rtf, help="每秒音频增加的耗时（秒）")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="对数正态抖动 sigma")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="返回 500 的比例")
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate, help="返回 429 的比例")
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after, help="429 的 Retry-After（秒）")
+    parser.add_argument("--hang-rate", type=float, default=defaults.hang_rate, help="挂起不响应的比例")
+    parser.add_argument("--hang-seconds", type=float, default=defaults.hang_seconds, help="挂起时长（秒）")
+    parser.add_argument("--reject-status", type=int, default=defaults.reject_status, help="所有请求返回该状态码，0 关闭")
+    parser.add_argument("--max-concurrency", type=int, default=defaults.max_concurrency, help="服务端并发上限，0 不限")
+    parser.add_argument("--assumed-kbps", type=float, default=defaults.assumed_kbps, help="按字节估算时长时的码率")
+    parser.add_argument("--probe", action="store_true", help="用 ffprobe 获取准确的音频时长")
+    parser.add_argument("--seed", type=int, help="随机种子")
+    return parser
+
+
+def config_from_args(args: argparse.Namespace) -> FakeASRConfig:
+    return FakeASRConfig(
+        base_latency=args.base_latency,
+        rtf=args.rtf,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        reject_status=args.reject_status,
+        max_concurrency=args.max_concurrency,
+        assumed_kbps=args.assumed_kbps,
+        probe=args.probe,
+        seed=args.seed,
+    )
+
+
+def main(argv: Optional[list] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    config = config_from_args(args)
+    server = FakeASRServer(config)
+    print(f"模拟转录服务: http://{args.host}:{args.port}{TRANSCRIPTION_PATH}")
+    web.run_app(server.create_app(), host=args.host, port=args.port, access_log=None, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""
+端到端转录吞吐基准测试
+合成或加载 N 个音频文件，按指定的任务并发数走完整的 transcribe_audio 流程
+（探测、转码、切片、上传、识别），统计：
+- 吞吐量：每秒处理的音频秒数（audio-seconds/sec）
+- 任务耗时 p50 / p95 / 最大值
+- 各阶段累计耗时（probe / transcode / split / upload / asr），来自 app.services.metrics 的直方图
+- 进程与 ffmpeg 子进程的峰值 RSS
+
+默认在进程内启动本地模拟转录服务（app/tools/fake_asr_server.py），不消耗真实额度；
+报告为 JSON，可在不同版本之间直接 diff。
+
+示例:
+  # 合成 8 个时长分别为 5 / 20 分钟的文件，2 个任务并发（在 backend 目录下执行）
+  python -m app.tools.throughput_benchmark --count 8 --lengths 300,1200 --jobs 2 -o throughput.json
+
+  # 使用已有样本、更小的切片与更高的识别并发，并注入 5% 的 429
+  python -m app.tools.throughput_benchmark ../data/2.mp3 --count 4 --chunk-seconds 120 --asr-concurrency 8 --throttle-rate 0.05
+
+  # 本地 Whisper
+  python -m app.tools.throughput_benchmark --provider whisper --whisper-model tiny --count 2 --lengths 120
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services import metrics
+from app.services.audio_assets import AudioAssetService
+from app.services.audio_segmenter import SegmenterConfig
+from app.services.media_toolkit import run_ffmpeg
+from app.tools.fake_asr_server import FakeASRConfig, start_fake_server
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("fake", "siliconflow", "whisper")
+
+# 阶段名 -> 对应的直方图
+STAGE_METRICS = {
+    "probe": metrics.PROBE_SECONDS,
+    "transcode": metrics.TRANSCODE_SECONDS,
+    "split": metrics.SEGMENT_SECONDS,
+    "upload": metrics.UPLOAD_SECONDS,
+    "asr": metrics.RESPONSE_SECONDS,
+    "schedulerWait": metrics.SCHEDULER_WAIT,
+    "chunkRequest": metrics.CHUNK_LATENCY,
+}
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))]
+
+
+def _rounded(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+def _rss_mb(usage: resource.struct_rusage) -> float:
+    # Linux 下 ru_maxrss 单位为 KB，macOS 为字节
+    divisor = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return round(usage.ru_maxrss / divisor, 1)
+
+
+def snapshot_stages() -> Dict[str, tuple]:
+    return {name: metrics.histogram_totals(metric) for name, metric in STAGE_METRICS.items()}
+
+
+def stage_delta(before: Dict[str, tuple], after: Dict[str, tuple]) -> Dict[str, Dict[str, Any]]:
+    """各阶段在本次运行中的观测次数与累计耗时（并发任务的耗时会叠加，不等于墙钟时间）"""
+    stages: Dict[str, Dict[str, Any]] = {}
+    for name in STAGE_METRICS:
+        count = after[name][0] - before[name][0]
+        seconds = after[name][1] - before[name][1]
+        stages[name] = {"count": int(count), "seconds": round(seconds, 3)}
+    return stages
+
+
+async def synthesize_audio(path: Path, seconds: float, index: int) -> Path:
+    """
+    合成带停顿的测试音频：每 7 秒中 5 秒音调、2 秒静音，便于触发静音切分；
+    每个文件的音调频率不同，避免转码资产或识别缓存被复用
+    """
+    frequency = 180 + (index * 37) % 400
+    expression = f"0.3*sin(2*PI*{frequency}*t)*lt(mod(t\\,7)\\,5)"
+    await run_ffmpeg([
+        "-y",
+        "-f", "lavfi",
+        "-i", f"aevalsrc={expression}:s=16000:d={seconds}",
+        "-ac", "1",
+        "-c:a", "libmp3lame",
+        "-b:a", "64k",
+        str(path)
+    ])
+    return path
+
+
+async def prepare_inputs(
+    sources: List[Path],
+    count: int,
+    lengths: List[float],
+    workdir: Path
+) -> List[Path]:
+    """每个任务使用独立的文件与目录，互不复用派生资产"""
+    inputs: List[Path] = []
+    for index in range(count):
+        job_dir = workdir / f"job_{index:03d}"
+        job_dir.mkdir(parents=True, exist_ok=True)
+        if sources:
+            source = sources[index % len(sources)]
+            target = job_dir / source.name
+            shutil.copy2(source, target)
+        else:
+            seconds = lengths[index % len(lengths)]
+            target = await synthesize_audio(job_dir / f"synthetic_{index:03d}.mp3", seconds, index)
+        inputs.append(target)
+    return inputs
+
+
+def build_transcriber(args: argparse.Namespace):
+    if args.provider == "whisper":
+        from app.services.whisper_service import WhisperTranscriptionService
+        transcriber = WhisperTranscriptionService(model_size=args.whisper_model, method=args.whisper_method)
+    else:
+        from app.services.transcription_service import TranscriptionService
+        api_key = settings.SILICONFLOW_API_KEY or ("fake" if args.provider == "fake" else "")
+        transcriber = TranscriptionService(api_key)
+        # 基准测试必须走真实的切片与请求路径
+        transcriber.use_mock = False
+    if args.chunk_seconds:
+        transcriber.chunk_duration_seconds = args.chunk_seconds
+        transcriber.segmenter = SegmenterConfig.from_env(args.chunk_seconds)
+    # 相同内容的重复任务不能命中识别缓存
+    transcriber.asr_cache.enabled = False
+    return transcriber
+
+
+async def run_job(transcriber: Any, path: Path, index: int, model: Optional[str]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    job: Dict[str, Any] = {"index": index, "file": path.name}
+    try:
+        kwargs = {"model": model} if model else {}
+        result = await transcriber.transcribe_audio(path, user_id=f"bench-{index}", **kwargs)
+        job.update({
+            "status": result.overall_status,
+            "chunks": len(result.chunks),
+            "failedChunks": len(result.failed_chunks),
+            "retries": sum(chunk.retry_count for chunk in result.chunks),
+        })
+    except Exception as exc:
+        job.update({"status": "error", "error": str(exc) or type(exc).__name__})
+    job["latencySeconds"] = round(time.perf_counter() - started, 3)
+    return job
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    runner = server = None
+    if args.provider == "fake":
+        runner, server, url = await start_fake_server(FakeASRConfig(
+            base_latency=args.base_latency,
+            rtf=args.rtf,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            hang_rate=args.hang_rate,
+            max_concurrency=args.server_concurrency,
+            seed=args.seed,
+        ))
+        os.environ["TRANSCRIBE_SILICONFLOW_URL"] = url
+    if args.asr_concurrency:
+        # 调度器在首次创建转录服务时读取该配置
+        os.environ["TRANSCRIBE_MAX_CONCURRENCY"] = str(args.asr_concurrency)
+
+    transcriber = build_transcriber(args)
+    model = args.model if args.provider != "whisper" else None
+    sources = [Path(item) for item in args.sources]
+    lengths = [float(item) for item in args.lengths.split(",") if item.strip()]
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="throughput_bench_") as tmp:
+            logger.info("准备 %d 个输入文件", args.count)
+            inputs = await prepare_inputs(sources, args.count, lengths, Path(tmp))
+
+            before = snapshot_stages()
+            semaphore = asyncio.Semaphore(max(1, args.jobs))
+
+            async def guarded(index: int, path: Path) -> Dict[str, Any]:
+                async with semaphore:
+                    logger.info("开始任务 %d: %s", index, path.name)
+                    return await run_job(transcriber, path, index, model)
+
+            started = time.perf_counter()
+            jobs = await asyncio.gather(*(guarded(index, path) for index, path in enumerate(inputs)))
+            wall_seconds = time.perf_counter() - started
+            stages = stage_delta(before, snapshot_stages())
+
+            # 时长读取使用任务中已缓存的媒体信息，不计入阶段耗时
+            assets = AudioAssetService()
+            for job, path in zip(jobs, inputs):
+                info = await assets.get_media_info(path)
+                job["audioSeconds"] = _rounded(info.duration if info else None)
+    finally:
+        http_client = getattr(transcriber, "http_client", None)
+        if http_client is not None:
+            await http_client.close()
+        if runner is not None:
+            await runner.cleanup()
+
+    if args.provider == "whisper":
+        # 本地模型没有 HTTP 上传，识别耗时取模型推理时间
+        stages["asr"] = dict(stages["chunkRequest"])
+
+    latencies = [job["latencySeconds"] for job in jobs]
+    succeeded = [job for job in jobs if job.get("status") in {"completed", "partial"}]
+    audio_seconds = sum(job.get("audioSeconds") or 0.0 for job in succeeded)
+    return {
+        "config": {
+            "provider": args.provider,
+            "model": model or f"whisper-{args.whisper_method}-{args.whisper_model}",
+            "count": args.count,
+            "jobs": args.jobs,
+            "sources": [str(path) for path in sources],
+            "lengths": lengths if not sources else None,
+            "chunkSeconds": getattr(transcriber, "chunk_duration_seconds", None),
+            "asrConcurrency": (
+                transcriber.scheduler.limiter.limit if hasattr(transcriber, "scheduler") else None
+            ),
+            "transcodeProfile": transcriber.audio_assets.profile.name,
+        },
+        "summary": {
+            "jobs": len(jobs),
+            "succeededJobs": len(succeeded),
+            "wallSeconds": round(wall_seconds, 3),
+            "audioSeconds": round(audio_seconds, 3),
+            "audioSecondsPerSecond": round(audio_seconds / wall_seconds, 3) if wall_seconds > 0 else None,
+            "jobLatency": {
+                "p50": _rounded(_percentile(latencies, 0.5)),
+                "p95": _rounded(_percentile(latencies, 0.95)),
+                "max": _rounded(max(latencies) if latencies else None),
+            },
+            "stages": stages,
+            "peakRssMb": _rss_mb(resource.getrusage(resource.RUSAGE_SELF)),
+            "peakChildRssMb": _rss_mb(resource.getrusage(resource.RUSAGE_CHILDREN)),
+        },
+        "fakeServer": server.stats.to_dict() if server is not None else None,
+        "jobs": jobs,
+    }
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    summary = report["summary"]
+    latency = summary["jobLatency"]
+    print(
+        f"\n任务 {summary['succeededJobs']}/{summary['jobs']} 成功 · 音频 {summary['audioSeconds']}s · "
+        f"墙钟 {summary['wallSeconds']}s · 吞吐 {summary['audioSecondsPerSecond']} 音频秒/秒"
+    )
+    print(f"任务耗时 p50={latency['p50']}s p95={latency['p95']}s max={latency['max']}s")
+    print(f"峰值 RSS: 进程 {summary['peakRssMb']}MB · 子进程 {summary['peakChildRssMb']}MB")
+    print(f"{'stage':<14} {'count':>7} {'seconds':>10}")
+    for name, item in summary["stages"].items():
+        print(f"{name:<14} {item['count']:>7} {item['seconds']:>10.3f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    defaults = FakeASRConfig()
+    parser = argparse.ArgumentParser(
+        description="端到端转录吞吐基准测试 - 统计吞吐量、任务耗时分位数、阶段耗时与峰值内存",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("sources", nargs="*", help="样本音视频文件（不指定时合成测试音频）")
+    parser.add_argument("--count", type=int, default=4, help="任务数（默认 4）")
+    parser.add_argument("--lengths", default="300", help="合成音频的时长列表（秒，逗号分隔，循环使用）")
+    parser.add_argument("--jobs", type=int, default=2, help="同时运行的转录任务数（默认 2）")
+    parser.add_argument("--provider", choices=PROVIDERS, default="fake", help="fake=进程内模拟服务（默认）")
+    parser.add_argument("--model", default=settings.TRANSCRIPTION_MODEL, help="在线转录模型")
+    parser.add_argument("--whisper-model", default="base", help="Whisper 模型大小")
+    parser.add_argument("--whisper-method", choices=("local", "faster"), default="local")
+    parser.add_argument("--chunk-seconds", type=int, help="分片时长（默认取 TRANSCRIPTION_CHUNK_SECONDS）")
+    parser.add_argument("--asr-concurrency", type=int, help="识别请求初始并发（默认取 TRANSCRIBE_MAX_CONCURRENCY）")
+    fake = parser.add_argument_group("模拟服务（--provider fake）")
+    fake.add_argument("--base-latency", type=float, default=defaults.base_latency, help="基础耗时（秒）")
+    fake.add_argument("--rtf", type=float, default=defaults.rtf, help="每秒音频增加的耗时（秒）")
+    fake.add_argument("--jitter", type=float, default=defaults.jitter, help="对数正态抖动 sigma")
+    fake.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的比例")
+    fake.add_argument("--throttle-rate", type=float, default=0.0, help="返回 429 的比例")
+    fake.add_argument("--hang-rate", type=float, default=0.0, help="挂起不响应的比例")
+    fake.add_argument("--server-concurrency", type=int, default=0, help="服务端并发上限，0 不限")
+    fake.add_argument("--seed", type=int, default=0, help="随机种子（默认 0，保证可复现）")
+    parser.add_argument("-o", "--output", help="JSON 报告输出路径")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    missing = [item for item in args.sources if not Path(item).exists()]
+    if missing:
+        parser.error(f"文件不存在: {', '.join(missing)}")
+    if args.count < 1:
+        parser.error("--count 至少为 1")
+    if args.provider == "siliconflow" and not settings.SILICONFLOW_API_KEY:
+        parser.error("使用 siliconflow 需要配置 SILICONFLOW_API_KEY")
+
+    report = asyncio.run(run_benchmark(args))
+    print_summary(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n报告已保存: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+转码配置基准测试
+对同一批样本文件分别用不同转码配置生成标准化音频与分片，统计：
+- 上传字节数（分片总大小）与转码耗时
+- 逐个分片请求转录服务的端到端耗时（p50 / p90 / 合计）
+- 转录文本与基准配置的相似度（去除空白与标点后的 difflib 比值）
+
+示例:
+  # 对比默认配置与两个低码率配置（在 backend 目录下执行）
+  python -m app.tools.transcode_benchmark ../data/2.mp3
+
+  # 仅比较字节数与转码耗时，不调用转录服务
+  python -m app.tools.transcode_benchmark ../data/2.mp3 --skip-asr
+
+  # 指定配置、基准与报告路径
+  python -m app.tools.transcode_benchmark a.mp3 b.m4a --profiles mp3-hq,opus-24k --baseline mp3-hq -o report.json
+"""
+import argparse
+import asyncio
+import difflib
+import json
+import logging
+import shutil
+import sys
+import tempfile
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.asr_providers import TimedText
+from app.services.audio_assets import AudioAssetService
+from app.services.audio_segmenter import SegmenterConfig, dedupe_overlap
+from app.services.transcode_profiles import DEFAULT_PROFILE, PROFILES, get_profile
+from app.services.transcription_service import TranscriptionService
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """去除空白与标点，只比较识别出的字词"""
+    return "".join(
+        char for char in unicodedata.normalize("NFKC", text)
+        if not char.isspace() and not unicodedata.category(char).startswith("P")
+    )
+
+
+def similarity(reference: str, candidate: str) -> float:
+    a, b = normalize_text(reference), normalize_text(candidate)
+    if not a and not b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))]
+
+
+def _stage_source(source: Path, workdir: Path) -> Path:
+    """每个配置使用独立目录，避免复用已生成的资产影响计时"""
+    workdir.mkdir(parents=True, exist_ok=True)
+    staged = workdir / source.name
+    try:
+        staged.symlink_to(source.resolve())
+    except OSError:
+        shutil.copy2(source, staged)
+    return staged
+
+
+async def benchmark_profile(
+    source: Path,
+    profile_name: str,
+    workdir: Path,
+    transcriber: TranscriptionService,
+    *,
+    model: str,
+    run_asr: bool,
+    max_chunks: Optional[int]
+) -> Dict[str, Any]:
+    profile = get_profile(profile_name)
+    assets = AudioAssetService(profile)
+    staged = _stage_source(source, workdir / profile.name)
+
+    started = time.perf_counter()
+    asset, manifest = await assets.prepare_chunks(
+        staged,
+        transcriber.segmenter,
+        should_chunk=transcriber._should_chunk_audio
+    )
+    transcode_seconds = time.perf_counter() - started
+    chunk_paths = [assets.resolve_chunk_path(asset, chunk) for chunk in manifest.chunks]
+    chunks = list(zip(manifest.chunks, chunk_paths))
+    if max_chunks:
+        chunks = chunks[:max_chunks]
+
+    report: Dict[str, Any] = {
+        "profile": profile.to_dict(),
+        "transcodeSeconds": round(transcode_seconds, 3),
+        "canonicalBytes": asset.path.stat().st_size if asset.path.exists() else None,
+        "chunkCount": len(chunks),
+        "uploadBytes": sum(chunk.size for chunk, _ in chunks),
+        "audioSeconds": round(sum(chunk.duration for chunk, _ in chunks), 3),
+    }
+    if report["audioSeconds"]:
+        report["kbps"] = round(report["uploadBytes"] * 8 / 1000 / report["audioSeconds"], 1)
+    if not run_asr:
+        return report
+
+    provider = transcriber.router.providers[0]
+    latencies: List[float] = []
+    texts: List[str] = []
+    errors: List[str] = []
+    previous = ""
+    for chunk, path in chunks:
+        request_started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(
+                provider.transcribe_chunk(path, model, audio_seconds=chunk.duration),
+                timeout=transcriber.router.timeout_for(provider, chunk.duration)
+            )
+        except Exception as exc:
+            errors.append(f"{chunk.filename}: {exc or type(exc).__name__}")
+            previous = ""
+            continue
+        latencies.append(time.perf_counter() - request_started)
+        text = ((result.text if isinstance(result, TimedText) else result) or "").strip()
+        texts.append(dedupe_overlap(previous, text, chunk.overlap) if previous else text)
+        previous = text
+
+    report.update({
+        "provider": provider.name,
+        "latency": {
+            "p50": round(_percentile(latencies, 0.5), 3) if latencies else None,
+            "p90": round(_percentile(latencies, 0.9), 3) if latencies else None,
+            "total": round(sum(latencies), 3),
+        },
+        "errors": errors,
+        "text": "".join(texts),
+    })
+    return report
+
+
+async def run_benchmark(
+    sources: List[Path],
+    profiles: List[str],
+    baseline: str,
+    *,
+    model: str,
+    run_asr: bool,
+    max_chunks: Optional[int],
+    chunk_seconds: Optional[int]
+) -> Dict[str, Any]:
+    transcriber = TranscriptionService(settings.SILICONFLOW_API_KEY)
+    if chunk_seconds:
+        transcriber.chunk_duration_seconds = chunk_seconds
+        transcriber.segmenter = SegmenterConfig.from_env(chunk_seconds)
+    if run_asr and (transcriber.use_mock or not transcriber.router.providers):
+        logger.warning("未配置可用的转录服务，仅统计字节数与转码耗时")
+        run_asr = False
+    if baseline not in profiles:
+        profiles = [baseline] + profiles
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="transcode_bench_") as tmp:
+        for source in sources:
+            per_profile: Dict[str, Dict[str, Any]] = {}
+            for name in profiles:
+                logger.info("基准测试 %s · %s", source.name, name)
+                per_profile[name] = await benchmark_profile(
+                    source,
+                    name,
+                    Path(tmp) / source.stem,
+                    transcriber,
+                    model=model,
+                    run_asr=run_asr,
+                    max_chunks=max_chunks
+                )
+            reference = per_profile[baseline]
+            for name, item in per_profile.items():
+                if reference["uploadBytes"]:
+                    item["bytesVsBaseline"] = round(item["uploadBytes"] / reference["uploadBytes"], 3)
+                if run_asr:
+                    item["similarityToBaseline"] = round(similarity(reference["text"], item["text"]), 4)
+            results.append({"source": str(source), "profiles": per_profile})
+
+    await transcriber.http_client.close()
+    return {
+        "baseline": baseline,
+        "model": model,
+        "asr": run_asr,
+        "chunkSeconds": transcriber.chunk_duration_seconds,
+        "results": results,
+    }
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    for result in report["results"]:
+        print(f"\n{result['source']}")
+        print(f"{'profile':<10} {'bytes':>12} {'kbps':>7} {'x base':>7} {'transcode':>10} {'p50':>7} {'p90':>7} {'similar':>8}")
+        for name, item in result["profiles"].items():
+            latency = item.get("latency") or {}
+            print(
+                f"{name:<10} {item['uploadBytes']:>12} {item.get('kbps', '-'):>7} "
+                f"{item.get('bytesVsBaseline', '-'):>7} {item['transcodeSeconds']:>9.2f}s "
+                f"{latency.get('p50') if latency.get('p50') is not None else '-':>7} "
+                f"{latency.get('p90') if latency.get('p90') is not None else '-':>7} "
+                f"{item.get('similarityToBaseline', '-'):>8}"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="转码配置基准测试 - 对比上传字节数、分片转录耗时与转录相似度",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("sources", nargs="+", help="样本音视频文件")
+    parser.add_argument(
+        "--profiles",
+        default=",".join(PROFILES),
+        help=f"逗号分隔的转码配置（默认: {','.join(PROFILES)}）"
+    )
+    parser.add_argument("--baseline", default=DEFAULT_PROFILE, help=f"相似度基准配置（默认: {DEFAULT_PROFILE}）")
+    parser.add_argument("--model", default=settings.TRANSCRIPTION_MODEL, help="转录模型")
+    parser.add_argument("--chunk-seconds", type=int, help="分片时长（默认取 TRANSCRIPTION_CHUNK_SECONDS）")
+    parser.add_argument("--max-chunks", type=int, help="每个文件最多转录的分片数")
+    parser.add_argument("--skip-asr", action="store_true", help="只统计字节数与转码耗时，不调用转录服务")
+    parser.add_argument("-o", "--output", help="JSON 报告输出路径")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sources = [Path(item) for item in args.sources]
+    missing = [str(path) for path in sources if not path.exists()]
+    if missing:
+        parser.error(f"文件不存在: {', '.join(missing)}")
+    profiles = [name.strip() for name in args.profiles.split(",") if name.strip()]
+    for name in profiles + [args.baseline]:
+        if name not in PROFILES:
+            parser.error(f"未知的转码配置: {name}（可选: {', '.join(PROFILES)}）")
+
+    report = asyncio.run(run_benchmark(
+        sources,
+        profiles,
+        args.baseline,
+        model=args.model,
+        run_asr=not args.skip_asr,
+        max_chunks=args.max_chunks,
+        chunk_seconds=args.chunk_seconds
+    ))
+    print_summary(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n报告已保存: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
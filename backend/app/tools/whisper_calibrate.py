@@ -0,0 +1,250 @@
+"""
+本地 Whisper 推理配置校准
+在本机依次测试 进程数 × 每进程 CPU 线程数 × 量化类型 的组合：每个组合启动一个推理进程池，
+先让每个进程完成一次推理（加载模型、预热），再并行转录一组相同时长的片段并计时，
+以实时率（RTF = 墙钟秒数 / 音频秒数，越小越快）衡量。
+最快的组合达到目标实时率时写入校准结果（TRANSCRIBE_WHISPER_TUNING_FILE），
+转录服务启动时读取；显式设置的 TRANSCRIBE_WHISPER_* 环境变量优先于校准结果。
+
+示例（在 backend 目录下执行）:
+  # 使用真实的面试录音截取 60 秒片段，测试 faster-whisper small 的默认组合
+  python -m app.tools.whisper_calibrate ../data/2.mp3 --method faster --model small
+
+  # 指定组合与目标实时率，只输出报告不写入校准结果
+  python -m app.tools.whisper_calibrate --method local --model tiny --workers 1,2 --threads 2,4 \
+      --target-rtf 0.5 --no-write -o calibration.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.services.audio_assets import AudioAssetService
+from app.services.media_toolkit import run_ffmpeg
+from app.services.whisper_pool import (
+    COMPUTE_TYPES,
+    WHISPER_TUNING_FILE,
+    WhisperPoolConfig,
+    WhisperProcessPool,
+    save_tuning
+)
+from app.tools.throughput_benchmark import synthesize_audio
+
+logger = logging.getLogger(__name__)
+
+
+def _int_list(value: str) -> List[int]:
+    return sorted({int(item) for item in value.split(",") if item.strip()})
+
+
+def build_combinations(
+    workers: List[int],
+    threads: List[int],
+    compute_types: List[str],
+    cpu_count: int
+) -> List[WhisperPoolConfig]:
+    """进程数 × 线程数超过 CPU 核数的组合会互相争抢，不参与测试"""
+    combinations = []
+    for worker_count in workers:
+        for thread_count in threads:
+            if worker_count < 1 or thread_count < 1 or worker_count * thread_count > cpu_count:
+                continue
+            for compute_type in compute_types:
+                combinations.append(WhisperPoolConfig(
+                    workers=worker_count,
+                    cpu_threads=thread_count,
+                    compute_type=compute_type,
+                    source="calibrated"
+                ))
+    return combinations
+
+
+async def prepare_clip(source: Optional[Path], seconds: float, workdir: Path) -> Path:
+    """截取（或合成）一个固定时长的 16kHz 单声道片段；建议使用真实语音，合成音调的推理耗时不具代表性"""
+    if source is None:
+        return await synthesize_audio(workdir / "calibration.mp3", seconds, 0)
+    clip = workdir / "calibration.wav"
+    await run_ffmpeg([
+        "-y",
+        "-i", str(source),
+        "-t", str(seconds),
+        "-ac", "1",
+        "-ar", "16000",
+        str(clip)
+    ])
+    return clip
+
+
+async def measure(
+    method: str,
+    model_size: str,
+    config: WhisperPoolConfig,
+    clip: Path,
+    clip_seconds: float,
+    rounds: int
+) -> Dict[str, Any]:
+    """测量一个组合：预热轮次不计时，计时轮次每个进程各转录 rounds 个片段"""
+    clips = config.workers * rounds
+    # 计时轮次一次提交全部片段，排队上限放宽到片段数
+    pool = WhisperProcessPool(method, model_size, replace(config, max_queue=clips))
+    result: Dict[str, Any] = {**config.to_dict(), "clips": clips}
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(pool.transcribe(clip) for _ in range(config.workers)))
+        result["warmupSeconds"] = round(time.perf_counter() - started, 3)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(pool.transcribe(clip) for _ in range(clips)))
+        wall_seconds = time.perf_counter() - started
+        audio_seconds = clip_seconds * clips
+        result.update({
+            "status": "ok",
+            "wallSeconds": round(wall_seconds, 3),
+            "audioSeconds": round(audio_seconds, 3),
+            "rtf": round(wall_seconds / audio_seconds, 4),
+            "audioSecondsPerSecond": round(audio_seconds / wall_seconds, 3),
+        })
+    except Exception as exc:
+        result.update({"status": "error", "error": str(exc) or type(exc).__name__})
+    finally:
+        pool.shutdown()
+    return result
+
+
+async def run_calibration(args: argparse.Namespace) -> Dict[str, Any]:
+    cpu_count = os.cpu_count() or 1
+    compute_types = (
+        [item.strip() for item in args.compute_types.split(",") if item.strip()]
+        if args.method == "faster" else ["float32"]
+    )
+    combinations = build_combinations(_int_list(args.workers), _int_list(args.threads), compute_types, cpu_count)
+    if not combinations:
+        raise ValueError(f"没有可测试的组合（进程数 × 线程数不能超过 CPU 核数 {cpu_count}）")
+
+    with tempfile.TemporaryDirectory(prefix="whisper_calibrate_") as tmp:
+        clip = await prepare_clip(Path(args.source) if args.source else None, args.seconds, Path(tmp))
+        info = await AudioAssetService().get_media_info(clip)
+        clip_seconds = (info.duration if info else None) or args.seconds
+
+        results = []
+        for config in combinations:
+            logger.info(
+                "测试组合 workers=%d threads=%d compute=%s",
+                config.workers,
+                config.cpu_threads,
+                config.compute_type
+            )
+            results.append(await measure(args.method, args.model, config, clip, clip_seconds, args.rounds))
+
+    succeeded = sorted((item for item in results if item["status"] == "ok"), key=lambda item: item["rtf"])
+    best = succeeded[0] if succeeded else None
+    return {
+        "method": args.method,
+        "model": args.model,
+        "cpuCount": cpu_count,
+        "clipSeconds": round(clip_seconds, 3),
+        "targetRtf": args.target_rtf,
+        "best": best,
+        "meetsTarget": bool(best and best["rtf"] <= args.target_rtf),
+        "results": results,
+    }
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    print(f"\n{'workers':>7} {'threads':>7} {'compute':>13} {'rtf':>8} {'audio s/s':>10}  status")
+    for item in report["results"]:
+        print(
+            f"{item['workers']:>7} {item['cpuThreads']:>7} {item['computeType']:>13} "
+            f"{item.get('rtf', '-'):>8} {item.get('audioSecondsPerSecond', '-'):>10}  "
+            f"{item['status'] if item['status'] == 'ok' else item.get('error')}"
+        )
+    best = report["best"]
+    if best:
+        print(
+            f"\n最快组合: workers={best['workers']} threads={best['cpuThreads']} "
+            f"compute={best['computeType']} RTF={best['rtf']}（目标 {report['targetRtf']}）"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(
+        description="本地 Whisper 推理配置校准 - 测试进程数、线程数与量化类型，写入最快的配置",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("source", nargs="?", help="样本音视频文件（不指定时合成测试音频）")
+    parser.add_argument("--method", choices=("local", "faster"), default="faster")
+    parser.add_argument("--model", default="base", help="Whisper 模型大小")
+    parser.add_argument("--seconds", type=float, default=60, help="测试片段时长（秒，默认 60）")
+    parser.add_argument("--rounds", type=int, default=2, help="计时轮次中每个进程转录的片段数（默认 2）")
+    parser.add_argument(
+        "--workers",
+        default=",".join(str(item) for item in (1, 2, 4) if item <= cpu_count),
+        help="待测试的进程数列表（逗号分隔）"
+    )
+    parser.add_argument(
+        "--threads",
+        default=",".join(str(item) for item in (1, 2, 4, 8) if item <= cpu_count),
+        help="待测试的每进程 CPU 线程数列表（逗号分隔）"
+    )
+    parser.add_argument(
+        "--compute-types",
+        default="int8,int8_float32",
+        help=f"待测试的量化类型（仅 faster-whisper，可选 {', '.join(COMPUTE_TYPES)}）"
+    )
+    parser.add_argument("--target-rtf", type=float, default=1.0, help="目标实时率，最快组合达到时才写入（默认 1.0）")
+    parser.add_argument("--tuning-file", default=WHISPER_TUNING_FILE, help="校准结果文件")
+    parser.add_argument("--no-write", action="store_true", help="只输出报告，不写入校准结果")
+    parser.add_argument("-o", "--output", help="JSON 报告输出路径")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.source and not Path(args.source).exists():
+        parser.error(f"文件不存在: {args.source}")
+    unknown = [item for item in args.compute_types.split(",") if item.strip() and item.strip() not in COMPUTE_TYPES]
+    if unknown:
+        parser.error(f"不支持的量化类型: {', '.join(unknown)}")
+    if args.seconds <= 0 or args.rounds < 1:
+        parser.error("--seconds 必须大于 0，--rounds 至少为 1")
+
+    try:
+        report = asyncio.run(run_calibration(args))
+    except ValueError as exc:
+        parser.error(str(exc))
+    print_summary(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n报告已保存: {args.output}")
+
+    best = report["best"]
+    if best is None:
+        print("\n所有组合均失败，未写入校准结果")
+        return 1
+    if not report["meetsTarget"]:
+        print(f"\n最快组合的实时率 {best['rtf']} 未达到目标 {args.target_rtf}，未写入校准结果")
+        return 1
+    if not args.no_write:
+        save_tuning(args.method, args.model, {
+            "workers": best["workers"],
+            "cpuThreads": best["cpuThreads"],
+            "numWorkers": best["numWorkers"],
+            "computeType": best["computeType"],
+            "rtf": best["rtf"],
+            "cpuCount": report["cpuCount"],
+            "calibratedAt": datetime.utcnow().isoformat(),
+        }, args.tuning_file)
+        print(f"\n校准结果已写入: {args.tuning_file}（重启服务后生效）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@ import asyncio
 import logging
 from typing import Optional, Dict, Any
 
+from app.services.executors import run_storage
 from app.services.storage_service import StorageService
 from app.services.transcription_service import TranscriptionProgress
 
@@ -57,7 +58,7 @@ class InterviewTranscriptionTracker:
 
         async with self._lock:
             try:
-                self.storage.update_interview(self.user_id, self.interview_id, updates)
+                await run_storage(self.storage.update_interview, self.user_id, self.interview_id, updates)
             except Exception as exc:  # pragma: no cover - persistence best effort
                 self.logger.warning(
                     "[Transcribe][Progress] 持久化失败 user=%s interview=%s err=%s",
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+测试自适应并发窗口（AIMD）的增长、收缩与 Retry-After
+"""
+import sys
+import os
+import asyncio
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.adaptive_concurrency import AdaptiveConcurrencyLimiter
+
+
+def test_window_grows_and_backs_off():
+    """健康响应使窗口加性增长，限流时乘性收缩"""
+    limiter = AdaptiveConcurrencyLimiter(initial=4, minimum=1, maximum=16)
+    for _ in range(40):
+        limiter.on_success(1.0, 60.0)
+    grown = limiter.snapshot().window
+    assert grown > 8
+
+    limiter.on_throttle(retry_after=None)
+    assert abs(limiter.snapshot().window - grown * 0.5) < 1e-6
+    # 冷却时间内的连续失败只收缩一次
+    limiter.on_failure()
+    assert abs(limiter.snapshot().window - grown * 0.5) < 1e-6
+    print("✓ 并发窗口加性增长、乘性收缩")
+
+
+def test_latency_is_normalized_by_chunk_duration():
+    """延迟按每秒音频耗时比较：偏快的首样本不会锁定基线，短分片与长分片不会互相误判"""
+    limiter = AdaptiveConcurrencyLimiter(initial=8, minimum=1, maximum=32)
+    limiter.on_success(2.0, 600.0)
+    for _ in range(20):
+        limiter.on_success(25.0, 600.0)
+    snapshot = limiter.snapshot()
+    assert snapshot.decreases == 0 and snapshot.window > 8
+    assert snapshot.speed_baseline > 20.0 / 600.0
+
+    # 长分片耗时更久但每秒音频耗时相同，不视为拥塞；过短的分片不参与延迟判断
+    limiter.on_success(100.0, 2400.0)
+    limiter.on_success(30.0, 2.0)
+    assert limiter.snapshot().decreases == 0
+    limiter.on_success(200.0, 600.0)
+    assert limiter.snapshot().decreases == 1
+    print("✓ 延迟按分片时长归一化")
+
+
+def test_limit_blocks_and_honors_retry_after():
+    """超过窗口的请求需等待，Retry-After 期间不发放名额"""
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial=2, minimum=1, maximum=4)
+        peak = 0
+
+        async def job():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(job() for _ in range(6)))
+        assert peak == 2
+
+        limiter.on_throttle(retry_after=0.2)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with limiter.slot():
+            waited = loop.time() - started
+        assert waited >= 0.15
+        assert limiter.snapshot().to_dict()["throttled"] == 1
+
+    asyncio.run(scenario())
+    print("✓ 并发上限与 Retry-After 生效")
+
+
+if __name__ == "__main__":
+    test_window_grows_and_backs_off()
+    test_latency_is_normalized_by_chunk_duration()
+    test_limit_blocks_and_honors_retry_after()
+    print("所有测试通过！✓")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+测试转录提供方故障转移与熔断
+"""
+import sys
+import os
+import asyncio
+import time
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.asr_providers import ASRProvider, ProviderRouter
+from app.services.http_client import ProviderHTTPError
+
+
+class FakeProvider(ASRProvider):
+    def __init__(self, name, outcome):
+        self.name = name
+        self.outcome = outcome
+        self.calls = 0
+
+    async def transcribe_chunk(self, file_path, model, audio_seconds=0.0):
+        self.calls += 1
+        if isinstance(self.outcome, BaseException):
+            raise self.outcome
+        return self.outcome
+
+
+def test_failover_opens_breaker_and_recovers():
+    """主提供方连续失败后熔断并切换到备用；冷却后半开探测成功即恢复"""
+    async def scenario():
+        primary = FakeProvider("primary", ProviderHTTPError(502, "bad gateway"))
+        backup = FakeProvider("backup", "备用结果")
+        router = ProviderRouter([primary, backup], failure_threshold=2, recovery_seconds=0.05)
+
+        results = [await router.transcribe(Path("chunk.wav"), "m") for _ in range(4)]
+        assert {result.provider for result in results} == {"backup"}
+        # 熔断后不再调用主提供方
+        assert primary.calls == 2
+        assert router.snapshot()["primary"]["state"] == "open"
+
+        time.sleep(0.06)
+        primary.outcome = "主结果"
+        recovered = await router.transcribe(Path("chunk.wav"), "m")
+        return recovered, router.snapshot()
+
+    recovered, snapshot = asyncio.run(scenario())
+    assert recovered.provider == "primary" and recovered.text == "主结果"
+    assert snapshot["primary"]["state"] == "closed"
+    print("✓ 熔断、故障转移与半开恢复正常")
+
+
+def test_client_error_does_not_trip_breaker():
+    """分片本身的 4xx 错误切换提供方，但不计入熔断"""
+    async def scenario():
+        primary = FakeProvider("primary", ProviderHTTPError(413, "too large"))
+        backup = FakeProvider("backup", "ok")
+        router = ProviderRouter([primary, backup], failure_threshold=1)
+        result = await router.transcribe(Path("chunk.wav"), "m")
+        return result, router.snapshot()
+
+    result, snapshot = asyncio.run(scenario())
+    assert result.provider == "backup"
+    assert snapshot["primary"]["state"] == "closed"
+    print("✓ 客户端错误不触发熔断")
+
+
+def test_fatal_errors_are_not_failed_over():
+    """鉴权失败与额度耗尽直接抛出，不切换到备用提供方；限流切换但不计入熔断"""
+    async def scenario():
+        backup = FakeProvider("backup", "ok")
+        outcomes = {}
+        for status, message in ((401, "Invalid API key"), (402, ""), (403, "forbidden")):
+            primary = FakeProvider("primary", ProviderHTTPError(status, message))
+            router = ProviderRouter([primary, backup], failure_threshold=1)
+            try:
+                await router.transcribe(Path("chunk.wav"), "m")
+                outcomes[status] = "ok"
+            except ProviderHTTPError as exc:
+                outcomes[status] = exc.status
+            assert router.snapshot()["primary"]["state"] == "closed"
+
+        throttled = FakeProvider("primary", ProviderHTTPError(429, "rate limited"))
+        router = ProviderRouter([throttled, backup], failure_threshold=1)
+        result = await router.transcribe(Path("chunk.wav"), "m")
+        return outcomes, backup.calls, result, router.snapshot()
+
+    outcomes, backup_calls, result, snapshot = asyncio.run(scenario())
+    assert outcomes == {401: 401, 402: 402, 403: 403}
+    assert backup_calls == 1 and result.provider == "backup"
+    assert snapshot["primary"]["state"] == "closed"
+    print("✓ 鉴权/额度错误不故障转移，限流不触发熔断")
+
+
+if __name__ == "__main__":
+    test_failover_opens_breaker_and_recovers()
+    test_client_error_does_not_trip_breaker()
+    test_fatal_errors_are_not_failed_over()
+    print("所有测试通过！✓")
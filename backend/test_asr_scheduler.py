@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+测试进程级 ASR 调度器的按用户公平排队、优先级分档与重试优先
+"""
+import sys
+import os
+import asyncio
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.adaptive_concurrency import AdaptiveConcurrencyLimiter
+from app.services.asr_scheduler import ASRScheduler
+
+
+def test_fair_order_and_retry_priority():
+    """大任务排队时，其他用户的分片与重试分片不会被饿死"""
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial=1, minimum=1, maximum=1, enabled=False)
+        scheduler = ASRScheduler(limiter)
+        order = []
+        gate = asyncio.Event()
+
+        async def blocker():
+            async with scheduler.slot("big"):
+                await gate.wait()
+
+        async def job(user, label, retry=False):
+            async with scheduler.slot(user, retry=retry):
+                order.append(label)
+
+        first = asyncio.create_task(blocker())
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(job("big", f"big-{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(job("small", "small-0")))
+        tasks.append(asyncio.create_task(job("small", "small-retry", retry=True)))
+        await asyncio.sleep(0)
+        snapshot = scheduler.snapshot()
+        assert snapshot.queued_fresh == 3 and snapshot.queued_retries == 1
+        gate.set()
+        await asyncio.gather(first, *tasks)
+        return order
+
+    order = asyncio.run(scenario())
+    # big-0 已在闸门处等待并发名额；之后重试优先，再按用户轮转
+    assert order[0] == "big-0"
+    assert order[1] == "small-retry"
+    assert order.index("small-0") < order.index("big-2")
+    print("✓ 公平排队与重试优先")
+
+
+def test_short_jobs_jump_bulk_and_aging_prevents_starvation():
+    """短文件的分片排在长文件之前；排队超过 aging 周期的长文件分片逐档提升"""
+    async def scenario(aging_seconds):
+        limiter = AdaptiveConcurrencyLimiter(initial=1, minimum=1, maximum=1, enabled=False)
+        scheduler = ASRScheduler(limiter, short_job_seconds=600, aging_seconds=aging_seconds)
+        order = []
+        gate = asyncio.Event()
+
+        async def blocker():
+            async with scheduler.slot("onsite", job_seconds=10800):
+                await gate.wait()
+
+        async def job(user, label, job_seconds):
+            async with scheduler.slot(user, job_seconds=job_seconds):
+                order.append(label)
+
+        first = asyncio.create_task(blocker())
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(job("onsite", f"bulk-{i}", 10800)) for i in range(3)]
+        await asyncio.sleep(0.05)
+        tasks += [asyncio.create_task(job("screen", f"short-{i}", 300)) for i in range(2)]
+        await asyncio.sleep(0)
+        snapshot = scheduler.snapshot()
+        assert snapshot.queued_short == 2 and snapshot.queued_bulk == 2
+        gate.set()
+        await asyncio.gather(first, *tasks)
+        return order
+
+    order = asyncio.run(scenario(aging_seconds=60))
+    # bulk-0 已在闸门处等待并发名额，其后短文件先于剩余长文件分片
+    assert order == ["bulk-0", "short-0", "short-1", "bulk-1", "bulk-2"]
+
+    aged = asyncio.run(scenario(aging_seconds=0.02))
+    # 长文件分片已排队两个 aging 周期，优先级超过刚入队的短文件
+    assert aged[:3] == ["bulk-0", "bulk-1", "bulk-2"]
+    print("✓ 短文件优先且长文件不会被饿死")
+
+
+def test_audio_seconds_bucket_throttles():
+    """音频秒数令牌不足时需等待"""
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial=4, enabled=False)
+        scheduler = ASRScheduler(limiter, audio_seconds_per_minute=60)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with scheduler.slot("u", audio_seconds=60):
+            pass
+        async with scheduler.slot("u", audio_seconds=0.3):
+            pass
+        return loop.time() - started
+
+    elapsed = asyncio.run(scenario())
+    assert elapsed >= 0.25
+    print("✓ 音频秒数限速生效")
+
+
+if __name__ == "__main__":
+    test_fair_order_and_retry_priority()
+    test_short_jobs_jump_bulk_and_aging_prevents_starvation()
+    test_audio_seconds_bucket_throttles()
+    print("所有测试通过！✓")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+测试异步任务型转录提供方与共享轮询器
+"""
+import sys
+import os
+import asyncio
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.adaptive_concurrency import AdaptiveConcurrencyLimiter
+from app.services.asr_providers import ProviderRouter
+from app.services.asr_scheduler import ASRScheduler
+from app.services.audio_assets import AudioAsset, AudioChunk, ChunkManifest
+from app.services import async_asr_providers
+from app.services.async_asr_providers import VolcengineAUCProvider
+from app.services.http_client import JSONResponse
+from app.services.task_poller import AsyncTaskPoller, TaskFailedError
+from app.services.transcription_service import TranscriptionService
+
+
+def test_poller_multiplexes_tasks_with_backoff():
+    """多个任务共用一个轮询协程，各自按指数退避查询，失败任务单独报错"""
+    async def scenario():
+        poller = AsyncTaskPoller(initial_interval=0.01, max_interval=0.04, backoff_factor=2)
+        polls = {}
+
+        def make_query(name, ready_after, fail=False):
+            async def query():
+                polls[name] = polls.get(name, 0) + 1
+                if polls[name] < ready_after:
+                    return None
+                if fail:
+                    raise TaskFailedError(f"{name} failed")
+                return f"{name} done"
+            return query
+
+        results = await asyncio.gather(
+            *(poller.wait(f"t{i}", make_query(f"t{i}", ready_after=3)) for i in range(20)),
+            poller.wait("bad", make_query("bad", ready_after=2, fail=True)),
+            return_exceptions=True
+        )
+        return results, polls, poller.stats()
+
+    results, polls, stats = asyncio.run(scenario())
+    assert results[:20] == [f"t{i} done" for i in range(20)]
+    assert isinstance(results[20], TaskFailedError)
+    assert all(count == 3 for name, count in polls.items() if name != "bad")
+    assert stats.outstanding == 0 and stats.completed == 20 and stats.failed == 1
+    print("✓ 共享轮询器并发等待多个任务")
+
+
+class FakeVolcClient:
+    def __init__(self):
+        self.queries = 0
+        self.submitted = []
+
+    async def request_json(self, method, url, **kwargs):
+        if url.endswith("/submit"):
+            self.submitted.append(kwargs["json_body"]["audio"]["url"])
+            return JSONResponse(200, {"x-api-status-code": "20000000", "x-tt-logid": "log"}, {})
+        self.queries += 1
+        if self.queries < 2:
+            return JSONResponse(200, {"x-api-status-code": "20000001"}, {})
+        utterances = [
+            {"text": "请介绍一下你自己。", "start_time": 0, "end_time": 1800, "additions": {"speaker": "1"}},
+            {"text": "好的，", "start_time": 2100, "end_time": 2600, "additions": {"speaker": "2"}},
+            {"text": "我是前端工程师。", "start_time": 2600, "end_time": 4250, "additions": {"speaker": "2"}},
+        ]
+        return JSONResponse(200, {"x-api-status-code": "20000000"}, {"result": {"utterances": utterances}})
+
+
+def test_volcengine_provider_polls_until_done():
+    """火山引擎提供方提交后经轮询器取回结果，并按说话人分行"""
+    async def scenario():
+        client = FakeVolcClient()
+        provider = VolcengineAUCProvider(
+            "app",
+            "token",
+            http_client=client,
+            poller=AsyncTaskPoller(initial_interval=0.01),
+            file_link=lambda path: f"https://files.example.com/{path.name}"
+        )
+        return await provider.transcribe_chunk(Path("chunk_000.mp3"), "bigmodel"), client.queries
+
+    result, queries = asyncio.run(scenario())
+    assert queries == 2
+    assert result.text == "说话人1：请介绍一下你自己。\n说话人2：好的，我是前端工程师。"
+    assert result.segments[0] == (0.0, 1.8, "请介绍一下你自己。")
+    assert result.segments[-1] == (2.6, 4.25, "我是前端工程师。")
+    print("✓ 火山引擎异步识别结果正确")
+
+
+def test_async_provider_releases_slot_while_polling():
+    """任务提交后归还并发名额：轮询期间其他请求可以获得名额，slot 结束时不会重复归还"""
+    async def scenario():
+        scheduler = ASRScheduler(AdaptiveConcurrencyLimiter(initial=1, maximum=1))
+        provider = VolcengineAUCProvider(
+            "app",
+            "token",
+            http_client=FakeVolcClient(),
+            poller=AsyncTaskPoller(initial_interval=0.05),
+            file_link=lambda path: f"https://files.example.com/{path.name}"
+        )
+
+        order = []
+
+        async def long_task():
+            async with scheduler.slot():
+                result = await provider.transcribe_chunk(Path("chunk_000.mp3"), "bigmodel")
+            order.append("async")
+            return result
+
+        async def online_request():
+            await asyncio.sleep(0.01)
+            async with scheduler.slot():
+                order.append("online")
+                return scheduler.limiter.in_flight
+
+        polled, in_flight = await asyncio.wait_for(asyncio.gather(long_task(), online_request()), timeout=1.0)
+        return polled, in_flight, order, scheduler.limiter.in_flight
+
+    polled, in_flight, order, remaining = asyncio.run(scenario())
+    assert polled.text and order == ["online", "async"]
+    assert in_flight == 1 and remaining == 0
+    print("✓ 异步任务轮询期间不占用并发名额")
+
+
+def test_whole_file_submission_keeps_speakers_global():
+    """整段提交一次，按分片区间拆分结果；只有一个说话人的分片同样保留全文件一致的说话人前缀"""
+    async def scenario():
+        client = FakeVolcClient()
+        provider = VolcengineAUCProvider(
+            "app",
+            "token",
+            http_client=client,
+            poller=AsyncTaskPoller(initial_interval=0.01),
+            file_link=lambda path: f"https://files.example.com/{path.name}"
+        )
+        service = TranscriptionService("fake")
+        service.scheduler = ASRScheduler(AdaptiveConcurrencyLimiter(2, maximum=2))
+        service.router = ProviderRouter([provider])
+        asset = AudioAsset(Path("interview.mp3"), "hash", Path("canonical_hash_16k_mono.m4a"))
+        manifest = ChunkManifest(
+            source_hash="hash",
+            chunk_seconds=2,
+            chunks=[
+                AudioChunk(0, "chunks/chunk_000.m4a", 0.0, 2.0, 1, "a"),
+                AudioChunk(1, "chunks/chunk_001.m4a", 2.0, 5.0, 1, "b"),
+            ],
+            duration=5.0
+        )
+        results = await service._transcribe_whole_file(asset, manifest, "m", [0, 1])
+        return results, client.submitted
+
+    original_base_url = async_asr_providers.FILE_BASE_URL
+    async_asr_providers.FILE_BASE_URL = "https://files.example.com"
+    try:
+        results, submitted = asyncio.run(scenario())
+    finally:
+        async_asr_providers.FILE_BASE_URL = original_base_url
+    assert submitted == ["https://files.example.com/canonical_hash_16k_mono.m4a"]
+    assert results[0].text == "说话人1：请介绍一下你自己。"
+    assert results[1].text == "说话人2：好的，我是前端工程师。"
+    assert results[1].segments[0] == (2.1, 2.6, "好的，")
+    assert results[1].start == 2.0 and results[1].end == 5.0
+    assert {chunk.provider for chunk in results.values()} == {"volcengine"}
+    assert {chunk.timestamps for chunk in results.values()} == {"provider"}
+    print("✓ 整段提交后按分片拆分，说话人编号全文件一致")
+
+
+if __name__ == "__main__":
+    test_poller_multiplexes_tasks_with_backoff()
+    test_volcengine_provider_polls_until_done()
+    test_async_provider_releases_slot_while_polling()
+    test_whole_file_submission_keeps_speakers_global()
+    print("所有测试通过！✓")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+测试标准化音频派生资产的哈希缓存与复用
+"""
+import sys
+import os
+import asyncio
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.asr_cache import ASRResultCache
+from app.services.audio_assets import AudioAssetService
+from app.services.audio_segmenter import SegmenterConfig
+from app.services.transcode_profiles import get_profile
+from app.services.transcription_service import TranscriptionService
+
+
+def test_canonical_reused_without_transcode():
+    """已存在的标准化音频应直接复用，不再调用 ffmpeg"""
+    service = AudioAssetService()
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "interview.wav"
+        source.write_bytes(b"RIFF" + os.urandom(2048))
+
+        source_hash = service.compute_source_hash(source)
+        canonical = service.canonical_path(source, source_hash)
+        canonical.parent.mkdir(parents=True, exist_ok=True)
+        canonical.write_bytes(b"fake-mp3")
+
+        def fail_transcode(*_args, **_kwargs):
+            raise AssertionError("不应重新转码")
+
+        service._transcode_canonical = fail_transcode
+        asset = asyncio.run(service.ensure_canonical(source))
+
+        assert asset.path == canonical
+        assert asset.source_hash == source_hash
+        assert canonical.parent == source.parent / "interview.wav.assets"
+        print("✓ 标准化音频复用成功")
+
+
+def test_source_hash_follows_content():
+    """源文件内容变化后哈希应随之更新"""
+    service = AudioAssetService()
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "interview.mp3"
+        source.write_bytes(b"first-version")
+        first = service.compute_source_hash(source)
+        assert service.compute_source_hash(source) == first
+
+        source.write_bytes(b"second-version-with-different-size")
+        second = service.compute_source_hash(source)
+        assert second != first
+        print("✓ 源文件哈希随内容更新")
+
+
+def test_transcode_profiles_keep_separate_assets():
+    """不同转码配置的标准化音频与分片清单互不复用"""
+    default = AudioAssetService(get_profile("mp3-hq"))
+    opus = AudioAssetService(get_profile("opus-24k"))
+    segmenter = SegmenterConfig(chunk_seconds=600)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "interview.wav"
+        source.write_bytes(b"RIFF" + os.urandom(2048))
+        source_hash = default.compute_source_hash(source)
+        assert default.canonical_path(source, source_hash).name.endswith("_16k_mono.mp3")
+        assert opus.canonical_path(source, source_hash).name.endswith("_16k_mono_opus-24k.ogg")
+
+        asset = asyncio.run(default._asset_for(source))
+        asset.path.parent.mkdir(parents=True, exist_ok=True)
+        asset.path.write_bytes(b"fake-mp3")
+        default.save_chunk_manifest(asset, segmenter, [(asset.path, 0.0, 30.0, 0.0)], 30.0)
+        assert default.load_chunk_manifest(asset, segmenter) is not None
+
+        opus_asset = asyncio.run(opus._asset_for(source))
+        fallback = default.load_chunk_manifest(asset, segmenter).to_dict()
+        assert opus.load_chunk_manifest(opus_asset, segmenter, fallback) is None
+        print("✓ 转码配置之间的资产互相隔离")
+
+
+def test_retry_only_touches_requested_chunks():
+    """重试应复用持久化的分片清单，只上传指定分片"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "interview.m4a"
+        source.write_bytes(os.urandom(4096))
+
+        service = TranscriptionService("sk-test")
+        service.use_mock = False
+        service.asr_cache = ASRResultCache(str(Path(tmp) / "asr_cache"))
+        assets = service.audio_assets
+        source_hash = assets.compute_source_hash(source)
+        canonical = assets.canonical_path(source, source_hash)
+        canonical.parent.mkdir(parents=True, exist_ok=True)
+        canonical.write_bytes(b"fake-canonical")
+        asset = asyncio.run(assets.ensure_canonical(source))
+
+        chunk_dir = assets.chunk_dir(asset, service.segmenter)
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+        segments = []
+        for idx in range(3):
+            chunk_path = chunk_dir / f"chunk_{idx:03d}.mp3"
+            chunk_path.write_bytes(f"chunk-{idx}".encode())
+            start = idx * service.chunk_duration_seconds
+            segments.append((chunk_path, start, start + service.chunk_duration_seconds, 0.0))
+        manifest = assets.save_chunk_manifest(asset, service.segmenter, segments)
+        assert [chunk.filename for chunk in manifest.chunks] == ["chunk_000.mp3", "chunk_001.mp3", "chunk_002.mp3"]
+
+        def fail_split(*_args, **_kwargs):
+            raise AssertionError("不应重新切片")
+
+        uploaded = []
+
+        async def fake_request(chunk_path, _model):
+            uploaded.append(chunk_path.name)
+            return f"text of {chunk_path.name}"
+
+        service._split_audio_file = fail_split
+        service._request_transcription = fake_request
+        results = asyncio.run(service.transcribe_chunk_subset(source, [1]))
+
+        assert uploaded == ["chunk_001.mp3"]
+        assert list(results.keys()) == [1]
+        assert results[1].status == "ok"
+        print("✓ 分片重试仅处理指定分片")
+
+        # 再次转录相同内容的分片命中结果缓存，不再调用外部 API
+        again = asyncio.run(service.transcribe_chunk_subset(source, [1]))
+        assert uploaded == ["chunk_001.mp3"]
+        assert again[1].text == "text of chunk_001.mp3"
+        assert service.asr_cache.stats().hits == 1
+        print("✓ 相同分片命中 ASR 结果缓存")
+
+
+if __name__ == "__main__":
+    test_canonical_reused_without_transcode()
+    test_source_hash_follows_content()
+    test_transcode_profiles_keep_separate_assets()
+    test_retry_only_touches_requested_chunks()
+    print("所有测试通过！✓")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+测试静音感知切分点规划与重叠文本去重
+"""
+import sys
+import os
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.audio_segmenter import build_segments, dedupe_overlap, plan_cut_points
+
+
+def test_cut_points_snap_to_silence():
+    """切分点应落在目标时长附近的静音区间内"""
+    frame_seconds = 0.1
+    energies = [-20.0] * 3000  # 300 秒
+    for idx in range(920, 950):  # 92s ~ 95s 为静音
+        energies[idx] = -80.0
+    cuts = plan_cut_points(energies, frame_seconds, 300.0, 100.0, 20.0)
+
+    assert 92.0 <= cuts[0] <= 95.0
+    assert len(cuts) == 2
+    segments = build_segments(cuts, 300.0, overlap_seconds=2.0)
+    assert segments[0] == (0.0, cuts[0], 0.0)
+    assert segments[1][0] == round(cuts[0] - 2.0, 3) and segments[1][2] == 2.0
+    print("✓ 切分点对齐静音")
+
+
+def test_dedupe_overlap_removes_repeated_prefix():
+    """重叠音频产生的重复文本应只保留一份"""
+    previous = "我们先聊一下你最近做的项目，主要负责哪些模块"
+    following = "主要负责哪些模块？我主要负责后端的转录服务"
+    merged = dedupe_overlap(previous, following, overlap_seconds=2.0)
+    assert merged == "我主要负责后端的转录服务"
+    assert dedupe_overlap(previous, "完全不同的内容开头", 2.0) == "完全不同的内容开头"
+    assert dedupe_overlap(previous, following, 0.0) == following
+    print("✓ 重叠文本去重")
+
+
+if __name__ == "__main__":
+    test_cut_points_snap_to_silence()
+    test_dedupe_overlap_removes_repeated_prefix()
+    print("所有测试通过！✓")
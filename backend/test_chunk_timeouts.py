@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+测试按分片时长计算的请求超时与任务截止时间
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.asr_providers import ProviderRouter, SiliconFlowProvider
+from app.services.chunk_timeouts import ChunkTimeoutPolicy, JobDeadline
+from app.services.transcription_service import TranscriptionService
+from app.tools.fake_asr_server import FakeASRConfig, start_fake_server
+
+
+def test_timeout_scales_with_duration_and_observed_speed():
+    """超时随分片时长增长；实测速度更快时缩短，超时后放宽"""
+    policy = ChunkTimeoutPolicy(base_seconds=10, seconds_per_audio_second=0.1, multiplier=2, minimum=5, maximum=200)
+    assert policy.timeout_for("p", 30) == 16
+    assert policy.timeout_for("p", 600) == 130
+    assert policy.timeout_for("p", 3600) == 200
+
+    policy.observe("p", 600, 12)  # 0.02s/音频秒
+    assert abs(policy.timeout_for("p", 600) - 34) < 1e-6
+    policy.observe_timeout("p")
+    assert policy.timeout_for("p", 600) > 34
+    assert policy.timeout_for("other", 600) == 130
+    assert policy.job_deadline(1800) is None
+    assert ChunkTimeoutPolicy(job_ratio=1.0).job_deadline(1800) == 1800
+    assert ChunkTimeoutPolicy(job_ratio=1.0).job_deadline(60, floor=900) == 900
+    print("✓ 分片超时随时长与实测速度调整")
+
+
+def test_job_deadline_starts_at_first_dispatch():
+    """截止时间在第一个请求发出前不计时，排队等待不会消耗任务预算"""
+    async def scenario():
+        deadline = JobDeadline(0.2)
+        expiry = asyncio.ensure_future(deadline.expired())
+        await asyncio.sleep(0.3)
+        assert not expiry.done() and deadline.allows(3600)
+        deadline.start()
+        assert not deadline.allows(0.5)
+        await asyncio.wait_for(expiry, timeout=1.0)
+
+    asyncio.run(scenario())
+    print("✓ 任务截止时间从第一个请求发出时开始计时")
+
+
+def test_job_deadline_cancels_hung_chunk():
+    """提供方未设置单次超时时，任务截止时间到期后取消挂起的请求，分片标记为失败并释放调度器名额"""
+    async def scenario(chunk: Path):
+        runner, _server, url = await start_fake_server(
+            FakeASRConfig(base_latency=0.0, jitter=0.0, hang_rate=1.0, hang_seconds=2.0)
+        )
+        service = TranscriptionService("fake")
+        service.base_url = url
+        service.hedger.enabled = False
+        service.chunk_max_attempts = 1
+        service.timeouts = ChunkTimeoutPolicy(minimum=30, maximum=30, job_ratio=0.01, job_minimum=0.5)
+        service.router = ProviderRouter([SiliconFlowProvider(service)])
+        try:
+            started = time.perf_counter()
+            results, stats = await service._transcribe_chunk_group(
+                [chunk], "m", chunk_durations={0: 10.0}
+            )
+            return results, stats, time.perf_counter() - started, service.scheduler.limiter.snapshot().in_flight
+        finally:
+            await service.http_client.close()
+            await runner.cleanup()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunk = Path(tmp) / "chunk_000.mp3"
+        chunk.write_bytes(b"x" * 1000)
+        results, stats, elapsed, in_flight = asyncio.run(scenario(chunk))
+
+    assert elapsed < 1.5
+    assert results[0].status == "error" and "截止时间" in results[0].error
+    assert stats == {"completed": 1, "failed": 1}
+    assert in_flight == 0
+    print("✓ 任务截止时间到期后取消挂起的分片请求")
+
+
+if __name__ == "__main__":
+    test_timeout_scales_with_duration_and_observed_speed()
+    test_job_deadline_starts_at_first_dispatch()
+    test_job_deadline_cancels_hung_chunk()
+    print("所有测试通过！✓")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+测试转录过程中按失败比例与错误类别提前终止任务
+"""
+import sys
+import os
+import asyncio
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.adaptive_concurrency import AdaptiveConcurrencyLimiter
+from app.services.asr_providers import ASRProvider, ProviderRouter, SiliconFlowProvider, classify_failure
+from app.services.asr_scheduler import ASRScheduler
+from app.services.http_client import ProviderHTTPError
+from app.services.transcription_service import TranscriptionService
+from app.tools.fake_asr_server import FakeASRConfig, start_fake_server
+
+
+class BackupProvider(ASRProvider):
+    """备用提供方（相当于本地 Whisper 兜底），记录被调用的次数"""
+
+    name = "backup"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def transcribe_chunk(self, file_path, model, audio_seconds=0.0):
+        self.calls += 1
+        return "备用结果"
+
+
+def _run_job(config: FakeASRConfig, chunk_count: int, max_attempts: int, fallbacks=()):
+    async def scenario(chunks):
+        runner, server, url = await start_fake_server(config)
+        service = TranscriptionService("fake")
+        service.base_url = url
+        service.hedger.enabled = False
+        service.asr_cache.enabled = False
+        service.chunk_max_attempts = max_attempts
+        service.retry_base_delay = 0.01
+        service.failure_ratio_threshold = 0.3
+        service.scheduler = ASRScheduler(AdaptiveConcurrencyLimiter(2, maximum=2))
+        service.concurrency = service.scheduler.limiter
+        service.router = ProviderRouter(
+            [SiliconFlowProvider(service), *fallbacks],
+            timeout_policy=service.timeouts
+        )
+        try:
+            results, stats = await service._transcribe_chunk_group(chunks, "m", total_chunks=len(chunks))
+            return results, stats, server.stats.requests
+        finally:
+            await service.http_client.close()
+            await runner.cleanup()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks = []
+        for idx in range(chunk_count):
+            chunk = Path(tmp) / f"chunk_{idx:03d}.mp3"
+            chunk.write_bytes(bytes([idx]) * 1000)
+            chunks.append(chunk)
+        return asyncio.run(scenario(chunks))
+
+
+def test_classify_failure():
+    assert classify_failure(ProviderHTTPError(401, "Invalid API key")) == "auth"
+    assert classify_failure(ProviderHTTPError(402, "")) == "quota"
+    assert classify_failure(ProviderHTTPError(429, "You exceeded your current quota")) == "quota"
+    assert classify_failure(ProviderHTTPError(429, "rate limited")) == "throttled"
+    assert classify_failure(ProviderHTTPError(502, "bad gateway")) == "server"
+    assert classify_failure(asyncio.TimeoutError()) == "timeout"
+    print("✓ 错误类别划分")
+
+
+def test_auth_failure_aborts_without_retries():
+    """鉴权失败不重试，并立即取消其余分片"""
+    config = FakeASRConfig(base_latency=0.05, jitter=0.0, reject_status=401)
+    results, stats, requests = _run_job(config, chunk_count=12, max_attempts=3)
+
+    assert requests <= 2
+    assert stats == {"completed": 12, "failed": 12}
+    assert all(chunk.status == "error" for chunk in results.values())
+    fatal = [chunk for chunk in results.values() if chunk.error.startswith("鉴权失败")]
+    assert len(fatal) == 1 and fatal[0].retry_count == 0
+    assert all(
+        chunk.error.startswith("任务已提前终止：鉴权失败")
+        for chunk in results.values() if chunk is not fatal[0]
+    )
+    print("✓ 鉴权失败时立即终止任务")
+
+
+def test_auth_failure_aborts_through_failover_chain():
+    """主提供方鉴权失败时不切换到备用提供方，整个任务立即终止"""
+    backup = BackupProvider()
+    config = FakeASRConfig(base_latency=0.05, jitter=0.0, reject_status=401)
+    results, stats, requests = _run_job(config, chunk_count=8, max_attempts=3, fallbacks=[backup])
+
+    assert backup.calls == 0
+    assert requests <= 2
+    assert stats == {"completed": 8, "failed": 8}
+    assert any(chunk.error.startswith("鉴权失败") for chunk in results.values())
+    print("✓ 多提供方时鉴权失败同样终止任务")
+
+
+def test_failure_ratio_aborts_once_threshold_is_certain():
+    """失败分片超过阈值（30%）后不再提交剩余分片"""
+    config = FakeASRConfig(base_latency=0.05, jitter=0.0, error_rate=1.0)
+    results, stats, requests = _run_job(config, chunk_count=10, max_attempts=1)
+
+    assert requests < 10
+    assert stats["failed"] == 10
+    assert any("提前终止" in chunk.error for chunk in results.values())
+    print("✓ 失败比例确定超过阈值后提前终止")
+
+
+if __name__ == "__main__":
+    test_classify_failure()
+    test_auth_failure_aborts_without_retries()
+    test_auth_failure_aborts_through_failover_chain()
+    test_failure_ratio_aborts_once_threshold_is_certain()
+    print("所有测试通过！✓")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+测试有界线程池的排队上限与拒绝，以及存储线程池中并发读-改-写不丢失更新
+"""
+import sys
+import os
+import asyncio
+import contextvars
+import tempfile
+import threading
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.executors import BoundedExecutor, ExecutorSaturatedError
+from app.services.storage_service import StorageService
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_executor_rejects_when_queue_full():
+    """执行中 + 排队中的任务达到容量后立即拒绝，释放后恢复接收"""
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    def blocking():
+        release.wait(5)
+        return request_id.get()
+
+    async def scenario():
+        request_id.set("req-1")
+        first = asyncio.create_task(executor.run(blocking))
+        second = asyncio.create_task(executor.run(blocking))
+        await asyncio.sleep(0.05)
+        rejected = False
+        try:
+            await executor.run(blocking)
+        except ExecutorSaturatedError as exc:
+            rejected = exc.name == "test"
+        busy = executor.stats()
+        release.set()
+        values = await asyncio.gather(first, second)
+        after = await executor.run(lambda: "ok")
+        return rejected, busy, values, after
+
+    try:
+        rejected, busy, values, after = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert rejected
+    assert busy.active == 1 and busy.queued == 1 and busy.utilization == 1.0
+    assert values == ["req-1", "req-1"]
+    assert after == "ok"
+    stats = executor.stats()
+    assert stats.rejected == 1 and stats.completed == 3
+    assert stats.active == 0 and stats.queued == 0
+    print("✓ 线程池排队已满时拒绝，并传递 contextvars")
+
+
+def test_concurrent_storage_updates_are_not_lost():
+    """不同 StorageService 实例在多个线程中同时创建与更新同一用户的面试，所有修改都保留"""
+    executor = BoundedExecutor("storage-test", max_workers=4, max_queue=64)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            first, second = StorageService(), StorageService()
+            first.save_interviews("u1", [{"id": "0"}])
+
+            async def scenario():
+                await asyncio.gather(
+                    *(executor.run((first, second)[i % 2].create_interview, "u1", {"id": str(i + 1)}) for i in range(30)),
+                    *(executor.run((second, first)[i % 2].update_interview, "u1", "0", {"n": i}) for i in range(30))
+                )
+
+            asyncio.run(scenario())
+            interviews = first.get_interviews("u1")
+        finally:
+            os.chdir(cwd)
+            executor.shutdown()
+    assert len(interviews) == 31
+    assert "n" in next(item for item in interviews if item["id"] == "0")
+    print("✓ 并发读-改-写不丢失更新")
+
+
+if __name__ == "__main__":
+    test_executor_rejects_when_queue_full()
+    test_concurrent_storage_updates_are_not_lost()
+    print("所有测试通过！✓")
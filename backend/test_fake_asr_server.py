@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+测试本地模拟转录服务
+"""
+import sys
+import os
+import asyncio
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import metrics
+from app.services.http_client import AsyncHTTPClient, ProviderHTTPError
+from app.tools.fake_asr_server import FakeASRConfig, start_fake_server
+
+
+def _write_chunk(directory: str, size: int = 4000) -> Path:
+    path = Path(directory) / "chunk_000.mp3"
+    path.write_bytes(os.urandom(size))
+    return path
+
+
+def test_fake_server_transcribes_and_throttles():
+    """正常请求返回与时长成正比的确定性文本；throttle_rate=1 时返回带 Retry-After 的 429"""
+    async def scenario(config: FakeASRConfig, chunk: Path):
+        runner, server, url = await start_fake_server(config)
+        client = AsyncHTTPClient()
+        try:
+            first = await client.post_file(url, chunk, fields={"model": "m"}, timeout=5)
+            second = await client.post_file(url, chunk, fields={"model": "m"}, timeout=5)
+            return first, second, server.stats.to_dict()
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunk = _write_chunk(tmp)
+        config = FakeASRConfig(base_latency=0.01, rtf=0.0, jitter=0.0, seed=1)
+        uploads_before = metrics.histogram_totals(metrics.UPLOAD_SECONDS)[0]
+        responses_before = metrics.histogram_totals(metrics.RESPONSE_SECONDS)
+        first, second, stats = asyncio.run(scenario(config, chunk))
+        # 上传与服务端处理耗时分别记录，服务端处理至少包含模拟的基础耗时
+        assert metrics.histogram_totals(metrics.UPLOAD_SECONDS)[0] == uploads_before + 2
+        responses_after = metrics.histogram_totals(metrics.RESPONSE_SECONDS)
+        assert responses_after[0] == responses_before[0] + 2
+        assert responses_after[1] - responses_before[1] >= 0.02
+        assert first["text"] and first["text"] == second["text"]
+        assert first["model"] == "m"
+        assert stats["succeeded"] == 2 and stats["bytesReceived"] == 8000
+
+        throttled = FakeASRConfig(base_latency=0.0, jitter=0.0, throttle_rate=1.0, retry_after=2)
+        try:
+            asyncio.run(scenario(throttled, chunk))
+        except ProviderHTTPError as exc:
+            assert exc.status == 429
+            assert exc.retry_after == 2
+        else:
+            raise AssertionError("应返回 429")
+    print("✓ 模拟转录服务返回文本并按比例限流")
+
+
+if __name__ == "__main__":
+    test_fake_server_transcribes_and_throttles()
+    print("所有测试通过！✓")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+测试长尾分片的对冲请求
+"""
+import sys
+import os
+import asyncio
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.hedging import RequestHedger
+
+
+def test_slow_request_is_hedged_within_budget():
+    """超过 p90 延迟的请求触发对冲，先返回的结果胜出，且不超出预算"""
+    async def scenario():
+        hedger = RequestHedger(min_samples=3, budget_ratio=0.1, initial_budget=1)
+        calls = []
+
+        async def fast():
+            await asyncio.sleep(0.01)
+            return "fast"
+
+        for _ in range(5):
+            await hedger.run(fast, fast, audio_seconds=30)
+
+        async def slow():
+            calls.append("primary")
+            await asyncio.sleep(0.5)
+            return "slow"
+
+        async def hedge():
+            calls.append("hedge")
+            return "hedge"
+
+        first = await hedger.run(slow, hedge, audio_seconds=30)
+        # 预算已用完，第二个慢请求只能等待主请求
+        second = await hedger.run(slow, hedge, audio_seconds=30)
+        return first, second, calls, hedger.stats()
+
+    first, second, calls, stats = asyncio.run(scenario())
+    assert first == "hedge"
+    assert second == "slow"
+    assert calls == ["primary", "hedge", "primary"]
+    assert stats.hedges == 1 and stats.hedge_wins == 1
+    print("✓ 长尾请求对冲生效且受预算限制")
+
+
+if __name__ == "__main__":
+    test_slow_request_is_hedged_within_budget()
+    print("所有测试通过！✓")
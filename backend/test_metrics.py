@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+测试转录流水线指标输出
+"""
+import sys
+import os
+import asyncio
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import metrics
+from app.services.adaptive_concurrency import AdaptiveConcurrencyLimiter
+from app.services.asr_scheduler import ASRScheduler
+
+
+def test_metrics_exposition_includes_pipeline_series():
+    """调度等待、分片耗时、重试与队列深度均以 Prometheus 文本格式输出"""
+    async def scenario():
+        scheduler = ASRScheduler(AdaptiveConcurrencyLimiter(2, enabled=False))
+        async with scheduler.slot("u1", 10.0, job_seconds=60):
+            return metrics.render_latest(scheduler)
+
+    metrics.CHUNK_LATENCY.labels(provider="siliconflow", model="m", attempt="1", outcome="ok").observe(1.5)
+    metrics.CHUNK_RETRIES.labels(reason="timeout").inc()
+    content, content_type = asyncio.run(scenario())
+    text = content.decode("utf-8")
+
+    assert content_type.startswith("text/plain")
+    assert 'interreview_scheduler_wait_seconds_count{priority="short"}' in text
+    assert "interreview_transcribe_chunk_seconds_bucket" in text
+    bucket = metrics._registry.get_sample_value(
+        "interreview_transcribe_chunk_seconds_bucket",
+        {"provider": "siliconflow", "model": "m", "attempt": "1", "outcome": "ok", "le": "2.0"}
+    )
+    assert bucket >= 1.0
+    assert 'interreview_transcribe_chunk_retries_total{reason="timeout"}' in text
+    assert 'interreview_scheduler_queue_depth{priority="bulk"} 0.0' in text
+    assert "interreview_asr_in_flight 1.0" in text
+    print("✓ 指标输出包含流水线各项数据")
+
+
+if __name__ == "__main__":
+    test_metrics_exposition_includes_pipeline_series()
+    print("所有测试通过！✓")
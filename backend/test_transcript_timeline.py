@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+测试转录时间轴索引与区间重新转录的拼接
+"""
+import sys
+import os
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.transcript_timeline import (
+    TranscriptTimeline,
+    estimate_segments,
+    estimated_chunks,
+    parse_timecode,
+    splice_range,
+)
+
+
+def _chunks():
+    return [
+        {
+            "index": 0, "status": "ok", "start": 0.0, "end": 62.0,
+            "text": "请介绍一下你自己。我是前端工程师。",
+            "segments": [[0.0, 20.0, "请介绍一下你自己。"], [21.0, 40.0, "我是前端工程师。"], [59.0, 61.5, "你做过"]],
+        },
+        {
+            "index": 1, "status": "ok", "start": 58.0, "end": 120.0,
+            "text": "你做过哪些性能优化？主要是虚拟滚动。",
+        },
+    ]
+
+
+MANIFEST = {"duration": 120.0, "chunks": [
+    {"index": 0, "start": 0.0, "end": 62.0, "overlap": 0.0},
+    {"index": 1, "start": 58.0, "end": 120.0, "overlap": 4.0},
+]}
+
+
+def test_timeline_index_and_lookup():
+    """重叠区间以中点为界去重，按时间二分定位句子"""
+    timeline = TranscriptTimeline.from_chunks(_chunks(), MANIFEST)
+    assert timeline.starts == sorted(timeline.starts)
+    # 分片 0 末尾 59-61.5s 的半句中点落在 60s 之后，归分片 1（估算时间戳）所有
+    assert "你做过" not in timeline.texts
+    assert timeline.chunks == [0, 0, 1, 1]
+
+    hit = timeline.entry(timeline.locate(parse_timecode("00:25")))
+    assert hit["text"] == "我是前端工程师。" and hit["chunk"] == 0
+    assert [timeline.texts[pos] for pos in timeline.between(30, 70)] == ["我是前端工程师。", "你做过哪些性能优化？"]
+    assert TranscriptTimeline.from_dict(timeline.to_dict()) == timeline
+    assert parse_timecode("07:03-07:53") == 423.0 and parse_timecode("1:02:03") == 3723.0
+    print("✓ 时间轴索引定位正确")
+
+
+def test_render_marks_estimated_timecodes():
+    """估算时间戳的分片在 LLM 输入中标注为近似时间码，且仍可解析回秒数"""
+    chunks = _chunks()
+    timeline = TranscriptTimeline.from_chunks(chunks, MANIFEST)
+    approximate = estimated_chunks(chunks)
+    assert approximate == {1}
+
+    lines = timeline.render(approximate).split("\n")
+    assert "估算" in lines[0]
+    assert lines[1] == "[00:00] 请介绍一下你自己。"
+    assert lines[3] == "[≈00:58] 你做过哪些性能优化？"
+    assert parse_timecode(lines[3]) == int(timeline.starts[2])
+    assert "估算" not in timeline.render()
+    print("✓ 估算时间码标注为近似值")
+
+
+def test_splice_range_replaces_overlapping_segments():
+    """区间重新转录的句子替换各分片中中点落在区间内的句子，并重建分片文本"""
+    chunks = _chunks()
+    chunks[1]["segments"] = [list(item) for item in estimate_segments(chunks[1]["text"], 58.0, 120.0)]
+    touched = splice_range(chunks, MANIFEST, 15.0, 45.0, [(18.0, 30.0, "我是资深前端工程师，"), (30.0, 44.0, "做了五年。")])
+    assert touched == [0]
+    assert chunks[0]["text"] == "请介绍一下你自己。我是资深前端工程师，做了五年。你做过"
+    assert chunks[1]["text"] == "你做过哪些性能优化？主要是虚拟滚动。"
+
+    failed = [{"index": 0, "status": "error", "error": "timeout", "text": ""}]
+    assert splice_range(failed, {"duration": 30.0, "chunks": [{"index": 0}]}, 0.0, 30.0, [(1.0, 3.0, "hello")]) == [0]
+    assert failed[0]["status"] == "ok" and failed[0]["text"] == "hello"
+    print("✓ 区间结果拼回对应分片")
+
+
+if __name__ == "__main__":
+    test_timeline_index_and_lookup()
+    test_render_marks_estimated_timecodes()
+    test_splice_range_replaces_overlapping_segments()
+    print("所有测试通过！✓")
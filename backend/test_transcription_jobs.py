@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+测试转录任务记录的分片检查点与重启后恢复
+"""
+import sys
+import os
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.asr_providers import ProviderRouter, SiliconFlowProvider
+from app.services.transcription_jobs import TranscriptionJobStore
+from app.services.transcription_service import TranscriptionService
+from app.tools.fake_asr_server import FakeASRConfig, start_fake_server
+
+
+def test_checkpoints_survive_restart_and_skip_completed_chunks():
+    """分片完成即写入检查点；新进程认领记录后只转录剩余分片"""
+    async def run_chunks(store, task_id, chunks, indices):
+        runner, server, url = await start_fake_server(FakeASRConfig(base_latency=0.0, jitter=0.0))
+        service = TranscriptionService("fake")
+        service.base_url = url
+        service.hedger.enabled = False
+        service.asr_cache.enabled = False
+        service.router = ProviderRouter([SiliconFlowProvider(service)], timeout_policy=service.timeouts)
+        try:
+            results, stats = await service._transcribe_chunk_group(
+                chunks,
+                "m",
+                indices,
+                completed_offset=len(chunks) - len(indices),
+                checkpoint=store.checkpointer(task_id)
+            )
+            return results, stats, server.stats.requests
+        finally:
+            await service.http_client.close()
+            await runner.cleanup()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks = []
+        for idx in range(3):
+            chunk = Path(tmp) / f"chunk_{idx:03d}.mp3"
+            chunk.write_bytes(bytes([idx]) * 1000)
+            chunks.append(chunk)
+        job_dir = Path(tmp) / "jobs"
+
+        # 第一个进程只完成了前两个分片就退出
+        store = TranscriptionJobStore(str(job_dir))
+        store.create("task-1", "u1", "i1", Path(tmp) / "a.mp3", "m")
+        asyncio.run(run_chunks(store, "task-1", chunks, [0, 1]))
+
+        restarted = TranscriptionJobStore(str(job_dir))
+        jobs = restarted.claim_unfinished()
+        assert [job.task_id for job in jobs] == ["task-1"]
+        assert jobs[0].resume_count == 1
+        completed = jobs[0].completed_chunks()
+        assert sorted(completed) == [0, 1] and completed[0].text
+
+        remaining = [idx for idx in range(3) if idx not in completed]
+        results, stats, requests = asyncio.run(run_chunks(restarted, "task-1", chunks, remaining))
+        assert requests == 1 and list(results) == [2]
+        assert stats == {"completed": 3, "failed": 0}
+        record = json.loads((job_dir / "task-1.json").read_text(encoding="utf-8"))
+        assert [chunk["index"] for chunk in record["chunks"]] == [0, 1, 2]
+
+        restarted.finish("task-1")
+        assert not list(job_dir.glob("*.json"))
+        assert TranscriptionJobStore(str(job_dir)).claim_unfinished() == []
+    print("✓ 分片检查点在重启后复用，只转录剩余分片")
+
+
+if __name__ == "__main__":
+    test_checkpoints_survive_restart_and_skip_completed_chunks()
+    print("所有测试通过！✓")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+测试转录服务的后台加载、预热与就绪状态
+"""
+import sys
+import os
+import asyncio
+import time
+
+import pytest
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core import transcription
+
+
+class SlowTranscriber:
+    """模拟加载较慢的本地模型"""
+
+    def __init__(self):
+        self.warmed = False
+
+    async def warmup(self):
+        await asyncio.sleep(0.05)
+        self.warmed = True
+
+
+def test_background_loading_reports_readiness():
+    """加载期间非阻塞地报告 loading，转录接口等待加载完成，预热后变为 ready"""
+    original = transcription.initialize_transcription_service
+    loaded = SlowTranscriber()
+
+    def slow_initialize(force: bool = False):
+        time.sleep(0.3)
+        transcription._transcriber = loaded
+        transcription._initialized = True
+        return loaded
+
+    async def scenario():
+        task = transcription.start_background_initialization()
+        assert transcription.transcription_readiness()["state"] == "loading"
+        with pytest.raises(transcription.TranscriberNotReadyError):
+            transcription.get_transcriber()
+        with pytest.raises(transcription.TranscriberNotReadyError):
+            await transcription.wait_for_transcriber(timeout=0.05)
+
+        assert await transcription.wait_for_transcriber() is loaded
+        await task
+        readiness = transcription.transcription_readiness()
+        assert readiness["state"] == "ready" and readiness["serviceType"] == "SlowTranscriber"
+        assert readiness["loadSeconds"] >= 0.3 and "warmupSeconds" in readiness
+        assert loaded.warmed
+
+    saved = (transcription._transcriber, transcription._initialized, dict(transcription._readiness))
+    transcription.initialize_transcription_service = slow_initialize
+    transcription._transcriber, transcription._initialized = None, False
+    transcription._readiness.clear()
+    transcription._readiness["state"] = "idle"
+    try:
+        asyncio.run(scenario())
+    finally:
+        transcription.initialize_transcription_service = original
+        transcription._transcriber, transcription._initialized = saved[0], saved[1]
+        transcription._readiness.clear()
+        transcription._readiness.update(saved[2])
+    print("✓ 后台加载期间报告 loading，预热完成后 ready")
+
+
+if __name__ == "__main__":
+    test_background_loading_reports_readiness()
+    print("所有测试通过！✓")
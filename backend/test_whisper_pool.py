@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+测试本地 Whisper 推理进程池的配置解析、排队上限与工作进程异常退出后的重建
+"""
+import sys
+import os
+import asyncio
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.executors import ExecutorSaturatedError
+from app.services.whisper_pool import WhisperPoolConfig, WhisperProcessPool, resolve_pool_config, save_tuning
+
+
+def test_config_prefers_env_over_calibration():
+    """校准结果覆盖默认值，显式设置的环境变量再覆盖校准结果"""
+    names = [f"TRANSCRIBE_WHISPER_{name}" for name in ("WORKERS", "THREADS", "NUM_WORKERS", "COMPUTE_TYPE", "QUEUE")]
+    saved = {name: os.environ.pop(name, None) for name in names}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tuning_file = str(Path(tmp) / "whisper_tuning.json")
+            assert resolve_pool_config("faster", "small", tuning_file).source == "default"
+
+            save_tuning("faster", "small", {
+                "workers": 3, "cpuThreads": 2, "numWorkers": 1, "computeType": "int8_float32", "rtf": 0.2
+            }, tuning_file)
+            config = resolve_pool_config("faster", "small", tuning_file)
+            assert (config.workers, config.cpu_threads, config.compute_type, config.source) == (
+                3, 2, "int8_float32", "calibrated"
+            )
+            assert config.max_queue == 12
+            assert resolve_pool_config("faster", "base", tuning_file).source == "default"
+
+            os.environ["TRANSCRIBE_WHISPER_COMPUTE_TYPE"] = "int8"
+            os.environ["TRANSCRIBE_WHISPER_WORKERS"] = "0"
+            config = resolve_pool_config("faster", "small", tuning_file)
+            assert (config.workers, config.cpu_threads, config.compute_type, config.source) == (0, 2, "int8", "env")
+    finally:
+        for name, value in saved.items():
+            os.environ.pop(name, None)
+            if value is not None:
+                os.environ[name] = value
+    print("✓ 环境变量优先于校准结果")
+
+
+def test_pool_rejects_when_queue_is_full():
+    """执行中与排队中的分片数达到上限时直接拒绝，不启动进程"""
+    pool = WhisperProcessPool("local", "tiny", WhisperPoolConfig(workers=2, cpu_threads=1, max_queue=1))
+    pool._pending = 3
+    with pytest.raises(ExecutorSaturatedError):
+        asyncio.run(pool.transcribe(Path("chunk_000.mp3")))
+    stats = pool.stats()
+    assert stats["rejected"] == 1 and not stats["started"]
+    assert stats["active"] == 2 and stats["queued"] == 1
+    print("✓ 排队已满时拒绝分片")
+
+
+def test_broken_worker_fails_chunk_and_restarts_pool():
+    """工作进程加载模型失败（不存在的模型方法）时当前分片失败，进程池在下次提交时重建"""
+    pool = WhisperProcessPool("missing", "tiny", WhisperPoolConfig(workers=1, cpu_threads=1, max_queue=0))
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(pool.transcribe(Path("chunk_000.mp3")))
+        stats = pool.stats()
+        assert stats["restarts"] == 1 and not stats["started"]
+        assert stats["active"] == 0 and stats["queued"] == 0
+    finally:
+        pool.shutdown()
+    print("✓ 工作进程异常退出后重建进程池")
+
+
+if __name__ == "__main__":
+    test_config_prefers_env_over_calibration()
+    test_pool_rejects_when_queue_is_full()
+    test_broken_worker_fails_chunk_and_restarts_pool()
+    print("所有测试通过！✓")